@@ -0,0 +1,12 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# `OPENCIS_PROFILE=<file> python -m benchmarks.<name>` samples the benchmark with the
+# built-in profiler and saves the profile when it exits
+from opencis.util.profiler import profile_from_environment
+
+profile_from_environment()
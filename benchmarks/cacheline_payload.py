@@ -0,0 +1,61 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Measures how many payload bytes per second move through the CXL.mem data path
+# (packet build -> packet parse -> accessor write -> accessor read -> packet build)
+# when cachelines are carried as 512-bit ints versus as bytes.
+
+import asyncio
+import os
+import tempfile
+import time
+
+import click
+
+from opencis.util.accessor import FileAccessor
+from opencis.cxl.transport.transaction import CxlMemMemWrPacket, CxlMemMemDataPacket
+
+CACHELINE = 64
+
+
+async def _run_int(accessor: FileAccessor, lines: int):
+    for line in range(lines):
+        addr = line * CACHELINE
+        wr_packet = CxlMemMemWrPacket.create(addr, (line << 448) | line)
+        await accessor.write(wr_packet.get_address(), wr_packet.data, CACHELINE)
+        data = await accessor.read(addr, CACHELINE)
+        rd_packet = CxlMemMemDataPacket.create(data)
+        assert rd_packet.data == wr_packet.data
+
+
+async def _run_bytes(accessor: FileAccessor, lines: int):
+    for line in range(lines):
+        addr = line * CACHELINE
+        wr_packet = CxlMemMemWrPacket.create(addr, line.to_bytes(8, "little") * 8)
+        await accessor.write(wr_packet.get_address(), wr_packet.get_data_bytes(), CACHELINE)
+        data = await accessor.read_bytes(addr, CACHELINE)
+        rd_packet = CxlMemMemDataPacket.create(data)
+        assert rd_packet.get_data_bytes() == data
+
+
+@click.command()
+@click.option("--lines", default=20000, help="Number of cachelines to move per mode")
+def main(lines: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        accessor = FileAccessor(os.path.join(tmp, "mem.bin"), lines * CACHELINE)
+        for name, run in (("int", _run_int), ("bytes", _run_bytes)):
+            start = time.perf_counter()
+            asyncio.run(run(accessor, lines))
+            elapsed = time.perf_counter() - start
+            # each cacheline is written once and read once
+            moved = lines * CACHELINE * 2
+            print(f"{name:>5}: {moved / elapsed / (1 << 20):8.2f} MiB/s ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
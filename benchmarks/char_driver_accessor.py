@@ -0,0 +1,110 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Measures per-cacheline access latency of CharDriverAccessor against a local
+# file standing in for the character device:
+#   reopen    - open/lseek/read|write/close per access (the previous accessor)
+#   pread     - persistent descriptor, pread/pwrite on the event loop
+#   threaded  - persistent descriptor, pread/pwrite on the accessor's thread pool
+# and the bulk throughput of one preadv/pwritev per transfer versus one
+# pread/pwrite per cacheline.
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import click
+
+from opencis.util.accessor import CharDriverAccessor
+
+CACHELINE = 64
+
+
+class ReopenAccessor:
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    async def write(self, offset: int, data: bytes, _: int):
+        fd = os.open(self.filename, os.O_WRONLY, 0o644)
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+        os.close(fd)
+
+    async def read_bytes(self, offset: int, size: int) -> bytes:
+        fd = os.open(self.filename, os.O_RDONLY)
+        os.lseek(fd, offset, os.SEEK_SET)
+        data = os.read(fd, size)
+        os.close(fd)
+        return data
+
+
+async def _latency(accessor, lines: int):
+    samples = []
+    data = bytes(range(CACHELINE))
+    for line in range(lines):
+        offset = line * CACHELINE
+        start = time.perf_counter()
+        await accessor.write(offset, data, CACHELINE)
+        await accessor.read_bytes(offset, CACHELINE)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _bulk(accessor: CharDriverAccessor, lines: int, per_transfer: int, vectored: bool):
+    buffers = [bytearray(CACHELINE) for _ in range(per_transfer)]
+    for base in range(0, lines - per_transfer + 1, per_transfer):
+        offset = base * CACHELINE
+        if vectored:
+            await accessor.write_from(offset, buffers)
+            await accessor.read_into(offset, buffers)
+        else:
+            for index, buffer in enumerate(buffers):
+                await accessor.write(offset + index * CACHELINE, buffer, CACHELINE)
+                buffer[:] = await accessor.read_bytes(offset + index * CACHELINE, CACHELINE)
+
+
+def _report(name: str, samples):
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    print(f"{name:>9}: p50 {p50:7.2f} us  p99 {p99:7.2f} us  (write+read per cacheline)")
+
+
+@click.command()
+@click.option("--lines", default=20000, help="Number of cachelines per mode")
+@click.option("--io-threads", default=2, help="Thread pool size for the threaded mode")
+@click.option("--per-transfer", default=64, help="Cachelines per bulk transfer")
+def main(lines: int, io_threads: int, per_transfer: int):
+    size = lines * CACHELINE
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "dax0.0")
+        with open(filename, "wb") as file:
+            file.truncate(size)
+
+        _report("reopen", asyncio.run(_latency(ReopenAccessor(filename), lines)))
+        accessor = CharDriverAccessor(filename, size)
+        _report("pread", asyncio.run(_latency(accessor, lines)))
+        asyncio.run(accessor.close())
+        accessor = CharDriverAccessor(filename, size, io_threads=io_threads)
+        _report("threaded", asyncio.run(_latency(accessor, lines)))
+        asyncio.run(accessor.close())
+
+        accessor = CharDriverAccessor(filename, size)
+        moved = (lines - lines % per_transfer) * CACHELINE * 2
+        for name, vectored in (("per-line", False), ("vectored", True)):
+            start = time.perf_counter()
+            asyncio.run(_bulk(accessor, lines, per_transfer, vectored))
+            elapsed = time.perf_counter() - start
+            print(f"{name:>9}: {moved / elapsed / (1 << 20):8.2f} MiB/s (bulk write+read)")
+        asyncio.run(accessor.close())
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
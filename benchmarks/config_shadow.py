@@ -0,0 +1,98 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Counts the config requests a CxlRootPortDevice sends to enumerate a 256 MB
+# single logical device and scan its capabilities and component registers, with
+# the host config space shadow off, on, and in snapshot mode for the PCI header
+# region and for the whole PCIe config space. Each setting runs `--scans` times
+# back to back on one shadow, so every pass after the first shows the rescan.
+# As in doe_cdat, the config FIFOs deliver each packet `--latency-us` after it
+# was sent, so the times show what the snapshot bursts cost over a link.
+
+import asyncio
+import time
+
+import click
+
+from benchmarks.doe_cdat import LinkQueue
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.pci.component.fifo_pair import FifoPair
+from opencis.pci.component.config_shadow import PCI_CONFIG_SPACE_SIZE, PCIE_CONFIG_SPACE_SIZE
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+
+SETTINGS = [
+    ("off", False, 0),
+    ("on", True, 0),
+    ("snapshot 256B", True, PCI_CONFIG_SPACE_SIZE),
+    ("snapshot 4KB", True, PCIE_CONFIG_SPACE_SIZE),
+]
+
+
+async def _count_requests(latency: float, scans: int):
+    connection = CxlConnection()
+    connection.cfg_fifo = FifoPair(LinkQueue(latency), LinkQueue(latency))
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file="mem_config_shadow.bin",
+        serial_number="DDDDDDDDDDDDDDDD",
+        test_mode=True,
+        cxl_connection=connection,
+    )
+    task = asyncio.create_task(device.run())
+    await device.wait_for_ready()
+
+    requests = 0
+    host_to_target = connection.cfg_fifo.host_to_target
+    put = host_to_target.put
+
+    async def counting_put(packet):
+        nonlocal requests
+        requests += 1
+        await put(packet)
+
+    host_to_target.put = counting_put
+
+    results = []
+    for name, enabled, snapshot_size in SETTINGS:
+        root_port_device = CxlRootPortDevice(downstream_connection=connection, label="Port0")
+        shadow = root_port_device.get_config_shadow()
+        shadow.enabled = enabled
+        shadow.snapshot_size = snapshot_size
+        counts = []
+        start = time.perf_counter()
+        for _ in range(scans):
+            requests = 0
+            await root_port_device.enumerate(0xFE000000)
+            await root_port_device.scan_devices()
+            counts.append(requests)
+        elapsed = (time.perf_counter() - start) / scans
+        results.append((name, counts, shadow.hits, elapsed))
+
+    await device.stop()
+    await task
+    return results
+
+
+@click.command()
+@click.option("--latency-us", default=50, help="One-way delay of each config packet")
+@click.option("--scans", default=2, help="Enumerations run back to back per setting")
+def main(latency_us: int, scans: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    for name, counts, hits, elapsed in asyncio.run(_count_requests(latency_us / 1e6, scans)):
+        counts_str = ", ".join(str(count) for count in counts)
+        print(
+            f"shadow {name:13s}: config requests per enumeration [{counts_str}], "
+            f"{hits} shadow hits, {elapsed * 1e3:6.2f} ms per enumeration"
+        )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
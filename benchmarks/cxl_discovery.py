@@ -0,0 +1,161 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Times CxlBusDriver discovering 8, 32 and 128 single logical devices, device by
+# device with one read at a time and with concurrent discovery. The devices sit on
+# buses 2 and up behind an IoBridge; a small in-process fabric routes config
+# requests by bus and MMIO requests by BAR, standing in for a switch. As in
+# doe_cdat, the host link delivers each packet `--latency-us` after it was sent.
+# The config space shadow is emptied before every run, so each run is a first
+# discovery.
+
+import asyncio
+import os
+import tempfile
+import time
+from typing import List, Tuple
+
+import click
+
+from benchmarks.doe_cdat import LinkQueue
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.root_complex.io_bridge import IoBridge, IoBridgeConfig
+from opencis.cxl.transport.memory_fifo import MemoryFifoPair
+from opencis.cxl.transport.transaction import CXL_IO_FMT_TYPE
+from opencis.drivers.cxl_bus_driver import CxlBusDriver
+from opencis.drivers.pci_bus_driver import PciBusDriver
+from opencis.pci.component.fifo_pair import FifoPair
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+
+FIRST_DEVICE_BUS = 2
+MMIO_BASE_ADDRESS = 0xA0000000
+
+
+class Fabric:
+    """Routes config requests by bus and MMIO requests by BAR to device connections"""
+
+    def __init__(self, cfg_fifo: FifoPair, mmio_fifo: FifoPair, connections: List[CxlConnection]):
+        self._cfg_fifo = cfg_fifo
+        self._mmio_fifo = mmio_fifo
+        self._connections = connections
+        self._mmio_ranges: List[Tuple[int, int, CxlConnection]] = []
+
+    def set_mmio_ranges(self, pci_bus_driver: PciBusDriver):
+        for device in pci_bus_driver.get_devices():
+            bar = device.bars[0]
+            connection = self._connections[(device.bdf >> 8) - FIRST_DEVICE_BUS]
+            self._mmio_ranges.append((bar.base_address, bar.base_address + bar.size, connection))
+
+    async def _route_cfg(self):
+        while True:
+            packet = await self._cfg_fifo.host_to_target.get()
+            connection = self._connections[packet.get_bus() - FIRST_DEVICE_BUS]
+            # Each device sits on its own bus, as below a downstream port
+            if packet.is_cfg_read():
+                packet.cxl_io_header.fmt_type = CXL_IO_FMT_TYPE.CFG_RD0
+            else:
+                packet.cxl_io_header.fmt_type = CXL_IO_FMT_TYPE.CFG_WR0
+            await connection.cfg_fifo.host_to_target.put(packet)
+
+    async def _route_mmio(self):
+        while True:
+            packet = await self._mmio_fifo.host_to_target.get()
+            address = packet.get_address()
+            for start, end, connection in self._mmio_ranges:
+                if start <= address < end:
+                    await connection.mmio_fifo.host_to_target.put(packet)
+                    break
+
+    async def _forward(self, source: FifoPair, destination: FifoPair):
+        while True:
+            await destination.target_to_host.put(await source.target_to_host.get())
+
+    async def run(self):
+        tasks = [self._route_cfg(), self._route_mmio()]
+        for connection in self._connections:
+            tasks.append(self._forward(connection.cfg_fifo, self._cfg_fifo))
+            tasks.append(self._forward(connection.mmio_fifo, self._mmio_fifo))
+        await asyncio.gather(*tasks)
+
+
+async def _discover(count: int, latency: float, memory_dir: str):
+    cfg_fifo = FifoPair(LinkQueue(latency), LinkQueue(latency))
+    mmio_fifo = FifoPair(LinkQueue(latency), LinkQueue(latency))
+    io_bridge = IoBridge(
+        IoBridgeConfig(
+            root_bus=0,
+            cxl_io_cfg_fifos=cfg_fifo,
+            cxl_io_mmio_fifos=mmio_fifo,
+            memory_producer_fifos=MemoryFifoPair(),
+            host_name="Host",
+        )
+    )
+    connections = [CxlConnection() for _ in range(count)]
+    devices = [
+        SingleLogicalDevice(
+            memory_size=256 * MB,
+            memory_file=os.path.join(memory_dir, f"mem{index}.bin"),
+            serial_number=f"{index:016X}",
+            test_mode=True,
+            cxl_connection=connection,
+        )
+        for index, connection in enumerate(connections)
+    ]
+    fabric = Fabric(cfg_fifo, mmio_fifo, connections)
+    tasks = [asyncio.create_task(device.run()) for device in devices]
+    tasks.append(asyncio.create_task(io_bridge.run()))
+    fabric_task = asyncio.create_task(fabric.run())
+    await asyncio.gather(*(device.wait_for_ready() for device in devices))
+    await io_bridge.wait_for_ready()
+
+    pci_bus_driver = PciBusDriver(io_bridge)
+    memory_start = MMIO_BASE_ADDRESS
+    for bus in range(FIRST_DEVICE_BUS, FIRST_DEVICE_BUS + count):
+        # pylint: disable=protected-access
+        (_, memory_start) = await pci_bus_driver._scan_bus(bus, memory_start)
+    fabric.set_mmio_ranges(pci_bus_driver)
+
+    results = []
+    for concurrent in (False, True):
+        io_bridge.get_config_shadow().invalidate()
+        cxl_bus_driver = CxlBusDriver(pci_bus_driver, io_bridge, concurrent_discovery=concurrent)
+        start = time.perf_counter()
+        await cxl_bus_driver.init()
+        elapsed = time.perf_counter() - start
+        found = cxl_bus_driver.get_devices()
+        registers = sum(len(device.cachemem_registers) for device in found)
+        results.append((concurrent, len(found), registers, elapsed))
+
+    fabric_task.cancel()
+    await asyncio.gather(*(device.stop() for device in devices))
+    await io_bridge.stop()
+    await asyncio.gather(*tasks)
+    return results
+
+
+@click.command()
+@click.option("--latency-us", default=50, help="One-way delay of each packet on the host link")
+@click.option("--devices", "counts", default=[8, 32, 128], multiple=True, help="Device counts")
+def main(latency_us: int, counts: List[int]):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for count in counts:
+            for concurrent, found, registers, elapsed in asyncio.run(
+                _discover(count, latency_us / 1e6, memory_dir)
+            ):
+                mode = "concurrent" if concurrent else "sequential"
+                print(
+                    f"{count:4d} devices, {mode:10s}: {found} CXL devices, "
+                    f"{registers} CXL.cachemem capabilities in {elapsed * 1e3:8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,106 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Reads the CDAT of a 256 MB single logical device through its DOE mailbox with
+# DoeDriver, one config access at a time and with `--depth` outstanding. The
+# host root port and the device share an in-process CxlConnection whose config
+# FIFOs deliver each packet `--latency-us` after it was sent, in order, to stand
+# in for a TCP hop. Each setting is timed over `--reads` CDAT retrievals.
+
+import asyncio
+import collections
+import time
+
+import click
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.drivers.doe_driver import DoeDriver
+from opencis.pci.component.fifo_pair import FifoPair
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+from opencis.util.pci import create_bdf
+
+
+class LinkQueue(asyncio.Queue):
+    """Delivers each item `latency` seconds after it was put, in order"""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self._latency = latency
+        self._in_flight = collections.deque()
+        self._pump = None
+
+    async def put(self, item):
+        if not self._latency:
+            self.put_nowait(item)
+            return
+        self._in_flight.append((time.perf_counter() + self._latency, item))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._deliver())
+
+    async def _deliver(self):
+        while self._in_flight:
+            (deadline, item) = self._in_flight[0]
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._in_flight.popleft()
+            self.put_nowait(item)
+
+
+async def _read_cdat(latency: float, depths, reads: int):
+    connection = CxlConnection()
+    connection.cfg_fifo = FifoPair(LinkQueue(latency), LinkQueue(latency))
+    root_port_device = CxlRootPortDevice(downstream_connection=connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file="mem_doe_cdat.bin",
+        serial_number="DDDDDDDDDDDDDDDD",
+        test_mode=True,
+        cxl_connection=connection,
+    )
+    task = asyncio.create_task(device.run())
+    await device.wait_for_ready()
+    await root_port_device.enumerate(0xFE000000)
+    bdf = create_bdf(1, 0, 0)
+
+    results = []
+    for depth in depths:
+        driver = DoeDriver(root_port_device, pipeline_depth=depth)
+        mailbox_offset = (await driver.find_mailboxes(bdf))[0]
+        accesses = driver.get_config_access_count()
+        start = time.perf_counter()
+        for _ in range(reads):
+            entries = await driver.read_cdat(bdf, mailbox_offset)
+        elapsed = (time.perf_counter() - start) / reads
+        accesses = (driver.get_config_access_count() - accesses) // reads
+        results.append((depth, len(entries), accesses, elapsed))
+
+    await device.stop()
+    await task
+    return results
+
+
+@click.command()
+@click.option("--latency-us", default=50, help="One-way delay of each config packet")
+@click.option("--depth", default=8, help="Outstanding config accesses when pipelined")
+@click.option("--reads", default=10, help="CDAT retrievals timed per setting")
+def main(latency_us: int, depth: int, reads: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    results = asyncio.run(_read_cdat(latency_us / 1e6, [1, depth], reads))
+    for depth_, entries, accesses, elapsed in results:
+        print(
+            f"depth {depth_:3d}: CDAT ({entries} entries, {accesses} config accesses) "
+            f"in {elapsed * 1e3:7.2f} ms per device"
+        )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,120 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Unbinds and then binds every vPPB of a 2-VCS, 32-port switch through the
+# fabric manager's Socket.IO handlers. This is done once with one "vcs:bind"
+# or "vcs:unbind" request per vPPB, and once with a single "vcs:unbindBatch"
+# plus "vcs:bindBatch". The switch is the in-process model from
+# fm_notifications, with `--latency-us` added to every MCTP round trip. The
+# hosts are real ShortMsgConn clients connected to the FM's host notification
+# server, one per USP.
+
+import asyncio
+import time
+
+import click
+
+from benchmarks.fm_notifications import SwitchModel
+from opencis.cxl.component.fabric_manager.socketio_server import (
+    FabricManagerSocketIoServer,
+    HostFMConnManager,
+    HostFMMsg,
+)
+from opencis.cxl.component.short_msg_conn import ShortMsgConn
+from opencis.util.logger import logger
+
+VCS_COUNT = 2
+VPPBS_PER_VCS = 15
+
+
+async def _cycle(batched: bool, latency: float, host_port: int):
+    switch = SwitchModel(VCS_COUNT, VPPBS_PER_VCS, latency)
+    host_fm_conn_server = ShortMsgConn(
+        "FM_Server", port=host_port, server=True, msg_width=16, msg_type=HostFMMsg
+    )
+    server = FabricManagerSocketIoServer(switch, HostFMConnManager(switch, host_fm_conn_server))
+
+    async def emit(*_, **__):
+        pass
+
+    server._sio.emit = emit
+    server_task = asyncio.create_task(host_fm_conn_server.run())
+    await host_fm_conn_server.wait_for_ready()
+
+    host_messages = asyncio.Queue()
+
+    async def on_host_message(_: int, data: HostFMMsg):
+        host_messages.put_nowait(data)
+
+    hosts = []
+    host_tasks = []
+    for vcs_id in range(VCS_COUNT):
+        host = ShortMsgConn(
+            "FM_Client",
+            port=host_port,
+            msg_width=16,
+            msg_type=HostFMMsg,
+            device_id=vcs_id * (VPPBS_PER_VCS + 1),
+        )
+        host.register_general_handler(HostFMMsg.BIND, on_host_message)
+        host.register_general_handler(HostFMMsg.UNBIND, on_host_message)
+        host_tasks.append(asyncio.create_task(host.run()))
+        await host.wait_for_ready()
+        await host.start_connection()
+        hosts.append(host)
+    while host_fm_conn_server.num_connections() < VCS_COUNT:
+        await asyncio.sleep(0.001)
+
+    bindings = [
+        {
+            "virtualCxlSwitchId": vcs_id,
+            "vppbId": vppb_id,
+            "physicalPortId": vcs_id * (VPPBS_PER_VCS + 1) + 1 + vppb_id,
+        }
+        for vcs_id in range(VCS_COUNT)
+        for vppb_id in range(VPPBS_PER_VCS)
+    ]
+    start = time.perf_counter()
+    if batched:
+        await server._handle_event("vcs:unbindBatch", None, bindings)
+        await server._handle_event("vcs:bindBatch", None, bindings)
+    else:
+        for binding in bindings:
+            await server._handle_event("vcs:unbind", None, binding)
+        for binding in bindings:
+            await server._handle_event("vcs:bind", None, binding)
+    for _ in range(2 * len(bindings)):
+        await host_messages.get()
+    elapsed = time.perf_counter() - start
+
+    for host in hosts:
+        await host.shutdown()
+        await host.stop()
+    await host_fm_conn_server.stop()
+    await asyncio.gather(server_task, *host_tasks)
+    return (switch.round_trips, elapsed)
+
+
+@click.command()
+@click.option("--latency-us", default=200, help="FM-to-switch MCTP round trip latency")
+@click.option("--host-port", default=8750, help="TCP port of the host notification server")
+def main(latency_us: int, host_port: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    vppbs = VCS_COUNT * VPPBS_PER_VCS
+    for batched in (False, True):
+        (round_trips, elapsed) = asyncio.run(_cycle(batched, latency_us / 1e6, host_port))
+        label = "batched" if batched else "per vPPB"
+        print(
+            f"{label:>8}: unbind + bind {vppbs} vPPBs in {elapsed * 1e3:7.2f} ms, "
+            f"{sum(round_trips.values())} MCTP round trips "
+            f"({round_trips['get_virtual_cxl_switch_info']} Get Virtual CXL Switch Info)"
+        )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,163 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Counts the MCTP round trips the fabric manager's Socket.IO server makes
+# during a storm of bind/unbind requests. The switch is modelled in-process:
+# like the real one, it sends two NOTIFY_SWITCH_UPDATE notifications per
+# bind or unbind (in progress, then done). The Socket.IO client is modelled
+# too. It re-fetches the whole VCS list on an "vcs:updated" event that carries
+# no data, which is what the web UI does, and applies delta events directly.
+
+import asyncio
+from collections import Counter
+
+import click
+
+from opencis.cxl.cci.common import CCI_RETURN_CODE
+from opencis.cxl.cci.fabric_manager.physical_switch import IdentifySwitchDeviceResponsePayload
+from opencis.cxl.cci.fabric_manager.virtual_switch.get_virtual_cxl_switch_info import (
+    VCS_STATE,
+    GetVirtualCxlSwitchInfoResponsePayload,
+    PpbInfo,
+    VcsInfoBlock,
+)
+from opencis.cxl.cci.vendor_specfic import NotifySwitchUpdateRequestPayload
+from opencis.cxl.component.fabric_manager.socketio_server import (
+    FabricManagerSocketIoServer,
+    HostFMConnManager,
+)
+from opencis.cxl.component.virtual_switch.virtual_switch import PPB_BINDING_STATUS
+from opencis.cxl.transport.transaction import CciMessageHeaderPacket, CciMessagePacket
+from opencis.util.logger import logger
+
+
+class SwitchModel:
+    """Stands in for MctpCciApiClient and the switch behind it, counting round trips"""
+
+    def __init__(self, vcs_count: int, vppbs_per_vcs: int, latency: float = 0):
+        self.round_trips = Counter()
+        self._latency = latency
+        self._vppbs_per_vcs = vppbs_per_vcs
+        self._usp_ids = [vcs_id * (vppbs_per_vcs + 1) for vcs_id in range(vcs_count)]
+        self._bindings = {
+            (vcs_id, vppb_id): usp_id + 1 + vppb_id
+            for vcs_id, usp_id in enumerate(self._usp_ids)
+            for vppb_id in range(vppbs_per_vcs)
+        }
+        self._notification_handler = None
+
+    async def _round_trip(self, name: str):
+        self.round_trips[name] += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    def register_notification_handler(self, handler):
+        self._notification_handler = handler
+
+    async def _notify_switch_update(self, vcs_id: int, vppb_id: int, status: PPB_BINDING_STATUS):
+        request = NotifySwitchUpdateRequestPayload(vcs_id, vppb_id, status).create_request()
+        header = CciMessageHeaderPacket()
+        header.command_opcode = request.opcode
+        header.set_message_payload_length(len(request.payload))
+        await self._notification_handler(CciMessagePacket.create(header, request.payload))
+
+    async def identify_switch_device(self):
+        await self._round_trip("identify_switch_device")
+        payload = IdentifySwitchDeviceResponsePayload(
+            num_physical_ports=len(self._bindings) + len(self._usp_ids),
+            num_vcss=len(self._usp_ids),
+        )
+        return (CCI_RETURN_CODE.SUCCESS, payload)
+
+    async def get_virtual_cxl_switch_info(self, request):
+        await self._round_trip("get_virtual_cxl_switch_info")
+        vcs_info_list = []
+        for vcs_id in request.vcs_id_list:
+            ppb_info_list = []
+            for vppb_id in range(self._vppbs_per_vcs):
+                port_id = self._bindings.get((vcs_id, vppb_id))
+                status = PPB_BINDING_STATUS.UNBOUND
+                if port_id is not None:
+                    status = PPB_BINDING_STATUS.BOUND_PHYSICAL_PORT
+                ppb_info_list.append(PpbInfo(vppb_id, status, port_id or 0))
+            vcs_info_list.append(
+                VcsInfoBlock(
+                    vcs_id,
+                    VCS_STATE.ENABLED,
+                    self._usp_ids[vcs_id],
+                    self._vppbs_per_vcs,
+                    ppb_info_list,
+                )
+            )
+        return (
+            CCI_RETURN_CODE.SUCCESS,
+            GetVirtualCxlSwitchInfoResponsePayload(len(vcs_info_list), vcs_info_list),
+        )
+
+    async def bind_vppb(self, request):
+        await self._round_trip("bind_vppb")
+        key = (request.vcs_id, request.vppb_id)
+        await self._notify_switch_update(*key, PPB_BINDING_STATUS.BIND_OR_UNBIND_IN_PROGRESS)
+        self._bindings[key] = request.physical_port_id
+        await self._notify_switch_update(*key, PPB_BINDING_STATUS.BOUND_PHYSICAL_PORT)
+        return (CCI_RETURN_CODE.SUCCESS, CCI_RETURN_CODE.SUCCESS)
+
+    async def unbind_vppb(self, request):
+        await self._round_trip("unbind_vppb")
+        key = (request.vcs_id, request.vppb_id)
+        await self._notify_switch_update(*key, PPB_BINDING_STATUS.BIND_OR_UNBIND_IN_PROGRESS)
+        del self._bindings[key]
+        await self._notify_switch_update(*key, PPB_BINDING_STATUS.UNBOUND)
+        return (CCI_RETURN_CODE.SUCCESS, CCI_RETURN_CODE.SUCCESS)
+
+
+class HostConnModel:
+    async def send_irq_requests(self, requests, device: int = 0):
+        pass
+
+
+async def _storm(operations: int, vcs_count: int, vppbs_per_vcs: int):
+    switch = SwitchModel(vcs_count, vppbs_per_vcs)
+    server = FabricManagerSocketIoServer(switch, HostFMConnManager(switch, HostConnModel()))
+    client_refetches = []
+
+    async def client_on_event(event, data=None, **_):
+        if event == "vcs:updated" and data is None:
+            client_refetches.append(asyncio.create_task(server._handle_event("vcs:get", None)))
+
+    server._sio.emit = client_on_event
+    await server._handle_event("vcs:get", None)
+    switch.round_trips.clear()
+
+    vppbs = [(vcs_id, vppb_id) for vcs_id in range(vcs_count) for vppb_id in range(vppbs_per_vcs)]
+    for index in range(operations // 2):
+        vcs_id, vppb_id = vppbs[index % len(vppbs)]
+        data = {"virtualCxlSwitchId": vcs_id, "vppbId": vppb_id}
+        await server._handle_event("vcs:unbind", None, data)
+        data["physicalPortId"] = vcs_id * (vppbs_per_vcs + 1) + 1 + vppb_id
+        await server._handle_event("vcs:bind", None, data)
+    # let the debounce window close and the clients catch up
+    await asyncio.sleep(0.5)
+    await asyncio.gather(*client_refetches)
+    return switch.round_trips
+
+
+@click.command()
+@click.option("--operations", default=100, help="Bind plus unbind requests")
+@click.option("--vcs-count", default=2, help="Virtual CXL switches")
+@click.option("--vppbs", default=15, help="vPPBs per VCS")
+def main(operations: int, vcs_count: int, vppbs: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    round_trips = asyncio.run(_storm(operations, vcs_count, vppbs))
+    print(f"MCTP round trips per {operations} bind/unbind operations: {sum(round_trips.values())}")
+    for name, count in sorted(round_trips.items()):
+        print(f"  {name:>28}: {count}")
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,178 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Times how long it takes before an 8-way interleaved region is usable: programming
+# the HDM decoders of 8 SLDs and of the switch upstream port, then writing and reading
+# back one cacheline in every stripe through CXL.mem. The switch, the SLDs and the
+# host run in this process and talk over local sockets, as in `opencis start`.
+# Decoders are programmed one component after another, or all at once with
+# CxlMemDriver.attach_interleaved_mem_devices. Each mode runs on a fresh setup, since
+# committed decoders stay committed.
+
+import asyncio
+import os
+import tempfile
+import time
+
+import click
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cache_controller import MEM_ADDR_TYPE
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.cxl_memory_hub import CxlMemoryHub, CxlMemoryHubConfig
+from opencis.cxl.component.irq_manager import IrqManager
+from opencis.cxl.component.physical_port_manager import PhysicalPortManager
+from opencis.cxl.component.root_complex.root_complex import SystemMemControllerConfig
+from opencis.cxl.component.root_complex.root_port_client_manager import RootPortClientConfig
+from opencis.cxl.component.root_complex.root_port_switch import ROOT_PORT_SWITCH_TYPE
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.component.virtual_switch_manager import VirtualSwitchConfig, VirtualSwitchManager
+from opencis.drivers.cxl_bus_driver import CxlBusDriver
+from opencis.drivers.cxl_mem_driver import CxlMemDriver
+from opencis.drivers.pci_bus_driver import PciBusDriver
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+
+WAYS = 8
+HPA_BASE = 0x100000000000
+MMIO_BASE_ADDRESS = 0xFE000000
+STRIPE_SIZE = 256
+CACHELINE_SIZE = 64
+
+
+async def _program_serially(cxl_mem_driver: CxlMemDriver) -> bool:
+    interleave_set = cxl_mem_driver.create_interleave_set(cxl_mem_driver.get_devices(), HPA_BASE)
+    for device in interleave_set.devices:
+        if not await device.configure_hdm_decoder_device(
+            hpa_base=interleave_set.hpa_base,
+            hpa_size=interleave_set.hpa_size,
+            interleaving_granularity=interleave_set.ig,
+            interleaving_way=interleave_set.iw,
+        ):
+            return False
+    return await interleave_set.upstream_port.configure_hdm_decoder_switch(
+        hpa_base=interleave_set.hpa_base,
+        hpa_size=interleave_set.hpa_size,
+        target_list=interleave_set.target_list,
+        interleaving_granularity=interleave_set.ig,
+        interleaving_way=interleave_set.iw,
+    )
+
+
+async def _check_stripes(cxl_memory_hub: CxlMemoryHub) -> bool:
+    for stripe in range(WAYS):
+        address = HPA_BASE + stripe * STRIPE_SIZE
+        value = 0xC0FFEE00 + stripe
+        await cxl_memory_hub.store(address, CACHELINE_SIZE, value)
+        if await cxl_memory_hub.load(address, CACHELINE_SIZE) != value:
+            return False
+    return True
+
+
+async def _measure(batched: bool, port: int, memory_dir: str):
+    port_configs = [PortConfig(PORT_TYPE.USP)] + [PortConfig(PORT_TYPE.DSP)] * WAYS
+    switch_connection_manager = SwitchConnectionManager(port_configs, port=port)
+    physical_port_manager = PhysicalPortManager(
+        switch_connection_manager=switch_connection_manager, port_configs=port_configs
+    )
+    virtual_switch_manager = VirtualSwitchManager(
+        switch_configs=[
+            VirtualSwitchConfig(
+                upstream_port_index=0,
+                vppb_counts=WAYS,
+                initial_bounds=list(range(1, WAYS + 1)),
+                irq_host="127.0.0.1",
+                irq_port=port + 1,
+            )
+        ],
+        physical_port_manager=physical_port_manager,
+        allocated_ld={index: [0] for index in range(1, WAYS + 1)},
+    )
+    devices = [
+        SingleLogicalDevice(
+            port_index=index,
+            memory_size=256 * MB,
+            memory_file=os.path.join(memory_dir, f"mem{index}.bin"),
+            serial_number=f"{index:016X}",
+            port=port,
+        )
+        for index in range(1, WAYS + 1)
+    ]
+    irq_manager = IrqManager(
+        device_name="Host", addr="127.0.0.1", port=port + 1, server=True, device_id=0
+    )
+    cxl_memory_hub = CxlMemoryHub(
+        CxlMemoryHubConfig(
+            host_name="Host",
+            root_bus=0,
+            root_port_switch_type=ROOT_PORT_SWITCH_TYPE.PASS_THROUGH,
+            root_ports=[RootPortClientConfig(0, "127.0.0.1", port)],
+            sys_mem_controller=SystemMemControllerConfig(
+                memory_size=1 * MB, memory_filename=os.path.join(memory_dir, "sys.bin")
+            ),
+            irq_handler=irq_manager,
+        )
+    )
+    components = [
+        switch_connection_manager,
+        physical_port_manager,
+        virtual_switch_manager,
+        *devices,
+        irq_manager,
+    ]
+    tasks = [asyncio.create_task(component.run()) for component in components]
+    await asyncio.gather(*(component.wait_for_ready() for component in components))
+    tasks.append(asyncio.create_task(cxl_memory_hub.run()))
+    await cxl_memory_hub.wait_for_ready()
+
+    root_complex = cxl_memory_hub.get_root_complex()
+    pci_bus_driver = PciBusDriver(root_complex)
+    await pci_bus_driver.init(MMIO_BASE_ADDRESS)
+    cxl_bus_driver = CxlBusDriver(pci_bus_driver, root_complex)
+    await cxl_bus_driver.init()
+    cxl_mem_driver = CxlMemDriver(cxl_bus_driver, root_complex)
+    await cxl_mem_driver.init()
+
+    start = time.perf_counter()
+    if batched:
+        successful = await cxl_mem_driver.attach_interleaved_mem_devices(
+            cxl_mem_driver.get_devices(), HPA_BASE
+        )
+    else:
+        successful = await _program_serially(cxl_mem_driver)
+    programmed = time.perf_counter() - start
+    hpa_size = min(device.get_memory_size() for device in cxl_mem_driver.get_devices()) * WAYS
+    cxl_memory_hub.add_mem_range(HPA_BASE, hpa_size, MEM_ADDR_TYPE.CXL_UNCACHED)
+    usable = successful and await _check_stripes(cxl_memory_hub)
+    elapsed = time.perf_counter() - start
+
+    await asyncio.gather(*(component.stop() for component in [*components, cxl_memory_hub]))
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return usable, programmed, elapsed
+
+
+@click.command()
+@click.option("--port", default=8780, help="First of the local ports the setups listen on")
+@click.option("--repeat", default=3, help="Setups per mode")
+def main(port: int, repeat: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for batched in (False, True):
+            mode = "batched" if batched else "serial"
+            for run in range(repeat):
+                # Every setup gets its own ports, so none waits on a socket of the last
+                setup_port = port + (2 * repeat if batched else 0) + 2 * run
+                usable, programmed, elapsed = asyncio.run(_measure(batched, setup_port, memory_dir))
+                print(
+                    f"{WAYS}-way, {mode:7s}: decoders committed in {programmed * 1e3:7.2f} ms, "
+                    f"memory usable in {elapsed * 1e3:7.2f} ms, usable: {usable}"
+                )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,109 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# A device IrqManager raises `--count` interrupts at the host's IrqManager as
+# fast as it can, as a device signalling a completion per request would. The
+# benchmark reports the delivered interrupt rate, the handler invocations that
+# needed and the send-to-handler latency percentiles. It runs once with the
+# per-message handler and once per coalescing setting on a vector handler.
+# With `--rate`, interrupts are paced in bursts of `--burst` instead of flooded.
+
+import asyncio
+import statistics
+import time
+
+import click
+
+from opencis.cxl.component.irq_manager import Irq, IrqManager
+from opencis.cxl.component.short_msg_conn import InterruptCoalescing
+from opencis.util.logger import logger
+
+COALESCING_SETTINGS = [
+    InterruptCoalescing(max_count=1),
+    InterruptCoalescing(max_count=16, max_delay=100e-6),
+    InterruptCoalescing(max_count=64, max_delay=500e-6),
+]
+
+
+async def _raise(count: int, port: int, coalescing: InterruptCoalescing, rate: int, burst: int):
+    host = IrqManager("Host", port=port, server=True)
+    device = IrqManager("Device", port=port, device_id=1)
+    tasks = [asyncio.create_task(host.run()), asyncio.create_task(device.run())]
+    await host.wait_for_ready()
+    await device.wait_for_ready()
+    await device.start_connection()
+
+    sent_at = []
+    latencies = []
+    invocations = 0
+    done = asyncio.Event()
+
+    def delivered(irq_count: int):
+        now = time.perf_counter()
+        for index in range(len(latencies), len(latencies) + irq_count):
+            latencies.append(now - sent_at[index])
+        if len(latencies) == count:
+            done.set()
+
+    async def on_interrupt(_: int):
+        nonlocal invocations
+        invocations += 1
+        delivered(1)
+
+    async def on_interrupts(_: int, irqs):
+        nonlocal invocations
+        invocations += 1
+        delivered(len(irqs))
+
+    if coalescing is None:
+        host.register_interrupt_handler(Irq.HOST_SENT, on_interrupt, dev_id=1)
+    else:
+        host.register_vector_handler(Irq.HOST_SENT, on_interrupts, 1, coalescing)
+
+    start = time.perf_counter()
+    for index in range(count):
+        if rate and index % burst == 0:
+            # sleep until this burst is due
+            await asyncio.sleep(max(0, start + index / rate - time.perf_counter()))
+        sent_at.append(time.perf_counter())
+        await device.send_irq_request(Irq.HOST_SENT)
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    await device.shutdown()
+    await device.stop()
+    await host.stop()
+    await asyncio.gather(*tasks)
+    return (count / elapsed, invocations, latencies)
+
+
+@click.command()
+@click.option("--count", default=20000, help="Interrupts raised per run")
+@click.option("--port", default=8560, help="TCP port of the host IrqManager")
+@click.option("--rate", default=0, help="Interrupts per second to pace at, 0 to flood")
+@click.option("--burst", default=32, help="Interrupts raised back to back when paced")
+def main(count: int, port: int, rate: int, burst: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    for coalescing in [None] + COALESCING_SETTINGS:
+        (irq_rate, invocations, latencies) = asyncio.run(
+            _raise(count, port, coalescing, rate, burst)
+        )
+        quantiles = statistics.quantiles(latencies, n=100)
+        if coalescing is None:
+            label = "per message"
+        else:
+            label = f"{coalescing.max_count} / {coalescing.max_delay * 1e6:.0f} us"
+        print(
+            f"{label:>13}: {irq_rate:9.0f} irq/s, {invocations:6d} handler calls, latency "
+            f"p50 {quantiles[49] * 1e6:8.1f} us, p99 {quantiles[98] * 1e6:8.1f} us, "
+            f"max {max(latencies) * 1e6:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
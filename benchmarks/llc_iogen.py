@@ -0,0 +1,141 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Ops per second and latency percentiles of HostLlcIoGen workloads against a host
+# LLC, for every address pattern at several queue depths. The LLC misses to a
+# coherency bridge that serves DRAM from a flat buffer after `--miss-latency-us`,
+# in place of the cache coherency bridge and home agent of a full host. With a
+# working set larger than the LLC, random and strided workloads miss most of the
+# time and zipfian ones mostly hit. The depth 1 sequential row is what the old
+# store-then-load loop of the generator did. A miss takes up to three bridge round
+# trips, and asyncio timers wake up about a millisecond late at best, so any
+# nonzero `--miss-latency-us` costs a few milliseconds per miss.
+
+import asyncio
+from typing import List
+
+import click
+
+from opencis.cxl.component.cache_controller import (
+    CacheController,
+    CacheControllerConfig,
+    MEM_ADDR_TYPE,
+)
+from opencis.cxl.component.host_llc_iogen import HostLlcIoGen, HostLlcIoGenConfig
+from opencis.cxl.component.llc_iogen import IOGEN_ADDRESS_PATTERN, LlcIoGenWorkload
+from opencis.cxl.transport.cache_fifo import (
+    CacheFifoPair,
+    CacheResponse,
+    CACHE_REQUEST_TYPE,
+    CACHE_RESPONSE_STATUS,
+)
+from opencis.cxl.transport.memory_fifo import MemoryFifoPair
+from opencis.util.logger import logger
+from opencis.util.number import payload_to_bytes
+from opencis.util.number_const import KB, MB
+
+DRAM_SIZE = 1 * MB
+CACHELINE_SIZE = 64
+
+
+async def _serve_dram(fifo: CacheFifoPair, memory: bytearray, packet, miss_latency: float):
+    if miss_latency:
+        await asyncio.sleep(miss_latency)
+    match packet.type:
+        case CACHE_REQUEST_TYPE.SNP_DATA:
+            data = bytes(memory[packet.addr : packet.addr + CACHELINE_SIZE])
+            response = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data)
+        case CACHE_REQUEST_TYPE.SNP_INV:
+            response = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I)
+        case CACHE_REQUEST_TYPE.WRITE_BACK:
+            data = payload_to_bytes(packet.data)
+            memory[packet.addr : packet.addr + CACHELINE_SIZE] = data
+            response = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+    response.tag = packet.tag
+    await fifo.response.put(response)
+
+
+async def _run_dram(fifo: CacheFifoPair, memory: bytearray, miss_latency: float):
+    # Outstanding requests overlap their latency and respond in completion order
+    requests = set()
+    while True:
+        packet = await fifo.request.get()
+        if packet is None:
+            break
+        request = asyncio.create_task(_serve_dram(fifo, memory, packet, miss_latency))
+        requests.add(request)
+        request.add_done_callback(requests.discard)
+    await asyncio.gather(*requests)
+
+
+async def _measure(workloads: List[LlcIoGenWorkload], miss_latency: float):
+    processor_to_cache_fifo = MemoryFifoPair()
+    cache_to_coh_bridge_fifo = CacheFifoPair()
+    cache_controller = CacheController(
+        CacheControllerConfig(
+            component_name="Host",
+            processor_to_cache_fifo=processor_to_cache_fifo,
+            cache_to_coh_agent_fifo=CacheFifoPair(),
+            coh_agent_to_cache_fifo=CacheFifoPair(),
+            cache_to_coh_bridge_fifo=cache_to_coh_bridge_fifo,
+            coh_bridge_to_cache_fifo=CacheFifoPair(),
+        )
+    )
+    cache_controller.add_mem_range(0, DRAM_SIZE, MEM_ADDR_TYPE.DRAM)
+    iogen = HostLlcIoGen(
+        HostLlcIoGenConfig(
+            host_name="Host", processor_to_cache_fifo=processor_to_cache_fifo, memory_size=DRAM_SIZE
+        )
+    )
+    dram = asyncio.create_task(
+        _run_dram(cache_to_coh_bridge_fifo, bytearray(DRAM_SIZE), miss_latency)
+    )
+    tasks = [asyncio.create_task(component.run()) for component in (cache_controller, iogen)]
+    await asyncio.gather(cache_controller.wait_for_ready(), iogen.wait_for_ready())
+
+    reports = [await iogen.run_workload(workload) for workload in workloads]
+
+    await asyncio.gather(iogen.stop(), cache_controller.stop())
+    await asyncio.gather(*tasks)
+    await cache_to_coh_bridge_fifo.request.put(None)
+    await dram
+    return reports
+
+
+@click.command()
+@click.option("--duration", default=1.0, help="Seconds per workload")
+@click.option("--miss-latency-us", default=0, help="Microseconds the DRAM takes per request")
+@click.option("--working-set-kb", default=256, help="Working set of every workload")
+@click.option("--queue-depths", "queue_depths", default=[1, 4, 16], multiple=True)
+def main(duration: float, miss_latency_us: int, working_set_kb: int, queue_depths: List[int]):
+    logger.set_stdout_levels(loglevel="WARNING")
+    workloads = [
+        LlcIoGenWorkload(
+            pattern=pattern,
+            read_ratio=0.5,
+            queue_depth=queue_depth,
+            working_set_size=working_set_kb * KB,
+            stride=4 * KB,
+            duration=duration,
+        )
+        for pattern in IOGEN_ADDRESS_PATTERN
+        for queue_depth in queue_depths
+    ]
+    reports = asyncio.run(_measure(workloads, miss_latency_us * 1e-6))
+    for workload, report in zip(workloads, reports):
+        print(
+            f"{workload.pattern.name:10s} depth {workload.queue_depth:3d}: "
+            f"{report.get_ops_per_sec():8.1f} ops/s, "
+            f"p50 {report.get_latency_percentile(50) * 1e6:8.1f} us, "
+            f"p99 {report.get_latency_percentile(99) * 1e6:8.1f} us, "
+            f"{report.failures} failed, {report.mismatches} mismatched"
+        )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
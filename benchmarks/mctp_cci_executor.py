@@ -0,0 +1,129 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Floods MctpCciExecutor with Identify requests (executed by the switch) and
+# Get LD Info requests (passed down to FMLDs behind the downstream ports) and
+# reports completed commands per second. `--window` requests are kept in
+# flight, as a pipelined FM client would. `--switch-latency-us` makes Identify
+# await before answering, standing in for switch commands that wait on other
+# components.
+
+import asyncio
+import time
+
+import click
+
+from opencis.cxl.cci.common import CCI_FM_API_COMMAND_OPCODE, CCI_GENERIC_COMMAND_OPCODE
+from opencis.cxl.cci.generic.information_and_status import (
+    IdentifyCommand,
+    IdentifyComponentType,
+    IdentifyResponsePayload,
+)
+from opencis.cxl.component.cci_executor import CciRequest, CciResponse
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.fmld import FMLD
+from opencis.cxl.component.mctp.mctp_cci_executor import MctpCciExecutor
+from opencis.cxl.component.mctp.mctp_connection import MctpConnection
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.device.cxl_type3_device import CXL_T3_DEV_TYPE
+from opencis.cxl.transport.transaction import (
+    CCI_MCTP_MESSAGE_CATEGORY,
+    CciMessageHeaderPacket,
+    CciMessagePacket,
+    CciPayloadPacket,
+)
+from opencis.pci.component.pci import SW_SWITCH_DID
+from opencis.util.logger import logger
+
+
+class DelayedIdentifyCommand(IdentifyCommand):
+    def __init__(self, dev_info: IdentifyResponsePayload, latency: float):
+        super().__init__(dev_info)
+        self._latency = latency
+
+    async def _execute(self, request: CciRequest) -> CciResponse:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return await super()._execute(request)
+
+
+def _request(opcode: int, message_tag: int, port_index: int) -> CciPayloadPacket:
+    header = CciMessageHeaderPacket()
+    header.message_category = CCI_MCTP_MESSAGE_CATEGORY.REQUEST
+    header.message_tag = message_tag
+    header.command_opcode = opcode
+    packet = CciMessagePacket.create(header, bytes())
+    return CciPayloadPacket.create(packet, packet.get_total_size(), port_index)
+
+
+async def _flood(mix: str, mlds: int, count: int, window: int, switch_latency: float) -> float:
+    port_configs = [PortConfig(PORT_TYPE.USP)] + [PortConfig(PORT_TYPE.DSP)] * mlds
+    switch_connection_manager = SwitchConnectionManager(port_configs)
+    connection = MctpConnection()
+    executor = MctpCciExecutor(connection, switch_connection_manager, port_configs)
+    ident_payload = IdentifyResponsePayload(
+        device_id=SW_SWITCH_DID, component_type=IdentifyComponentType.SWITCH
+    )
+    executor.register_cci_commands([DelayedIdentifyCommand(ident_payload, switch_latency)])
+    fmlds = [
+        FMLD(
+            switch_connection_manager.get_cxl_connection(port_index).cci_fifo,
+            ld_count=4,
+            dev_type=CXL_T3_DEV_TYPE.MLD,
+        )
+        for port_index in range(1, mlds + 1)
+    ]
+    components = [executor, *fmlds]
+    tasks = [asyncio.create_task(component.run()) for component in components]
+    for component in components:
+        await component.wait_for_ready()
+
+    requests = []
+    for index in range(count):
+        tag = index % 256
+        if mix == "identify" or (mix == "mixed" and index % 2 == 0):
+            requests.append(_request(CCI_GENERIC_COMMAND_OPCODE.IDENTIFY, tag, 0))
+        else:
+            port_index = 1 + index % mlds
+            requests.append(_request(CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO, tag, port_index))
+
+    in_flight = asyncio.Semaphore(window)
+
+    async def receive():
+        for _ in range(count):
+            await connection.ep_to_controller.get()
+            in_flight.release()
+
+    start = time.perf_counter()
+    receiver = asyncio.create_task(receive())
+    for request in requests:
+        await in_flight.acquire()
+        await connection.controller_to_ep.put(request)
+    await receiver
+    elapsed = time.perf_counter() - start
+
+    for component in components:
+        await component.stop()
+    await asyncio.gather(*tasks)
+    return count / elapsed
+
+
+@click.command()
+@click.option("--count", default=4000, help="Requests per flood")
+@click.option("--mlds", default=4, help="MLDs behind downstream ports")
+@click.option("--window", default=8, help="Requests kept in flight")
+@click.option("--switch-latency-us", default=0, help="Time Identify awaits before answering")
+def main(count: int, mlds: int, window: int, switch_latency_us: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    for mix in ("identify", "ld-info", "mixed"):
+        rate = asyncio.run(_flood(mix, mlds, count, window, switch_latency_us / 1e6))
+        print(f"{mix:>8}: {rate:9.0f} commands/s")
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,91 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Measures how long the FM takes to read the physical port state of a 64-port
+# switch through MctpCciApiClient, with one request outstanding at a time versus
+# pipelined over the 3-bit MCTP tag space. The client and the switch-side
+# MctpCciExecutor are connected through a link that delays every packet by a
+# fixed one-way latency, standing in for the FM-to-switch TCP connection.
+
+import asyncio
+import statistics
+import time
+
+import click
+
+from opencis.cxl.cci.fabric_manager.physical_switch import GetPhysicalPortStateCommand
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.mctp.mctp_cci_api_client import MCTP_TAG_COUNT, MctpCciApiClient
+from opencis.cxl.component.mctp.mctp_cci_executor import MctpCciExecutor
+from opencis.cxl.component.mctp.mctp_connection import MctpConnection
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.util.logger import logger
+
+
+async def _relay(source: asyncio.Queue, destination: asyncio.Queue, latency: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        packet = await source.get()
+        loop.call_later(latency, destination.put_nowait, packet)
+
+
+async def _sweep(ports: int, latency: float, max_outstanding: int, chunk_size: int, rounds: int):
+    port_configs = [PortConfig(PORT_TYPE.USP)] + [PortConfig(PORT_TYPE.DSP)] * (ports - 1)
+    fm_side = MctpConnection()
+    switch_side = MctpConnection()
+    executor = MctpCciExecutor(switch_side, None, [])
+    executor.register_cci_commands(
+        [GetPhysicalPortStateCommand(SwitchConnectionManager(port_configs), [])]
+    )
+    client = MctpCciApiClient(fm_side, max_outstanding=max_outstanding)
+    relays = [
+        asyncio.create_task(
+            _relay(fm_side.controller_to_ep, switch_side.controller_to_ep, latency)
+        ),
+        asyncio.create_task(
+            _relay(switch_side.ep_to_controller, fm_side.ep_to_controller, latency)
+        ),
+    ]
+    tasks = [asyncio.create_task(component.run()) for component in (executor, client)]
+    await executor.wait_for_ready()
+    await client.wait_for_ready()
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        (_, response) = await client.gather_port_states(range(ports), chunk_size)
+        samples.append(time.perf_counter() - start)
+        assert len(response.port_info_list) == ports
+
+    await executor.stop()
+    await client.stop()
+    await asyncio.gather(*tasks)
+    for relay in relays:
+        relay.cancel()
+    return samples
+
+
+@click.command()
+@click.option("--ports", default=64, help="Physical ports on the switch")
+@click.option("--latency-us", default=200, help="One-way FM-to-switch link latency")
+@click.option("--rounds", default=20, help="Inventory sweeps per configuration")
+def main(ports: int, latency_us: int, rounds: int):
+    latency = latency_us / 1e6
+    logger.set_stdout_levels(loglevel="WARNING")
+    for chunk_size in (1, 8):
+        for max_outstanding in (1, MCTP_TAG_COUNT):
+            samples = asyncio.run(_sweep(ports, latency, max_outstanding, chunk_size, rounds))
+            requests = -(-ports // chunk_size)
+            print(
+                f"{requests:3d} requests x {chunk_size} ports, {max_outstanding} outstanding: "
+                f"median {statistics.median(samples) * 1e3:7.2f} ms per {ports}-port sweep"
+            )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
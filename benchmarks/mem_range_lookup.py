@@ -0,0 +1,132 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Address classifications per second through CacheController.get_mem_addr_type with
+# the memory map of a host that pooled 64, 256 and 1024 devices. As memory_pooling
+# does, every device adds a config space range, a BAR range and a CXL memory range.
+# Addresses are either random over every range, or streams of 64 cachelines through
+# one range at a time. The list scan the controller used before the range map is
+# timed too, for reference, and the range map runs with and without its last hit
+# entry.
+
+import random
+import time
+from typing import Callable, List
+
+import click
+
+from opencis.cxl.component.cache_controller import (
+    CacheController,
+    CacheControllerConfig,
+    MEM_ADDR_TYPE,
+    MemoryRange,
+)
+from opencis.cxl.transport.cache_fifo import CacheFifoPair
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+
+PCI_CFG_BASE = 0x10000000
+PCI_CFG_SIZE = 0x100000
+MMIO_BASE = 0xFE000000
+BAR_SIZE = 0x200000
+CXL_HPA_BASE = 0x100000000000
+CXL_MEMORY_SIZE = 256 * MB
+STREAM_LENGTH = 64
+CACHELINE_SIZE = 64
+
+
+def _create_cache_controller(last_hit: bool) -> CacheController:
+    return CacheController(
+        CacheControllerConfig(
+            component_name="Host",
+            processor_to_cache_fifo=None,
+            cache_to_coh_agent_fifo=CacheFifoPair(),
+            coh_agent_to_cache_fifo=CacheFifoPair(),
+            mem_range_last_hit=last_hit,
+        )
+    )
+
+
+def _pooled_ranges(devices: int) -> List[MemoryRange]:
+    ranges = []
+    for index in range(devices):
+        ranges += [
+            MemoryRange(PCI_CFG_BASE + index * PCI_CFG_SIZE, PCI_CFG_SIZE, MEM_ADDR_TYPE.CFG),
+            MemoryRange(MMIO_BASE + index * BAR_SIZE, BAR_SIZE, MEM_ADDR_TYPE.MMIO),
+            MemoryRange(
+                CXL_HPA_BASE + index * CXL_MEMORY_SIZE,
+                CXL_MEMORY_SIZE,
+                MEM_ADDR_TYPE.CXL_UNCACHED,
+            ),
+        ]
+    return ranges
+
+
+def _addresses(ranges: List[MemoryRange], count: int, streaming: bool) -> List[int]:
+    rng = random.Random(0)
+    addresses = []
+    while len(addresses) < count:
+        mem_range = rng.choice(ranges)
+        if streaming:
+            offset = rng.randrange(mem_range.size // 2) & ~(CACHELINE_SIZE - 1)
+            start = mem_range.base_addr + offset
+            addresses += [start + line * CACHELINE_SIZE for line in range(STREAM_LENGTH)]
+        else:
+            addresses.append(mem_range.base_addr + rng.randrange(mem_range.size))
+    return addresses[:count]
+
+
+def _list_scan(ranges: List[MemoryRange]) -> Callable[[int], MEM_ADDR_TYPE]:
+    def get_mem_addr_type(addr: int) -> MEM_ADDR_TYPE:
+        for mem_range in ranges:
+            if mem_range.base_addr <= addr < (mem_range.base_addr + mem_range.size):
+                return mem_range.addr_type
+        return MEM_ADDR_TYPE.OOB
+
+    return get_mem_addr_type
+
+
+def _rate(get_mem_addr_type: Callable[[int], MEM_ADDR_TYPE], addresses: List[int]) -> float:
+    start = time.perf_counter()
+    for addr in addresses:
+        get_mem_addr_type(addr)
+    return len(addresses) / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("--devices", "counts", default=[64, 256, 1024], multiple=True, help="Pooled devices")
+@click.option("--lookups", default=200000, help="Classifications per measurement")
+def main(counts: List[int], lookups: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    for devices in counts:
+        ranges = _pooled_ranges(devices)
+        # Ranges are hot-added in the order the devices show up
+        added_ranges = random.Random(1).sample(ranges, len(ranges))
+        lookup_methods = [("list scan", _list_scan(added_ranges))]
+        for last_hit in (False, True):
+            cache_controller = _create_cache_controller(last_hit)
+            for mem_range in added_ranges:
+                cache_controller.add_mem_range(
+                    mem_range.base_addr, mem_range.size, mem_range.addr_type
+                )
+            name = "bisect + last hit" if last_hit else "bisect"
+            lookup_methods.append((name, cache_controller.get_mem_addr_type))
+
+        for streaming in (False, True):
+            addresses = _addresses(ranges, lookups, streaming)
+            pattern = "streaming" if streaming else "random"
+            for name, get_mem_addr_type in lookup_methods:
+                rate = _rate(get_mem_addr_type, addresses)
+                print(
+                    f"{devices:5d} devices, {len(ranges):5d} ranges, {pattern:9s}, "
+                    f"{name:17s}: {rate / 1e3:8.1f} k lookups/s"
+                )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,135 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Loads and stores per second through CxlMemoryHub with one outstanding request,
+# as before requests were tagged, and with several. `--tasks` tasks keep loading
+# their own cacheline, which stays in the host LLC, while one more task stores to
+# a new DRAM cacheline every time, so each of its stores misses and goes through
+# the cache coherency bridge. The LLC sets the two use do not overlap.
+
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+import click
+
+from opencis.cxl.component.cache_controller import MEM_ADDR_TYPE
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.cxl_memory_hub import CxlMemoryHub, CxlMemoryHubConfig
+from opencis.cxl.component.physical_port_manager import PhysicalPortManager
+from opencis.cxl.component.root_complex.root_complex import SystemMemControllerConfig
+from opencis.cxl.component.root_complex.root_port_client_manager import RootPortClientConfig
+from opencis.cxl.component.root_complex.root_port_switch import ROOT_PORT_SWITCH_TYPE
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.component.virtual_switch_manager import VirtualSwitchConfig, VirtualSwitchManager
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+
+CACHELINE_SIZE = 64
+# The host LLC has 8 sets; hot lines use sets 0-3 and the missing stores sets 4-7
+LLC_SET_COUNT = 8
+MISS_SET_BASE = 4
+DRAM_SIZE = 4 * MB
+
+
+def _hot_address(index: int) -> int:
+    return ((index // MISS_SET_BASE) * LLC_SET_COUNT + index % MISS_SET_BASE) * CACHELINE_SIZE
+
+
+def _miss_address(index: int) -> int:
+    line = (index // MISS_SET_BASE) * LLC_SET_COUNT + MISS_SET_BASE + index % MISS_SET_BASE
+    return line * CACHELINE_SIZE
+
+
+async def _measure(
+    max_outstanding: int, tasks: int, duration: float, port: int, memory_dir: str
+) -> List[int]:
+    port_configs = [PortConfig(PORT_TYPE.USP), PortConfig(PORT_TYPE.DSP)]
+    switch_connection_manager = SwitchConnectionManager(port_configs, port=port)
+    physical_port_manager = PhysicalPortManager(
+        switch_connection_manager=switch_connection_manager, port_configs=port_configs
+    )
+    virtual_switch_manager = VirtualSwitchManager(
+        switch_configs=[
+            VirtualSwitchConfig(
+                upstream_port_index=0,
+                vppb_counts=1,
+                initial_bounds=[-1],
+                irq_host="127.0.0.1",
+                irq_port=port + 1,
+            )
+        ],
+        physical_port_manager=physical_port_manager,
+        allocated_ld={},
+    )
+    cxl_memory_hub = CxlMemoryHub(
+        CxlMemoryHubConfig(
+            host_name="Host",
+            root_bus=0,
+            root_port_switch_type=ROOT_PORT_SWITCH_TYPE.PASS_THROUGH,
+            root_ports=[RootPortClientConfig(0, "127.0.0.1", port)],
+            sys_mem_controller=SystemMemControllerConfig(
+                memory_size=DRAM_SIZE, memory_filename=os.path.join(memory_dir, "sys.bin")
+            ),
+            irq_handler=None,
+            max_outstanding_requests=max_outstanding,
+        )
+    )
+    components = [switch_connection_manager, physical_port_manager, virtual_switch_manager]
+    run_tasks = [asyncio.create_task(component.run()) for component in components]
+    await asyncio.gather(*(component.wait_for_ready() for component in components))
+    run_tasks.append(asyncio.create_task(cxl_memory_hub.run()))
+    await cxl_memory_hub.wait_for_ready()
+    cxl_memory_hub.add_mem_range(0, DRAM_SIZE, MEM_ADDR_TYPE.DRAM)
+
+    for index in range(tasks):
+        await cxl_memory_hub.store(_hot_address(index), CACHELINE_SIZE, index)
+
+    counts = [0] * (tasks + 1)
+    deadline = time.perf_counter() + duration
+
+    async def load_hot_line(index: int):
+        while time.perf_counter() < deadline:
+            await cxl_memory_hub.load(_hot_address(index), CACHELINE_SIZE)
+            counts[index] += 1
+
+    async def store_missing_lines():
+        while time.perf_counter() < deadline:
+            await cxl_memory_hub.store(_miss_address(counts[tasks]), CACHELINE_SIZE, 1)
+            counts[tasks] += 1
+
+    await asyncio.gather(*(load_hot_line(index) for index in range(tasks)), store_missing_lines())
+
+    await cxl_memory_hub.stop()
+    await asyncio.gather(*(component.stop() for component in components))
+    await asyncio.gather(*run_tasks)
+    return counts
+
+
+@click.command()
+@click.option("--port", default=8800, help="First of the local ports the setups listen on")
+@click.option("--tasks", default=15, help="Tasks loading cachelines that hit in the LLC")
+@click.option("--duration", default=3.0, help="Seconds per run")
+@click.option("--outstanding", "outstanding", default=[1, 16], multiple=True)
+def main(port: int, tasks: int, duration: float, outstanding: List[int]):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for run, max_outstanding in enumerate(outstanding):
+            counts = asyncio.run(
+                _measure(max_outstanding, tasks, duration, port + 2 * run, memory_dir)
+            )
+            print(
+                f"{max_outstanding:3d} outstanding: {sum(counts[:tasks]) / duration:9.1f} hit loads/s, "
+                f"{counts[tasks] / duration:6.1f} missing stores/s"
+            )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
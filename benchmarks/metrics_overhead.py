@@ -0,0 +1,100 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Cost of the metrics registry: nanoseconds per counter increment and histogram
+# observation while it is disabled and enabled, then CXL.mem writes and reads per
+# second from a root port to an SLD in this process with metrics off and on. The
+# SLD's memory accessor records a latency histogram per access when enabled.
+
+import asyncio
+import os
+import tempfile
+from time import perf_counter
+
+import click
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.util.logger import logger
+from opencis.util.metrics import MetricsRegistry, format_metrics_snapshot, metrics
+from opencis.util.number_const import MB
+
+HPA_BASE = 0x100000000
+
+
+def _time_updates(iterations: int):
+    for enabled in (False, True):
+        registry = MetricsRegistry(enabled=enabled)
+        counter = registry.counter("packets", "Port0")
+        histogram = registry.histogram("latency", "Port0")
+        start = perf_counter()
+        for _ in range(iterations):
+            counter.inc()
+        inc_ns = (perf_counter() - start) / iterations * 1e9
+        start = perf_counter()
+        for _ in range(iterations):
+            histogram.observe(3e-5)
+        observe_ns = (perf_counter() - start) / iterations * 1e9
+        state = "enabled" if enabled else "disabled"
+        print(f"{state:8s}: inc {inc_ns:6.1f} ns, observe {observe_ns:6.1f} ns")
+
+
+async def _run_accesses(accesses: int, memory_dir: str) -> float:
+    connection = CxlConnection()
+    root_port_device = CxlRootPortDevice(downstream_connection=connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file=os.path.join(memory_dir, "mem.bin"),
+        serial_number="0000000000000001",
+        test_mode=True,
+        cxl_connection=connection,
+    )
+    task = asyncio.create_task(device.run())
+    await device.wait_for_ready()
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    await root_port_device.configure_hdm_decoder_single_device(info, HPA_BASE)
+
+    start = perf_counter()
+    for index in range(accesses):
+        address = HPA_BASE + (index % 1024) * 64
+        await root_port_device.cxl_mem_write(address, index)
+        await root_port_device.cxl_mem_read(address)
+    elapsed = perf_counter() - start
+
+    await device.stop()
+    await task
+    return accesses * 2 / elapsed
+
+
+@click.command()
+@click.option("--iterations", default=1000000, help="Metric updates to time")
+@click.option("--accesses", default=2000, help="CXL.mem write/read pairs per run")
+@click.option("--runs", default=3, help="Runs per setting; the best is reported")
+def main(iterations: int, accesses: int, runs: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    _time_updates(iterations)
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for enabled in (False, True, False, True):
+            if enabled:
+                metrics.enable()
+            else:
+                metrics.disable()
+            metrics.reset()
+            rates = [asyncio.run(_run_accesses(accesses, memory_dir)) for _ in range(runs)]
+            state = "on" if enabled else "off"
+            print(f"metrics {state:3s}: {max(rates):8.1f} CXL.mem ops/s")
+        for line in format_metrics_snapshot(metrics.get_snapshot("accessor_")):
+            print(f"  {line}")
+        metrics.disable()
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
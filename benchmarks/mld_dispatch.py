@@ -0,0 +1,168 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Requests per second through a 16-LD MLD in this process under mixed per-LD load,
+# with a set of FIFO consumer tasks per LD vs. the shared MldDispatcher. Requests
+# are routed by LD-ID the way CxlPacketProcessor does it; a few LDs get most of the
+# traffic, some get a little and the rest stay idle. Each request is a CXL.mem
+# write or read, or an MMIO register read, and the responses are collected from
+# the shared outgoing FIFOs.
+
+import asyncio
+import os
+import random
+import tempfile
+from time import perf_counter
+from typing import List, Union
+
+import click
+
+from opencis.apps.multi_logical_device import MultiLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.hdm_decoder import DecoderInfo
+from opencis.cxl.component.mld_dispatcher import get_ld_id
+from opencis.cxl.device.cxl_type3_device import CxlType3Device, CXL_T3_DEV_TYPE
+from opencis.cxl.transport.transaction import (
+    CxlIoMemRdPacket,
+    CxlMemMemRdPacket,
+    CxlMemMemWrPacket,
+)
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+
+HPA_BASE = 0x100000000
+LD_SIZE = 256 * MB
+
+
+def _get_ld_weights(ld_count: int) -> List[float]:
+    # Two hot LDs, a quarter of them idle, the rest lightly loaded
+    idle_count = ld_count // 4
+    return [8.0, 8.0] + [1.0] * (ld_count - 2 - idle_count) + [0.0] * idle_count
+
+
+def _create_requests(ld_count: int, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    ld_ids = rng.choices(range(ld_count), weights=_get_ld_weights(ld_count), k=count)
+    requests = []
+    for index, ld_id in enumerate(ld_ids):
+        address = HPA_BASE + (index % 1024) * 64
+        kind = rng.random()
+        if kind < 0.45:
+            requests.append(("cxl_mem", CxlMemMemWrPacket.create(address, index, ld_id=ld_id)))
+        elif kind < 0.9:
+            requests.append(("cxl_mem", CxlMemMemRdPacket.create(address, ld_id=ld_id)))
+        else:
+            requests.append(("mmio", CxlIoMemRdPacket.create(0xFE000000, 4, ld_id=ld_id)))
+    return requests
+
+
+def _create_devices(
+    dispatcher: bool, connections: List[CxlConnection], memory_dir: str
+) -> Union[MultiLogicalDevice, List[CxlType3Device]]:
+    ld_count = len(connections)
+    memory_files = [os.path.join(memory_dir, f"mld_mem{ld}.bin") for ld in range(ld_count)]
+    serial_numbers = [f"{ld + 1:016X}" for ld in range(ld_count)]
+    if dispatcher:
+        return MultiLogicalDevice(
+            port_index=1,
+            ld_count=ld_count,
+            memory_sizes=[LD_SIZE] * ld_count,
+            memory_files=memory_files,
+            serial_numbers=serial_numbers,
+            test_mode=True,
+            cxl_connections=connections,
+        )
+    # The previous layout: every LD consumes its own FIFOs, responses share LD 0's
+    base = connections[0]
+    for connection in connections[1:]:
+        connection.mmio_fifo.target_to_host = base.mmio_fifo.target_to_host
+        connection.cxl_mem_fifo.target_to_host = base.cxl_mem_fifo.target_to_host
+    return [
+        CxlType3Device(
+            transport_connection=connections[ld],
+            memory_size=LD_SIZE,
+            memory_file=memory_files[ld],
+            serial_number=serial_numbers[ld],
+            dev_type=CXL_T3_DEV_TYPE.MLD,
+        )
+        for ld in range(ld_count)
+    ]
+
+
+async def _run_load(dispatcher: bool, ld_count: int, requests, depth: int, memory_dir: str):
+    # pylint: disable=protected-access
+    connections = [CxlConnection() for _ in range(ld_count)]
+    devices = _create_devices(dispatcher, connections, memory_dir)
+    components = [devices] if dispatcher else devices
+    lds = devices._cxl_type3_devices if dispatcher else devices
+    for ld in lds:
+        memory_device = ld._cxl_memory_device_component
+        memory_device.get_hdm_decoder_manager().commit(0, DecoderInfo(size=LD_SIZE, base=HPA_BASE))
+
+    tasks_before = len(asyncio.all_tasks())
+    run_tasks = [asyncio.create_task(component.run()) for component in components]
+    for component in components:
+        await component.wait_for_ready()
+    task_count = len(asyncio.all_tasks()) - tasks_before
+
+    outgoing = {
+        "cxl_mem": connections[0].cxl_mem_fifo.target_to_host,
+        "mmio": connections[0].mmio_fifo.target_to_host,
+    }
+    window = asyncio.Semaphore(depth)
+
+    async def collect(fifo: asyncio.Queue, count: int):
+        for _ in range(count):
+            await fifo.get()
+            window.release()
+
+    collectors = [
+        asyncio.create_task(collect(fifo, sum(1 for channel, _ in requests if channel == name)))
+        for name, fifo in outgoing.items()
+    ]
+    start = perf_counter()
+    for channel, packet in requests:
+        await window.acquire()
+        # Route by LD-ID, as CxlPacketProcessor does for an MLD
+        connection = connections[get_ld_id(packet)]
+        fifo = connection.mmio_fifo if channel == "mmio" else connection.cxl_mem_fifo
+        await fifo.host_to_target.put(packet)
+    await asyncio.gather(*collectors)
+    elapsed = perf_counter() - start
+
+    for component in components:
+        await component.stop()
+    await asyncio.gather(*run_tasks)
+    return len(requests) / elapsed, task_count
+
+
+@click.command()
+@click.option("--lds", "ld_counts", type=int, default=[4, 16], multiple=True, help="LDs per MLD")
+@click.option("--requests", "request_count", default=20000, help="Requests per run")
+@click.option("--depth", default=16, help="Outstanding requests")
+@click.option("--runs", default=3, help="Runs per setting; the best is reported")
+def main(ld_counts: List[int], request_count: int, depth: int, runs: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for ld_count in ld_counts:
+            requests = _create_requests(ld_count, request_count)
+            for dispatcher in (False, True, False, True):
+                results = [
+                    asyncio.run(_run_load(dispatcher, ld_count, requests, depth, memory_dir))
+                    for _ in range(runs)
+                ]
+                rate = max(rate for rate, _ in results)
+                mode = "dispatcher" if dispatcher else "per-LD tasks"
+                print(
+                    f"{ld_count:2d} LDs, {mode:12s}: {results[0][1]:4d} tasks, "
+                    f"{rate:8.1f} requests/s"
+                )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
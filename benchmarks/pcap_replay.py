@@ -0,0 +1,132 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Writes a capture of one host stream of CXL.io config reads and CXL.mem reads and
+# writes, spaced `--gap-us` apart, with the completions a switch sent back. Then
+# times the offline analysis of the capture, and replays the host stream at 1x, 4x
+# and unthrottled pace against a stand-in switch in this process, which accepts the
+# connection and answers every request at once. Replay numbers are those of the
+# replay client and packet path, not of a switch and its devices.
+
+import asyncio
+import os
+import tempfile
+from time import perf_counter
+
+import click
+
+from opencis.cxl.component.packet_capture import (
+    analyze_packet_capture,
+    decode_packet_capture,
+    get_host_streams,
+    replay_packet_capture,
+)
+from opencis.cxl.component.packet_reader import PacketReader
+from opencis.cxl.transport.transaction import (
+    BaseSidebandPacket,
+    CxlIoCfgRdPacket,
+    CxlIoCompletionWithDataPacket,
+    CxlMemCmpPacket,
+    CxlMemM2SReqPacket,
+    CxlMemM2SRwDPacket,
+    CxlMemMemDataPacket,
+    CxlMemMemRdPacket,
+    CxlMemMemWrPacket,
+    SIDEBAND_TYPES,
+    SidebandConnectionRequestPacket,
+)
+from opencis.util.logger import logger
+from opencis.util.pcap import PcapWriter
+
+HOST = ("127.0.0.1", 40000)
+SWITCH = ("127.0.0.1", 8000)
+PORT = 8820
+
+
+def _write_capture(filename: str, requests: int, gap: float):
+    with open(filename, "wb") as file:
+        writer = PcapWriter(file)
+        writer.write_segment(0, HOST, SWITCH, bytes(SidebandConnectionRequestPacket.create(0)))
+        accept = BaseSidebandPacket.create(SIDEBAND_TYPES.CONNECTION_ACCEPT)
+        writer.write_segment(0, SWITCH, HOST, bytes(accept))
+        for index in range(requests):
+            timestamp = (index + 1) * gap
+            if index % 3 == 0:
+                request = CxlIoCfgRdPacket.create(0x100, 0, 4, req_id=0, tag=index % 256)
+                response = CxlIoCompletionWithDataPacket.create(0, index % 256, index)
+            elif index % 3 == 1:
+                request = CxlMemMemRdPacket.create(index * 64)
+                response = CxlMemMemDataPacket.create(index)
+            else:
+                request = CxlMemMemWrPacket.create(index * 64, index)
+                response = CxlMemCmpPacket.create()
+            writer.write_segment(timestamp, HOST, SWITCH, bytes(request))
+            writer.write_segment(timestamp + gap / 4, SWITCH, HOST, bytes(response))
+
+
+async def _handle(reader, writer):
+    packet_reader = PacketReader(reader, label="StandInSwitch")
+    await packet_reader.get_packet()
+    writer.write(bytes(BaseSidebandPacket.create(SIDEBAND_TYPES.CONNECTION_ACCEPT)))
+    try:
+        while True:
+            packet = await packet_reader.get_packet()
+            if isinstance(packet, CxlIoCfgRdPacket):
+                tag = packet.cfg_req_header.tag
+                writer.write(bytes(CxlIoCompletionWithDataPacket.create(0, tag, 0)))
+            elif isinstance(packet, CxlMemM2SReqPacket):
+                writer.write(bytes(CxlMemMemDataPacket.create(0)))
+            elif isinstance(packet, CxlMemM2SRwDPacket):
+                writer.write(bytes(CxlMemCmpPacket.create()))
+    except Exception:
+        writer.close()
+
+
+async def _replay(streams, speeds, recorded: float):
+    server = await asyncio.start_server(_handle, "127.0.0.1", PORT)
+    packets = sum(len(stream.packets) - 1 for stream in streams)
+    for speed in speeds:
+        start = perf_counter()
+        stats = await replay_packet_capture(streams, "127.0.0.1", PORT, speed=speed)
+        elapsed = perf_counter() - start
+        latencies = sorted(latency for values in stats.latencies.values() for latency in values)
+        print(
+            f"replay {speed:g}x: {elapsed:.3f} s for {recorded:.3f} s recorded, "
+            f"{packets / elapsed:8.1f} packets/s, "
+            f"p50 {latencies[len(latencies) // 2] * 1e6:.1f} us, "
+            f"{stats.unmatched_requests} unmatched"
+        )
+    server.close()
+    await server.wait_closed()
+
+
+@click.command()
+@click.option("--requests", default=1000, help="Requests in the capture")
+@click.option("--gap-us", default=2000, help="Time between recorded requests")
+@click.option("--speeds", "speeds", default=[1.0, 4.0, 1e9], multiple=True, type=float)
+def main(requests: int, gap_us: int, speeds):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as capture_dir:
+        filename = os.path.join(capture_dir, "capture.pcap")
+        _write_capture(filename, requests, gap_us * 1e-6)
+        start = perf_counter()
+        streams = decode_packet_capture(filename)
+        stats = analyze_packet_capture(streams)
+        elapsed = perf_counter() - start
+        packets = sum(stats.packets.values())
+        print(
+            f"analysis: {packets} packets, {os.path.getsize(filename)} bytes in {elapsed:.3f} s, "
+            f"{packets / elapsed:.0f} packets/s"
+        )
+        for line in stats.format():
+            print(f"  {line}")
+        asyncio.run(_replay(get_host_streams(streams), speeds, requests * gap_us * 1e-6))
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
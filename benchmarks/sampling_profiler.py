@@ -0,0 +1,125 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Cost of the sampling profiler: microseconds per sample of every thread, then
+# CXL.mem writes and reads per second from a root port to an SLD in this process
+# with the profiler off and sampling at several intervals. The profile of the
+# last run is summarized and saved; a name ending in .json gives speedscope JSON.
+
+import asyncio
+import os
+import tempfile
+import threading
+from time import perf_counter
+from typing import List
+
+import click
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+from opencis.util.profiler import SamplingProfiler, profiler
+
+HPA_BASE = 0x100000000
+
+
+def _time_samples(iterations: int, threads: int):
+    stop_event = threading.Event()
+    workers = [
+        threading.Thread(target=stop_event.wait, name=f"worker{index}", daemon=True)
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for include_idle in (False, True):
+        local_profiler = SamplingProfiler(include_idle=include_idle)
+        start = perf_counter()
+        for _ in range(iterations):
+            local_profiler.sample()
+        sample_us = (perf_counter() - start) / iterations * 1e6
+        idle = "with" if include_idle else "without"
+        print(f"sample of {threads + 1} threads, {idle} idle stacks: {sample_us:6.1f} us")
+    stop_event.set()
+    for worker in workers:
+        worker.join()
+
+
+async def _run_accesses(accesses: int, memory_dir: str) -> float:
+    connection = CxlConnection()
+    root_port_device = CxlRootPortDevice(downstream_connection=connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file=os.path.join(memory_dir, "mem.bin"),
+        serial_number="0000000000000001",
+        test_mode=True,
+        cxl_connection=connection,
+    )
+    task = asyncio.create_task(device.run())
+    await device.wait_for_ready()
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    await root_port_device.configure_hdm_decoder_single_device(info, HPA_BASE)
+
+    start = perf_counter()
+    for index in range(accesses):
+        address = HPA_BASE + (index % 1024) * 64
+        await root_port_device.cxl_mem_write(address, index)
+        await root_port_device.cxl_mem_read(address)
+    elapsed = perf_counter() - start
+
+    await device.stop()
+    await task
+    return accesses * 2 / elapsed
+
+
+def _run_in_thread(accesses: int, memory_dir: str) -> float:
+    # Like `opencis start`, which runs each component group in a named thread
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(asyncio.run(_run_accesses(accesses, memory_dir))),
+        name="sld",
+    )
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+@click.command()
+@click.option("--iterations", default=10000, help="Samples to time")
+@click.option("--threads", default=8, help="Idle threads besides the main one while timing")
+@click.option("--accesses", default=2000, help="CXL.mem write/read pairs per run")
+@click.option("--runs", default=3, help="Runs per setting; the best is reported")
+@click.option("--intervals", type=float, default=[0.02, 0.01, 0.001], multiple=True, help="Seconds")
+@click.option("--output", default="sampling_profile.collapsed", help="Profile output")
+def main(
+    iterations: int, threads: int, accesses: int, runs: int, intervals: List[float], output: str
+):
+    logger.set_stdout_levels(loglevel="WARNING")
+    _time_samples(iterations, threads)
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for interval in (None, *intervals):
+            rates = []
+            for _ in range(runs):
+                profiler.reset()
+                if interval:
+                    profiler.start(interval)
+                rates.append(_run_in_thread(accesses, memory_dir))
+                profiler.stop()
+            setting = f"every {interval * 1000:g} ms" if interval else "off"
+            print(f"profiler {setting:12s}: {max(rates):8.1f} CXL.mem ops/s")
+    for line in profiler.get_summary():
+        print(line)
+    profiler.save(output)
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
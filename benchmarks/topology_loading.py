@@ -0,0 +1,91 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Time to load generated environments of growing size: YAML parsing with the pure
+# Python and the libyaml loader, building the configs, the validation pass, and
+# constructing the switch the environment describes. Devices cycle through SLDs,
+# 4-LD MLDs and Type-1 and Type-2 accelerators.
+
+import os
+import tempfile
+from time import perf_counter
+from typing import Dict, List
+
+import click
+import yaml
+
+from opencis.apps.cxl_switch import CxlSwitch
+from opencis.cxl.environment import (
+    create_cxl_environment,
+    generate_cxl_environment,
+    save_cxl_environment,
+    validate_cxl_environment,
+)
+from opencis.util.logger import logger
+
+
+def _best_of(runs: int, function) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def _time_environment(config_data: Dict, yaml_path: str, runs: int):
+    loaders = [("pure", yaml.SafeLoader)]
+    if hasattr(yaml, "CSafeLoader"):
+        loaders.append(("libyaml", yaml.CSafeLoader))
+
+    def load(loader):
+        with open(yaml_path, "r") as file:
+            return yaml.load(file, Loader=loader)
+
+    load_times = [
+        (name, _best_of(runs, lambda loader=loader: load(loader))) for name, loader in loaders
+    ]
+    build_time = _best_of(runs, lambda: create_cxl_environment(config_data, False))
+    environment = create_cxl_environment(config_data)
+    validate_time = _best_of(runs, lambda: validate_cxl_environment(environment))
+    switch_time = _best_of(
+        runs,
+        lambda: CxlSwitch(
+            environment.switch_config, environment.logical_device_configs, start_mctp=False
+        ),
+    )
+    vppb_count = sum(vcs.vppb_counts for vcs in environment.switch_config.virtual_switch_configs)
+    loads = ", ".join(f"{name} {elapsed * 1000:7.1f} ms" for name, elapsed in load_times)
+    print(
+        f"{len(config_data['port_configs']):5d} ports, {vppb_count:5d} vPPBs: "
+        f"YAML {loads}; configs {build_time * 1000:6.2f} ms; "
+        f"validation {validate_time * 1000:6.2f} ms; switch {switch_time * 1000:7.1f} ms"
+    )
+
+
+@click.command()
+@click.option("--vcs", "vcs_count", default=8, help="Virtual switches")
+@click.option(
+    "--ports", "dsp_counts", type=int, default=[4, 32, 128], multiple=True, help="DSPs per VCS"
+)
+@click.option("--devices", default="sld,mld,t1,t2", help="Device types cycled over the DSPs")
+@click.option("--runs", default=3, help="Runs per step; the best is reported")
+def main(vcs_count: int, dsp_counts: List[int], devices: str, runs: int):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as config_dir:
+        for dsp_count in dsp_counts:
+            config_data = generate_cxl_environment(
+                vcs_count=vcs_count, dsp_count=dsp_count, device_types=devices.split(",")
+            )
+            yaml_path = os.path.join(config_dir, f"{vcs_count}vcs_{dsp_count}.yaml")
+            save_cxl_environment(config_data, yaml_path)
+            _time_environment(config_data, yaml_path, runs)
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
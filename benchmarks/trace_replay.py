@@ -0,0 +1,118 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Records a memory trace of CXL.mem reads and writes that a root port issues to an
+# SLD, then replays it against the same SLD open-loop, at the recorded pace and
+# faster, and closed-loop at several queue depths. Half of the recorded accesses
+# are followed by `--think-time-us` of idle time, as an application between
+# accesses would be; open-loop replay keeps those gaps, closed-loop replay drops
+# them. The root port and the SLD run in this process over a CxlConnection.
+
+import asyncio
+import os
+import random
+import tempfile
+from typing import List
+
+import click
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.memory_trace import (
+    CxlMemTraceTarget,
+    MemoryTraceRecorder,
+    MemoryTraceReplayer,
+    read_memory_trace,
+)
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+from opencis.util.workload_report import WorkloadReport
+
+HPA_BASE = 0x100000000
+CACHELINE_SIZE = 64
+LINES = 256
+
+
+def _print(name: str, report: WorkloadReport):
+    print(
+        f"{name:22s}: {report.get_ops_per_sec():8.1f} ops/s, "
+        f"p50 {report.get_latency_percentile(50) * 1e6:8.1f} us, "
+        f"p99 {report.get_latency_percentile(99) * 1e6:8.1f} us, "
+        f"{report.failures} failed, {report.mismatches} diverged"
+    )
+
+
+async def _run(accesses: int, think_time: float, queue_depths: List[int], memory_dir: str):
+    connection = CxlConnection()
+    recorder = MemoryTraceRecorder()
+    root_port_device = CxlRootPortDevice(
+        downstream_connection=connection, label="Port0", trace_recorder=recorder
+    )
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file=os.path.join(memory_dir, "mem.bin"),
+        serial_number="0000000000000001",
+        test_mode=True,
+        cxl_connection=connection,
+    )
+    task = asyncio.create_task(device.run())
+    await device.wait_for_ready()
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    await root_port_device.configure_hdm_decoder_single_device(info, HPA_BASE)
+
+    rng = random.Random(0)
+    written = set()
+    for index in range(accesses):
+        line = rng.randrange(LINES)
+        address = HPA_BASE + line * CACHELINE_SIZE
+        if line in written and rng.random() < 0.5:
+            await root_port_device.cxl_mem_read(address)
+        else:
+            await root_port_device.cxl_mem_write(address, address ^ index)
+            written.add(line)
+        if index % 2:
+            await asyncio.sleep(think_time)
+
+    trace_file = os.path.join(memory_dir, "port0.trace")
+    recorder.save(trace_file)
+    with open(trace_file, "rb") as file:
+        records = list(read_memory_trace(file))
+    recorded = (records[-1].timestamp - records[0].timestamp) / 1e9
+    print(
+        f"recorded {len(records)} accesses in {recorded:.3f} s, "
+        f"{os.path.getsize(trace_file) / len(records):.1f} bytes per record"
+    )
+
+    replayer = MemoryTraceReplayer(
+        {root_port_device.get_message_label(): CxlMemTraceTarget(root_port_device)}
+    )
+    for speed in (1, 4):
+        _print(f"open loop, {speed}x", await replayer.replay_open_loop(records, speed=speed))
+    for queue_depth in queue_depths:
+        report = await replayer.replay_closed_loop(records, queue_depth=queue_depth)
+        _print(f"closed loop, depth {queue_depth}", report)
+
+    await device.stop()
+    await task
+
+
+@click.command()
+@click.option("--accesses", default=1000, help="Accesses to record")
+@click.option("--think-time-us", default=2000, help="Idle time after every other access")
+@click.option("--queue-depths", "queue_depths", default=[1, 8], multiple=True)
+def main(accesses: int, think_time_us: int, queue_depths: List[int]):
+    logger.set_stdout_levels(loglevel="WARNING")
+    with tempfile.TemporaryDirectory() as memory_dir:
+        asyncio.run(_run(accesses, think_time_us * 1e-6, queue_depths, memory_dir))
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -0,0 +1,150 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+# Cost and output of transaction tracing: nanoseconds per span while the
+# transaction is untraced and traced, then CXL.mem writes and reads per second
+# from a root port to an SLD at several sample rates. The root port and the SLD
+# talk over a TCP link through a pair of CxlPacketProcessors in this process, so
+# traces cross the link the way they cross a switch port. Spans of the last run
+# are summarized per component and saved as Chrome trace-event JSON.
+
+import asyncio
+import os
+import tempfile
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+import click
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.common import CXL_COMPONENT_TYPE
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.cxl_packet_processor import CxlPacketProcessor
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.util.logger import logger
+from opencis.util.number_const import MB
+from opencis.util.tracing import Tracer, tracer
+
+HPA_BASE = 0x100000000
+PORT = 8840
+
+
+def _time_spans(iterations: int):
+    local_tracer = Tracer(max_spans=iterations)
+    start = perf_counter()
+    for _ in range(iterations):
+        with local_tracer.span("read", "Accessor"):
+            pass
+    untraced_ns = (perf_counter() - start) / iterations * 1e9
+    local_tracer.enable()
+    with local_tracer.trace("load", "Hub"):
+        start = perf_counter()
+        for _ in range(iterations):
+            with local_tracer.span("read", "Accessor"):
+                pass
+        traced_ns = (perf_counter() - start) / iterations * 1e9
+    print(f"span: untraced {untraced_ns:6.1f} ns, traced {traced_ns:6.1f} ns")
+
+
+async def _run_accesses(accesses: int, memory_dir: str) -> float:
+    host_connection = CxlConnection()
+    device_connection = CxlConnection()
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def handle_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    server = await asyncio.start_server(handle_client, "127.0.0.1", PORT)
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    processors = [
+        CxlPacketProcessor(reader, writer, host_connection, CXL_COMPONENT_TYPE.R, label="Port0"),
+        CxlPacketProcessor(
+            *(await accepted), device_connection, CXL_COMPONENT_TYPE.D2, label="SLD0"
+        ),
+    ]
+    root_port_device = CxlRootPortDevice(downstream_connection=host_connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file=os.path.join(memory_dir, "mem.bin"),
+        serial_number="0000000000000001",
+        test_mode=True,
+        cxl_connection=device_connection,
+    )
+    tasks = [asyncio.create_task(component.run()) for component in (*processors, device)]
+    for component in (*processors, device):
+        await component.wait_for_ready()
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    await root_port_device.configure_hdm_decoder_single_device(info, HPA_BASE)
+
+    start = perf_counter()
+    for index in range(accesses):
+        address = HPA_BASE + (index % 1024) * 64
+        await root_port_device.cxl_mem_write(address, index)
+        await root_port_device.cxl_mem_read(address)
+    elapsed = perf_counter() - start
+
+    await device.stop()
+    for processor in processors:
+        await processor.stop()
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    await asyncio.gather(*tasks)
+    return accesses * 2 / elapsed
+
+
+def _print_breakdown():
+    durations: Dict[Tuple[str, str], List[int]] = {}
+    for span in tracer.get_spans():
+        component = span.component.split(":")[0]
+        durations.setdefault((component, span.name), []).append(span.end - span.start)
+    for (component, name), values in sorted(durations.items()):
+        values.sort()
+        print(
+            f"  {component:20s} {name:14s}: {len(values):6d} spans, "
+            f"p50 {values[len(values) // 2] / 1000:8.1f} us, "
+            f"p99 {values[len(values) * 99 // 100] / 1000:8.1f} us"
+        )
+
+
+@click.command()
+@click.option("--iterations", default=200000, help="Spans to time")
+@click.option("--accesses", default=2000, help="CXL.mem write/read pairs per run")
+@click.option("--runs", default=3, help="Runs per setting; the best is reported")
+@click.option(
+    "--sample-rates", "sample_rates", type=float, default=[0, 0.01, 0.1, 1], multiple=True
+)
+@click.option("--trace-file", default="transaction_trace.json", help="Chrome trace output")
+def main(iterations: int, accesses: int, runs: int, sample_rates: List[float], trace_file: str):
+    logger.set_stdout_levels(loglevel="WARNING")
+    _time_spans(iterations)
+    with tempfile.TemporaryDirectory() as memory_dir:
+        for sample_rate in sample_rates:
+            if sample_rate:
+                tracer.enable(sample_rate)
+            else:
+                tracer.disable()
+            rates = []
+            for _ in range(runs):
+                tracer.reset()
+                rates.append(asyncio.run(_run_accesses(accesses, memory_dir)))
+            traces = len({span.trace_id for span in tracer.get_spans()})
+            print(
+                f"sample rate {sample_rate:5g}: {max(rates):8.1f} CXL.mem ops/s, "
+                f"{traces} traces, {len(tracer.get_spans())} spans in the last run"
+            )
+    _print_breakdown()
+    tracer.save(trace_file)
+    print(f"saved {trace_file}")
+    tracer.disable()
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    main()
@@ -27,7 +27,7 @@ from torchinfo import summary
 from tqdm.auto import tqdm
 
 from opencis.util.logger import logger
-from opencis.util.number import split_int
+from opencis.util.number import payload_to_bytes
 from opencis.cxl.device.cxl_type1_device import CxlType1Device, CxlType1DeviceConfig
 from opencis.cxl.device.cxl_type2_device import (
     CxlType2Device,
@@ -241,11 +241,8 @@ class MyType1Accelerator(RunnableComponent):
             logger.debug(self._create_message(f"addr: 0x{metadata_addr:x}"))
             logger.debug(self._create_message(f"end: 0x{metadata_end:x}"))
 
-            start = metadata_addr
-            end = metadata_addr + metadata_rounded_size
-            data = b""
             with tqdm(
-                total=metadata_size,
+                total=metadata_rounded_size,
                 desc=f"Dev {self._device_id} Reading Metadata",
                 unit="iB",
                 unit_scale=True,
@@ -253,13 +250,10 @@ class MyType1Accelerator(RunnableComponent):
                 position=self._device_id,
                 leave=False,
             ) as pbar:
-                for cacheline_offset in range(start, end, 64):
-                    cacheline = await self._cxl_type1_device.cxl_cache_readline(cacheline_offset)
-                    chunk_size = min(64, (metadata_end - cacheline_offset))
-                    chunk_data = cacheline.to_bytes(64, "little")
-                    data = chunk_data[:chunk_size]
-                    md_file.write(data)
-                    pbar.update(chunk_size)
+                data = await self._cxl_type1_device.cxl_cache_read(
+                    metadata_addr, metadata_rounded_size, progress=pbar.update
+                )
+            md_file.write(memoryview(data)[:metadata_size])
 
         logger.info(self._create_message(f"Dev {self._device_id} Finished writing file"))
 
@@ -270,13 +264,11 @@ class MyType1Accelerator(RunnableComponent):
         image_addr = await self._cxl_type1_device.read_mmio(image_addr_mmio_addr, 8)
         image_size = await self._cxl_type1_device.read_mmio(image_size_mmio_addr, 8)
 
-        image_end = image_addr + image_size
-
         im = None
 
         imgbuf = BytesIO()
-        cacheline = await self._cxl_type1_device.cxl_cache_read(image_addr, image_end)
-        imgbuf.write(cacheline)
+        image = await self._cxl_type1_device.cxl_cache_read(image_addr, image_size)
+        imgbuf.write(image)
 
         im = Image.open(imgbuf).convert("RGB")
 
@@ -302,13 +294,11 @@ class MyType1Accelerator(RunnableComponent):
         json_asenc = str.encode(json.dumps(pred_kv))
         bytes_size = len(json_asenc)
 
-        json_asint = int.from_bytes(json_asenc, "little")
-
         RESULTS_HPA = 0x900  # Arbitrarily chosen
 
         rounded_bytes_size = (((bytes_size - 1) // 64) + 1) * 64
         await self._cxl_type1_device.cxl_cache_write(
-            RESULTS_HPA, max(64, rounded_bytes_size), json_asint
+            RESULTS_HPA, max(64, rounded_bytes_size), json_asenc
         )
 
         HOST_VECTOR_ADDR = 0x1820
@@ -608,7 +598,6 @@ class MyType2Accelerator(RunnableComponent):
         with open("noisy_imagenette.csv", "wb") as md_file:
             logger.debug(self._create_message(f"addr: 0x{metadata_addr:x}"))
             logger.debug(self._create_message(f"end: 0x{metadata_end:x}"))
-            curr_written = 0
             with tqdm(
                 total=metadata_size,
                 desc=f"Dev {self._device_id} Reading Metadata",
@@ -618,11 +607,10 @@ class MyType2Accelerator(RunnableComponent):
                 position=self._device_id,
                 leave=False,
             ) as pbar:
-                for offset in range(0, metadata_size, 64):
-                    data = await self._cxl_type2_device.read_mem_dpa(metadata_addr + offset, 64)
-                    curr_written += 64
-                    md_file.write(data.to_bytes(64, byteorder="little"))
-                    pbar.update(64)
+                data = await self._cxl_type2_device.read_mem_dpa_range(
+                    metadata_addr, metadata_size, progress=pbar.update
+                )
+                md_file.write(data)
 
     async def _get_test_image(self) -> Image.Image:
         logger.debug(self._create_message("Getting test image"))
@@ -630,16 +618,10 @@ class MyType2Accelerator(RunnableComponent):
         image_size_mmio_addr = 0x1818
         image_addr = await self._cxl_type2_device.read_mmio(image_addr_mmio_addr, 8)
         image_size = await self._cxl_type2_device.read_mmio(image_size_mmio_addr, 8)
-        end = image_addr + image_size
 
         im = None
         with BytesIO() as imgbuf:
-            for addr in range(image_addr, image_addr + image_size + 64, 64):
-                data = await self._cxl_type2_device.read_mem_dpa(addr, 64)
-                chunk_size = min(64, (end - addr))
-                chunk_data = data.to_bytes(64, "little")
-                chunk_data = chunk_data[:chunk_size]
-                imgbuf.write(chunk_data)
+            imgbuf.write(await self._cxl_type2_device.read_mem_dpa_range(image_addr, image_size))
             im = Image.open(imgbuf).convert("RGB")
         return im
 
@@ -664,15 +646,11 @@ class MyType2Accelerator(RunnableComponent):
         json_asenc = str.encode(json.dumps(pred_kv))
         bytes_size = len(json_asenc)
 
-        json_asint = int.from_bytes(json_asenc, "little")
         RESULTS_OFFSET = 0x900  # Arbitrarily chosen
         rounded_bytes_size = math.ceil(bytes_size / 64) * 64
-        curr_written = 0
-        while curr_written < rounded_bytes_size:
-            chunk = json_asint & ((1 << (64 * 8)) - 1)
-            await self._cxl_type2_device.write_mem_dpa(RESULTS_OFFSET + curr_written, chunk, 64)
-            json_asint >>= 64 * 8
-            curr_written += 64
+        await self._cxl_type2_device.write_mem_dpa_range(
+            RESULTS_OFFSET, payload_to_bytes(json_asenc, rounded_bytes_size)
+        )
 
         HOST_VECTOR_ADDR = 0x1820
         HOST_VECTOR_SIZE = 0x1828
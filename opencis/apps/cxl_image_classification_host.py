@@ -17,6 +17,7 @@ from tqdm.auto import tqdm, trange
 
 from opencis.cxl.component.common import CXL_COMPONENT_TYPE
 from opencis.util.logger import logger
+from opencis.util.number import Payload, payload_to_bytes
 from opencis.cxl.transport.memory_fifo import (
     MemoryFifoPair,
 )
@@ -97,8 +98,7 @@ class HostTrainIoGen(RunnableComponent):
 
     # pylint: disable=duplicate-code
     async def load(self, address: int, size: int, prog_bar: bool = False) -> bytes:
-        end = address + size
-        result = b""
+        buffer = bytearray(size)
         with tqdm(
             total=size,
             desc="Reading Data",
@@ -107,15 +107,12 @@ class HostTrainIoGen(RunnableComponent):
             unit_divisor=1024,
             disable=not prog_bar,
         ) as pbar:
-            for cacheline_offset in range(address, address + size, 64):
-                cacheline = await self._cache_controller.cache_coherent_load(cacheline_offset, 64)
-                chunk_size = min(64, (end - cacheline_offset))
-                chunk_data = cacheline.to_bytes(64, "little")
-                result += chunk_data[:chunk_size]
-                pbar.update(chunk_size)
-        return result
-
-    async def store(self, address: int, size: int, value: int, prog_bar: bool = False):
+            await self._cache_controller.cache_coherent_load_into(
+                address, buffer, progress=pbar.update
+            )
+        return bytes(buffer)
+
+    async def store(self, address: int, size: int, value: Payload, prog_bar: bool = False):
         if address % 64 != 0 or size % 64 != 0:
             raise Exception("Size and address must be aligned to 64!")
 
@@ -127,16 +124,9 @@ class HostTrainIoGen(RunnableComponent):
             unit_divisor=1024,
             disable=not prog_bar,
         ) as pbar:
-            chunk_count = 0
-            while size > 0:
-                low_64_byte = value & ((1 << (64 * 8)) - 1)
-                await self._cache_controller.cache_coherent_store(
-                    address + (chunk_count * 64), 64, low_64_byte
-                )
-                size -= 64
-                chunk_count += 1
-                value >>= 64 * 8
-                pbar.update(64)
+            await self._cache_controller.cache_coherent_store_from(
+                address, payload_to_bytes(value, size), progress=pbar.update
+            )
 
     async def write_config(self, bdf: int, offset: int, size: int, value: int):
         await self._root_complex.write_config(bdf, offset, size, value)
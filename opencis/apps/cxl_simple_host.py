@@ -6,6 +6,7 @@
 """
 
 import asyncio
+from typing import Dict
 import jsonrpcclient
 from jsonrpcclient import parse_json, request_json
 import websockets
@@ -176,7 +177,8 @@ class CxlHostUtilClient:
         self._uri = f"ws://{host}:{port}"
 
     async def _process_cmd(self, cmd: str) -> str:
-        async with websockets.connect(self._uri) as ws:
+        # Profiles can be larger than the default 1 MiB message limit
+        async with websockets.connect(self._uri, max_size=None) as ws:
             logger.debug(f"Issuing: {cmd}")
             await ws.send(str(cmd))
             resp = await ws.recv()
@@ -211,6 +213,18 @@ class CxlHostUtilClient:
         )
         return await self._process_cmd(cmd)
 
+    async def get_metrics(self, prefix: str = "") -> Dict:
+        cmd = request_json("UTIL_GET_METRICS", params={"prefix": prefix})
+        return await self._process_cmd(cmd)
+
+    async def start_profile(self, interval: float = None) -> float:
+        cmd = request_json("UTIL_START_PROFILE", params={"interval": interval})
+        return await self._process_cmd(cmd)
+
+    async def stop_profile(self, profile_format: str = "collapsed") -> Dict:
+        cmd = request_json("UTIL_STOP_PROFILE", params={"profile_format": profile_format})
+        return await self._process_cmd(cmd)
+
     async def reinit(self, port: int, hpa_base: int = None) -> str:
         logger.info(f"CXL-Host[Port{port}]: Start CXL-Host Reinit")
         cmd = request_json("UTIL_REINIT", params={"port": port, "hpa_base": hpa_base})
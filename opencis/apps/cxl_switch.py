@@ -185,7 +185,10 @@ class CxlSwitch(RunnableComponent):
             create_task(self._switch_connection_manager.stop()),
             create_task(self._physical_port_manager.stop()),
             create_task(self._virtual_switch_manager.stop()),
-            create_task(self._mctp_connection_client.stop()),
-            create_task(self._mctp_cci_executor.stop()),
         ]
+        if self._start_mctp:
+            stop_tasks += [
+                create_task(self._mctp_connection_client.stop()),
+                create_task(self._mctp_cci_executor.stop()),
+            ]
         await gather(*stop_tasks)
@@ -13,7 +13,7 @@ from opencis.util.component import RunnableComponent
 from opencis.cxl.device.cxl_type3_device import CxlType3Device, CXL_T3_DEV_TYPE
 from opencis.cxl.component.switch_connection_client import SwitchConnectionClient
 from opencis.cxl.component.cxl_component import CXL_COMPONENT_TYPE
-from opencis.cxl.component.cxl_packet_processor import FifoGroup
+from opencis.cxl.component.mld_dispatcher import MldDispatcher
 
 
 class MultiLogicalDevice(RunnableComponent):
@@ -28,6 +28,7 @@ class MultiLogicalDevice(RunnableComponent):
         port: int = 8000,
         test_mode: bool = False,
         cxl_connections: List[CxlConnection] = None,
+        io_threads: int = 0,
     ):
         label = f"Port{port_index}"
         super().__init__(label)
@@ -58,25 +59,22 @@ class MultiLogicalDevice(RunnableComponent):
             )
             self._cxl_connections = self._sw_conn_client.get_cxl_connection()
 
-        base_outgoing = FifoGroup(
-            self._cxl_connections[0].cfg_fifo.target_to_host,
-            self._cxl_connections[0].mmio_fifo.target_to_host,
-            self._cxl_connections[0].cxl_mem_fifo.target_to_host,
-            self._cxl_connections[0].cxl_cache_fifo.target_to_host,
-            self._cxl_connections[0].cci_fifo.target_to_host,
-        )
+        base_connection = self._cxl_connections[0]
 
-        # Share the outgoing queue across multiple LDs
+        # Share the FIFOs across multiple LDs: the dispatcher consumes the incoming
+        # ones and routes by LD-ID, and every LD writes to the outgoing ones
         # TODO: avoid creation at all
-        if ld_count > 1:
-            for i in range(1, ld_count):
-                connection = self._cxl_connections[i]
-                connection.cfg_fifo.target_to_host = base_outgoing.cfg_space
-                connection.mmio_fifo.target_to_host = base_outgoing.mmio
-                connection.cxl_mem_fifo.target_to_host = base_outgoing.cxl_mem
-                connection.cxl_cache_fifo.target_to_host = base_outgoing.cxl_cache
-                connection.cci_fifo.target_to_host = base_outgoing.cci_fifo
-
+        for connection in self._cxl_connections[1:]:
+            connection.cfg_fifo.host_to_target = base_connection.cfg_fifo.host_to_target
+            connection.mmio_fifo.host_to_target = base_connection.mmio_fifo.host_to_target
+            connection.cxl_mem_fifo.host_to_target = base_connection.cxl_mem_fifo.host_to_target
+            connection.cfg_fifo.target_to_host = base_connection.cfg_fifo.target_to_host
+            connection.mmio_fifo.target_to_host = base_connection.mmio_fifo.target_to_host
+            connection.cxl_mem_fifo.target_to_host = base_connection.cxl_mem_fifo.target_to_host
+            connection.cxl_cache_fifo.target_to_host = base_connection.cxl_cache_fifo.target_to_host
+            connection.cci_fifo.target_to_host = base_connection.cci_fifo.target_to_host
+
+        self._dispatcher = MldDispatcher(base_connection, label=label)
         for ld in range(ld_count):
             cxl_type3_device = CxlType3Device(
                 transport_connection=self._cxl_connections[ld],
@@ -85,13 +83,15 @@ class MultiLogicalDevice(RunnableComponent):
                 serial_number=serial_numbers[ld],
                 dev_type=CXL_T3_DEV_TYPE.MLD,
                 label=label,
+                io_threads=io_threads,
             )
             self._cxl_type3_devices.append(cxl_type3_device)
+            self._dispatcher.set_ld_handlers(ld, cxl_type3_device.get_packet_handlers())
 
     async def _run(self):
-        # pylint: disable=duplicate-code
-        run_tasks = [create_task(device.run()) for device in self._cxl_type3_devices]
-        wait_tasks = [create_task(device.wait_for_ready()) for device in self._cxl_type3_devices]
+        # The LDs have no tasks of their own; the dispatcher calls into them
+        run_tasks = [create_task(self._dispatcher.run())]
+        wait_tasks = [create_task(self._dispatcher.wait_for_ready())]
         if not self._test_mode:
             run_tasks += [create_task(self._sw_conn_client.run())]
             wait_tasks += [create_task(self._sw_conn_client.wait_for_ready())]
@@ -101,8 +101,10 @@ class MultiLogicalDevice(RunnableComponent):
         await gather(*run_tasks)
 
     async def _stop(self):
-        stop_tasks = [create_task(device.stop()) for device in self._cxl_type3_devices]
+        stop_tasks = [create_task(self._dispatcher.stop())]
         if not self._test_mode:
             stop_tasks += [create_task(self._sw_conn_client.stop())]
 
         await gather(*stop_tasks)
+        # The LDs are not run on their own, so release their memory here
+        await gather(*(cxl_type3_device.close() for cxl_type3_device in self._cxl_type3_devices))
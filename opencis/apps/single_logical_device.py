@@ -24,6 +24,7 @@ class SingleLogicalDevice(RunnableComponent):
         port_index: int = -1,
         test_mode: bool = False,
         cxl_connection=None,
+        io_threads: int = 0,
     ):
         label = f"Port{port_index}"
         super().__init__(label)
@@ -52,6 +53,7 @@ class SingleLogicalDevice(RunnableComponent):
             serial_number=serial_number,
             dev_type=CXL_T3_DEV_TYPE.SLD,
             label=label,
+            io_threads=io_threads,
         )
 
     async def _run(self):
@@ -38,8 +38,15 @@ async def run_devices(accels: List[MyType1Accelerator | MyType2Accelerator]):
 def start_group(config_file, dev_type):
     logger.info(f"Starting CXL Accelerator Group - Config: {config_file}")
     cxl_env = parse_cxl_environment(config_file)
+    if dev_type == ACCEL_TYPE.T1:
+        device_configs = cxl_env.type1_accelerator_configs
+    else:
+        device_configs = cxl_env.type2_accelerator_configs
+    if not cxl_env.type1_accelerator_configs and not cxl_env.type2_accelerator_configs:
+        # Environments without accelerator entries run one on every device port
+        device_configs = cxl_env.logical_device_configs
     accels = []
-    for device_config in cxl_env.logical_device_configs:
+    for device_config in device_configs:
         if dev_type == ACCEL_TYPE.T1:
             accel = MyType1Accelerator(
                 port_index=device_config.port_index,
@@ -5,6 +5,7 @@
  See LICENSE for details.
 """
 
+import atexit
 import click
 import os
 import sys
@@ -13,33 +14,34 @@ import logging
 
 from importlib import import_module
 from opencis.util.logger import logger
-from opencis.bin import fabric_manager
-from opencis.bin import get_info
-from opencis.bin import cxl_switch
-from opencis.bin import single_logical_device as sld
-from opencis.bin import multi_logical_device as mld
-from opencis.bin import cxl_host
-from opencis.bin import mem
-
-
-@click.group()
+from opencis.util.metrics import metrics
+from opencis.util.profiler import profiler
+from opencis.util.tracing import tracer
+from opencis.bin.common import COMPONENT_MODULES, LazyGroup
+
+
+# Component modules pull in socketio, aiohttp, jsonrpc and torch, so command
+# groups are imported on first use instead of at startup.
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "host": "opencis.bin.cxl_host:host_group",
+        "fm": "opencis.bin.fabric_manager:fabric_manager_group",
+        "get-info": "opencis.bin.get_info:get_info_group",
+        "mem": "opencis.bin.mem:mem_group",
+        "pcap": "opencis.bin.pcap:pcap_group",
+        "profile": "opencis.bin.profile:profile_group",
+        "profile-startup": "opencis.bin.profile_startup:profile_startup",
+        "stats": "opencis.bin.stats:stats",
+        "topology": "opencis.bin.topology:topology_group",
+    },
+)
 def cli():
     pass
 
 
 def validate_component(ctx, param, components):
-    valid_components = [
-        "fm",
-        "switch",
-        "host",
-        "host-group",
-        "sld",
-        "sld-group",
-        "mld",
-        "mld-group",
-        "t1accel-group",
-        "t2accel-group",
-    ]
+    valid_components = list(COMPONENT_MODULES)
     if "all" in components:
         return ("fm", "switch", "host-group", "sld-group", "mld-group")
     for c in components:
@@ -75,6 +77,19 @@ def validate_log_level(ctx, param, level):
 @click.option("--show-timestamp", is_flag=True, default=False, help="Show timestamp.")
 @click.option("--show-loglevel", is_flag=True, default=False, help="Show log level.")
 @click.option("--show-linenumber", is_flag=True, default=False, help="Show line number.")
+@click.option("--metrics", "enable_metrics", is_flag=True, default=False, help="Collect metrics.")
+@click.option("--trace-file", help="<Trace File> output path, in Chrome trace-event JSON.")
+@click.option(
+    "--trace-sample-rate", type=float, default=1.0, help="Fraction of transactions to trace."
+)
+@click.option(
+    "--profile",
+    "profile_file",
+    help="<Profile File> output path; speedscope JSON if it ends in .json, else collapsed stacks.",
+)
+@click.option(
+    "--profile-interval", type=float, default=0.01, help="Seconds between profiler samples."
+)
 def start(
     ctx,
     comp,
@@ -86,6 +101,11 @@ def start(
     show_timestamp,
     show_loglevel,
     show_linenumber,
+    enable_metrics,
+    trace_file,
+    trace_sample_rate,
+    profile_file,
+    profile_interval,
 ):
     """Start components"""
 
@@ -112,6 +132,21 @@ def start(
             show_linenumber=show_linenumber,
         )
 
+    if enable_metrics:
+        # Before any component is created, as components look their metrics up then
+        metrics.enable()
+
+    if trace_file:
+        tracer.enable(trace_sample_rate)
+        # Runs once the component threads have exited
+        atexit.register(tracer.save, trace_file)
+
+    if profile_file:
+        profiler.start(profile_interval)
+        # atexit runs its functions last in, first out: stop sampling, then save
+        atexit.register(profiler.save, profile_file)
+        atexit.register(profiler.stop)
+
     threads = []
     if pcap_file:
         from multiprocessing import Process
@@ -120,61 +155,71 @@ def start(
         pcap_proc.start()
 
     if "fm" in comp:
-        t_fm = threading.Thread(target=start_fabric_manager, args=(ctx,))
+        t_fm = threading.Thread(target=start_fabric_manager, args=(ctx,), name="fm")
         threads.append(t_fm)
         t_fm.start()
 
     if "switch" in comp:
-        t_switch = threading.Thread(target=start_switch, args=(ctx, config_file))
+        t_switch = threading.Thread(target=start_switch, args=(ctx, config_file), name="switch")
         threads.append(t_switch)
         t_switch.start()
 
     if "t1accel-group" in comp:
-        accel = import_module("opencis.bin.accelerator")
+        accel = import_module(COMPONENT_MODULES["t1accel-group"])
         t_at1group = threading.Thread(
-            target=start_accel_group, args=(ctx, config_file, accel.ACCEL_TYPE.T1)
+            target=start_accel_group,
+            args=(ctx, config_file, accel.ACCEL_TYPE.T1),
+            name="t1accel-group",
         )
         threads.append(t_at1group)
         t_at1group.start()
 
     if "t2accel-group" in comp:
-        accel = import_module("opencis.bin.accelerator")
+        accel = import_module(COMPONENT_MODULES["t2accel-group"])
         t_at2group = threading.Thread(
-            target=start_accel_group, args=(ctx, config_file, accel.ACCEL_TYPE.T2)
+            target=start_accel_group,
+            args=(ctx, config_file, accel.ACCEL_TYPE.T2),
+            name="t2accel-group",
         )
         threads.append(t_at2group)
         t_at2group.start()
 
     if "sld" in comp:
-        t_sld = threading.Thread(target=start_sld, args=(ctx,))
+        t_sld = threading.Thread(target=start_sld, args=(ctx,), name="sld")
         threads.append(t_sld)
         t_sld.start()
     if "sld-group" in comp:
-        t_sgroup = threading.Thread(target=start_sld_group, args=(ctx, config_file))
+        t_sgroup = threading.Thread(
+            target=start_sld_group, args=(ctx, config_file), name="sld-group"
+        )
         threads.append(t_sgroup)
         t_sgroup.start()
 
     if "mld" in comp:
-        t_mld = threading.Thread(target=start_mld, args=(ctx,))
+        t_mld = threading.Thread(target=start_mld, args=(ctx,), name="mld")
         threads.append(t_mld)
         t_mld.start()
     if "mld-group" in comp:
-        t_mgroup = threading.Thread(target=start_mld_group, args=(ctx, config_file))
+        t_mgroup = threading.Thread(
+            target=start_mld_group, args=(ctx, config_file), name="mld-group"
+        )
         threads.append(t_mgroup)
         t_mgroup.start()
 
     if "host" in comp or "host-group" in comp:
         hm_mode = False  # TODO: re-enable HostManager hm_mode = not no_hm
         if hm_mode:
-            t_hm = threading.Thread(target=start_host_manager, args=(ctx,))
+            t_hm = threading.Thread(target=start_host_manager, args=(ctx,), name="host-manager")
             threads.append(t_hm)
             t_hm.start()
         if "host" in comp:
-            t_host = threading.Thread(target=start_host, args=(ctx,))
+            t_host = threading.Thread(target=start_host, args=(ctx,), name="host")
             threads.append(t_host)
             t_host.start()
         elif "host-group" in comp:
-            t_hgroup = threading.Thread(target=start_host_group, args=(ctx, config_file, hm_mode))
+            t_hgroup = threading.Thread(
+                target=start_host_group, args=(ctx, config_file, hm_mode), name="host-group"
+            )
             threads.append(t_hgroup)
             t_hgroup.start()
 
@@ -215,43 +260,52 @@ def start_capture(ctx, pcap_file):
 
 
 def start_host_manager(ctx):
+    cxl_simple_host = import_module("opencis.bin.cxl_simple_host")
     ctx.invoke(cxl_simple_host.start_host_manager)
 
 
 def start_fabric_manager(ctx):
+    fabric_manager = import_module(COMPONENT_MODULES["fm"])
     ctx.invoke(fabric_manager.start)
 
 
 def start_switch(ctx, config_file):
+    cxl_switch = import_module(COMPONENT_MODULES["switch"])
     ctx.invoke(cxl_switch.start, config_file=config_file)
 
 
 def start_host(ctx):
+    cxl_host = import_module(COMPONENT_MODULES["host"])
     ctx.invoke(cxl_host.start)
 
 
 def start_host_group(ctx, config_file, hm_mode):
+    cxl_host = import_module(COMPONENT_MODULES["host-group"])
     ctx.invoke(cxl_host.start_group, config_file=config_file, hm_mode=hm_mode)
 
 
-def start_sld(ctx, config_file):
-    ctx.invoke(sld.start, config_file=config_file)
+def start_sld(ctx):
+    sld = import_module(COMPONENT_MODULES["sld"])
+    ctx.invoke(sld.start)
 
 
 def start_sld_group(ctx, config_file):
+    sld = import_module(COMPONENT_MODULES["sld-group"])
     ctx.invoke(sld.start_group, config_file=config_file)
 
 
-def start_mld(ctx, config_file):
-    ctx.invoke(mld.start, config_file=config_file)
+def start_mld(ctx):
+    mld = import_module(COMPONENT_MODULES["mld"])
+    ctx.invoke(mld.start)
 
 
 def start_mld_group(ctx, config_file):
+    mld = import_module(COMPONENT_MODULES["mld-group"])
     ctx.invoke(mld.start_group, config_file=config_file)
 
 
 def start_accel_group(ctx, config_file, dev_type):
-    accel = import_module("opencis.bin.accelerator")
+    accel = import_module(COMPONENT_MODULES["t1accel-group"])
     ctx.invoke(accel.start_group, config_file=config_file, dev_type=dev_type)
 
 
@@ -261,10 +315,5 @@ def foo():
     pass
 
 
-cli.add_command(cxl_host.host_group)
-cli.add_command(fabric_manager.fabric_manager_group)
-cli.add_command(get_info.get_info_group)
-cli.add_command(mem.mem_group)
-
 if __name__ == "__main__":
     cli()
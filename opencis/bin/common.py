@@ -5,6 +5,9 @@
  See LICENSE for details.
 """
 
+from importlib import import_module
+from typing import Dict
+
 import click
 
 from opencis.util.logger import logger
@@ -24,3 +27,45 @@ class BasedInt(click.ParamType):
 
 
 BASED_INT = BasedInt()
+
+# Entry module for each component that `start` can launch. They are imported
+# only when the component is selected.
+COMPONENT_MODULES = {
+    "fm": "opencis.bin.fabric_manager",
+    "switch": "opencis.bin.cxl_switch",
+    "host": "opencis.bin.cxl_host",
+    "host-group": "opencis.bin.cxl_host",
+    "sld": "opencis.bin.single_logical_device",
+    "sld-group": "opencis.bin.single_logical_device",
+    "mld": "opencis.bin.multi_logical_device",
+    "mld-group": "opencis.bin.multi_logical_device",
+    "t1accel-group": "opencis.bin.accelerator",
+    "t2accel-group": "opencis.bin.accelerator",
+}
+
+
+class LazyGroup(click.Group):
+    """
+    click.Group whose subcommands are given as "module:attribute" paths and only
+    imported when invoked, so that listing or running one command group does not
+    pay the import cost of every other component.
+    """
+
+    def __init__(self, *args, lazy_subcommands: Dict[str, str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx):
+        return sorted(super().list_commands(ctx) + list(self.lazy_subcommands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_subcommands:
+            return self._lazy_load(cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _lazy_load(self, cmd_name):
+        module_name, attr_name = self.lazy_subcommands[cmd_name].split(":")
+        cmd_object = getattr(import_module(module_name), attr_name)
+        if not isinstance(cmd_object, click.BaseCommand):
+            raise ValueError(f"Lazy loading of {cmd_name} failed: not a click command")
+        return cmd_object
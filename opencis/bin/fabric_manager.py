@@ -9,7 +9,6 @@ import asyncio
 import click
 
 from opencis.util.logger import logger
-from opencis.apps.fabric_manager import CxlFabricManager
 from opencis.bin import socketio_client
 from opencis.bin.common import BASED_INT
 
@@ -25,6 +24,9 @@ def fabric_manager_group():
 @click.option("--use-test-runner", is_flag=True, help="Run with the test runner.")
 def start(use_test_runner):
     """Run the Fabric Manager."""
+    # The FM server stack is only needed here, not by the client subcommands
+    from opencis.apps.fabric_manager import CxlFabricManager
+
     logger.info(f"Starting CXL FabricManager")
     fabric_manager = CxlFabricManager(use_test_runner=use_test_runner)
     asyncio.run(fabric_manager.run())
@@ -2,7 +2,6 @@ import asyncio
 import click
 
 from opencis.util.logger import logger
-from opencis.apps.fabric_manager import CxlFabricManager
 from opencis.bin import socketio_client
 from opencis.bin.common import BASED_INT
 
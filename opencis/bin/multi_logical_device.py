@@ -43,6 +43,7 @@ def start_group(config_file):
             memory_sizes=device_config.memory_sizes,
             memory_files=device_config.memory_files,
             serial_numbers=device_config.serial_numbers,
+            io_threads=device_config.io_threads,
             host=cxl_env.switch_config.host,
             port=cxl_env.switch_config.port,
         )
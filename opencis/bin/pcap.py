@@ -0,0 +1,69 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import click
+
+from opencis.util.logger import logger
+from opencis.bin.common import BASED_INT
+from opencis.cxl.component.packet_capture import (
+    analyze_packet_capture,
+    decode_packet_capture,
+    get_host_streams,
+    replay_packet_capture,
+)
+
+
+@click.group(name="pcap")
+def pcap_group():
+    """Command group for offline analysis and replay of packet captures"""
+    pass
+
+
+@pcap_group.command(name="stats")
+@click.argument("pcap_file", nargs=1, type=click.Path(exists=True))
+@click.option("--port", multiple=True, type=BASED_INT, help="Only streams on these TCP ports.")
+def pcap_stats(pcap_file: str, port):
+    """Packet counts, bytes by opcode and completion latencies of a capture"""
+    streams = decode_packet_capture(pcap_file, set(port) if port else None)
+    for stream in streams:
+        if stream.undecoded or stream.stream.missing:
+            logger.info(
+                f"{stream.stream.src} -> {stream.stream.dst}: {len(stream.packets)} packets, "
+                f"{stream.undecoded} bytes not decoded, {stream.stream.missing} bytes missing"
+            )
+    for line in analyze_packet_capture(streams).format():
+        logger.info(line)
+
+
+@pcap_group.command(name="replay")
+@click.argument("pcap_file", nargs=1, type=click.Path(exists=True))
+@click.option("--switch-host", type=str, default="0.0.0.0", help="Host of the switch")
+@click.option("--switch-port", type=BASED_INT, default=8000, help="Port of the switch")
+@click.option("--speed", type=float, default=1.0, help="Replay speed over the recorded pace.")
+@click.option("--stream", "stream_index", type=int, help="Replay only this host stream.")
+@click.option("--timeout", type=float, default=10.0, help="Seconds to wait for completions.")
+def pcap_replay(
+    pcap_file: str,
+    switch_host: str,
+    switch_port: int,
+    speed: float,
+    stream_index: int,
+    timeout: float,
+):
+    """Re-inject the host-side packets of a capture into a switch"""
+    streams = get_host_streams(decode_packet_capture(pcap_file, {switch_port}))
+    if stream_index is not None:
+        streams = streams[stream_index : stream_index + 1]
+    if not streams:
+        logger.info("No host streams to replay")
+        return
+    stats = asyncio.run(
+        replay_packet_capture(streams, switch_host, switch_port, speed=speed, timeout=timeout)
+    )
+    for line in stats.format():
+        logger.info(line)
@@ -0,0 +1,85 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import time
+import click
+
+from opencis.util.logger import logger
+from opencis.util.profiler import get_profile_format, write_profile
+from opencis.apps.cxl_simple_host import CxlHostUtilClient
+from opencis.bin.common import BASED_INT
+
+
+@click.group(name="profile")
+def profile_group():
+    """Command group for sampling a running opencis process"""
+    pass
+
+
+def _stop_and_write(client: CxlHostUtilClient, output: str):
+    try:
+        result = asyncio.run(client.stop_profile(get_profile_format(output)))
+    except Exception as e:
+        logger.info(f"Failed to stop the profiler: {e}")
+        return
+    write_profile(output, result["profile"])
+    for line in result["summary"]:
+        click.echo(line)
+    logger.info(f"Profile saved to {output}")
+
+
+@profile_group.command(name="start")
+@click.option("--interval", type=float, default=None, help="Seconds between samples.")
+@click.option("--util-host", type=str, default="0.0.0.0", help="Host for util server")
+@click.option("--util-port", type=BASED_INT, default=8400, help="Port for util server")
+def start(interval: float, util_host: str, util_port: int):
+    """Start sampling every component thread"""
+    client = CxlHostUtilClient(host=util_host, port=util_port)
+    try:
+        interval = asyncio.run(client.start_profile(interval))
+    except Exception as e:
+        logger.info(f"Failed to start the profiler: {e}")
+        return
+    logger.info(f"Profiler started, sampling every {interval * 1000:g} ms")
+
+
+@profile_group.command(name="stop")
+@click.option(
+    "-o",
+    "--output",
+    default="opencis.collapsed",
+    help="Output path; speedscope JSON if it ends in .json, else collapsed stacks.",
+)
+@click.option("--util-host", type=str, default="0.0.0.0", help="Host for util server")
+@click.option("--util-port", type=BASED_INT, default=8400, help="Port for util server")
+def stop(output: str, util_host: str, util_port: int):
+    """Stop sampling and save the profile"""
+    _stop_and_write(CxlHostUtilClient(host=util_host, port=util_port), output)
+
+
+@profile_group.command(name="record")
+@click.option("--duration", type=float, default=10.0, help="Seconds to sample for.")
+@click.option("--interval", type=float, default=None, help="Seconds between samples.")
+@click.option(
+    "-o",
+    "--output",
+    default="opencis.collapsed",
+    help="Output path; speedscope JSON if it ends in .json, else collapsed stacks.",
+)
+@click.option("--util-host", type=str, default="0.0.0.0", help="Host for util server")
+@click.option("--util-port", type=BASED_INT, default=8400, help="Port for util server")
+def record(duration: float, interval: float, output: str, util_host: str, util_port: int):
+    """Sample every component thread for a while and save the profile"""
+    client = CxlHostUtilClient(host=util_host, port=util_port)
+    try:
+        asyncio.run(client.start_profile(interval))
+    except Exception as e:
+        logger.info(f"Failed to start the profiler: {e}")
+        return
+    time.sleep(duration)
+    _stop_and_write(client, output)
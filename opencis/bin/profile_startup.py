@@ -0,0 +1,219 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import click
+
+from opencis.util.logger import logger
+from opencis.util.component import RunnableComponent
+from opencis.bin.common import COMPONENT_MODULES
+
+# Components whose readiness can be measured in-process from an environment file
+READINESS_COMPONENTS = ("fm", "switch", "sld-group", "mld-group")
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def profile_imports(module_name: str) -> List[ImportRecord]:
+    """
+    Imports `module_name` in a fresh interpreter with `-X importtime` and returns
+    the import tree in the order the interpreter reports it (children first).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    records = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                name=stripped,
+                depth=(len(name) - len(stripped)) // 2,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+            )
+        )
+    return records
+
+
+def get_import_total_us(records: List[ImportRecord]) -> int:
+    return sum(record.cumulative_us for record in records if record.depth == 0)
+
+
+def format_import_tree(
+    records: List[ImportRecord], min_ms: float = 1.0, max_depth: Optional[int] = None
+) -> List[str]:
+    lines = []
+    # -X importtime lists a module after its children; reverse it to print parents first
+    for record in reversed(records):
+        if record.cumulative_us < min_ms * 1000:
+            continue
+        if max_depth is not None and record.depth > max_depth:
+            continue
+        indent = "  " * record.depth
+        lines.append(
+            f"{record.cumulative_us / 1000:9.1f} ms {record.self_us / 1000:9.1f} ms  "
+            f"{indent}{record.name}"
+        )
+    return lines
+
+
+def build_components(components, environment) -> List[Tuple[str, RunnableComponent]]:
+    """
+    Creates the runnable components that `start` would launch for `components`,
+    in dependency order (FM, switch, then devices).
+    """
+    # pylint: disable=import-outside-toplevel
+    built = []
+    if "fm" in components:
+        from opencis.apps.fabric_manager import CxlFabricManager
+
+        built.append(("fm", CxlFabricManager()))
+    if "switch" in components:
+        from opencis.apps.cxl_switch import CxlSwitch
+
+        switch = CxlSwitch(
+            environment.switch_config,
+            environment.logical_device_configs,
+            start_mctp="fm" in components,
+        )
+        built.append(("switch", switch))
+    if "sld-group" in components:
+        from opencis.apps.single_logical_device import SingleLogicalDevice
+
+        for device_config in environment.single_logical_device_configs:
+            sld = SingleLogicalDevice(
+                port_index=device_config.port_index,
+                memory_size=device_config.memory_size,
+                memory_file=device_config.memory_file,
+                serial_number=device_config.serial_number,
+                io_threads=device_config.io_threads,
+                host=environment.switch_config.host,
+                port=environment.switch_config.port,
+            )
+            built.append((f"sld[{device_config.port_index}]", sld))
+    if "mld-group" in components:
+        from opencis.apps.multi_logical_device import MultiLogicalDevice
+
+        for device_config in environment.multi_logical_device_configs:
+            mld = MultiLogicalDevice(
+                port_index=device_config.port_index,
+                ld_count=device_config.ld_count,
+                memory_sizes=device_config.memory_sizes,
+                memory_files=device_config.memory_files,
+                serial_numbers=device_config.serial_numbers,
+                io_threads=device_config.io_threads,
+                host=environment.switch_config.host,
+                port=environment.switch_config.port,
+            )
+            built.append((f"mld[{device_config.port_index}]", mld))
+    return built
+
+
+async def measure_readiness(
+    components: List[Tuple[str, RunnableComponent]], timeout: float = 10.0
+) -> Dict[str, Optional[float]]:
+    """
+    Runs all components concurrently and returns, per component, the seconds
+    from launch until it reported ready (None if it did not within `timeout`).
+    All components are stopped before returning.
+    """
+    readiness: Dict[str, Optional[float]] = {}
+    start = time.perf_counter()
+    run_tasks = [asyncio.create_task(component.run()) for _, component in components]
+
+    async def _wait(name: str, component: RunnableComponent):
+        try:
+            await asyncio.wait_for(component.wait_for_ready(), timeout)
+            readiness[name] = time.perf_counter() - start
+        except asyncio.TimeoutError:
+            readiness[name] = None
+
+    await asyncio.gather(*(_wait(name, component) for name, component in components))
+
+    # devices first, so that the switch and FM see clean disconnects
+    for name, component in reversed(components):
+        if readiness[name] is None:
+            continue
+        try:
+            await component.stop()
+        except Exception as e:
+            logger.debug(f"Failed to stop {name}: {e}")
+    for task in run_tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*run_tasks, return_exceptions=True)
+    return readiness
+
+
+@click.command(name="profile-startup")
+@click.option(
+    "-c",
+    "--comp",
+    multiple=True,
+    required=True,
+    type=click.Choice(list(COMPONENT_MODULES)),
+    help='Components. e.g. "-c switch -c sld-group"',
+)
+@click.option("--config-file", help="<Config File> input path, enables readiness measurement.")
+@click.option("--min-ms", type=float, default=1.0, show_default=True, help="Hide faster imports.")
+@click.option("--max-depth", type=int, default=None, help="Hide deeper imports.")
+@click.option("--timeout", type=float, default=10.0, show_default=True, help="Readiness timeout.")
+def profile_startup(comp, config_file, min_ms, max_depth, timeout):
+    """Report the import-time tree and readiness latency of components"""
+    modules = sorted({COMPONENT_MODULES[c] for c in comp})
+    for module_name in modules:
+        records = profile_imports(module_name)
+        total_ms = get_import_total_us(records) / 1000
+        logger.info(f"Cold import of {module_name}: {total_ms:.1f} ms")
+        logger.info(f"{'cumulative':>12} {'self':>12}  module")
+        for line in format_import_tree(records, min_ms, max_depth):
+            logger.info(line)
+
+    if not config_file:
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from opencis.cxl.environment import parse_cxl_environment
+
+    skipped = [c for c in comp if c not in READINESS_COMPONENTS]
+    if skipped:
+        logger.info(f"Readiness is not measured for {skipped}")
+    environment = parse_cxl_environment(config_file)
+    # keep the components' own start/stop messages out of the report
+    logger.set_stdout_levels(loglevel="WARNING")
+    try:
+        components = build_components(comp, environment)
+        readiness = asyncio.run(measure_readiness(components, timeout))
+    finally:
+        logger.set_stdout_levels()
+    for name, elapsed in readiness.items():
+        if elapsed is None:
+            logger.info(f"{name}: not ready after {timeout:.1f} s")
+        else:
+            logger.info(f"{name}: ready in {elapsed * 1000:.1f} ms")
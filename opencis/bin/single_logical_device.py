@@ -39,6 +39,7 @@ def start_group(config_file):
             memory_size=device_config.memory_size,
             memory_file=device_config.memory_file,
             serial_number=device_config.serial_number,
+            io_threads=device_config.io_threads,
             host=cxl_env.switch_config.host,
             port=cxl_env.switch_config.port,
         )
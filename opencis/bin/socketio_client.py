@@ -15,21 +15,24 @@ sio = socketio.AsyncClient()
 
 
 @sio.on("port:updated")
-def handle_port_updated():
+def handle_port_updated(data):
     print("[Notification]")
     print("port:updated")
+    print_result(data)
 
 
 @sio.on("vcs:updated")
-def handle_port_updated():
+def handle_vcs_updated(data):
     print("[Notification]")
-    print("port:updated")
+    print("vcs:updated")
+    print_result(data)
 
 
 @sio.on("device:updated")
-def handle_port_updated():
+def handle_device_updated(data):
     print("[Notification]")
     print("device:updated")
+    print_result(data)
 
 
 class CustomSemaphore(asyncio.Semaphore):
@@ -0,0 +1,38 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import json
+import click
+
+from opencis.util.logger import logger
+from opencis.util.metrics import format_metrics_snapshot
+from opencis.apps.cxl_simple_host import CxlHostUtilClient
+from opencis.bin.common import BASED_INT
+
+
+@click.command(name="stats")
+@click.option("--prefix", type=str, default="", help="Only metrics whose name starts with it.")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the raw snapshot.")
+@click.option("--util-host", type=str, default="0.0.0.0", help="Host for util server")
+@click.option("--util-port", type=BASED_INT, default=8400, help="Port for util server")
+def stats(prefix: str, as_json: bool, util_host: str, util_port: int):
+    """Show the metrics of a running opencis process (start it with --metrics)"""
+    client = CxlHostUtilClient(host=util_host, port=util_port)
+    try:
+        snapshot = asyncio.run(client.get_metrics(prefix))
+    except Exception as e:
+        logger.info(f"Failed to get metrics: {e}")
+        return
+    if as_json:
+        click.echo(json.dumps(snapshot, indent=2))
+        return
+    lines = format_metrics_snapshot(snapshot)
+    if not lines:
+        logger.info("No metrics recorded; is the process running with --metrics?")
+    for line in lines:
+        click.echo(line)
@@ -0,0 +1,96 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import time
+import click
+import humanfriendly
+
+from opencis.util.logger import logger
+from opencis.cxl.environment import (
+    generate_cxl_environment,
+    parse_cxl_environment,
+    save_cxl_environment,
+)
+from opencis.cxl.environment.generator import DEVICE_TYPES
+
+
+@click.group(name="topology")
+def topology_group():
+    """Command group for generating and checking environment files"""
+    pass
+
+
+def validate_device_types(ctx, param, device_types):
+    device_types = [device_type.strip() for device_type in device_types.split(",")]
+    for device_type in device_types:
+        if device_type not in DEVICE_TYPES:
+            raise click.BadParameter(f"Please select from {list(DEVICE_TYPES)}")
+    return device_types
+
+
+@topology_group.command(name="generate")
+@click.option("--vcs", "vcs_count", type=int, default=1, help="Number of virtual switches.")
+@click.option("--ports", "dsp_count", type=int, default=4, help="DSPs per virtual switch.")
+@click.option(
+    "--devices",
+    "device_types",
+    default="sld",
+    callback=validate_device_types,
+    help=f"Comma-separated device types cycled over the DSPs, from {','.join(DEVICE_TYPES)}.",
+)
+@click.option("--memory-size", default="256M", help="Memory per SLD, Type-2 device and LD.")
+@click.option("--ld-count", type=int, default=4, help="Logical devices per MLD.")
+@click.option("--switch-port", type=int, default=8000, help="Switch port for devices.")
+@click.option("--seed", type=int, default=0, help="Seed for serial numbers.")
+@click.option("-o", "--output", required=True, help="<Config File> output path.")
+def generate(vcs_count, dsp_count, device_types, memory_size, ld_count, switch_port, seed, output):
+    """Generate an environment file"""
+    try:
+        memory_size = humanfriendly.parse_size(memory_size, binary=True)
+    except humanfriendly.InvalidSize as exc:
+        raise click.BadParameter(f"Invalid memory size: {memory_size}") from exc
+    try:
+        config_data = generate_cxl_environment(
+            vcs_count=vcs_count,
+            dsp_count=dsp_count,
+            device_types=device_types,
+            memory_size=memory_size,
+            ld_count=ld_count,
+            port=switch_port,
+            seed=seed,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+    save_cxl_environment(config_data, output)
+    logger.info(
+        f"Saved {output}: {len(config_data['port_configs'])} ports, "
+        f"{vcs_count} virtual switches"
+    )
+
+
+@topology_group.command(name="validate")
+@click.argument("config_file")
+def validate(config_file):
+    """Load and validate an environment file"""
+    start = time.perf_counter()
+    try:
+        environment = parse_cxl_environment(config_file)
+    except Exception as e:
+        logger.error(f"{config_file}: {e}")
+        raise SystemExit(1) from e
+    elapsed = time.perf_counter() - start
+    switch_config = environment.switch_config
+    vppb_count = sum(vcs.vppb_counts for vcs in switch_config.virtual_switch_configs)
+    logger.info(
+        f"{config_file}: valid, loaded in {elapsed * 1000:.1f} ms - "
+        f"{len(switch_config.port_configs)} ports, "
+        f"{len(switch_config.virtual_switch_configs)} virtual switches, {vppb_count} vPPBs, "
+        f"{len(environment.single_logical_device_configs)} SLDs, "
+        f"{len(environment.multi_logical_device_configs)} MLDs, "
+        f"{len(environment.type1_accelerator_configs)} Type-1 and "
+        f"{len(environment.type2_accelerator_configs)} Type-2 accelerators"
+    )
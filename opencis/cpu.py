@@ -10,6 +10,7 @@ from typing import Callable, Awaitable
 from tqdm.auto import tqdm
 
 from opencis.util.component import RunnableComponent
+from opencis.util.number import Payload, payload_to_bytes
 from opencis.cxl.component.cxl_memory_hub import CxlMemoryHub
 
 
@@ -34,8 +35,8 @@ class CPU(RunnableComponent):
         return data
 
     async def load_bytes(self, addr: int, size: int, prog_bar: bool = False) -> bytes:
-        end = addr + size
-        result = b""
+        buffer = bytearray(size)
+        view = memoryview(buffer)
         with tqdm(
             total=size,
             desc="Reading Data",
@@ -44,15 +45,14 @@ class CPU(RunnableComponent):
             unit_divisor=1024,
             disable=not prog_bar,
         ) as pbar:
-            for cacheline_offset in range(addr, addr + size, 64):
-                cacheline = await self._cxl_mem_hub.load(cacheline_offset, 64)
-                chunk_size = min(64, (end - cacheline_offset))
-                chunk_data = cacheline.to_bytes(64, "little")
-                result += chunk_data[:chunk_size]
+            for offset in range(0, size, 64):
+                chunk_data = await self._cxl_mem_hub.load_bytes(addr + offset, 64)
+                chunk_size = min(64, size - offset)
+                view[offset : offset + chunk_size] = memoryview(chunk_data)[:chunk_size]
                 pbar.update(chunk_size)
-        return result
+        return bytes(buffer)
 
-    async def store(self, addr: int, size: int, value: int, prog_bar: bool = False):
+    async def store(self, addr: int, size: int, value: Payload, prog_bar: bool = False):
         if size < 64:
             await self._cxl_mem_hub.store(addr, size, value)
         else:
@@ -67,6 +67,12 @@ class CPU(RunnableComponent):
                 unit_divisor=1024,
                 disable=not prog_bar,
             ) as pbar:
+                if not isinstance(value, int):
+                    view = memoryview(payload_to_bytes(value, size))
+                    for offset in range(0, size, 64):
+                        await self._cxl_mem_hub.store(addr + offset, 64, view[offset : offset + 64])
+                        pbar.update(64)
+                    return
                 chunk_count = 0
                 while size > 0:
                     low_64_byte = value & ((1 << (64 * 8)) - 1)
@@ -108,6 +108,7 @@ class CCI_VENDOR_SPECIFIC_OPCODE(IntEnum):
     NOTIFY_SWITCH_UPDATE = 0xC001
     NOTIFY_DEVICE_UPDATE = 0xC002
     GET_CONNECTED_DEVICES = 0xC003
+    NOTIFY_BACKGROUND_OPERATION_COMPLETE = 0xC004
     TUNNEL_MANAGEMENT_COMMAND = 0xC010
 
 
@@ -25,6 +25,8 @@ from opencis.cxl.device.config.logical_device import (
     LogicalDeviceConfig,
     MultiLogicalDeviceConfig,
     SingleLogicalDeviceConfig,
+    Type1AcceleratorConfig,
+    Type2AcceleratorConfig,
 )
 
 
@@ -62,6 +64,14 @@ class CONNECTED_DEVICE_TYPE(IntEnum):
     # This field is reserved for all values of Current Port Configuration State except DSP.
 
 
+_CONNECTED_DEVICE_TYPES = {
+    SingleLogicalDeviceConfig: CONNECTED_DEVICE_TYPE.CXL_TYPE_3_SLD,
+    MultiLogicalDeviceConfig: CONNECTED_DEVICE_TYPE.CXL_TYPE_3_MLD,
+    Type1AcceleratorConfig: CONNECTED_DEVICE_TYPE.CXL_TYPE_1_DEVICE,
+    Type2AcceleratorConfig: CONNECTED_DEVICE_TYPE.CXL_TYPE_2_DEVICE,
+}
+
+
 class SUPPORTED_CXL_MODES(IntEnum):
     RCD_MODE = 0b00001
     CXL_68B_FLIT_AND_VH_CAPABLE = 0b00010
@@ -237,12 +247,13 @@ class GetPhysicalPortStateCommand(CciForegroundCommand):
         super().__init__(CCI_FM_API_COMMAND_OPCODE.GET_PHYSICAL_PORT_STATE)
         self._switch_connection_manager = switch_connection_manager
         self._device_configs = device_configs
+        # Device configs are grouped by device type, not ordered by port
+        self._device_configs_by_port = {config.port_index: config for config in device_configs}
 
     async def _execute(self, request: CciRequest) -> CciResponse:
         request_payload = self.parse_request_payload(request.payload)
         switch_ports = self._switch_connection_manager.get_switch_ports()
         port_info_list = []
-        usp_count = 0
         for port_id in request_payload.port_id_list:
             if port_id >= len(switch_ports):
                 return CciResponse(return_code=CCI_RETURN_CODE.INVALID_INPUT)
@@ -252,18 +263,13 @@ class GetPhysicalPortStateCommand(CciForegroundCommand):
             if switch_port.port_config.type == PORT_TYPE.USP:
                 port_info.current_port_configuration_state = CURRENT_PORT_CONFIGURATION_STATE.USP
                 port_info.connected_device_type = CONNECTED_DEVICE_TYPE.NO_DEVICE_DETECTED
-                usp_count += 1
             elif switch_port.port_config.type == PORT_TYPE.DSP:
                 port_info.current_port_configuration_state = CURRENT_PORT_CONFIGURATION_STATE.DSP
                 if switch_port.connected:
-                    # First item is always USP
-                    if isinstance(
-                        self._device_configs[port_info.port_id - usp_count],
-                        MultiLogicalDeviceConfig,
-                    ):
-                        port_info.connected_device_type = CONNECTED_DEVICE_TYPE.CXL_TYPE_3_MLD
-                    else:
-                        port_info.connected_device_type = CONNECTED_DEVICE_TYPE.CXL_TYPE_3_SLD
+                    device_config = self._device_configs_by_port.get(port_id)
+                    port_info.connected_device_type = _CONNECTED_DEVICE_TYPES.get(
+                        type(device_config), CONNECTED_DEVICE_TYPE.CXL_TYPE_3_SLD
+                    )
                 else:
                     port_info.connected_device_type = CONNECTED_DEVICE_TYPE.NO_DEVICE_DETECTED
             else:
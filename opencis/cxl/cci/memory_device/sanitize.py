@@ -0,0 +1,57 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+from typing import Awaitable, Callable
+
+from opencis.cxl.features.mailbox import (
+    CxlMailboxContext,
+    CxlMailboxBackgroundCommandBase,
+    MAILBOX_RETURN_CODE,
+)
+from opencis.util.number_const import MB
+
+SANITIZE_CHUNK_SIZE = 1 * MB
+
+#
+#   Sanitize command (Opcode 4400h)
+#
+
+
+class Sanitize(CxlMailboxBackgroundCommandBase):
+    """
+    Overwrites all user data with zeros as a background command, one chunk at a time
+    so that CXL.mem and MMIO requests keep being served in between.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        write_mem_dpa: Callable[[int, bytes, int], Awaitable[None]],
+        chunk_size: int = SANITIZE_CHUNK_SIZE,
+    ):
+        super().__init__(0x4400)
+        self._capacity = capacity
+        self._write_mem_dpa = write_mem_dpa
+        self._chunk_size = chunk_size
+
+    def process(self, context: CxlMailboxContext) -> bool:
+        if context.command["payload_length"] != 0:
+            context.status["return_code"] = MAILBOX_RETURN_CODE.INVALID_INPUT
+            return True
+        return False
+
+    async def process_background(
+        self, context: CxlMailboxContext, report_progress: Callable[[int], None]
+    ):
+        zeros = bytes(self._chunk_size)
+        for dpa in range(0, self._capacity, self._chunk_size):
+            size = min(self._chunk_size, self._capacity - dpa)
+            await self._write_mem_dpa(dpa, zeros[:size], size)
+            report_progress((dpa + size) * 100 // self._capacity)
+            # The accessor may not yield; let the device's other requests in
+            await asyncio.sleep(0)
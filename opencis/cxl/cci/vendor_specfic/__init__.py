@@ -8,6 +8,9 @@
 from .notify_port_update import NotifyPortUpdateRequestPayload
 from .notify_switch_update import NotifySwitchUpdateRequestPayload
 from .notify_device_update import NotifyDeviceUpdateRequestPayload
+from .notify_background_operation_complete import (
+    NotifyBackgroundOperationCompleteRequestPayload,
+)
 from .get_connected_devices import (
     GetConnectedDevicesResponsePayload,
     GetConnectedDevicesCommand,
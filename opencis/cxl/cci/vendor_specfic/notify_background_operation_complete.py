@@ -0,0 +1,56 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import ClassVar, List, Tuple
+import struct
+from opencis.cxl.component.cci_executor import CciRequest
+from opencis.cxl.cci.common import CCI_RETURN_CODE, CCI_VENDOR_SPECIFIC_OPCODE
+
+
+@dataclass
+class NotifyBackgroundOperationCompleteRequestPayload:
+    OPCODE: ClassVar[int] = CCI_VENDOR_SPECIFIC_OPCODE.NOTIFY_BACKGROUND_OPERATION_COMPLETE
+
+    # Class constants for the struct format
+    _STRUCT_FORMAT: ClassVar[str] = "<HHH"  # Little-endian, 2 byte integer x 3
+    _FIELD_SIZES: ClassVar[List[Tuple[str, int]]] = [
+        ("command_opcode", 2),  # 2 bytes
+        ("return_code", 2),  # 2 bytes
+        ("vendor_specific_status", 2),  # 2 bytes
+    ]
+
+    # Fields
+    command_opcode: int = field(default=0, metadata={"size": 2})
+    return_code: CCI_RETURN_CODE = field(default=CCI_RETURN_CODE.SUCCESS, metadata={"size": 2})
+    vendor_specific_status: int = field(default=0, metadata={"size": 2})
+
+    @classmethod
+    def parse(cls, data: bytes):
+        expected_size = sum(size for _, size in cls._FIELD_SIZES)
+        if len(data) != expected_size:
+            raise ValueError(
+                f"Data size does not match the expected struct size of {expected_size} bytes"
+            )
+
+        values = struct.unpack(cls._STRUCT_FORMAT, data)
+        values = values[0], CCI_RETURN_CODE(values[1]), values[2]
+        return cls(*values)
+
+    def dump(self) -> bytes:
+        values = (self.command_opcode, int(self.return_code), self.vendor_specific_status)
+        return struct.pack(self._STRUCT_FORMAT, *values)
+
+    def get_pretty_print(self):
+        field_values = {f.name: getattr(self, f.name) for f in fields(self)}
+        field_values["return_code"] = self.return_code.name
+        return "\n".join(f"{name}: {value}" for name, value in field_values.items())
+
+    def create_request(self) -> CciRequest:
+        payload = self.dump()
+        request = CciRequest(opcode=self.OPCODE, payload=payload)
+        return request
@@ -5,16 +5,21 @@
  See LICENSE for details.
 """
 
-from typing import Optional, Tuple, List
-from asyncio import create_task, gather
+from typing import Callable, Dict, Iterator, Optional, Tuple, List, Union
+from asyncio import Future, Lock, create_task, gather, get_running_loop
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from enum import Enum, auto
 from math import log2
 
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
+from opencis.util.number import Payload, payload_to_bytes
 from opencis.util.component import RunnableComponent
+from opencis.util.tracing import tracer
 from opencis.cxl.transport.memory_fifo import (
     MemoryFifoPair,
+    MemoryRequest,
     MEMORY_REQUEST_TYPE,
     MemoryResponse,
     MEMORY_RESPONSE_STATUS,
@@ -45,6 +50,67 @@ class MemoryRange:
     addr_type: MEM_ADDR_TYPE
 
 
+class MemoryRangeMap:
+    """
+    Non-overlapping memory ranges kept sorted by base address, so the range holding
+    an address is found by bisection. With `last_hit` set, the range found last is
+    checked first, as consecutive accesses tend to fall in the same range.
+    """
+
+    def __init__(self, last_hit: bool = True):
+        self._bases: List[int] = []
+        self._ranges: List[MemoryRange] = []
+        self._last_hit_enabled = last_hit
+        self._last_hit: Optional[MemoryRange] = None
+
+    def __iter__(self) -> Iterator[MemoryRange]:
+        return iter(self._ranges)
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def add(self, mem_range: MemoryRange):
+        if mem_range.size <= 0:
+            raise Exception(f"MemoryRange at 0x{mem_range.base_addr:x} must not be empty")
+        end = mem_range.base_addr + mem_range.size
+        index = bisect_right(self._bases, mem_range.base_addr)
+        for neighbor in self._ranges[max(index - 1, 0) : index + 1]:
+            if (
+                neighbor.base_addr < end
+                and mem_range.base_addr < neighbor.base_addr + neighbor.size
+            ):
+                raise Exception(
+                    f"MemoryRange 0x{mem_range.base_addr:x}-0x{end:x} overlaps "
+                    f"0x{neighbor.base_addr:x}-0x{neighbor.base_addr + neighbor.size:x}"
+                )
+        self._bases.insert(index, mem_range.base_addr)
+        self._ranges.insert(index, mem_range)
+
+    def remove(self, mem_range: MemoryRange) -> bool:
+        index = bisect_left(self._bases, mem_range.base_addr)
+        if index == len(self._ranges) or self._ranges[index] != mem_range:
+            return False
+        if self._last_hit is self._ranges[index]:
+            self._last_hit = None
+        del self._bases[index]
+        del self._ranges[index]
+        return True
+
+    def find(self, addr: int) -> Optional[MemoryRange]:
+        mem_range = self._last_hit
+        if mem_range is not None and 0 <= addr - mem_range.base_addr < mem_range.size:
+            return mem_range
+        index = bisect_right(self._bases, addr) - 1
+        if index < 0:
+            return None
+        mem_range = self._ranges[index]
+        if addr - mem_range.base_addr >= mem_range.size:
+            return None
+        if self._last_hit_enabled:
+            self._last_hit = mem_range
+        return mem_range
+
+
 class COH_STATE_MACHINE(Enum):
     COH_STATE_INIT = auto()
     COH_STATE_START = auto()
@@ -78,7 +144,7 @@ class CacheBlock:
     state: CacheState = CacheState.CACHE_INVALID
     tag: int = 0
     priority: int = 0
-    data: int = 0
+    data: Payload = 0
 
 
 @dataclass
@@ -96,6 +162,8 @@ class CacheControllerConfig:
     coh_bridge_to_cache_fifo: CacheFifoPair = None
     cache_num_assoc: Optional[int] = 4
     cache_num_set: Optional[int] = 8
+    bulk_window: Optional[int] = 8
+    mem_range_last_hit: Optional[bool] = True
 
 
 class CacheController(RunnableComponent):
@@ -121,7 +189,21 @@ class CacheController(RunnableComponent):
         self._cache_to_coh_bridge_fifo = config.cache_to_coh_bridge_fifo
         self._coh_bridge_to_cache_fifo = config.coh_bridge_to_cache_fifo
 
-        self._memory_ranges: List[MemoryRange] = []
+        self._memory_ranges = MemoryRangeMap(config.mem_range_last_hit)
+        self._bulk_window = config.bulk_window
+        self._next_cache_tag = 0
+        self._pending_cache_responses: Dict[int, Future] = {}
+
+        metrics_label = self.get_message_label()
+        self._trace_label = metrics_label
+        self._load_hits = metrics.counter("cache_load_hits", metrics_label)
+        self._load_misses = metrics.counter("cache_load_misses", metrics_label)
+        self._store_hits = metrics.counter("cache_store_hits", metrics_label)
+        self._store_misses = metrics.counter("cache_store_misses", metrics_label)
+        self._evictions = metrics.counter("cache_evictions", metrics_label)
+        self._snoops_sent = metrics.counter("cache_snoops_sent", metrics_label)
+        self._snoops_received = metrics.counter("cache_snoops_received", metrics_label)
+        self._requests_in_flight = metrics.gauge("cache_requests_in_flight", metrics_label)
 
         self._init_cache()
         logger.debug(self._create_message(f"{config.component_name} LLC Generated"))
@@ -134,38 +216,39 @@ class CacheController(RunnableComponent):
         ]
         # for cache block eviction algorithm
         self._setcnt = [SetCounter() for set in range(self._cache_set_size)]
+        # serializes fills and evictions within a set when several accesses are in flight
+        self._set_locks = [Lock() for set in range(self._cache_set_size)]
 
         self._blk_mask = self._cache_blk_size - 1
         self._set_mask = (self._cache_set_size - 1) << self._cache_blk_bit
         self._tag_mask = ~(self._set_mask | self._blk_mask)
 
-    def get_memory_ranges(self):
-        return self._memory_ranges
+    def get_memory_ranges(self) -> List[MemoryRange]:
+        return list(self._memory_ranges)
 
     def add_mem_range(self, addr: int, size: int, addr_type: MEM_ADDR_TYPE):
         logger.info(
             self._create_message(f"Adding MemoryRange addr: 0x{addr:x} addr_type: {addr_type.name}")
         )
-        self._memory_ranges.append(MemoryRange(base_addr=addr, size=size, addr_type=addr_type))
+        self._memory_ranges.add(MemoryRange(base_addr=addr, size=size, addr_type=addr_type))
 
     def remove_mem_range(self, base_addr: int, size: int, addr_type: MEM_ADDR_TYPE):
         r = MemoryRange(base_addr, size, addr_type)
-        if r in self._memory_ranges:
+        if self._memory_ranges.remove(r):
             logger.info(
                 self._create_message(
                     f"Removing MemoryRange addr: 0x{base_addr:x} addr_type: {addr_type.name}"
                 )
             )
-            self._memory_ranges.remove(r)
             return
         logger.error(
             self._create_message(f"MemoryRange addr:{base_addr} {addr_type.name} not found.")
         )
 
     def _get_mem_range(self, addr: int) -> MemoryRange:
-        for range in self._memory_ranges:
-            if range.base_addr <= addr < (range.base_addr + range.size):
-                return range
+        mem_range = self._memory_ranges.find(addr)
+        if mem_range is not None:
+            return mem_range
         logger.warning(self._create_message(f"0x{addr:x} is OOB"))
         return None
 
@@ -231,13 +314,16 @@ class CacheController(RunnableComponent):
 
         return None
 
-    def _cache_data_read(self, set: int, blk: int) -> int:
+    def _cache_data_read(self, set: int, blk: int) -> Payload:
         self._cache_priority_update(set, blk)
 
         return self._cache[set][blk].data
 
-    def _cache_data_write(self, set: int, blk: int, data: int) -> None:
+    def _cache_data_write(self, set: int, blk: int, data: Payload) -> None:
         self._cache_priority_update(set, blk)
+        if not isinstance(data, (int, bytes)):
+            # the block must not alias a caller-owned buffer
+            data = bytes(data)
         self._cache[set][blk].data = data
 
     def _cache_rsp_state_lookup(self, packet: CacheResponse) -> CacheState:
@@ -266,18 +352,42 @@ class CacheController(RunnableComponent):
             case _:
                 raise Exception(f"OOB Memory Address: 0x{addr:x}")
 
+    async def _cache_fifo_transaction(
+        self, cache_fifo: CacheFifoPair, packet: CacheRequest
+    ) -> CacheResponse:
+        packet.tag = self._next_cache_tag
+        packet.trace_id = tracer.get_trace_id()
+        self._next_cache_tag += 1
+        response = get_running_loop().create_future()
+        self._pending_cache_responses[packet.tag] = response
+        try:
+            await cache_fifo.request.put(packet)
+            return await response
+        finally:
+            del self._pending_cache_responses[packet.tag]
+
+    async def _process_cache_responses(self, cache_fifo: CacheFifoPair):
+        while True:
+            packet = await cache_fifo.response.get()
+            if packet is None:
+                break
+            response = self._pending_cache_responses.get(packet.tag)
+            if response is None or response.done():
+                logger.warning(
+                    self._create_message(f"Dropped cache response with unexpected tag {packet.tag}")
+                )
+                continue
+            response.set_result(packet)
+
     async def _memory_load(self, addr: int, size: int) -> CacheResponse:
         cache_fifo = self._get_cache_fifo(addr)
         packet = CacheRequest(CACHE_REQUEST_TYPE.SNP_DATA, addr, size)
-        await cache_fifo.request.put(packet)
-        packet = await cache_fifo.response.get()
-        return packet
+        return await self._cache_fifo_transaction(cache_fifo, packet)
 
-    async def _memory_store(self, addr: int, size: int, value: int) -> None:
+    async def _memory_store(self, addr: int, size: int, value: Payload) -> None:
         cache_fifo = self._get_cache_fifo(addr)
         packet = CacheRequest(CACHE_REQUEST_TYPE.WRITE_BACK, addr, size, value)
-        await cache_fifo.request.put(packet)
-        await cache_fifo.response.get()
+        await self._cache_fifo_transaction(cache_fifo, packet)
 
     # For request: coherency tasks from cache controller to coh module
     async def _cache_to_coh_state_lookup(self, addr: int) -> None:
@@ -295,15 +405,15 @@ class CacheController(RunnableComponent):
                 # no need to send SNP_INV
                 return
 
+        self._snoops_sent.inc()
         packet = CacheRequest(CACHE_REQUEST_TYPE.SNP_INV, addr)
-        await cache_fifo.request.put(packet)
-        packet = await cache_fifo.response.get()
+        packet = await self._cache_fifo_transaction(cache_fifo, packet)
         assert packet.status == CACHE_RESPONSE_STATUS.RSP_I
 
     # For response: coherency tasks from coh module to cache controller
     async def _coh_to_cache_state_lookup(
         self, type: CACHE_REQUEST_TYPE, addr: int
-    ) -> Tuple[int, int]:
+    ) -> Tuple[int, Payload]:
         data = 0
         tag = self._cache_extract_tag(addr)
         set = self._cache_extract_set(addr)
@@ -323,18 +433,25 @@ class CacheController(RunnableComponent):
         return cache_blk, data
 
     # cache access for read
-    async def cache_coherent_load(self, addr: int, size: int) -> int:
+    async def cache_coherent_load(self, addr: int, size: int) -> Payload:
         assert size == self._cache_blk_size
 
+        set = self._cache_extract_set(addr)
+        async with self._set_locks[set]:
+            return await self._cache_coherent_load(addr, size)
+
+    async def _cache_coherent_load(self, addr: int, size: int) -> Payload:
         tag = self._cache_extract_tag(addr)
         set = self._cache_extract_set(addr)
 
         cache_blk = self._cache_find_valid_block(tag, set)
         if cache_blk is not None:
             # cache hit
+            self._load_hits.inc()
             data = self._cache_data_read(set, cache_blk)
         else:
             # cache miss
+            self._load_misses.inc()
             cache_blk = self._cache_find_invalid_block(set)
 
             # cache block full
@@ -344,6 +461,7 @@ class CacheController(RunnableComponent):
                 cached_data = self._cache_data_read(set, cache_blk)
 
                 # cacheline flush to secure space
+                self._evictions.inc()
                 await self._memory_store(assem_addr, size, cached_data)
                 self._cache_update_block_state(tag, set, cache_blk, CacheState.CACHE_INVALID)
 
@@ -363,15 +481,21 @@ class CacheController(RunnableComponent):
         return data
 
     # cache access for write
-    async def cache_coherent_store(self, addr: int, size: int, data: int) -> None:
+    async def cache_coherent_store(self, addr: int, size: int, data: Payload) -> None:
         assert size == self._cache_blk_size
 
+        set = self._cache_extract_set(addr)
+        async with self._set_locks[set]:
+            await self._cache_coherent_store(addr, size, data)
+
+    async def _cache_coherent_store(self, addr: int, size: int, data: Payload) -> None:
         tag = self._cache_extract_tag(addr)
         set = self._cache_extract_set(addr)
 
         cache_blk = self._cache_find_valid_block(tag, set)
         if cache_blk is not None:
             # cache hit
+            self._store_hits.inc()
             cache_state = self._cache_extract_block_state(set, cache_blk)
             assert cache_state != CacheState.CACHE_INVALID
 
@@ -384,6 +508,7 @@ class CacheController(RunnableComponent):
             self._cache_data_write(set, cache_blk, data)
         else:
             # cache miss
+            self._store_misses.inc()
             cache_blk = self._cache_find_invalid_block(set)
 
             # cache block full
@@ -393,6 +518,7 @@ class CacheController(RunnableComponent):
                 cached_data = self._cache_data_read(set, cache_blk)
 
                 # cacheline flush to secure space
+                self._evictions.inc()
                 await self._memory_store(assem_addr, size, cached_data)
                 self._cache_update_block_state(tag, set, cache_blk, CacheState.CACHE_INVALID)
 
@@ -404,63 +530,144 @@ class CacheController(RunnableComponent):
             self._cache_update_block_state(tag, set, cache_blk, CacheState.CACHE_MODIFIED)
             self._cache_data_write(set, cache_blk, data)
 
-    async def _uncached_load(self, addr: int, size: int) -> int:
+    async def cache_coherent_load_into(
+        self,
+        addr: int,
+        buffer: Union[bytearray, memoryview],
+        window: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Fills `buffer` with the bytes starting at `addr`, keeping up to `window`
+        cacheline loads in flight. Each completed line is copied straight into its
+        slot of the preallocated buffer, so the cost grows linearly with the size.
+        """
+        if addr % self._cache_blk_size:
+            raise Exception(f"Address 0x{addr:x} must be aligned to {self._cache_blk_size}")
+        view = memoryview(buffer).cast("B")
+        size = len(view)
+        blk_size = self._cache_blk_size
+
+        async def _load_lines(offsets):
+            for offset in offsets:
+                data = await self.cache_coherent_load(addr + offset, blk_size)
+                chunk_size = min(blk_size, size - offset)
+                view[offset : offset + chunk_size] = memoryview(payload_to_bytes(data))[:chunk_size]
+                if progress:
+                    progress(chunk_size)
+
+        await self._run_windowed(_load_lines, size, window)
+
+    async def cache_coherent_store_from(
+        self,
+        addr: int,
+        data: Union[bytes, bytearray, memoryview],
+        window: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Stores `data` starting at `addr` one cacheline at a time, keeping up to
+        `window` stores in flight. Both `addr` and `len(data)` must be line-aligned.
+        """
+        view = memoryview(data).cast("B")
+        size = len(view)
+        blk_size = self._cache_blk_size
+        if addr % blk_size or size % blk_size:
+            raise Exception(f"Size {size} and address 0x{addr:x} must be aligned to {blk_size}")
+
+        async def _store_lines(offsets):
+            for offset in offsets:
+                await self.cache_coherent_store(
+                    addr + offset, blk_size, view[offset : offset + blk_size]
+                )
+                if progress:
+                    progress(blk_size)
+
+        await self._run_windowed(_store_lines, size, window)
+
+    async def _run_windowed(self, worker: Callable, size: int, window: Optional[int]):
+        # Workers share one offset iterator, so at most `window` lines are in flight
+        # and each line is handed out exactly once.
+        if window is None:
+            window = self._bulk_window
+        offsets = iter(range(0, size, self._cache_blk_size))
+        lines = -(-size // self._cache_blk_size)
+        workers = max(1, min(window, lines))
+        await gather(*(worker(offsets) for _ in range(workers)))
+
+    async def _uncached_load(self, addr: int, size: int) -> Payload:
         packet = CacheRequest(CACHE_REQUEST_TYPE.UNCACHED_READ, addr, size)
-        await self._cache_to_coh_agent_fifo.request.put(packet)
-        resp = await self._cache_to_coh_agent_fifo.response.get()
+        resp = await self._cache_fifo_transaction(self._cache_to_coh_agent_fifo, packet)
         return resp.data
 
-    async def _uncached_store(self, addr: int, size: int, data: int) -> int:
+    async def _uncached_store(self, addr: int, size: int, data: Payload) -> None:
         packet = CacheRequest(CACHE_REQUEST_TYPE.UNCACHED_WRITE, addr, size, data)
-        await self._cache_to_coh_agent_fifo.request.put(packet)
-        await self._cache_to_coh_agent_fifo.response.get()
+        await self._cache_fifo_transaction(self._cache_to_coh_agent_fifo, packet)
+
+    async def _run_processor_request(self, packet: MemoryRequest):
+        self._requests_in_flight.inc()
+        with tracer.span(packet.type.name.lower(), self._trace_label, packet.trace_id):
+            try:
+                match packet.type:
+                    case MEMORY_REQUEST_TYPE.READ:
+                        data = await self.cache_coherent_load(packet.addr, packet.size)
+                        response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
+
+                    case MEMORY_REQUEST_TYPE.UNCACHED_READ:
+                        data = await self._uncached_load(packet.addr, packet.size)
+                        response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
+
+                    case MEMORY_REQUEST_TYPE.WRITE:
+                        await self.cache_coherent_store(packet.addr, packet.size, packet.data)
+                        response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
+
+                    case MEMORY_REQUEST_TYPE.UNCACHED_WRITE:
+                        await self._uncached_store(packet.addr, packet.size, packet.data)
+                        response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
+
+                    case _:
+                        raise Exception(f"Unsupported memory request type: {packet.type}")
+            except Exception as e:
+                logger.error(
+                    self._create_message(f"Memory request at 0x{packet.addr:x} failed: {e}")
+                )
+                response = MemoryResponse(MEMORY_RESPONSE_STATUS.FAILED)
+        response.tag = packet.tag
+        self._requests_in_flight.dec()
+        await self._processor_to_cache_fifo.response.put(response)
 
     # registered event loop for processor's cache load/store operations
     async def _processor_request_scheduler(self):
+        # Requests run concurrently and respond in completion order, with the tag of
+        # their request. Each starts by taking its set lock, so accesses to one cache
+        # set still complete in the order they were issued.
+        requests = set()
         while True:
             packet = await self._processor_to_cache_fifo.request.get()
             if packet is None:
+                await gather(*requests)
                 logger.debug(
                     self._create_message("Stop processing processor request scheduler fifo")
                 )
                 break
-
-            match packet.type:
-                case MEMORY_REQUEST_TYPE.READ:
-                    data = await self.cache_coherent_load(packet.addr, packet.size)
-                    packet = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
-                    await self._processor_to_cache_fifo.response.put(packet)
-
-                case MEMORY_REQUEST_TYPE.UNCACHED_READ:
-                    data = await self._uncached_load(packet.addr, packet.size)
-                    packet = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
-                    await self._processor_to_cache_fifo.response.put(packet)
-
-                case MEMORY_REQUEST_TYPE.WRITE:
-                    await self.cache_coherent_store(packet.addr, packet.size, packet.data)
-                    packet = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
-                    await self._processor_to_cache_fifo.response.put(packet)
-
-                case MEMORY_REQUEST_TYPE.UNCACHED_WRITE:
-                    await self._uncached_store(packet.addr, packet.size, packet.data)
-                    packet = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
-                    await self._processor_to_cache_fifo.response.put(packet)
-
-                case _:
-                    assert False
+            request = create_task(self._run_processor_request(packet))
+            requests.add(request)
+            request.add_done_callback(requests.discard)
 
     async def _run_coh_request(self, packet: CacheRequest, cache_fifo: CacheFifoPair):
+        if packet.type != CACHE_REQUEST_TYPE.WRITE_BACK:
+            self._snoops_received.inc()
         cache_blk, data = await self._coh_to_cache_state_lookup(packet.type, packet.addr)
         if cache_blk is None:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_MISS, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_MISS, data, packet.tag)
         elif packet.type == CACHE_REQUEST_TYPE.SNP_DATA:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data, packet.tag)
         elif packet.type == CACHE_REQUEST_TYPE.SNP_INV:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, data, packet.tag)
         elif packet.type == CACHE_REQUEST_TYPE.SNP_CUR:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_V, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_V, data, packet.tag)
         elif packet.type == CACHE_REQUEST_TYPE.WRITE_BACK:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_V, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_V, data, packet.tag)
         else:
             assert False
         await cache_fifo.response.put(packet)
@@ -494,8 +701,18 @@ class CacheController(RunnableComponent):
             tasks.append(create_task(self._processor_request_scheduler()))
         if self._cache_to_coh_bridge_fifo:
             tasks.append(create_task(self._coh_bridge_request_scheduler()))
+        cache_fifos = [
+            fifo
+            for fifo in (self._cache_to_coh_agent_fifo, self._cache_to_coh_bridge_fifo)
+            if fifo is not None
+        ]
+        response_tasks = [create_task(self._process_cache_responses(fifo)) for fifo in cache_fifos]
         await self._change_status_to_running()
         await gather(*tasks)
+        # The schedulers wait for their requests, so no response is outstanding anymore
+        for fifo in cache_fifos:
+            await fifo.response.put(None)
+        await gather(*response_tasks)
 
     async def _stop(self):
         if self._processor_to_cache_fifo:
@@ -39,6 +39,7 @@ class CciBackgroundStatus:
 
 
 ProgressCallback = Callable[[int], Awaitable[None]]
+CompletionHandler = Callable[[CciBackgroundStatus], Awaitable[None]]
 
 
 class CciCommand(LabeledComponent):
@@ -111,11 +112,16 @@ class CciExecutor(RunnableComponent):
         self._commands: Dict[int, CciCommand] = {}
         self._background_command_slot = CciCommandSlot()
         self._background_command_condition = Condition()
+        self._completion_handler: Optional[CompletionHandler] = None
         self._running = True
 
     def register_command(self, opcode: int, command_instance: CciCommand) -> None:
         self._commands[opcode] = command_instance
 
+    def register_completion_handler(self, handler: CompletionHandler) -> None:
+        """Called with the final status whenever a background command finishes"""
+        self._completion_handler = handler
+
     async def execute_command(self, request: CciRequest) -> CciResponse:
         command = self._commands.get(request.opcode)
         opcode_string = get_opcode_string(request.opcode)
@@ -162,8 +168,11 @@ class CciExecutor(RunnableComponent):
     async def _process_background_command(self):
         while self._running:
             await self._condition.acquire()
-            while self._background_command_slot.command is None:
+            while self._background_command_slot.command is None and self._running:
                 await self._condition.wait()
+            if not self._running:
+                self._condition.release()
+                break
 
             command = self._background_command_slot.command
             request = self._background_command_slot.request
@@ -181,9 +190,21 @@ class CciExecutor(RunnableComponent):
             self._background_command_slot.command = None
             self._condition.release()
 
+            if self._completion_handler is not None:
+                status = CciBackgroundStatus(
+                    opcode=request.opcode,
+                    percentage_complete=100,
+                    return_code=response.return_code,
+                    vendor_specific_status=response.vendor_specific_status,
+                )
+                await self._completion_handler(status)
+
     async def _run(self):
         await self._change_status_to_running()
         await self._process_background_command()
 
     async def _stop(self):
+        await self._condition.acquire()
         self._running = False
+        self._condition.notify_all()
+        self._condition.release()
@@ -23,6 +23,7 @@ from asyncio import (
 
 from opencis.util.bound_event import BoundEvent
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
 from opencis.pci.component.fifo_pair import FifoPair
 from opencis.cxl.transport.transaction import (
     BasePacket,
@@ -86,6 +87,15 @@ class CxlCacheDcoh(PacketProcessor):
         # emulated .cache d2h channels
         self._cxl_channel = {"h2d_req": Queue(), "h2d_rsp": Queue(), "h2d_data": Queue()}
 
+        metrics_label = self.get_message_label()
+        self._h2d_packets = {
+            channel: metrics.counter("dcoh_h2d_packets", f"{metrics_label},{channel}")
+            for channel in self._cxl_channel
+        }
+        for channel, queue in self._cxl_channel.items():
+            metrics.gauge("dcoh_queue_depth", f"{metrics_label},{channel}", queue.qsize)
+        self._d2h_requests = metrics.counter("dcoh_d2h_requests", metrics_label)
+
         self.device_entries: dict[int, Future] = (
             {}
         )  # maps CQID -> received future packets associated with CQID
@@ -351,14 +361,17 @@ class CxlCacheDcoh(PacketProcessor):
 
         # Handle H2DRSP without matching CQID
 
+        tag = self._cur_state.packet.tag
         if h2drsp_packet.h2drsp_header.cache_opcode == CXL_CACHE_H2DRSP_OPCODE.GO:
             if h2drsp_packet.h2drsp_header.rsp_data == CXL_CACHE_H2DRSP_CACHE_STATE.EXCLUSIVE:
-                cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I)
+                cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, tag=tag)
                 await self._cache_to_coh_agent_fifo.response.put(cache_packet)
 
             elif h2drsp_packet.h2drsp_header.rsp_data == CXL_CACHE_H2DRSP_CACHE_STATE.SHARED:
                 packet = await self._cxl_channel["h2d_data"].get()
-                cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, packet.data)
+                cache_packet = CacheResponse(
+                    CACHE_RESPONSE_STATUS.RSP_S, packet.get_data_bytes(), tag
+                )
                 await self._cache_to_coh_agent_fifo.response.put(cache_packet)
 
             elif h2drsp_packet.h2drsp_header.rsp_data == CXL_CACHE_H2DRSP_CACHE_STATE.INVALID:
@@ -367,7 +380,7 @@ class CxlCacheDcoh(PacketProcessor):
         elif h2drsp_packet.h2drsp_header.cache_opcode == CXL_CACHE_H2DRSP_OPCODE.GO_WRITE_PULL:
             cxl_packet = CxlCacheCacheD2HDataPacket.create(0, self._cur_state.packet.data)
             await self._upstream_fifo.target_to_host.put(cxl_packet)
-            cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+            cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, tag=tag)
             await self._cache_to_coh_agent_fifo.response.put(cache_packet)
 
         self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
@@ -406,6 +419,7 @@ class CxlCacheDcoh(PacketProcessor):
                     self._cur_state.cache_list[0],
                     CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_OWN_NO_DATA,
                 )
+            self._d2h_requests.inc()
             await self._upstream_fifo.target_to_host.put(cxl_packet)
             self._cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
 
@@ -425,10 +439,13 @@ class CxlCacheDcoh(PacketProcessor):
 
             cxl_packet = cast(CxlCacheBasePacket, packet)
             if cxl_packet.is_h2dreq():
+                self._h2d_packets["h2d_req"].inc()
                 await self._cxl_channel["h2d_req"].put(cast(CxlCacheH2DReqPacket, packet))
             elif cxl_packet.is_h2drsp():
+                self._h2d_packets["h2d_rsp"].inc()
                 await self._cxl_channel["h2d_rsp"].put(cast(CxlCacheH2DRspPacket, packet))
             elif cxl_packet.is_h2ddata():
+                self._h2d_packets["h2d_data"].inc()
                 await self._cxl_channel["h2d_data"].put(cast(CxlCacheH2DDataPacket, packet))
             else:
                 raise Exception(f"Received unexpected packet: {cxl_packet.get_type()}")
@@ -44,6 +44,12 @@ class CxlIoManager(RunnableComponent):
     def get_cfg_reg_vals(self):
         return self._config_space_manager.get_register()
 
+    def get_cfg_packet_handler(self):
+        return self._config_space_manager.process_host_to_target_packet
+
+    def get_mmio_packet_handler(self):
+        return self._mmio_manager.process_host_to_target_packet
+
     async def _run(self):
         run_tasks = [
             asyncio.create_task(self._mmio_manager.run()),
@@ -10,6 +10,9 @@ from asyncio import create_task, gather, sleep, Queue
 from enum import Enum, auto
 
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
+from opencis.util.tracing import tracer
+from opencis.util.number import Payload
 from opencis.pci.component.fifo_pair import FifoPair
 from opencis.cxl.transport.transaction import (
     BasePacket,
@@ -86,6 +89,18 @@ class CxlMemDcoh(PacketProcessor):
         # emulated .mem m2s channels
         self._cxl_channel = {"m2s_req": Queue(), "m2s_rwd": Queue(), "m2s_birsp": Queue()}
 
+        metrics_label = self.get_message_label()
+        self._trace_label = metrics_label
+        self._m2s_packets = {
+            channel: metrics.counter("dcoh_m2s_packets", f"{metrics_label},{channel}")
+            for channel in self._cxl_channel
+        }
+        for channel, queue in self._cxl_channel.items():
+            metrics.gauge("dcoh_queue_depth", f"{metrics_label},{channel}", queue.qsize)
+        self._sf_hits = metrics.counter("dcoh_snoop_filter_hits", metrics_label)
+        self._sf_misses = metrics.counter("dcoh_snoop_filter_misses", metrics_label)
+        self._bisnps_sent = metrics.counter("dcoh_bisnps_sent", metrics_label)
+
     def set_memory_device_component(self, memory_device_component: CxlMemoryDeviceComponent):
         self._memory_device_component = memory_device_component
 
@@ -104,15 +119,16 @@ class CxlMemDcoh(PacketProcessor):
     def _create_mem_rsp_packet(
         self,
         ndr_opcode: CXL_MEM_S2MNDR_OPCODE,
-        data: Optional[int] = 0,
+        data: Optional[Payload] = 0,
         drs_opcode: Optional[CXL_MEM_S2MDRS_OPCODE] = CXL_MEM_S2MDRS_OPCODE.MEM_DATA,
         meta_field: Optional[CXL_MEM_META_FIELD] = CXL_MEM_META_FIELD.NO_OP,
         meta_value: Optional[CXL_MEM_META_VALUE] = CXL_MEM_META_VALUE.INVALID,
     ) -> Tuple[CxlMemCmpPacket, CxlMemMemDataPacket]:
-        return (
-            CxlMemCmpPacket.create(ndr_opcode, meta_field, meta_value),
-            CxlMemMemDataPacket.create(data, drs_opcode, meta_field, meta_value),
-        )
+        ndr_packet = CxlMemCmpPacket.create(ndr_opcode, meta_field, meta_value)
+        drs_packet = CxlMemMemDataPacket.create(data, drs_opcode, meta_field, meta_value)
+        # Responses belong to the trace of the request being handled
+        ndr_packet.trace_id = drs_packet.trace_id = tracer.get_trace_id()
+        return ndr_packet, drs_packet
 
     # .mem m2s req (MemRd, MemRdData, and MemInv) handler
     async def _process_cxl_m2s_req_packet(self, m2sreq_packet: CxlMemM2SReqPacket):
@@ -123,7 +139,7 @@ class CxlMemDcoh(PacketProcessor):
         dpa = self._memory_device_component.get_dpa(addr)
 
         if m2sreq_packet.m2sreq_header.meta_field == CXL_MEM_META_FIELD.NO_OP:
-            data = await self._memory_device_component.read_mem_dpa(dpa)
+            data = await self._memory_device_component.read_mem_dpa_bytes(dpa)
 
             _, packet = self._create_mem_rsp_packet(CXL_MEM_S2MNDR_OPCODE.CMP, data)
             await self._upstream_fifo.target_to_host.put(packet)
@@ -167,7 +183,7 @@ class CxlMemDcoh(PacketProcessor):
                 pass
 
             if data_read is True:
-                data = await self._memory_device_component.read_mem_dpa(dpa)
+                data = await self._memory_device_component.read_mem_dpa_bytes(dpa)
         else:
             if packet.status == CACHE_RESPONSE_STATUS.RSP_S:
                 rsp_code = CXL_MEM_S2MNDR_OPCODE.CMP_S
@@ -211,9 +227,11 @@ class CxlMemDcoh(PacketProcessor):
         dpa = self._memory_device_component.get_dpa(addr)
 
         if m2srwd_packet.m2srwd_header.meta_field == CXL_MEM_META_FIELD.NO_OP:
-            await self._memory_device_component.write_mem_dpa(dpa, m2srwd_packet.data)
+            await self._memory_device_component.write_mem_dpa(dpa, m2srwd_packet.get_data_bytes())
 
-            packet, _ = self._create_mem_rsp_packet(CXL_MEM_S2MNDR_OPCODE.CMP, m2srwd_packet.data)
+            packet, _ = self._create_mem_rsp_packet(
+                CXL_MEM_S2MNDR_OPCODE.CMP, m2srwd_packet.get_data_bytes()
+            )
             await self._upstream_fifo.target_to_host.put(packet)
             self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             return
@@ -236,7 +254,7 @@ class CxlMemDcoh(PacketProcessor):
             self._snoop_filter_update(dpa, sf_update_list)
 
         if data_flush is True:
-            await self._memory_device_component.write_mem_dpa(dpa, m2srwd_packet.data)
+            await self._memory_device_component.write_mem_dpa(dpa, m2srwd_packet.get_data_bytes())
 
         ndr_packet, _ = self._create_mem_rsp_packet(rsp_code)
         await self._upstream_fifo.target_to_host.put(ndr_packet)
@@ -244,12 +262,13 @@ class CxlMemDcoh(PacketProcessor):
     # .mem m2s birsp handler
     async def _process_cxl_m2s_birsp_packet(self, m2sbirsp_packet: CxlMemM2SBIRspPacket):
         dpa = self._cur_state.packet.addr
-        data = await self._memory_device_component.read_mem_dpa(dpa)
+        tag = self._cur_state.packet.tag
+        data = await self._memory_device_component.read_mem_dpa_bytes(dpa)
 
         if m2sbirsp_packet.m2sbirsp_header.opcode == CXL_MEM_M2SBIRSP_OPCODE.BIRSP_S:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data, tag)
         elif m2sbirsp_packet.m2sbirsp_header.opcode == CXL_MEM_M2SBIRSP_OPCODE.BIRSP_I:
-            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, data)
+            packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, data, tag)
         else:
             raise Exception(
                 f"Unsupported M2SBIRsp Opcode: {m2sbirsp_packet.m2sbirsp_header.opcode}"
@@ -268,29 +287,31 @@ class CxlMemDcoh(PacketProcessor):
         if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
             dpa = cache_packet.addr
             if cache_packet.type == CACHE_REQUEST_TYPE.READ:
-                data = await self._memory_device_component.read_mem_dpa(dpa)
-                packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, data)
+                data = await self._memory_device_component.read_mem_dpa_bytes(dpa)
+                packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, data, cache_packet.tag)
                 await self._cache_to_coh_agent_fifo.response.put(packet)
                 self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             elif cache_packet.type in (CACHE_REQUEST_TYPE.WRITE, CACHE_REQUEST_TYPE.WRITE_BACK):
                 await self._memory_device_component.write_mem_dpa(dpa, cache_packet.data)
-                packet = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+                packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, tag=cache_packet.tag)
                 await self._cache_to_coh_agent_fifo.response.put(packet)
                 self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             else:
                 # host cache snoop filter miss
                 if not self._sf_host_is_hit(dpa):
+                    self._sf_misses.inc()
                     if cache_packet.type == CACHE_REQUEST_TYPE.SNP_DATA:
-                        data = await self._memory_device_component.read_mem_dpa(dpa)
-                        packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, data)
+                        data = await self._memory_device_component.read_mem_dpa_bytes(dpa)
+                        packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, data, cache_packet.tag)
                     elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_INV:
-                        packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I)
+                        packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I, tag=cache_packet.tag)
                     elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_CUR:
-                        packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_V)
+                        packet = CacheResponse(CACHE_RESPONSE_STATUS.RSP_V, tag=cache_packet.tag)
                     await self._cache_to_coh_agent_fifo.response.put(packet)
                     self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
                 # host cache snoop filter hit
                 else:
+                    self._sf_hits.inc()
                     sf_update_list = []
                     if cache_packet.type == CACHE_REQUEST_TYPE.SNP_DATA:
                         bi_opcode = CXL_MEM_S2MBISNP_OPCODE.BISNP_DATA
@@ -301,6 +322,7 @@ class CxlMemDcoh(PacketProcessor):
                         bi_opcode = CXL_MEM_S2MBISNP_OPCODE.BISNP_CUR
                     hpa = self._memory_device_component.get_hpa(dpa)
                     cxl_packet = CxlMemBISnpPacket.create(hpa, bi_opcode, self._bi_id, self._bi_tag)
+                    self._bisnps_sent.inc()
                     await self._upstream_fifo.target_to_host.put(cxl_packet)
 
                     if sf_update_list:
@@ -322,10 +344,13 @@ class CxlMemDcoh(PacketProcessor):
             # packets are distributed to m2s channels
             cxl_packet = cast(CxlMemBasePacket, packet)
             if cxl_packet.is_m2sreq():
+                self._m2s_packets["m2s_req"].inc()
                 await self._cxl_channel["m2s_req"].put(cast(CxlMemM2SReqPacket, packet))
             elif cxl_packet.is_m2srwd():
+                self._m2s_packets["m2s_rwd"].inc()
                 await self._cxl_channel["m2s_rwd"].put(cast(CxlMemM2SRwDPacket, packet))
             elif cxl_packet.is_m2sbirsp():
+                self._m2s_packets["m2s_birsp"].inc()
                 await self._cxl_channel["m2s_birsp"].put(cast(CxlMemM2SBIRspPacket, packet))
             else:
                 raise Exception(f"Received unexpected packet: {cxl_packet.get_type()}")
@@ -359,12 +384,14 @@ class CxlMemDcoh(PacketProcessor):
             # process host request regardless of device processing state
             if not self._cxl_channel["m2s_req"].empty():
                 packet = await self._cxl_channel["m2s_req"].get()
-                await self._process_cxl_m2s_req_packet(packet)
+                with tracer.span("m2s_req", self._trace_label, packet.trace_id):
+                    await self._process_cxl_m2s_req_packet(packet)
 
             # process host request regardless of device processing state
             if not self._cxl_channel["m2s_rwd"].empty():
                 packet = await self._cxl_channel["m2s_rwd"].get()
-                await self._process_cxl_m2s_rwd_packet(packet)
+                with tracer.span("m2s_rwd", self._trace_label, packet.trace_id):
+                    await self._process_cxl_m2s_rwd_packet(packet)
 
     # pylint: disable=duplicate-code
     async def _run(self):
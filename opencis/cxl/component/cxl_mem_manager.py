@@ -8,6 +8,7 @@
 from typing import Optional, cast
 
 from opencis.util.logger import logger
+from opencis.util.tracing import tracer
 from opencis.pci.component.fifo_pair import FifoPair
 from opencis.cxl.transport.transaction import (
     BasePacket,
@@ -38,6 +39,7 @@ class CxlMemManager(PacketProcessor):
 
         super().__init__(upstream_fifo, downstream_fifo, label)
         self._memory_device_component: Optional[CxlMemoryDeviceComponent] = None
+        self._trace_label = self.get_message_label()
 
     def set_memory_device_component(self, memory_device_component: CxlMemoryDeviceComponent):
         self._memory_device_component = memory_device_component
@@ -52,11 +54,12 @@ class CxlMemManager(PacketProcessor):
             raise Exception("CxlMemoryDeviceComponent isn't set yet")
 
         addr = mem_rd_packet.get_address()
-        data = await self._memory_device_component.read_mem(addr)
+        data = await self._memory_device_component.read_mem_bytes(addr)
         ld_id = mem_rd_packet.m2sreq_header.ld_id
         logger.debug(self._create_message(f"CXL.mem Read: HPA addr:0x{addr:08x} LD-ID:{ld_id}"))
 
         packet = CxlMemMemDataPacket.create(data, ld_id=ld_id)
+        packet.trace_id = mem_rd_packet.trace_id
         await self._upstream_fifo.target_to_host.put(packet)
 
     async def _process_cxl_mem_wr_packet(self, mem_wr_packet: CxlMemMemWrPacket):
@@ -69,16 +72,13 @@ class CxlMemManager(PacketProcessor):
             raise Exception("CxlMemoryDeviceComponent isn't set yet")
 
         addr = mem_wr_packet.get_address()
-        data = mem_wr_packet.data
+        data = mem_wr_packet.get_data_bytes()
         ld_id = mem_wr_packet.m2srwd_header.ld_id
-        logger.debug(
-            self._create_message(
-                f"CXL.mem Write: HPA addr:0x{addr:08x} LD-ID:{ld_id} Data:0x{data:08x}"
-            )
-        )
+        logger.debug(self._create_message(f"CXL.mem Write: HPA addr:0x{addr:08x} LD-ID:{ld_id}"))
         await self._memory_device_component.write_mem(addr, data)
 
         packet = CxlMemCmpPacket.create(ld_id=ld_id)
+        packet.trace_id = mem_wr_packet.trace_id
         await self._upstream_fifo.target_to_host.put(packet)
 
     async def process_cxl_mem_bisnp_packet(self, mem_bisnp_packet: CxlMemBISnpPacket):
@@ -107,38 +107,41 @@ class CxlMemManager(PacketProcessor):
                 logger.debug(self._create_message("Stopped processing incoming fifo"))
                 break
 
-            base_packet = cast(BasePacket, packet)
-            if not base_packet.is_cxl_mem():
-                raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
+            await self.process_host_to_target_packet(packet)
 
-            logger.debug(self._create_message("Received incoming packet"))
-            cxl_mem_packet = cast(CxlMemBasePacket, packet)
+    async def process_host_to_target_packet(self, packet: CxlMemBasePacket):
+        base_packet = cast(BasePacket, packet)
+        if not base_packet.is_cxl_mem():
+            raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
 
-            if cxl_mem_packet.is_m2sreq():
-                m2sreq_packet = cast(CxlMemM2SReqPacket, packet)
-                if m2sreq_packet.is_mem_rd() or m2sreq_packet.is_mem_inv():
+        logger.debug(self._create_message("Received incoming packet"))
+        cxl_mem_packet = cast(CxlMemBasePacket, packet)
+
+        if cxl_mem_packet.is_m2sreq():
+            m2sreq_packet = cast(CxlMemM2SReqPacket, packet)
+            if m2sreq_packet.is_mem_rd() or m2sreq_packet.is_mem_inv():
+                with tracer.span("mem_rd", self._trace_label, packet.trace_id):
                     await self._process_cxl_mem_rd_packet(cast(CxlMemMemRdPacket, m2sreq_packet))
-                else:
-                    raise Exception(
-                        f"Unsupported MEM Opcode for Req: {m2sreq_packet.m2sreq_header.mem_opcode}"
-                    )
-            elif cxl_mem_packet.is_m2srwd():
-                m2srwd_packet = cast(CxlMemM2SRwDPacket, packet)
-                if m2srwd_packet.is_mem_wr():
+            else:
+                raise Exception(
+                    f"Unsupported MEM Opcode for Req: {m2sreq_packet.m2sreq_header.mem_opcode}"
+                )
+        elif cxl_mem_packet.is_m2srwd():
+            m2srwd_packet = cast(CxlMemM2SRwDPacket, packet)
+            if m2srwd_packet.is_mem_wr():
+                with tracer.span("mem_wr", self._trace_label, packet.trace_id):
                     await self._process_cxl_mem_wr_packet(cast(CxlMemMemWrPacket, m2srwd_packet))
-                else:
-                    raise Exception(
-                        f"Unsupported MEM Opcode for RwD: {m2srwd_packet.m2srwd_header.mem_opcode}"
-                    )
-            elif cxl_mem_packet.is_m2sbirsp():
-                m2sbirsp_packet = cast(CxlMemM2SBIRspPacket, packet)
-                if m2sbirsp_packet.is_m2sbirsp():
-                    await self._process_cxl_mem_birsp_packet(
-                        cast(CxlMemBIRspPacket, m2sbirsp_packet)
-                    )
-                else:
-                    raise Exception(
-                        f"Unsupported BIRsp packet, tag: {m2sbirsp_packet.m2sbirsp_header.bi_tag}"
-                    )
             else:
-                raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
+                raise Exception(
+                    f"Unsupported MEM Opcode for RwD: {m2srwd_packet.m2srwd_header.mem_opcode}"
+                )
+        elif cxl_mem_packet.is_m2sbirsp():
+            m2sbirsp_packet = cast(CxlMemM2SBIRspPacket, packet)
+            if m2sbirsp_packet.is_m2sbirsp():
+                await self._process_cxl_mem_birsp_packet(cast(CxlMemBIRspPacket, m2sbirsp_packet))
+            else:
+                raise Exception(
+                    f"Unsupported BIRsp packet, tag: {m2sbirsp_packet.m2sbirsp_header.bi_tag}"
+                )
+        else:
+            raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
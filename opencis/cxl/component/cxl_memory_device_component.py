@@ -7,12 +7,15 @@
 
 from dataclasses import dataclass
 from enum import IntEnum
-import os
 import time
 from typing import TypedDict, List, Optional
 
+from opencis.util.accessor import CharDriverAccessor
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
+from opencis.util.number import Payload, payload_to_bytes
 from opencis.util.number_const import KB
+from opencis.util.tracing import tracer
 from opencis.util.unaligned_bit_structure import (
     UnalignedBitStructure,
     ByteField,
@@ -36,6 +39,7 @@ from opencis.cxl.cci.generic.logs import GetLog, GetSupportedLogs
 from opencis.cxl.cci.memory_device.identify_memory_device import (
     IdentifyMemoryDevice,
 )
+from opencis.cxl.cci.memory_device.sanitize import Sanitize
 from opencis.cxl.component.bi_decoder import (
     CxlBIDecoderCapabilityStructureOptions,
     CxlBIDecoderCapabilityRegisterOptions,
@@ -66,47 +70,39 @@ from opencis.cxl.config_space.doe.cdat import (
 SIZE_256MB = 256 * 1024 * 1024
 
 
-class CharDriverAccessor:
-    def __init__(self, filename: str, size: int):
-        self.filename = filename
-        self.size = size
-
-    async def write(self, offset: int, data: int, size: int):
-        # TODO: Check for OOB and use asyncio
-        data_bytes = data.to_bytes(size, "little")
-        fd = os.open(self.filename, os.O_WRONLY, 0o644)
-        os.lseek(fd, offset, os.SEEK_SET)
-        os.write(fd, data_bytes)
-        os.close(fd)
-
-    async def read(self, offset: int, size: int) -> int:
-        # TODO: Check for OOB and use asyncio
-        fd = os.open(self.filename, os.O_RDONLY)
-        os.lseek(fd, offset, os.SEEK_SET)
-        data = os.read(fd, size)
-        os.close(fd)
-        return int.from_bytes(data, "little")
-
-
 class FileAccessor:
     def __init__(self, filename: str, _: int):
         self.filename = filename
+        self._read_latency = metrics.histogram("accessor_read_latency", filename)
+        self._write_latency = metrics.histogram("accessor_write_latency", filename)
+        self._trace_label = f"{self.__class__.__name__}:{filename}"
         with open(filename, "wb") as file:
             file.write(b"\x00" * 1024)
             file.flush()
 
-    async def write(self, offset: int, data: int, size: int):
+    async def write(self, offset: int, data: Payload, size: int):
         # TODO: Check for OOB and use asyncio
-        with open(self.filename, "r+b") as file:
+        start = time.perf_counter()
+        with tracer.span("write", self._trace_label), open(self.filename, "r+b") as file:
             file.seek(offset)
-            file.write(data.to_bytes(size, byteorder="little"))
+            file.write(payload_to_bytes(data, size))
+        self._write_latency.observe(time.perf_counter() - start)
 
-    async def read(self, offset: int, size: int) -> int:
+    async def read_bytes(self, offset: int, size: int) -> bytes:
         # TODO: Check for OOB and use asyncio
-        with open(self.filename, "rb") as file:
+        start = time.perf_counter()
+        with tracer.span("read", self._trace_label), open(self.filename, "rb") as file:
             file.seek(offset)
             data = file.read(size)
-            return int.from_bytes(data, byteorder="little")
+        self._read_latency.observe(time.perf_counter() - start)
+        # Reads past the end of the sparse backing file return zeros
+        if len(data) < size:
+            data += bytes(size - len(data))
+        return data
+
+    async def read(self, offset: int, size: int) -> int:
+        data = await self.read_bytes(offset, size)
+        return int.from_bytes(data, byteorder="little")
 
 
 class MemoryDeviceIdentity(UnalignedBitStructure):
@@ -184,12 +180,12 @@ class CXLCacheCacheLineInfo:
     last_access_time: float
     state: int = 0
     dirty: bool = False
-    data: int = 0
+    data: Payload = 0
 
-    def write(self, data: int):
+    def write(self, data: Payload):
         self.data = data
 
-    def read(self) -> int:
+    def read(self) -> Payload:
         return self.data
 
 
@@ -202,6 +198,7 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
         label: Optional[str] = None,
         cache_lines: int = 0,
         cache_line_size: int = 64 * KB,
+        io_threads: int = 0,
     ):
         super().__init__(label)
         self._event_manager = EventManager()
@@ -210,7 +207,7 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
         primary_mailbox_capabilities = MailboxCapabilities(
             payload_size=MIN_PAYLOAD_SIZE,
             mb_doorbell_interrupt_capable=0,
-            background_command_complete_interrupt_capable=0,
+            background_command_complete_interrupt_capable=1,
             interrupt_message_number=0,
             mailbox_ready_time=0,
             type=MAILBOX_TYPE.MEMORY_DEVICE_COMMANDS,
@@ -223,6 +220,7 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
             GetLog(self._log_manager),
             GetSupportedLogs(self._log_manager),
             IdentifyMemoryDevice(self._identity),
+            Sanitize(self._identity.get_total_capacity(), self.write_mem_dpa),
         ]
         self._primary_mailbox = CxlMailbox(
             capabilities=primary_mailbox_capabilities, commands=primary_mailbox_commands
@@ -244,7 +242,7 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
         self._hdm_decoder_manager = DeviceHdmDecoderManager(hdm_decoder_capabilities, label=label)
         if "/dev" in memory_file:
             self._memory_accessor = CharDriverAccessor(
-                memory_file, self._identity.get_total_capacity()
+                memory_file, self._identity.get_total_capacity(), io_threads=io_threads
             )
         elif memory_file == "":
             self._memory_accessor = None
@@ -262,6 +260,10 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
                 )
             )
 
+    async def close(self):
+        if isinstance(self._memory_accessor, CharDriverAccessor):
+            await self._memory_accessor.close()
+
     def get_primary_mailbox(self) -> Optional[CxlMailbox]:
         return self._primary_mailbox
 
@@ -358,7 +360,7 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
             return None
         return hpa
 
-    async def write_mem(self, hpa: int, data: int, size: int = 64):
+    async def write_mem(self, hpa: int, data: Payload, size: int = 64):
         dpa = self._hdm_decoder_manager.get_dpa(hpa)
         if dpa is None:
             logger.warning(self._create_message(f"[write_mem] HPA {hex(hpa)} is not decodable"))
@@ -372,15 +374,25 @@ class CxlMemoryDeviceComponent(CxlDeviceComponent):
             return 0
         return await self._memory_accessor.read(dpa, size)
 
+    async def read_mem_bytes(self, hpa: int, size: int = 64) -> bytes:
+        dpa = self._hdm_decoder_manager.get_dpa(hpa)
+        if dpa is None:
+            logger.warning(self._create_message(f"[read_mem] HPA {hex(hpa)} is not decodable"))
+            return bytes(size)
+        return await self._memory_accessor.read_bytes(dpa, size)
+
     async def read_mem_dpa(self, dpa: int, size: int = 64) -> int:
         return await self._memory_accessor.read(dpa, size)
 
-    async def write_mem_dpa(self, dpa: int, data: int, size: int = 64):
+    async def read_mem_dpa_bytes(self, dpa: int, size: int = 64) -> bytes:
+        return await self._memory_accessor.read_bytes(dpa, size)
+
+    async def write_mem_dpa(self, dpa: int, data: Payload, size: int = 64):
         await self._memory_accessor.write(dpa, data, size)
 
     # TODO: check OOB write for cache (should <= self._cache_line_size)
-    async def write_cache(self, cache_id: int, data: int):
+    async def write_cache(self, cache_id: int, data: Payload):
         self._cache_info[cache_id].write(data)
 
-    async def read_cache(self, cache_id: int) -> int:
+    async def read_cache(self, cache_id: int) -> Payload:
         return self._cache_info[cache_id].read()
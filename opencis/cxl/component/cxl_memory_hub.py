@@ -7,9 +7,12 @@
 
 import asyncio
 from dataclasses import dataclass, field
-from typing import Callable, List
+from typing import Callable, List, Optional
 from opencis.cxl.component.irq_manager import Irq, IrqManager
+from opencis.cxl.component.memory_requester import MemoryRequester
+from opencis.cxl.component.memory_trace import MEMORY_TRACE_OP, MemoryTraceRecorder
 from opencis.util.component import RunnableComponent
+from opencis.util.tracing import tracer
 from opencis.cxl.component.root_complex.root_complex import (
     RootComplex,
     RootComplexConfig,
@@ -37,6 +40,7 @@ from opencis.cxl.transport.memory_fifo import (
     MEMORY_REQUEST_TYPE,
     MEMORY_RESPONSE_STATUS,
 )
+from opencis.util.number import Payload, payload_to_bytes, payload_to_int
 from opencis.util.pci import create_bdf
 
 
@@ -48,13 +52,24 @@ class CxlMemoryHubConfig:
     irq_handler: IrqManager
     root_port_switch_type: ROOT_PORT_SWITCH_TYPE
     root_ports: List[RootPortClientConfig] = field(default_factory=list)
+    # Loads and stores that may wait on the cache controller at the same time
+    max_outstanding_requests: int = 16
+    # Records every load() and store() when set
+    trace_recorder: Optional[MemoryTraceRecorder] = None
 
 
 class CxlMemoryHub(RunnableComponent):
     def __init__(self, config: CxlMemoryHubConfig):
         super().__init__(lambda class_name: f"{config.host_name}:{class_name}")
 
+        self._host_name = config.host_name
+        self._trace_recorder = config.trace_recorder
         self._processor_to_cache_fifo = MemoryFifoPair()
+        self._request_slots = asyncio.Semaphore(config.max_outstanding_requests)
+        self._memory_requester = MemoryRequester(
+            self._processor_to_cache_fifo, lambda class_name: f"{config.host_name}:{class_name}"
+        )
+        self._trace_label = self.get_message_label()
         cache_to_home_agent_fifo = CacheFifoPair()
         home_agent_to_cache_fifo = CacheFifoPair()
         cache_to_coh_bridge_fifo = CacheFifoPair()
@@ -160,22 +175,34 @@ class CxlMemoryHub(RunnableComponent):
         )
 
     async def _send_mem_request(self, packet: MemoryRequest) -> MemoryResponse:
-        await self._processor_to_cache_fifo.request.put(packet)
-        resp = await self._processor_to_cache_fifo.response.get()
+        async with self._request_slots:
+            packet.trace_id = tracer.get_trace_id()
+            resp = await self._memory_requester.request(packet)
         assert resp.status == MEMORY_RESPONSE_STATUS.OK
         return resp
 
     async def load(self, addr: int, size: int) -> int:
+        with tracer.trace("load", self._trace_label):
+            if self._trace_recorder is None:
+                return await self._load(addr, size)
+            timestamp = self._trace_recorder.get_timestamp()
+            value = await self._load(addr, size)
+            self._trace_recorder.record(
+                timestamp, self._host_name, MEMORY_TRACE_OP.LOAD, addr, size, value
+            )
+            return value
+
+    async def _load(self, addr: int, size: int) -> int:
         addr_type = self._cache_controller.get_mem_addr_type(addr)
         match addr_type:
             case MEM_ADDR_TYPE.DRAM | MEM_ADDR_TYPE.CXL_CACHED | MEM_ADDR_TYPE.CXL_CACHED_BI:
                 packet = MemoryRequest(MEMORY_REQUEST_TYPE.READ, addr, size)
                 resp = await self._send_mem_request(packet)
-                return resp.data
+                return payload_to_int(resp.data)
             case MEM_ADDR_TYPE.CXL_UNCACHED:
                 packet = MemoryRequest(MEMORY_REQUEST_TYPE.UNCACHED_READ, addr, size)
                 resp = await self._send_mem_request(packet)
-                return resp.data
+                return payload_to_int(resp.data)
             case MEM_ADDR_TYPE.MMIO:
                 return await self._root_complex.read_mmio(addr, size)
             case MEM_ADDR_TYPE.CFG:
@@ -185,8 +212,38 @@ class CxlMemoryHub(RunnableComponent):
             case _:
                 raise Exception(self._create_message(f"Address 0x{addr:x} is OOB."))
 
-    async def store(self, addr: int, size: int, data: int):
+    async def load_bytes(self, addr: int, size: int) -> bytes:
+        """
+        Same as load(), but memory-backed ranges return the cacheline as-is
+        instead of converting it to an int.
+        """
+        addr_type = self._cache_controller.get_mem_addr_type(addr)
+        match addr_type:
+            case MEM_ADDR_TYPE.DRAM | MEM_ADDR_TYPE.CXL_CACHED | MEM_ADDR_TYPE.CXL_CACHED_BI:
+                packet = MemoryRequest(MEMORY_REQUEST_TYPE.READ, addr, size)
+            case MEM_ADDR_TYPE.CXL_UNCACHED:
+                packet = MemoryRequest(MEMORY_REQUEST_TYPE.UNCACHED_READ, addr, size)
+            case _:
+                return payload_to_bytes(await self._load(addr, size), size)
+        with tracer.trace("load", self._trace_label):
+            resp = await self._send_mem_request(packet)
+        return payload_to_bytes(resp.data, size)
+
+    async def store(self, addr: int, size: int, data: Payload):
+        with tracer.trace("store", self._trace_label):
+            if self._trace_recorder is None:
+                await self._store(addr, size, data)
+                return
+            timestamp = self._trace_recorder.get_timestamp()
+            await self._store(addr, size, data)
+            self._trace_recorder.record(
+                timestamp, self._host_name, MEMORY_TRACE_OP.STORE, addr, size, data
+            )
+
+    async def _store(self, addr: int, size: int, data: Payload):
         addr_type = self._cache_controller.get_mem_addr_type(addr)
+        if addr_type in (MEM_ADDR_TYPE.MMIO, MEM_ADDR_TYPE.CFG):
+            data = payload_to_int(data)
         match addr_type:
             case MEM_ADDR_TYPE.DRAM | MEM_ADDR_TYPE.CXL_CACHED | MEM_ADDR_TYPE.CXL_CACHED_BI:
                 packet = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, size, data)
@@ -226,6 +283,7 @@ class CxlMemoryHub(RunnableComponent):
             asyncio.create_task(self._root_port_client_manager.run()),
             asyncio.create_task(self._root_complex.run()),
             asyncio.create_task(self._cache_controller.run()),
+            asyncio.create_task(self._memory_requester.process_responses()),
         ]
         wait_tasks = [
             asyncio.create_task(self._root_port_client_manager.wait_for_ready()),
@@ -243,3 +301,4 @@ class CxlMemoryHub(RunnableComponent):
             asyncio.create_task(self._cache_controller.stop()),
         ]
         await asyncio.gather(*tasks)
+        await self._processor_to_cache_fifo.response.put(None)
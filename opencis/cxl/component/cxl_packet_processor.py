@@ -19,6 +19,8 @@ from typing import cast, Optional, Dict, Union, List
 from opencis.cxl.cci.common import CCI_FM_API_COMMAND_OPCODE
 from opencis.util.logger import logger
 from opencis.util.component import RunnableComponent
+from opencis.util.metrics import metrics
+from opencis.util.tracing import tracer
 from opencis.cxl.component.common import CXL_COMPONENT_TYPE
 from opencis.cxl.component.cxl_connection import CxlConnection
 from opencis.cxl.component.packet_reader import PacketReader
@@ -78,6 +80,25 @@ class CxlPacketProcessor(RunnableComponent):
         self._component_type = component_type
         self._fmld = None
         self._cci_connection_for_fmld = None
+        metrics_label = self.get_message_label()
+        self._rx_packets = {
+            payload_type: metrics.counter("packets_rx", f"{metrics_label},{payload_type.name}")
+            for payload_type in PAYLOAD_TYPE
+        }
+        self._tx_packets = {
+            payload_type: metrics.counter("packets_tx", f"{metrics_label},{payload_type.name}")
+            for payload_type in PAYLOAD_TYPE
+        }
+        # Trace ids of written packets are bound to the link and the packet's position
+        # in the stream, and claimed by the processor reading the other end. CXL.mem
+        # tags do not tell packets apart, as requests here all use tag 0.
+        self._trace_label = metrics_label
+        sockname = writer.get_extra_info("sockname")
+        peername = writer.get_extra_info("peername")
+        self._trace_tx_link = (sockname, peername)
+        self._trace_rx_link = (peername, sockname)
+        self._tx_sequence = 0
+        self._rx_sequence = 0
 
         logger.debug(self._create_message(f"Configured for {component_type.name}"))
         if component_type in (CXL_COMPONENT_TYPE.R, CXL_COMPONENT_TYPE.DSP):
@@ -152,16 +173,14 @@ class CxlPacketProcessor(RunnableComponent):
             )
             self._incoming_dir = PROCESSOR_DIRECTION.HOST_TO_TARGET
             self._outgoing_dir = PROCESSOR_DIRECTION.TARGET_TO_HOST
-            self._incoming = [
-                FifoGroup(
-                    cfg_space=cxl_conn.cfg_fifo.host_to_target,
-                    mmio=cxl_conn.mmio_fifo.host_to_target,
-                    cxl_mem=cxl_conn.cxl_mem_fifo.host_to_target,
-                    cxl_cache=None,
-                    cci_fifo=None,
-                )
-                for cxl_conn in self._cxl_connection
-            ]
+            # The LDs share these FIFOs, and MldDispatcher routes their packets by LD-ID
+            self._incoming = FifoGroup(
+                cfg_space=self._cxl_connection[0].cfg_fifo.host_to_target,
+                mmio=self._cxl_connection[0].mmio_fifo.host_to_target,
+                cxl_mem=self._cxl_connection[0].cxl_mem_fifo.host_to_target,
+                cxl_cache=None,
+                cci_fifo=None,
+            )
 
             self._outgoing = FifoGroup(
                 cfg_space=self._cxl_connection[0].cfg_fifo.target_to_host,
@@ -207,6 +226,12 @@ class CxlPacketProcessor(RunnableComponent):
         while True:  # pylint: disable=too-many-nested-blocks
             try:
                 packet = await self._reader.get_packet()
+                self._rx_packets[packet.system_header.payload_type].inc()
+                self._rx_sequence += 1
+                if tracer.has_bindings():
+                    packet.trace_id = tracer.claim(
+                        (self._trace_rx_link, self._rx_sequence), self._trace_label
+                    )
                 if packet.is_cxl_io():
                     cxl_io_packet = cast(CxlIoBasePacket, packet)
                     if cxl_io_packet.is_cpl() or cxl_io_packet.is_cpld():
@@ -216,18 +241,10 @@ class CxlPacketProcessor(RunnableComponent):
                             )
                         )
                         fifo_type = self._pop_tlp_table_entry(cxl_io_packet)
-                        # Add MLD
-                        if self._component_type == CXL_COMPONENT_TYPE.LD:
-                            ld_id = cxl_io_packet.tlp_prefix.ld_id
-                            if fifo_type == CXL_IO_FIFO_TYPE.CFG:
-                                await self._incoming[ld_id].cfg_space.put(cxl_io_packet)
-                            else:
-                                await self._incoming[ld_id].mmio.put(cxl_io_packet)
+                        if fifo_type == CXL_IO_FIFO_TYPE.CFG:
+                            await self._incoming.cfg_space.put(cxl_io_packet)
                         else:
-                            if fifo_type == CXL_IO_FIFO_TYPE.CFG:
-                                await self._incoming.cfg_space.put(cxl_io_packet)
-                            else:
-                                await self._incoming.mmio.put(cxl_io_packet)
+                            await self._incoming.mmio.put(cxl_io_packet)
                     elif cxl_io_packet.is_cfg():
                         logger.debug(
                             self._create_message(
@@ -235,12 +252,7 @@ class CxlPacketProcessor(RunnableComponent):
                             )
                         )
                         self._push_tlp_table_entry(cxl_io_packet)
-                        # Add MLD
-                        if self._component_type == CXL_COMPONENT_TYPE.LD:
-                            ld_id = cxl_io_packet.tlp_prefix.ld_id
-                            await self._incoming[ld_id].cfg_space.put(cxl_io_packet)
-                        else:
-                            await self._incoming.cfg_space.put(cxl_io_packet)
+                        await self._incoming.cfg_space.put(cxl_io_packet)
                     elif cxl_io_packet.is_mmio():
                         logger.debug(
                             self._create_message(
@@ -249,43 +261,20 @@ class CxlPacketProcessor(RunnableComponent):
                         )
                         if cxl_io_packet.is_mem_write() is False:
                             self._push_tlp_table_entry(cxl_io_packet)
-                        # Add MLD
-                        if self._component_type == CXL_COMPONENT_TYPE.LD:
-                            ld_id = cxl_io_packet.tlp_prefix.ld_id
-                            await self._incoming[ld_id].mmio.put(cxl_io_packet)
-                        else:
-                            await self._incoming.mmio.put(cxl_io_packet)
+                        await self._incoming.mmio.put(cxl_io_packet)
                     else:
                         logger.warning(self._create_message("Unexpected CXL.io packet"))
                         logger.debug(self._create_message(packet.get_pretty_string()))
                         raise Exception("Received unexpected CXL.io packet")
                 elif packet.is_cxl_mem():
-                    if (
-                        self._component_type != CXL_COMPONENT_TYPE.LD
-                        and self._incoming.cxl_mem is None
-                    ):
+                    if self._incoming.cxl_mem is None:
                         logger.error(self._create_message("Got CXL.mem packet on no CXL.mem FIFO"))
                         continue
                     logger.debug(
                         self._create_message(f"Received {self._incoming_dir} CXL.mem packet")
                     )
                     cxl_mem_packet = cast(CxlMemBasePacket, packet)
-                    if self._component_type == CXL_COMPONENT_TYPE.LD:
-                        # Add LD routing code
-                        if cxl_mem_packet.is_m2sreq():
-                            ld_id = cxl_mem_packet.m2sreq_header.ld_id
-                        elif cxl_mem_packet.is_m2srwd():
-                            ld_id = cxl_mem_packet.m2srwd_header.ld_id
-                        elif cxl_mem_packet.is_s2mndr():
-                            ld_id = cxl_mem_packet.s2mndr_header.ld_id
-                        elif cxl_mem_packet.is_s2mdrs():
-                            ld_id = cxl_mem_packet.s2mdrs_header.ld_id
-                        else:
-                            logger.warning(self._create_message("Unexpected CXL.mem packet"))
-
-                        await self._incoming[ld_id].cxl_mem.put(cxl_mem_packet)
-                    else:
-                        await self._incoming.cxl_mem.put(cxl_mem_packet)
+                    await self._incoming.cxl_mem.put(cxl_mem_packet)
 
                 elif packet.is_cxl_cache():
                     if self._incoming.cxl_cache is None:
@@ -339,6 +328,13 @@ class CxlPacketProcessor(RunnableComponent):
             logger.info(self._create_message("Sending disconnection notification to CCI"))
             await self._outgoing.cci_fifo.put(packet)
 
+    def _write_packet(self, packet: BasePacket):
+        self._tx_packets[packet.system_header.payload_type].inc()
+        self._tx_sequence += 1
+        if packet.trace_id is not None:
+            tracer.bind((self._trace_tx_link, self._tx_sequence), packet.trace_id)
+        self._writer.write(bytes(packet))
+
     async def _process_outgoing_cfg_packets(self):
         logger.debug(self._create_message("Starting outgoing CFG FIFO processor"))
         while True:
@@ -359,7 +355,7 @@ class CxlPacketProcessor(RunnableComponent):
                     )
                 )
                 self._push_tlp_table_entry(cxl_io_packet)
-            self._writer.write(bytes(packet))
+            self._write_packet(packet)
             await self._writer.drain()
         logger.debug(self._create_message("Stopped outgoing CFG FIFO processor"))
 
@@ -381,7 +377,7 @@ class CxlPacketProcessor(RunnableComponent):
                 )
                 if cxl_io_packet.is_mem_write() is False:
                     self._push_tlp_table_entry(cxl_io_packet)
-            self._writer.write(bytes(packet))
+            self._write_packet(packet)
             await self._writer.drain()
         logger.debug(self._create_message("Stopped outgoing MMIO FIFO processor"))
 
@@ -391,7 +387,7 @@ class CxlPacketProcessor(RunnableComponent):
             packet = await self._outgoing.cxl_mem.get()
             if self._is_disconnection_notification(packet):
                 break
-            self._writer.write(bytes(packet))
+            self._write_packet(packet)
             await self._writer.drain()
         logger.debug(self._create_message("Stopped outgoing CXL.mem FIFO processor"))
 
@@ -401,7 +397,7 @@ class CxlPacketProcessor(RunnableComponent):
             packet = await self._outgoing.cxl_cache.get()
             if self._is_disconnection_notification(packet):
                 break
-            self._writer.write(bytes(packet))
+            self._write_packet(packet)
             await self._writer.drain()
         logger.debug(self._create_message("Stopped outgoing CXL.cache FIFO processor"))
 
@@ -417,15 +413,15 @@ class CxlPacketProcessor(RunnableComponent):
                 logger.info(self._create_message(f"Received CCI packet with opcode {opcode:x}"))
                 if opcode == CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO:
                     packet = cast(GetLdInfoResponsePacket, packet)
-                    self._writer.write(bytes(packet))
+                    self._write_packet(packet)
                     await self._writer.drain()
                 elif opcode == CCI_FM_API_COMMAND_OPCODE.GET_LD_ALLOCATIONS:
                     packet = cast(GetLdAllocationsResponsePacket, packet)
-                    self._writer.write(bytes(packet))
+                    self._write_packet(packet)
                     await self._writer.drain()
                 elif opcode == CCI_FM_API_COMMAND_OPCODE.SET_LD_ALLOCATIONS:
                     packet = cast(SetLdAllocationsResponsePacket, packet)
-                    self._writer.write(bytes(packet))
+                    self._write_packet(packet)
                     await self._writer.drain()
                 else:
                     logger.warning(self._create_message("Unsupported CCI packet"))
@@ -433,7 +429,7 @@ class CxlPacketProcessor(RunnableComponent):
                 packet = await self._outgoing.cci_fifo.get()
                 if self._is_disconnection_notification(packet):
                     break
-                self._writer.write(bytes(packet))
+                self._write_packet(packet)
                 await self._writer.drain()
             else:
                 break
@@ -12,7 +12,6 @@ from opencis.cxl.component.short_msg_conn import ShortMsgBase, ShortMsgConn
 from opencis.util.component import RunnableComponent
 from opencis.cxl.component.mctp.mctp_cci_api_client import (
     MctpCciApiClient,
-    GetPhysicalPortStateRequestPayload,
     GetVirtualCxlSwitchInfoRequestPayload,
     IdentifySwitchDeviceResponsePayload,
     BindVppbRequestPayload,
@@ -21,11 +20,14 @@ from opencis.cxl.component.mctp.mctp_cci_api_client import (
     GetLdAllocationsRequestPayload,
     SetLdAllocationsRequestPayload,
 )
+from opencis.cxl.cci.fabric_manager.virtual_switch.get_virtual_cxl_switch_info import (
+    VcsInfoBlock,
+)
 from opencis.cxl.cci.common import (
     CCI_VENDOR_SPECIFIC_OPCODE,
     get_opcode_string,
 )
-from typing import TypedDict, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Tuple, TypedDict, Optional, Any
 from pprint import pformat
 from opencis.util.logger import logger
 from functools import partial
@@ -36,6 +38,44 @@ class CommandResponse(TypedDict):
     result: Any
 
 
+class InventoryDelta(TypedDict):
+    updated: List[Any]
+    removed: List[int]
+
+
+# Notifications that arrive within this window are folded into a single refresh
+NOTIFICATION_DEBOUNCE_S = 0.05
+
+
+class InventorySnapshot:
+    """
+    Last port, VCS or device inventory sent to clients, keyed by entry id.
+    update() replaces it and returns only the entries that changed.
+    """
+
+    def __init__(self, key: str):
+        self._key = key
+        self._entries: Optional[Dict[int, Any]] = None
+        self.stale = True
+
+    def get(self) -> Optional[List[Any]]:
+        if self._entries is None:
+            return None
+        return list(self._entries.values())
+
+    def update(self, entries: List[Any]) -> InventoryDelta:
+        new_entries = {entry[self._key]: entry for entry in entries}
+        old_entries = self._entries or {}
+        delta: InventoryDelta = {
+            "updated": [
+                entry for key, entry in new_entries.items() if old_entries.get(key) != entry
+            ],
+            "removed": [key for key in old_entries if key not in new_entries],
+        }
+        self._entries = new_entries
+        return delta
+
+
 class HostFMMsg(ShortMsgBase):
     UNBIND = 0x00
     BIND = 0x01
@@ -105,33 +145,70 @@ class HostFMConnManager:
     def __init__(self, api_client: MctpCciApiClient, host_fm_conn_server: ShortMsgConn):
         self._api_client = api_client
         self._host_fm_conn_server = host_fm_conn_server
+        # VCS ID -> USP ID, filled on first use and dropped by invalidate_topology()
+        self._usp_by_vcs: Optional[Dict[int, int]] = None
+        self._topology_lock = asyncio.Lock()
 
     async def notify_host_bind(self, device_vppb: int, vcs_id: int):
-        root_port = await self.get_usp_by_vcs_id(vcs_id)
-        req = HostFMMsg.create(device_vppb, root_port, False, True)
-        logger.info(
-            f"Host bind notification root_port {root_port}, device_vppb {device_vppb}, val {req.real_val}"
-        )
-        await self._host_fm_conn_server.send_irq_request(req, root_port)
+        await self.notify_hosts([(device_vppb, vcs_id)], bind=True)
 
     async def notify_host_unbind(self, device_vppb: int, vcs_id: int):
-        root_port = await self.get_usp_by_vcs_id(vcs_id)
-        req = HostFMMsg.create(device_vppb, root_port, False, False)
-        logger.info(
-            f"Host unbind notification root_port {root_port}, device_vppb {device_vppb}, val {req.real_val}"
-        )
-        await self._host_fm_conn_server.send_irq_request(req, root_port)
+        await self.notify_hosts([(device_vppb, vcs_id)], bind=False)
+
+    async def notify_hosts(self, vppbs: List[Tuple[int, int]], bind: bool):
+        """
+        Notifies the hosts of (vPPB, VCS ID) pairs that were bound or unbound.
+        Notifications for the same root port are sent together.
+        """
+        vppbs_by_root_port: Dict[int, List[int]] = {}
+        for device_vppb, vcs_id in vppbs:
+            root_port = await self.get_usp_by_vcs_id(vcs_id)
+            if root_port is None:
+                logger.warning(f"No root port for VCS {vcs_id}, vPPB {device_vppb} not notified")
+                continue
+            vppbs_by_root_port.setdefault(root_port, []).append(device_vppb)
+        for root_port, device_vppbs in vppbs_by_root_port.items():
+            logger.info(
+                f"Host {'bind' if bind else 'unbind'} notification root_port {root_port}, "
+                f"device_vppbs {device_vppbs}"
+            )
+            # HostFMMsg.create() reuses the enum member, so each message is
+            # created only when the connection is about to encode it
+            await self._host_fm_conn_server.send_irq_requests(
+                (HostFMMsg.create(vppb, root_port, False, bind) for vppb in device_vppbs),
+                root_port,
+            )
 
-    async def get_usp_by_vcs_id(self, vcs_id: int):
-        vcs_info_tuple = await self._api_client.get_virtual_cxl_switch_info(
+    async def get_usp_by_vcs_id(self, vcs_id: int) -> Optional[int]:
+        async with self._topology_lock:
+            if self._usp_by_vcs is None or vcs_id not in self._usp_by_vcs:
+                await self._fetch_topology()
+            if self._usp_by_vcs is None:
+                return None
+            return self._usp_by_vcs.get(vcs_id)
+
+    def update_topology(self, vcs_info_list: List[VcsInfoBlock]):
+        self._usp_by_vcs = {vcs_info.vcs_id: vcs_info.usp_id for vcs_info in vcs_info_list}
+
+    def invalidate_topology(self):
+        self._usp_by_vcs = None
+
+    async def _fetch_topology(self):
+        (return_code, switch_identity) = await self._api_client.identify_switch_device()
+        if not switch_identity:
+            logger.warning(f"Topology not refreshed, failed to identify switch: {return_code.name}")
+            return
+        (return_code, response) = await self._api_client.get_virtual_cxl_switch_info(
             GetVirtualCxlSwitchInfoRequestPayload(
-                start_vppb=0, vppb_list_limit=255, vcs_id_list=[vcs_id]
+                start_vppb=0,
+                vppb_list_limit=255,
+                vcs_id_list=list(range(switch_identity.num_vcss)),
             )
         )
-        vcs_info_list = vcs_info_tuple[1]
-        for vcs_info in vcs_info_list.vcs_info_list:
-            if vcs_id == vcs_info.vcs_id:
-                return vcs_info.usp_id
+        if not response:
+            logger.warning(f"Topology not refreshed, failed to get VCS info: {return_code.name}")
+            return
+        self.update_topology(response.vcs_info_list)
 
 
 class FabricManagerSocketIoServer(RunnableComponent):
@@ -141,6 +218,7 @@ class FabricManagerSocketIoServer(RunnableComponent):
         host_fm_conn_manager: HostFMConnManager,
         host: str = "0.0.0.0",
         port: int = 8200,
+        notification_debounce: float = NOTIFICATION_DEBOUNCE_S,
     ):
         super().__init__()
         self._mctp_client = mctp_client
@@ -151,6 +229,22 @@ class FabricManagerSocketIoServer(RunnableComponent):
         self._switch_identity = None
         self._stop_signal = False
 
+        # Inventories are fetched over MCTP only when a notification marked them stale
+        self._inventories: Dict[str, InventorySnapshot] = {
+            "port": InventorySnapshot("portId"),
+            "vcs": InventorySnapshot("virtualCxlSwitchId"),
+            "device": InventorySnapshot("boundPortId"),
+        }
+        self._inventory_fetchers: Dict[str, Callable[[], Awaitable[CommandResponse]]] = {
+            "port": self._fetch_physical_ports,
+            "vcs": self._fetch_virtual_switches,
+            "device": self._fetch_devices,
+        }
+        self._inventory_locks = {kind: asyncio.Lock() for kind in self._inventories}
+        self._notification_debounce = notification_debounce
+        self._flush_pending = False
+        self._flush_tasks = set()
+
         # Create a new Aiohttp web app
         self._app = web.Application()
 
@@ -164,6 +258,8 @@ class FabricManagerSocketIoServer(RunnableComponent):
         self._register_handler("device:get")
         self._register_handler("vcs:bind")
         self._register_handler("vcs:unbind")
+        self._register_handler("vcs:bindBatch")
+        self._register_handler("vcs:unbindBatch")
         self._register_handler("mld:get")
         self._register_handler("mld:getAllocation")
         self._register_handler("mld:setAllocation")
@@ -177,14 +273,52 @@ class FabricManagerSocketIoServer(RunnableComponent):
         opcode = packet.header.command_opcode
         opcode_str = get_opcode_string(opcode)
         if opcode == CCI_VENDOR_SPECIFIC_OPCODE.NOTIFY_PORT_UPDATE:
-            await self._send_update_physical_ports_notification()
+            self._mark_stale("port")
         elif opcode == CCI_VENDOR_SPECIFIC_OPCODE.NOTIFY_SWITCH_UPDATE:
-            await self._send_update_virtual_cxl_switches_notification()
+            self._mark_stale("vcs")
         elif opcode == CCI_VENDOR_SPECIFIC_OPCODE.NOTIFY_DEVICE_UPDATE:
-            await self._send_update_devices_notification()
+            self._mark_stale("device")
         else:
             logger.error(self._create_message(f"Unexpected Packet {opcode_str}"))
 
+    def _mark_stale(self, kind: str):
+        # Runs on the MCTP client's receive loop, so it must not wait on MCTP itself
+        self._inventories[kind].stale = True
+        if not self._flush_pending:
+            self._flush_pending = True
+            task = asyncio.create_task(self._flush_notifications())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_notifications(self):
+        await asyncio.sleep(self._notification_debounce)
+        # Notifications from here on schedule another flush
+        self._flush_pending = False
+        if self._inventories["vcs"].stale:
+            # Refilled by the VCS refresh below, or on the next host notification
+            self._host_fm_conn_manager.invalidate_topology()
+        for kind, inventory in self._inventories.items():
+            # Never fetched: nobody has seen it yet, so the next get fills it
+            if inventory.stale and inventory.get() is not None:
+                await self._refresh_inventory(kind)
+
+    async def _refresh_inventory(self, kind: str) -> CommandResponse:
+        async with self._inventory_locks[kind]:
+            inventory = self._inventories[kind]
+            if not inventory.stale:
+                return CommandResponse(error="", result=inventory.get())
+            # Cleared before fetching so that a notification during the fetch is not lost
+            inventory.stale = False
+            response = await self._inventory_fetchers[kind]()
+            if response["error"]:
+                inventory.stale = True
+                return response
+            initial = inventory.get() is None
+            delta = inventory.update(response["result"])
+            if not initial and (delta["updated"] or delta["removed"]):
+                await self._sio.emit(f"{kind}:updated", delta)
+            return response
+
     async def _handle_event(self, event_type, _, data=None):
         async with self._event_lock:
             # Determine the event type and call the appropriate method
@@ -201,6 +335,10 @@ class FabricManagerSocketIoServer(RunnableComponent):
                 response = await self._bind_vppb(data)
             elif event_type == "vcs:unbind":
                 response = await self._unbind_vppb(data)
+            elif event_type == "vcs:bindBatch":
+                response = await self._bind_vppbs(data)
+            elif event_type == "vcs:unbindBatch":
+                response = await self._unbind_vppbs(data)
             elif event_type == "mld:get":
                 response = await self._get_ld_info(data)
             elif event_type == "mld:getAllocation":
@@ -220,16 +358,24 @@ class FabricManagerSocketIoServer(RunnableComponent):
         return self._switch_identity
 
     async def _get_physical_ports(self) -> CommandResponse:
+        return await self._refresh_inventory("port")
+
+    async def _get_virtual_switches(self) -> CommandResponse:
+        return await self._refresh_inventory("vcs")
+
+    async def _get_devices(self) -> CommandResponse:
+        return await self._refresh_inventory("device")
+
+    async def _fetch_physical_ports(self) -> CommandResponse:
         switch_identity = await self._get_switch_identity()
         port_id_list = list(range(switch_identity.num_physical_ports))
-        request = GetPhysicalPortStateRequestPayload(port_id_list)
-        (return_code, response) = await self._mctp_client.get_physical_port_state(request)
+        (return_code, response) = await self._mctp_client.gather_port_states(port_id_list)
         if response:
             return CommandResponse(error="", result=response.to_dict()["portInfoList"])
         else:
             return CommandResponse(error=return_code.name)
 
-    async def _get_virtual_switches(self) -> CommandResponse:
+    async def _fetch_virtual_switches(self) -> CommandResponse:
         switch_identity = await self._get_switch_identity()
         vcs_id_list = list(range(switch_identity.num_vcss))
         request = GetVirtualCxlSwitchInfoRequestPayload(
@@ -237,11 +383,12 @@ class FabricManagerSocketIoServer(RunnableComponent):
         )
         (return_code, response) = await self._mctp_client.get_virtual_cxl_switch_info(request)
         if response:
+            self._host_fm_conn_manager.update_topology(response.vcs_info_list)
             return CommandResponse(error="", result=response.to_dict()["vcsInfoList"])
         else:
             return CommandResponse(error=return_code.name)
 
-    async def _get_devices(self) -> CommandResponse:
+    async def _fetch_devices(self) -> CommandResponse:
         (return_code, response) = await self._mctp_client.get_connected_devices()
         if response:
             return CommandResponse(error="", result=response.to_dict()["devices"])
@@ -249,6 +396,40 @@ class FabricManagerSocketIoServer(RunnableComponent):
             return CommandResponse(error=return_code.name)
 
     async def _bind_vppb(self, data) -> CommandResponse:
+        (response, bound) = await self._send_bind_vppb(data)
+        if bound:
+            await self._host_fm_conn_manager.notify_host_bind(
+                data["vppbId"], data["virtualCxlSwitchId"]
+            )
+        return response
+
+    async def _unbind_vppb(self, data) -> CommandResponse:
+        await self._host_fm_conn_manager.notify_host_unbind(
+            data["vppbId"], data["virtualCxlSwitchId"]
+        )
+        return await self._send_unbind_vppb(data)
+
+    async def _bind_vppbs(self, data) -> CommandResponse:
+        # Binds run one at a time on the switch (one background command at a time);
+        # the hosts are notified once all of them are done
+        responses = []
+        bound_vppbs = []
+        for binding in data:
+            (response, bound) = await self._send_bind_vppb(binding)
+            responses.append(response)
+            if bound:
+                bound_vppbs.append((binding["vppbId"], binding["virtualCxlSwitchId"]))
+        await self._host_fm_conn_manager.notify_hosts(bound_vppbs, bind=True)
+        return CommandResponse(error="", result=responses)
+
+    async def _unbind_vppbs(self, data) -> CommandResponse:
+        await self._host_fm_conn_manager.notify_hosts(
+            [(binding["vppbId"], binding["virtualCxlSwitchId"]) for binding in data], bind=False
+        )
+        responses = [await self._send_unbind_vppb(binding) for binding in data]
+        return CommandResponse(error="", result=responses)
+
+    async def _send_bind_vppb(self, data) -> Tuple[CommandResponse, bool]:
         ld_id = data.get("ldId")
         if ld_id is None:
             ld_id = 0  # SLD
@@ -260,21 +441,15 @@ class FabricManagerSocketIoServer(RunnableComponent):
         )
         (return_code, response) = await self._mctp_client.bind_vppb(request)
         if response is not None:
-            await self._host_fm_conn_manager.notify_host_bind(
-                data["vppbId"], data["virtualCxlSwitchId"]
-            )
-            return CommandResponse(error="", result=response.name)
+            return (CommandResponse(error="", result=response.name), True)
         else:
-            return CommandResponse(error="", result=return_code.name)
+            return (CommandResponse(error="", result=return_code.name), False)
 
-    async def _unbind_vppb(self, data) -> CommandResponse:
+    async def _send_unbind_vppb(self, data) -> CommandResponse:
         request = UnbindVppbRequestPayload(
             vcs_id=data["virtualCxlSwitchId"],
             vppb_id=data["vppbId"],
         )
-        await self._host_fm_conn_manager.notify_host_unbind(
-            data["vppbId"], data["virtualCxlSwitchId"]
-        )
         (return_code, response) = await self._mctp_client.unbind_vppb(request)
         if response is not None:
             return CommandResponse(error="", result=response.name)
@@ -318,18 +493,6 @@ class FabricManagerSocketIoServer(RunnableComponent):
         else:
             return CommandResponse(error=return_code.name)
 
-    async def _send_update_physical_ports_notification(self):
-        # Emitting event without arguments
-        await self._sio.emit("port:updated")
-
-    async def _send_update_virtual_cxl_switches_notification(self):
-        # Emitting event without arguments
-        await self._sio.emit("vcs:updated")
-
-    async def _send_update_devices_notification(self):
-        # Emitting event without arguments
-        await self._sio.emit("device:updated")
-
     async def _run(self):
         await self._runner.setup()
         site = web.TCPSite(self._runner, self._host, self._port)
@@ -345,4 +508,7 @@ class FabricManagerSocketIoServer(RunnableComponent):
 
     async def _stop(self):
         self._stop_signal = True
+        for task in list(self._flush_tasks):
+            task.cancel()
+        await self._sio.shutdown()
         await self._runner.cleanup()
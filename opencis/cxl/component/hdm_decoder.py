@@ -85,6 +85,7 @@ class HdmDecoderBase:
     base: int = 0
     ig: INTERLEAVE_GRANULARITY = INTERLEAVE_GRANULARITY.SIZE_256B  # interleave granularity
     iw: INTERLEAVE_WAYS = INTERLEAVE_WAYS.WAY_1  # interleave ways
+    committed: bool = False
 
     def is_hpa_in_range(self, hpa: int) -> bool:
         return self.base <= hpa < (self.base + self.size)
@@ -102,6 +103,12 @@ class DeviceHdmDecoder(HdmDecoderBase):
         selected_bits = shifted_number & mask
         return selected_bits
 
+    def get_dpa_size(self) -> int:
+        return self.size // IW_TO_WAYS.calc(self.iw)
+
+    def is_dpa_in_range(self, dpa: int) -> bool:
+        return self.dpa_base <= dpa < (self.dpa_base + self.get_dpa_size())
+
     def get_dpa(self, hpa: int) -> int:
         hpa_offset = hpa - self.base
         dpa_offset_low = self.get_bit_range(hpa_offset, 0, self.ig + 7)
@@ -114,7 +121,7 @@ class DeviceHdmDecoder(HdmDecoderBase):
         return dpa
 
     def get_hpa(self, dpa: int) -> int:
-        return dpa + self.base
+        return dpa - self.dpa_base + self.base
 
 
 @dataclass
@@ -181,11 +188,31 @@ class HdmDecoderManagerBase(LabeledComponent):
     def is_hpa_in_range(self, hpa: int) -> bool:
         return self.get_decoder_from_hpa(hpa) is not None
 
-    def get_decoder_for_dpa(self) -> Optional[HdmDecoderBase]:
-        for decoder in self._decoders:
-            if decoder is not None:
-                return decoder
-        return None
+    def check_commit_order(self, index: int, info: DecoderInfo) -> bool:
+        """
+        Decoders are committed in index order, and each one decodes HPAs above the
+        ones decoded by the decoder before it.
+        """
+        if index >= len(self._decoders):
+            logger.warning(self._create_message(f"Decoder index ({index}) is out of bound"))
+            return False
+        if index == 0:
+            return True
+        previous = self._decoders[index - 1]
+        if not previous.committed:
+            logger.warning(
+                self._create_message(f"Decoder {index} committed before decoder {index - 1}")
+            )
+            return False
+        if info.base < previous.base + previous.size:
+            logger.warning(
+                self._create_message(
+                    f"Decoder {index} base 0x{info.base:x} is below the end of decoder "
+                    f"{index - 1}, 0x{previous.base + previous.size:x}"
+                )
+            )
+            return False
+        return True
 
     @staticmethod
     def get_decoder_count(decode_register_value: int):
@@ -218,15 +245,24 @@ class DeviceHdmDecoderManager(HdmDecoderManagerBase):
         pass
 
     def commit(self, index: int, info: DecoderInfo) -> bool:
-        # TODO: implement index >= 1
+        if not self.check_commit_order(index, info):
+            return False
+
+        # The DPA range of a decoder starts where the previous one ends, after the skip
+        dpa_base = 0
+        if index > 0:
+            previous = cast(DeviceHdmDecoder, self._decoders[index - 1])
+            dpa_base = previous.dpa_base + previous.get_dpa_size()
         decoder = cast(DeviceHdmDecoder, self._decoders[index])
-        decoder.dpa_base = 0
+        decoder.dpa_base = dpa_base + info.dpa_skip
         decoder.dpa_skip = info.dpa_skip
         decoder.base = info.base
         decoder.size = info.size
         decoder.ig = INTERLEAVE_GRANULARITY(info.ig)
         decoder.iw = INTERLEAVE_WAYS(info.iw)
 
+        decoder.committed = True
+
         decoder_commit_info = (
             f"[Decoder Commit] index: {index}, base: 0x{decoder.base:x}, size: 0x{decoder.size:x}, "
             + f"ig: {decoder.ig.name}, iw: {decoder.iw.name}, dpa skip: {str(decoder.dpa_skip)}"
@@ -244,11 +280,17 @@ class DeviceHdmDecoderManager(HdmDecoderManagerBase):
         device_decoder = cast(DeviceHdmDecoder, decoder)
         return device_decoder.get_dpa(hpa)
 
+    def get_decoder_from_dpa(self, dpa: int) -> Optional[DeviceHdmDecoder]:
+        for decoder in self._decoders:
+            device_decoder = cast(DeviceHdmDecoder, decoder)
+            if device_decoder.committed and device_decoder.is_dpa_in_range(dpa):
+                return device_decoder
+        return None
+
     def get_hpa(self, dpa: int) -> Optional[int]:
-        decoder = self.get_decoder_for_dpa()
-        if not decoder:
+        device_decoder = self.get_decoder_from_dpa(dpa)
+        if not device_decoder:
             return None
-        device_decoder = cast(DeviceHdmDecoder, decoder)
         if device_decoder.iw != INTERLEAVE_WAYS.WAY_1:
             return None
         return device_decoder.get_hpa(dpa)
@@ -275,9 +317,7 @@ class SwitchHdmDecoderManager(HdmDecoderManagerBase):
         pass
 
     def commit(self, index: int, info: DecoderInfo) -> bool:
-        # TODO: implement index >= 1
-        if index > len(self._decoders):
-            logger.warning(f"Decoder index ({index}) is out of bound")
+        if not self.check_commit_order(index, info):
             return False
 
         decoder = cast(SwitchHdmDecoder, self._decoders[index])
@@ -286,6 +326,7 @@ class SwitchHdmDecoderManager(HdmDecoderManagerBase):
         decoder.ig = INTERLEAVE_GRANULARITY(info.ig)
         decoder.iw = INTERLEAVE_WAYS(info.iw)
         decoder.target_ports = info.target_ports
+        decoder.committed = True
 
         decoder_commit_info = (
             f"[Decoder Commit] index: {index}, base: 0x{decoder.base:x}, size: 0x{decoder.size:x}, "
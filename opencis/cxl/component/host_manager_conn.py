@@ -16,7 +16,10 @@ from websockets import WebSocketClientProtocol
 
 from opencis.cxl.transport.transaction import CXL_MEM_M2SBIRSP_OPCODE
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
+from opencis.util.profiler import profiler
 from opencis.util.component import RunnableComponent
+from opencis.util.listener import Backoff, listener_registry
 
 
 class Result:
@@ -58,6 +61,7 @@ class HostConnServer(RunnableComponent):
     async def serve(self):
         self._fut = asyncio.Future()
         self._host_server = await websockets.serve(self._serve, self._host, self._port)
+        listener_registry.notify_ready(self._port)
         await self._change_status_to_running()
         res = await self._fut
         logger.debug(self._create_message(f"{res}"))
@@ -70,6 +74,7 @@ class HostConnServer(RunnableComponent):
 
     async def _stop(self):
         self._fut.set_result("Host Done")
+        listener_registry.notify_closed(self._port)
         self._host_server.close()
         await self._host_server.wait_closed()
 
@@ -90,6 +95,9 @@ class UtilConnServer(RunnableComponent):
             "UTIL_CXL_MEM_WRITE": self._util_cxl_mem_write,
             "UTIL_CXL_MEM_BIRSP": self._util_cxl_mem_birsp,
             "UTIL_REINIT": self._util_reinit,
+            "UTIL_GET_METRICS": self._util_get_metrics,
+            "UTIL_START_PROFILE": self._util_start_profile,
+            "UTIL_STOP_PROFILE": self._util_stop_profile,
         }
         self._fut = None
         self._util_server = None
@@ -131,6 +139,34 @@ class UtilConnServer(RunnableComponent):
         cmd = jsonrpcclient.request_json("HOST_REINIT", params={"hpa_base": hpa_base})
         return await self._process_cmd(cmd, port)
 
+    async def _util_get_metrics(self, prefix: str = "") -> jsonrpcserver.Result:
+        # Metrics are process-wide, so no host connection is involved
+        return jsonrpcserver.Success({"result": metrics.get_snapshot(prefix)})
+
+    async def _util_start_profile(self, interval: float = None) -> jsonrpcserver.Result:
+        # Samples every thread of this process, not only the host connections
+        if profiler.running:
+            return jsonrpcserver.Error(ERROR_INTERNAL_ERROR, "Profiler is already running")
+        profiler.reset()
+        try:
+            profiler.start(interval)
+        except Exception as e:
+            return jsonrpcserver.Error(ERROR_INTERNAL_ERROR, str(e))
+        return jsonrpcserver.Success({"result": profiler.interval})
+
+    async def _util_stop_profile(self, profile_format: str = "collapsed") -> jsonrpcserver.Result:
+        if not profiler.running:
+            return jsonrpcserver.Error(ERROR_INTERNAL_ERROR, "Profiler is not running")
+        # Joining the sampling thread would block the event loop for up to one interval
+        await asyncio.to_thread(profiler.stop)
+        try:
+            profile = profiler.get_profile(profile_format)
+        except Exception as e:
+            return jsonrpcserver.Error(ERROR_INTERNAL_ERROR, str(e))
+        return jsonrpcserver.Success(
+            {"result": {"profile": profile, "summary": profiler.get_summary()}}
+        )
+
     async def _serve(self, ws):
         cmd = await ws.recv()
         resp = await jsonrpcserver.async_dispatch(cmd, methods=self._util_methods)
@@ -165,6 +201,7 @@ class HostManagerConnClient(RunnableComponent):
     ):
         super().__init__(f"Port{port_index}")
         self._port_index = port_index
+        self._server_port = port
         self._server_uri = f"ws://{host}:{port}"
         self._methods = methods
         self._event = asyncio.Event()
@@ -172,6 +209,7 @@ class HostManagerConnClient(RunnableComponent):
 
     async def _open_connection(self, port: int):
         logger.info(self._create_message("Connecting to HostManager"))
+        backoff = Backoff(self._server_port, max_delay=0.2)
         while True:
             try:
                 # send + receive init message from CxlHostManager
@@ -186,7 +224,7 @@ class HostManagerConnClient(RunnableComponent):
                 break
             except OSError as _:
                 logger.error(self._create_message("HostManager not ready. Reconnecting..."))
-                await asyncio.sleep(0.2)
+                await backoff.wait()
 
         # keep the connection alive and receive / process messages from CxlHostManager
         try:
@@ -0,0 +1,225 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from asyncio import CancelledError, Task, create_task, gather, sleep
+from bisect import bisect_left
+from dataclasses import dataclass
+from enum import Enum, auto
+from random import Random
+from time import perf_counter
+from typing import Optional
+
+from opencis.util.component import RunnableComponent
+from opencis.util.logger import logger
+from opencis.util.number import payload_to_int
+from opencis.util.workload_report import WorkloadReport
+from opencis.cxl.component.memory_requester import MemoryRequester
+from opencis.cxl.transport.memory_fifo import (
+    MemoryFifoPair,
+    MemoryRequest,
+    MemoryResponse,
+    MEMORY_REQUEST_TYPE,
+    MEMORY_RESPONSE_STATUS,
+)
+
+CACHELINE_SIZE = 0x40
+
+
+class IOGEN_ADDRESS_PATTERN(Enum):
+    SEQUENTIAL = auto()
+    RANDOM = auto()
+    STRIDED = auto()
+    ZIPFIAN = auto()
+
+
+@dataclass
+class LlcIoGenWorkload:
+    pattern: IOGEN_ADDRESS_PATTERN = IOGEN_ADDRESS_PATTERN.RANDOM
+    # Fraction of the operations that are loads; the rest are stores
+    read_ratio: float = 0.5
+    queue_depth: int = 1
+    base_addr: int = 0
+    # Bytes the addresses are drawn from, starting at base_addr; 0 for the whole memory
+    working_set_size: int = 0
+    stride: int = CACHELINE_SIZE
+    zipf_theta: float = 0.99
+    # Operations per second over all queue slots; 0 to issue as fast as they complete
+    target_rate: float = 0
+    duration: float = 0
+    op_count: int = 0
+    start_delay: float = 0
+    seed: int = 0
+
+
+class ZipfianLines:
+    """
+    Draws line numbers in [0, line_count) with a Zipfian distribution, line 0 being
+    the most popular, using the cumulative distribution and bisection.
+    """
+
+    def __init__(self, line_count: int, theta: float, rng: Random):
+        self._rng = rng
+        total = 0.0
+        self._cdf = []
+        for rank in range(1, line_count + 1):
+            total += 1 / rank**theta
+            self._cdf.append(total)
+        self._total = total
+
+    def next(self) -> int:
+        return bisect_left(self._cdf, self._rng.random() * self._total)
+
+
+class LlcIoGen(RunnableComponent):
+    """
+    Issues loads and stores to a cache controller through its processor fifo. Several
+    requests may be outstanding, each with its own tag. With a workload, the
+    generator runs it once after starting and logs the report.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        processor_to_cache_fifo: MemoryFifoPair,
+        memory_size: int,
+        workload: Optional[LlcIoGenWorkload] = None,
+    ):
+        super().__init__(lambda class_name: f"{label}:{class_name}")
+        self._processor_to_cache_fifo = processor_to_cache_fifo
+        self._memory_requester = MemoryRequester(
+            processor_to_cache_fifo, lambda class_name: f"{label}:{class_name}"
+        )
+        self._memory_size = memory_size
+        self._workload = workload
+        self._report: Optional[WorkloadReport] = None
+        self._workload_task: Optional[Task] = None
+
+    async def load(self, address: int, size: int) -> MemoryResponse:
+        return await self._memory_requester.request(
+            MemoryRequest(MEMORY_REQUEST_TYPE.READ, address, size)
+        )
+
+    async def store(self, address: int, size: int, value: int) -> MemoryResponse:
+        return await self._memory_requester.request(
+            MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, address, size, value)
+        )
+
+    def get_report(self) -> Optional[WorkloadReport]:
+        return self._report
+
+    def _create_address_generator(self, workload: LlcIoGenWorkload, rng: Random):
+        working_set_size = workload.working_set_size or self._memory_size
+        line_count = working_set_size // CACHELINE_SIZE
+        if line_count == 0:
+            raise Exception(f"Working set of {working_set_size} bytes holds no cacheline")
+
+        def sequential_line(index: int) -> int:
+            return index % line_count
+
+        def strided_line(index: int) -> int:
+            return (index * stride_lines) % line_count
+
+        def random_line(_: int) -> int:
+            return rng.randrange(line_count)
+
+        def zipfian_line(_: int) -> int:
+            return zipfian_lines.next()
+
+        match workload.pattern:
+            case IOGEN_ADDRESS_PATTERN.SEQUENTIAL:
+                next_line = sequential_line
+            case IOGEN_ADDRESS_PATTERN.STRIDED:
+                stride_lines = max(workload.stride // CACHELINE_SIZE, 1)
+                next_line = strided_line
+            case IOGEN_ADDRESS_PATTERN.RANDOM:
+                next_line = random_line
+            case IOGEN_ADDRESS_PATTERN.ZIPFIAN:
+                zipfian_lines = ZipfianLines(line_count, workload.zipf_theta, rng)
+                next_line = zipfian_line
+            case _:
+                raise Exception(f"Unsupported address pattern: {workload.pattern}")
+
+        return lambda index: workload.base_addr + next_line(index) * CACHELINE_SIZE
+
+    async def run_workload(self, workload: LlcIoGenWorkload) -> WorkloadReport:
+        """
+        Runs `workload` with `queue_depth` requests outstanding until `op_count`
+        operations were issued or `duration` seconds passed. Every store writes the
+        address of its cacheline, and a load of a line whose store completed before
+        the load was issued must return that address.
+        """
+        if workload.duration <= 0 and workload.op_count <= 0:
+            raise Exception("A workload needs a duration or an operation count")
+        if workload.queue_depth < 1:
+            raise Exception("Queue depth must be at least 1")
+
+        rng = Random(workload.seed)
+        next_address = self._create_address_generator(workload, rng)
+        report = WorkloadReport()
+        written = set()
+        issued = 0
+        start = perf_counter()
+        deadline = start + workload.duration if workload.duration > 0 else None
+
+        async def issue_operations():
+            nonlocal issued
+            while True:
+                if workload.op_count > 0 and issued >= workload.op_count:
+                    return
+                if deadline is not None and perf_counter() >= deadline:
+                    return
+                index = issued
+                issued += 1
+                address = next_address(index)
+                is_read = rng.random() < workload.read_ratio
+                if workload.target_rate > 0:
+                    await sleep(max(0, start + index / workload.target_rate - perf_counter()))
+
+                issue_time = perf_counter()
+                if is_read:
+                    was_written = address in written
+                    response = await self.load(address, CACHELINE_SIZE)
+                    report.reads += 1
+                else:
+                    response = await self.store(address, CACHELINE_SIZE, address)
+                    report.writes += 1
+                report.latencies.append(perf_counter() - issue_time)
+
+                if response.status != MEMORY_RESPONSE_STATUS.OK:
+                    report.failures += 1
+                elif not is_read:
+                    written.add(address)
+                elif was_written and payload_to_int(response.data) != address:
+                    report.mismatches += 1
+
+        await gather(*(issue_operations() for _ in range(workload.queue_depth)))
+        report.elapsed = perf_counter() - start
+        return report
+
+    async def _run_configured_workload(self):
+        try:
+            await sleep(self._workload.start_delay)
+            self._report = await self.run_workload(self._workload)
+        except CancelledError:
+            logger.debug(self._create_message("Workload cancelled"))
+            return
+        for line in self._report.format():
+            logger.info(self._create_message(line))
+
+    async def _run(self):
+        tasks = [create_task(self._memory_requester.process_responses())]
+        if self._workload is not None:
+            self._workload_task = create_task(self._run_configured_workload())
+            tasks.append(self._workload_task)
+        await self._change_status_to_running()
+        await gather(*tasks)
+
+    async def _stop(self):
+        # An unfinished workload may be waiting on responses that will never arrive
+        if self._workload_task is not None:
+            self._workload_task.cancel()
+        await self._processor_to_cache_fifo.response.put(None)
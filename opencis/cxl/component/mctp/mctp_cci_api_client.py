@@ -47,25 +47,54 @@ from opencis.cxl.cci.fabric_manager.mld_components import (
 from opencis.cxl.cci.vendor_specfic import (
     GetConnectedDevicesCommand,
     GetConnectedDevicesResponsePayload,
+    NotifyBackgroundOperationCompleteRequestPayload,
 )
-from opencis.cxl.cci.common import CCI_RETURN_CODE
+from opencis.cxl.cci.common import CCI_RETURN_CODE, CCI_VENDOR_SPECIFIC_OPCODE
 from opencis.cxl.component.cci_executor import CciRequest
 from opencis.util.component import RunnableComponent
-from typing import cast, Any, Tuple, Optional, Callable, Dict, Coroutine
-from asyncio import Condition
+from typing import cast, Any, Iterable, List, Tuple, Optional, Callable, Dict, Coroutine
+from asyncio import Future, Lock, Semaphore, gather, get_running_loop, shield, wait_for
+import asyncio
 from opencis.util.logger import logger
 
 CreateRequestFuncType = Callable[[Optional[Any]], CciRequest]
 AsyncEventHandlerType = Callable[[CciMessagePacket], Coroutine[Any, Any, None]]
 
+# MCTP message tags are 3 bits wide, so at most 8 requests can be outstanding
+MCTP_TAG_COUNT = 8
+# Ports per Get Physical Port State request issued by gather_port_states()
+PORT_STATE_CHUNK_SIZE = 8
+
 
 class MctpCciApiClient(RunnableComponent):
-    def __init__(self, mctp_connection: MctpConnection):
+    """
+    FM API client over an MCTP connection.
+
+    Requests are pipelined: each one takes a free tag from the 3-bit MCTP tag
+    space and waits on its own future, so up to `max_outstanding` requests can
+    be in flight at once. Background commands complete on the switch's
+    NOTIFY_BACKGROUND_OPERATION_COMPLETE notification; the Background
+    Operation Status command is only polled every `background_poll_interval`
+    seconds as a fallback.
+    """
+
+    def __init__(
+        self,
+        mctp_connection: MctpConnection,
+        max_outstanding: int = MCTP_TAG_COUNT,
+        background_poll_interval: float = 1.0,
+    ):
         super().__init__()
+        if not 1 <= max_outstanding <= MCTP_TAG_COUNT:
+            raise ValueError(f"max_outstanding must be between 1 and {MCTP_TAG_COUNT}")
         self._mctp_connection = mctp_connection
-        self._tag = 0
-        self._responses: Dict[int, CciMessagePacket] = {}
-        self._condition = Condition()
+        self._background_poll_interval = background_poll_interval
+        self._next_tag = 0
+        self._pending: Dict[int, Future] = {}
+        self._tag_slots = Semaphore(max_outstanding)
+        # The CCI has a single background command slot
+        self._background_lock = Lock()
+        self._background_completion: Optional[Future] = None
         self._notification_handler = None
 
     async def _process_incoming_packets(self):
@@ -77,18 +106,35 @@ class MctpCciApiClient(RunnableComponent):
             response_tmc1 = cast(CciPayloadPacket, raw_response)
             response = response_tmc1.get_packet()
             if response.header.message_category == CCI_MCTP_MESSAGE_CATEGORY.REQUEST:
-                opcode_str = get_opcode_string(response.header.command_opcode)
+                opcode = response.header.command_opcode
+                opcode_str = get_opcode_string(opcode)
                 logger.debug(
                     self._create_message(f"Received request (notification) packet {opcode_str}")
                 )
-                if self._notification_handler != None:
+                if opcode == CCI_VENDOR_SPECIFIC_OPCODE.NOTIFY_BACKGROUND_OPERATION_COMPLETE:
+                    self._complete_background_operation(response)
+                elif self._notification_handler != None:
                     await self._notification_handler(response)
             else:
-                logger.debug(self._create_message("Received response packet"))
-                await self._condition.acquire()
-                self._responses[response.header.message_tag] = response
-                self._condition.notify_all()
-                self._condition.release()
+                tag = response.header.message_tag
+                logger.debug(self._create_message(f"Received Response (Tag: {tag})"))
+                future = self._pending.get(tag)
+                if future is None or future.done():
+                    logger.warning(self._create_message(f"Dropped response with unknown tag {tag}"))
+                    continue
+                future.set_result(response)
+
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+
+    def _complete_background_operation(self, notification: CciMessagePacket):
+        payload = NotifyBackgroundOperationCompleteRequestPayload.parse(notification.get_payload())
+        opcode_str = get_opcode_string(payload.command_opcode)
+        logger.debug(self._create_message(f"Background {opcode_str} completed"))
+        completion = self._background_completion
+        if completion is not None and not completion.done():
+            completion.set_result(payload.return_code)
 
     async def _run(self):
         await self._change_status_to_running()
@@ -97,30 +143,31 @@ class MctpCciApiClient(RunnableComponent):
     async def _stop(self):
         await self._mctp_connection.ep_to_controller.put(None)
 
-    async def _get_response(self, message_tag: int) -> CciMessagePacket:
-        await self._condition.acquire()
-        logger.debug(self._create_message(f"Waiting for Message {message_tag}"))
-        while message_tag not in self._responses:
-            await self._condition.wait()
-        logger.debug(self._create_message(f"Received Message {message_tag}"))
-        response = self._responses[message_tag]
-        self._condition.release()
-        return response
+    def _allocate_tag(self) -> int:
+        # Callers hold a _tag_slots permit, so fewer than MCTP_TAG_COUNT tags are in use
+        while self._next_tag in self._pending:
+            self._next_tag = (self._next_tag + 1) % MCTP_TAG_COUNT
+        tag = self._next_tag
+        self._next_tag = (self._next_tag + 1) % MCTP_TAG_COUNT
+        return tag
 
     async def _send_request(
         self, request: CciMessagePacket, port_index=0, ld_id=0
     ) -> CciMessagePacket:
-        request.header.message_tag = self._get_next_tag()
         opcode_name = get_opcode_string(request.header.command_opcode)
-        req_tag = request.header.message_tag
-        logger.debug(self._create_message(f"Sending {opcode_name} (Tag: {req_tag})"))
-        # wrapping
-        request_tmc = CciPayloadPacket.create(request, request.get_total_size(), port_index)
-
-        await self._mctp_connection.controller_to_ep.put(request_tmc)
-        response = await self._get_response(req_tag)
-        res_tag = response.header.message_tag
-        logger.debug(self._create_message(f"Received Response (Tag: {res_tag})"))
+        async with self._tag_slots:
+            req_tag = self._allocate_tag()
+            request.header.message_tag = req_tag
+            response_future = get_running_loop().create_future()
+            self._pending[req_tag] = response_future
+            try:
+                logger.debug(self._create_message(f"Sending {opcode_name} (Tag: {req_tag})"))
+                # wrapping
+                request_tmc = CciPayloadPacket.create(request, request.get_total_size(), port_index)
+                await self._mctp_connection.controller_to_ep.put(request_tmc)
+                response = await response_future
+            finally:
+                del self._pending[req_tag]
 
         if (
             response.header.background_operation
@@ -136,11 +183,6 @@ class MctpCciApiClient(RunnableComponent):
 
         return response
 
-    def _get_next_tag(self) -> int:
-        tag = self._tag
-        self._tag += 1
-        return tag
-
     def _create_request_packet(self, request: CciRequest) -> CciMessagePacket:
         header = CciMessageHeaderPacket()
         header.message_category = CCI_MCTP_MESSAGE_CATEGORY.REQUEST
@@ -149,16 +191,16 @@ class MctpCciApiClient(RunnableComponent):
         message_packet = CciMessagePacket.create(header, request.payload)
         return message_packet
 
-    async def _wait_for_background_operation(self) -> CCI_RETURN_CODE:
-        completed = False
-        while not completed:
-            (return_code, result) = await self.background_operation_status()
-            if not result:
-                continue
-            completed = not result.background_operation_status.operation_in_progress
-            if completed:
-                return return_code
-        # TODO: Handle timeout
+    async def _wait_for_background_operation(self, completion: Future) -> CCI_RETURN_CODE:
+        while True:
+            try:
+                return await wait_for(shield(completion), self._background_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            # The notification may have been lost; fall back to a status query
+            (_, result) = await self.background_operation_status()
+            if result and not result.background_operation_status.operation_in_progress:
+                return CCI_RETURN_CODE(result.return_code)
 
     async def _send_cci_command(
         self, create_request_func: CreateRequestFuncType, request=None, port_index=0, ld_id=0
@@ -167,6 +209,25 @@ class MctpCciApiClient(RunnableComponent):
         request_message_packet = self._create_request_packet(cci_request)
         return await self._send_request(request_message_packet, port_index, ld_id)
 
+    async def _send_background_command(
+        self, create_request_func: CreateRequestFuncType, request, wait_for_completion: bool
+    ) -> CCI_RETURN_CODE:
+        async with self._background_lock:
+            # Armed before sending: the notification can overtake the response
+            completion = get_running_loop().create_future()
+            self._background_completion = completion
+            try:
+                response_message_packet = await self._send_cci_command(create_request_func, request)
+                return_code = CCI_RETURN_CODE(response_message_packet.header.return_code)
+                if (
+                    wait_for_completion
+                    and return_code == CCI_RETURN_CODE.BACKGROUND_COMMAND_STARTED
+                ):
+                    return_code = await self._wait_for_background_operation(completion)
+                return return_code
+            finally:
+                self._background_completion = None
+
     def register_notification_handler(self, notification_handler: AsyncEventHandlerType):
         self._notification_handler = notification_handler
 
@@ -239,13 +300,9 @@ class MctpCciApiClient(RunnableComponent):
     async def bind_vppb(
         self, request: BindVppbRequestPayload, wait_for_completion: bool = True
     ) -> Tuple[CCI_RETURN_CODE, Optional[CCI_RETURN_CODE]]:
-        response_message_packet = await self._send_cci_command(
-            BindVppbCommand.create_cci_request, request
+        return_code = await self._send_background_command(
+            BindVppbCommand.create_cci_request, request, wait_for_completion
         )
-
-        return_code = CCI_RETURN_CODE(response_message_packet.header.return_code)
-        if wait_for_completion:
-            return_code = await self._wait_for_background_operation()
         has_error = not (
             return_code == CCI_RETURN_CODE.SUCCESS
             or return_code == CCI_RETURN_CODE.BACKGROUND_COMMAND_STARTED
@@ -257,13 +314,9 @@ class MctpCciApiClient(RunnableComponent):
     async def unbind_vppb(
         self, request: UnbindVppbRequestPayload, wait_for_completion: bool = True
     ) -> Tuple[CCI_RETURN_CODE, Optional[CCI_RETURN_CODE]]:
-        response_message_packet = await self._send_cci_command(
-            UnbindVppbCommand.create_cci_request, request
+        return_code = await self._send_background_command(
+            UnbindVppbCommand.create_cci_request, request, wait_for_completion
         )
-
-        return_code = CCI_RETURN_CODE(response_message_packet.header.return_code)
-        if wait_for_completion:
-            return_code = await self._wait_for_background_operation()
         has_error = not (
             return_code == CCI_RETURN_CODE.SUCCESS
             or return_code == CCI_RETURN_CODE.BACKGROUND_COMMAND_STARTED
@@ -330,3 +383,41 @@ class MctpCciApiClient(RunnableComponent):
             response_message_packet.get_payload()
         )
         return (return_code, response)
+
+    async def gather_port_states(
+        self, port_ids: Iterable[int], chunk_size: int = PORT_STATE_CHUNK_SIZE
+    ) -> Tuple[CCI_RETURN_CODE, Optional[GetPhysicalPortStateResponsePayload]]:
+        """
+        Gets the state of all `port_ids`, split into concurrent requests of at
+        most `chunk_size` ports. The port info list keeps the order of `port_ids`.
+        """
+        port_ids = list(port_ids)
+        chunks = [port_ids[i : i + chunk_size] for i in range(0, len(port_ids), chunk_size)]
+        results = await gather(
+            *(
+                self.get_physical_port_state(GetPhysicalPortStateRequestPayload(chunk))
+                for chunk in chunks
+            )
+        )
+        # the first chunk that fails fails the whole request
+        merged = GetPhysicalPortStateResponsePayload()
+        for return_code, response in results:
+            if return_code != CCI_RETURN_CODE.SUCCESS:
+                return (return_code, None)
+            merged.port_info_list.extend(response.port_info_list)
+        return (CCI_RETURN_CODE.SUCCESS, merged)
+
+    async def gather_ld_info(
+        self, port_indices: Iterable[int]
+    ) -> List[Tuple[CCI_RETURN_CODE, Optional[GetLdInfoResponsePayload]]]:
+        return await gather(*(self.get_ld_info(port_index) for port_index in port_indices))
+
+    async def gather_ld_allocations(
+        self, requests: Dict[int, GetLdAllocationsRequestPayload]
+    ) -> Dict[int, Tuple[CCI_RETURN_CODE, Optional[GetLdAllocationsResponsePayload]]]:
+        """Issues one Get LD Allocations request per port index in `requests` concurrently"""
+        port_indices = list(requests)
+        results = await gather(
+            *(self.get_ld_alloctaion(requests[index], index) for index in port_indices)
+        )
+        return dict(zip(port_indices, results))
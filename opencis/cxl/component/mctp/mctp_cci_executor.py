@@ -5,8 +5,8 @@
  See LICENSE for details.
 """
 
-from asyncio import create_task, gather
-from typing import Optional, cast, List
+from asyncio import Queue, Semaphore, create_task, gather
+from typing import Callable, Dict, Optional, cast, List
 from opencis.util.component import RunnableComponent
 from opencis.cxl.component.mctp.mctp_connection import MctpConnection
 from opencis.cxl.component.cci_executor import (
@@ -27,15 +27,43 @@ from opencis.cxl.transport.transaction import (
     CciMessageHeaderPacket,
     CCI_MCTP_MESSAGE_CATEGORY,
     CciPayloadPacket,
+    CciRequestPacket,
     GetLdInfoRequestPacket,
     GetLdAllocationsRequestPacket,
     SetLdAllocationsRequestPacket,
 )
-from opencis.cxl.cci.common import CCI_FM_API_COMMAND_OPCODE, get_opcode_string
+from opencis.cxl.cci.common import CCI_FM_API_COMMAND_OPCODE, CCI_RETURN_CODE, get_opcode_string
+from opencis.cxl.cci.vendor_specfic import NotifyBackgroundOperationCompleteRequestPayload
 from opencis.util.logger import logger
 
+LdRequestFactory = Callable[[CciMessagePacket], CciRequestPacket]
+
+# FM API commands that are passed down to the MLD behind the addressed port
+LD_REQUEST_FACTORIES: Dict[int, LdRequestFactory] = {
+    CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO: GetLdInfoRequestPacket.create_from_ccimessage,
+    CCI_FM_API_COMMAND_OPCODE.GET_LD_ALLOCATIONS: (
+        GetLdAllocationsRequestPacket.create_from_ccimessage
+    ),
+    CCI_FM_API_COMMAND_OPCODE.SET_LD_ALLOCATIONS: (
+        SetLdAllocationsRequestPacket.create_from_ccimessage
+    ),
+}
+
+# Requests forwarded to one MLD that may be waiting for a response
+MAX_OUTSTANDING_LD_REQUESTS = 8
+
 
 class MctpCciExecutor(RunnableComponent):
+    """
+    Executes FM API requests received over MCTP.
+
+    Every request has a target: the switch itself, or the MLD behind a
+    downstream port for the opcodes in LD_REQUEST_FACTORIES. The reader only
+    dispatches by opcode; each target has its own queue
+    and worker, so requests for different targets run concurrently while the
+    requests for one target are handled in the order they arrived.
+    """
+
     def __init__(
         self,
         mctp_connection: MctpConnection,
@@ -44,11 +72,11 @@ class MctpCciExecutor(RunnableComponent):
         label: Optional[str] = None,
     ):
         super().__init__(label)
-        self._message_tag_list = {}
         self._mctp_connection = mctp_connection
         self._cci_executor = CciExecutor(label="MCTP")
+        self._cci_executor.register_completion_handler(self._notify_background_completion)
         self._switch_connection_manager = switch_connection_manager
-        self._downstream_port_connections = {}
+        self._downstream_port_connections: Dict[int, CxlConnection] = {}
 
         for port_index, port_config in enumerate(port_configs):
             if port_config.type == PORT_TYPE.DSP:
@@ -56,6 +84,28 @@ class MctpCciExecutor(RunnableComponent):
                     self._switch_connection_manager.get_cxl_connection(port_index)
                 )
 
+        self._switch_requests: Queue = Queue()
+        self._ld_requests: Dict[int, Queue] = {
+            port_index: Queue() for port_index in self._downstream_port_connections
+        }
+        # Tags of requests forwarded to each MLD, bounded by MAX_OUTSTANDING_LD_REQUESTS
+        self._message_tag_list: Dict[int, Dict[int, int]] = {
+            port_index: {} for port_index in self._downstream_port_connections
+        }
+        self._ld_request_slots: Dict[int, Semaphore] = {
+            port_index: Semaphore(MAX_OUTSTANDING_LD_REQUESTS)
+            for port_index in self._downstream_port_connections
+        }
+
+    async def _notify_background_completion(self, status: CciBackgroundStatus):
+        # Lets the FM wake up on completion instead of polling Background Operation Status
+        payload = NotifyBackgroundOperationCompleteRequestPayload(
+            command_opcode=status.opcode,
+            return_code=status.return_code,
+            vendor_specific_status=status.vendor_specific_status,
+        )
+        await self.send_notification(payload.create_request())
+
     def register_cci_commands(self, commands: List[CciCommand]):
         for command in commands:
             self._cci_executor.register_command(command.get_opcode(), command)
@@ -97,41 +147,56 @@ class MctpCciExecutor(RunnableComponent):
             opcode = cci_packet.header.command_opcode
             port_index = cci_packet_tmc.cci_header.port_index
 
-            opcodes_for_ld = [
-                CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO,
-                CCI_FM_API_COMMAND_OPCODE.GET_LD_ALLOCATIONS,
-                CCI_FM_API_COMMAND_OPCODE.SET_LD_ALLOCATIONS,
-            ]
-            if opcode in opcodes_for_ld:
-                # Pass down to MLD
-                ld_index = cci_packet_tmc.cci_header.port_index
-                message_tag = cci_packet.header.message_tag
-                self._message_tag_list[message_tag] = port_index
-
-                downstream_packet = None
-                if opcode == CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO:
-                    downstream_packet = GetLdInfoRequestPacket.create_from_ccimessage(cci_packet)
-                if opcode == CCI_FM_API_COMMAND_OPCODE.GET_LD_ALLOCATIONS:
-                    downstream_packet = GetLdAllocationsRequestPacket.create_from_ccimessage(
-                        cci_packet
-                    )
+            if opcode not in LD_REQUEST_FACTORIES:
+                self._switch_requests.put_nowait(cci_packet)
+            elif port_index in self._ld_requests:
+                self._ld_requests[port_index].put_nowait(cci_packet)
+            else:
+                opcode_str = get_opcode_string(opcode)
+                logger.debug(self._create_message(f"{opcode_str} for non-DSP port {port_index}"))
+                response = CciResponse(return_code=CCI_RETURN_CODE.INVALID_INPUT)
+                await self._send_response(response, cci_packet.header.message_tag)
 
-                if opcode == CCI_FM_API_COMMAND_OPCODE.SET_LD_ALLOCATIONS:
-                    downstream_packet = SetLdAllocationsRequestPacket.create_from_ccimessage(
-                        cci_packet
-                    )
+        self._switch_requests.put_nowait(None)
+        for requests in self._ld_requests.values():
+            requests.put_nowait(None)
 
-                await self._downstream_port_connections[port_index].cci_fifo.host_to_target.put(
-                    downstream_packet
+    async def _process_switch_requests(self):
+        while True:
+            cci_packet = await self._switch_requests.get()
+            if cci_packet is None:
+                break
+            # Convert packet to CciRequest and send it to CciExecutor
+            request = self._packet_to_request(cci_packet)
+            response = await self._cci_executor.execute_command(request)
+            await self._send_response(response, cci_packet.header.message_tag)
+
+    async def _process_ld_requests(self, port_index: int):
+        # Pass down to MLD
+        downstream_connection = self._downstream_port_connections[port_index]
+        outstanding_tags = self._message_tag_list[port_index]
+        while True:
+            cci_packet = await self._ld_requests[port_index].get()
+            if cci_packet is None:
+                break
+            message_tag = cci_packet.header.message_tag
+            if message_tag in outstanding_tags:
+                logger.warning(self._create_message(f"Tag {message_tag} is already in use"))
+                await self._send_response(
+                    CciResponse(return_code=CCI_RETURN_CODE.BUSY), message_tag
                 )
-            else:
-                # Convert packet to CciRequest and send it to CciExecutor
-                request = self._packet_to_request(cci_packet)
-                response = await self._cci_executor.execute_command(request)
-                await self._send_response(response, cci_packet.header.message_tag)
+                continue
+
+            await self._ld_request_slots[port_index].acquire()
+            opcode = cci_packet.header.command_opcode
+            outstanding_tags[message_tag] = opcode
+            downstream_packet = LD_REQUEST_FACTORIES[opcode](cci_packet)
+            await downstream_connection.cci_fifo.host_to_target.put(downstream_packet)
 
-    async def _process_outcoming_responses(self, downstream_connection: CxlConnection):
+    async def _process_outcoming_responses(self, port_index: int):
         logger.debug(self._create_message("Started processing outcoming request"))
+        downstream_connection = self._downstream_port_connections[port_index]
+        outstanding_tags = self._message_tag_list[port_index]
         while True:
             # Wait for incoming packets from the MCTP connection
             packet = await downstream_connection.cci_fifo.target_to_host.get()
@@ -139,28 +204,39 @@ class MctpCciExecutor(RunnableComponent):
                 logger.debug(self._create_message("Stopped processing outcoming request"))
                 break
 
-            # set LD table
-            opcode = packet.get_command_opcode()
-            if opcode == CCI_FM_API_COMMAND_OPCODE.SET_LD_ALLOCATIONS:
-                logger.info(self._create_message("switch received SetLdAllocationsResponsePacket"))
-                port_index = self._message_tag_list.get(packet.header_data.message_tag, None)
-                if port_index is None:
-                    raise ValueError("Invalid message tag")
+            message_tag = packet.header_data.message_tag
+            if outstanding_tags.pop(message_tag, None) is None:
+                logger.warning(
+                    self._create_message(
+                        f"Dropped port {port_index} response with tag {message_tag}"
+                    )
+                )
+                continue
+            self._ld_request_slots[port_index].release()
 
-            self._message_tag_list.pop(packet.header_data.message_tag)
+            if packet.get_command_opcode() == CCI_FM_API_COMMAND_OPCODE.SET_LD_ALLOCATIONS:
+                logger.info(self._create_message("switch received SetLdAllocationsResponsePacket"))
 
             cci_packet = packet.create_ccimessage()
             cci_packet_tmc = CciPayloadPacket.create(cci_packet, cci_packet.get_total_size())
 
             await self._mctp_connection.ep_to_controller.put(cci_packet_tmc)
 
+        # Unblock the request worker if the MLD went away with requests outstanding
+        for _ in outstanding_tags:
+            self._ld_request_slots[port_index].release()
+        outstanding_tags.clear()
+
     async def _run(self):
         tasks = [
             create_task(self._process_incoming_requests()),
+            create_task(self._process_switch_requests()),
             create_task(self._cci_executor.run()),
         ]
-        for downstream_connection in self._downstream_port_connections.values():
-            tasks.append(create_task(self._process_outcoming_responses(downstream_connection)))
+        for port_index in self._downstream_port_connections:
+            tasks.append(create_task(self._process_ld_requests(port_index)))
+            tasks.append(create_task(self._process_outcoming_responses(port_index)))
+        await self._cci_executor.wait_for_ready()
         await self._change_status_to_running()
         await gather(*tasks)
 
@@ -168,7 +244,7 @@ class MctpCciExecutor(RunnableComponent):
         # Stop the executor
         await self._mctp_connection.controller_to_ep.put(None)
         for downstream_connection in self._downstream_port_connections.values():
-            await downstream_connection.target_to_host.put(None)
+            await downstream_connection.cci_fifo.target_to_host.put(None)
         await self._cci_executor.stop()
 
     async def get_background_command_status(self) -> CciBackgroundStatus:
@@ -12,6 +12,7 @@ from opencis.cxl.component.mctp.mctp_packet_processor import (
     MCTP_PACKET_PROCESSOR_TYPE,
 )
 from opencis.util.component import RunnableComponent
+from opencis.util.listener import Backoff
 from opencis.util.logger import logger
 
 
@@ -42,6 +43,7 @@ class MctpConnectionClient(RunnableComponent):
         if self._auto_reconnect:
             logger.debug(self._create_message("Enabled auto-reconnect"))
 
+        backoff = Backoff(self._port, max_delay=self._reconnect_delay)
         while self._running:
             try:
                 (reader, writer) = await self._connect()
@@ -51,8 +53,10 @@ class MctpConnectionClient(RunnableComponent):
                     self._mctp_connection,
                     MCTP_PACKET_PROCESSOR_TYPE.ENDPOINT,
                 )
+                processor_task = asyncio.create_task(self._packet_processor.run())
+                await self._packet_processor.wait_for_ready()
                 await self._change_status_to_running()
-                await self._packet_processor.run()
+                await processor_task
                 self._packet_processor = None
             except Exception as e:
                 if not self._auto_reconnect:
@@ -66,7 +70,7 @@ class MctpConnectionClient(RunnableComponent):
                     break
 
                 logger.warning(self._create_message("Attempting to reconnect"))
-                await asyncio.sleep(self._reconnect_delay)
+                await backoff.wait()
 
     async def _stop(self):
         self._running = False
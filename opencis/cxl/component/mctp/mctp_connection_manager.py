@@ -15,6 +15,7 @@ from opencis.cxl.component.mctp.mctp_packet_processor import (
 )
 from opencis.util.component import RunnableComponent
 from typing import List
+from opencis.util.listener import listener_registry
 from opencis.util.logger import logger
 import asyncio
 
@@ -47,8 +48,7 @@ class MctpConnectionManager(RunnableComponent):
             server = await self._create_server()
             self._server_task = asyncio.create_task(server.serve_forever())
             logger.info(self._create_message("Starting TCP server task"))
-            while not server.is_serving():
-                await asyncio.sleep(0.1)
+            listener_registry.notify_ready(self._port)
             await self._change_status_to_running()
             await self._server_task
         except Exception as e:
@@ -63,6 +63,7 @@ class MctpConnectionManager(RunnableComponent):
 
     async def _stop(self):
         logger.info(self._create_message("Canceling TCP server task"))
+        listener_registry.notify_closed(self._port)
         self._server_task.cancel()
 
     async def _create_server(self):
@@ -104,7 +105,9 @@ class MctpConnectionManager(RunnableComponent):
             MCTP_PACKET_PROCESSOR_TYPE.CONTROLLER,
         )
         self._switch_port.packet_processor = packet_processor
-        await packet_processor.run()
+        processor_task = asyncio.create_task(packet_processor.run())
+        await packet_processor.wait_for_ready()
+        await processor_task
         self._switch_port.packet_processor = None
 
     def get_mctp_connection(self) -> MctpConnection:
@@ -0,0 +1,55 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from asyncio import Future, get_running_loop
+from typing import Dict, Optional
+
+from opencis.util.component import LabeledComponent, Label
+from opencis.util.logger import logger
+from opencis.cxl.transport.memory_fifo import MemoryFifoPair, MemoryRequest, MemoryResponse
+
+
+class MemoryRequester(LabeledComponent):
+    """
+    Sends requests to a cache controller through its processor fifo and hands every
+    response to the request with the same tag, so several requests may be outstanding.
+    process_responses() must run while requests are sent, and returns once None is put
+    in the response queue.
+    """
+
+    def __init__(self, processor_to_cache_fifo: MemoryFifoPair, label: Optional[Label] = None):
+        super().__init__(label)
+        self._processor_to_cache_fifo = processor_to_cache_fifo
+        self._next_tag = 0
+        self._pending_responses: Dict[int, Future] = {}
+
+    async def request(self, packet: MemoryRequest) -> MemoryResponse:
+        packet.tag = self._next_tag
+        self._next_tag += 1
+        response = get_running_loop().create_future()
+        self._pending_responses[packet.tag] = response
+        try:
+            await self._processor_to_cache_fifo.request.put(packet)
+            return await response
+        finally:
+            del self._pending_responses[packet.tag]
+
+    async def process_responses(self):
+        while True:
+            packet = await self._processor_to_cache_fifo.response.get()
+            if packet is None:
+                logger.debug(self._create_message("Stop processing memory responses"))
+                break
+            response = self._pending_responses.get(packet.tag)
+            if response is None or response.done():
+                logger.warning(
+                    self._create_message(
+                        f"Dropped memory response with unexpected tag {packet.tag}"
+                    )
+                )
+                continue
+            response.set_result(packet)
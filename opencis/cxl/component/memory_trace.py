@@ -0,0 +1,234 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from enum import IntEnum
+from struct import Struct
+from time import perf_counter, perf_counter_ns
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from opencis.util.logger import logger
+from opencis.util.number import Payload, payload_to_bytes, payload_to_int
+from opencis.util.workload_report import WorkloadReport
+
+# A trace file is a header, the table of host names and then the records:
+#   header:  magic "OCMT", version (u16), host count (u16)
+#   host:    name length (u8), UTF-8 name
+#   record:  timestamp in ns (u64), host index (u16), op (u8), flags (u8),
+#            address (u64), size (u32), then `size` bytes of data if flagged
+# All fields are little-endian.
+MEMORY_TRACE_MAGIC = b"OCMT"
+MEMORY_TRACE_VERSION = 1
+MEMORY_TRACE_FLAG_DATA = 0x1
+
+_HEADER = Struct("<4sHH")
+_RECORD = Struct("<QHBBQI")
+
+
+class MEMORY_TRACE_OP(IntEnum):
+    LOAD = 0
+    STORE = 1
+
+
+@dataclass
+class MemoryTraceRecord:
+    # Nanoseconds from the start of the recording to the issue of the access
+    timestamp: int
+    host: str
+    op: MEMORY_TRACE_OP
+    address: int
+    size: int
+    # Stored data, or the data the load returned
+    data: Optional[bytes] = None
+
+
+def write_memory_trace(file: BinaryIO, records: List[MemoryTraceRecord]):
+    hosts: Dict[str, int] = {}
+    for record in records:
+        hosts.setdefault(record.host, len(hosts))
+    file.write(_HEADER.pack(MEMORY_TRACE_MAGIC, MEMORY_TRACE_VERSION, len(hosts)))
+    for host in hosts:
+        name = host.encode()
+        file.write(bytes([len(name)]) + name)
+    for record in records:
+        flags = MEMORY_TRACE_FLAG_DATA if record.data is not None else 0
+        file.write(
+            _RECORD.pack(
+                record.timestamp,
+                hosts[record.host],
+                record.op,
+                flags,
+                record.address,
+                record.size,
+            )
+        )
+        if record.data is not None:
+            file.write(payload_to_bytes(record.data, record.size))
+
+
+def read_memory_trace(file: BinaryIO) -> Iterator[MemoryTraceRecord]:
+    magic, version, host_count = _HEADER.unpack(file.read(_HEADER.size))
+    if magic != MEMORY_TRACE_MAGIC or version != MEMORY_TRACE_VERSION:
+        raise Exception(f"Unsupported memory trace: magic {magic}, version {version}")
+    hosts = []
+    for _ in range(host_count):
+        hosts.append(file.read(file.read(1)[0]).decode())
+    while True:
+        fields = file.read(_RECORD.size)
+        if not fields:
+            return
+        if len(fields) < _RECORD.size:
+            raise Exception("Memory trace ends in the middle of a record")
+        timestamp, host, op, flags, address, size = _RECORD.unpack(fields)
+        data = file.read(size) if flags & MEMORY_TRACE_FLAG_DATA else None
+        yield MemoryTraceRecord(timestamp, hosts[host], MEMORY_TRACE_OP(op), address, size, data)
+
+
+class MemoryTraceRecorder:
+    """
+    Collects the loads and stores of the components it is passed to. Every access is
+    recorded once it completed, with the time it was issued.
+    """
+
+    def __init__(self):
+        self._start = perf_counter_ns()
+        self._records: List[MemoryTraceRecord] = []
+
+    def get_timestamp(self) -> int:
+        return perf_counter_ns() - self._start
+
+    def record(
+        self,
+        timestamp: int,
+        host: str,
+        op: MEMORY_TRACE_OP,
+        address: int,
+        size: int,
+        data: Optional[Payload] = None,
+    ):
+        if data is not None:
+            data = bytes(payload_to_bytes(data, size))
+        self._records.append(MemoryTraceRecord(timestamp, host, op, address, size, data))
+
+    def get_records(self) -> List[MemoryTraceRecord]:
+        return sorted(self._records, key=lambda record: record.timestamp)
+
+    def save(self, filename: str):
+        with open(filename, "wb") as file:
+            write_memory_trace(file, self.get_records())
+
+
+class CxlMemTraceTarget:
+    """
+    Replays accesses as CXL.mem reads and writes of a CxlRootPortDevice. Completions
+    on its CXL.mem FIFO pair are matched by order, so accesses run one at a time.
+    The root port moves whole cachelines, so every access must be 64 bytes.
+    """
+
+    ACCESS_SIZE = 64
+
+    def __init__(self, root_port_device):
+        self._root_port_device = root_port_device
+        self._lock = asyncio.Lock()
+
+    def _check_size(self, address: int, size: int):
+        if size != self.ACCESS_SIZE:
+            raise Exception(
+                f"CXL.mem access of {size} bytes at 0x{address:x} is not "
+                f"{self.ACCESS_SIZE} bytes"
+            )
+
+    async def load(self, address: int, size: int) -> Optional[int]:
+        self._check_size(address, size)
+        async with self._lock:
+            return await self._root_port_device.cxl_mem_read(address)
+
+    async def store(self, address: int, size: int, data: Payload):
+        self._check_size(address, size)
+        async with self._lock:
+            if await self._root_port_device.cxl_mem_write(address, payload_to_int(data)) is None:
+                raise Exception(f"CXL.mem write to 0x{address:x} timed out")
+
+
+class MemoryTraceReplayer:
+    """
+    Replays a memory trace against the targets of its hosts: a CxlMemoryHub, a
+    CxlMemTraceTarget or anything else with the same load() and store().
+    """
+
+    def __init__(self, targets: Dict[str, object]):
+        self._targets = targets
+
+    async def _replay_record(self, record: MemoryTraceRecord, report: WorkloadReport):
+        target = self._targets.get(record.host)
+        if target is None:
+            raise Exception(f"No replay target for host {record.host}")
+        issue_time = perf_counter()
+        try:
+            if record.op == MEMORY_TRACE_OP.LOAD:
+                report.reads += 1
+                data = await target.load(record.address, record.size)
+            else:
+                report.writes += 1
+                await target.store(record.address, record.size, record.data or 0)
+        except Exception as e:
+            logger.debug(f"[MemoryTraceReplayer] Access at 0x{record.address:x} failed: {e}")
+            report.failures += 1
+            return
+        finally:
+            report.latencies.append(perf_counter() - issue_time)
+
+        if record.op != MEMORY_TRACE_OP.LOAD or record.data is None:
+            return
+        if data is None:
+            report.failures += 1
+        elif payload_to_bytes(data, record.size) != record.data:
+            report.mismatches += 1
+
+    async def replay_open_loop(
+        self, records: List[MemoryTraceRecord], speed: float = 1.0
+    ) -> WorkloadReport:
+        """
+        Issues every access at its recorded time, divided by `speed`, without waiting
+        for the ones before it to complete.
+        """
+        report = WorkloadReport()
+        accesses = []
+        start = perf_counter()
+        first_timestamp = records[0].timestamp if records else 0
+        for record in records:
+            due = start + (record.timestamp - first_timestamp) / 1e9 / speed
+            delay = due - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            accesses.append(asyncio.create_task(self._replay_record(record, report)))
+        await asyncio.gather(*accesses)
+        report.elapsed = perf_counter() - start
+        return report
+
+    async def replay_closed_loop(
+        self, records: List[MemoryTraceRecord], queue_depth: int = 1
+    ) -> WorkloadReport:
+        """
+        Issues the accesses in recorded order, as soon as one of `queue_depth` slots is
+        free. Accesses to one address may complete out of order above depth 1, and show
+        up as mismatches if a load passes a store.
+        """
+        if queue_depth < 1:
+            raise Exception("Queue depth must be at least 1")
+        report = WorkloadReport()
+        pending = iter(records)
+
+        async def issue_records():
+            for record in pending:
+                await self._replay_record(record, report)
+
+        start = perf_counter()
+        await asyncio.gather(*(issue_records() for _ in range(queue_depth)))
+        report.elapsed = perf_counter() - start
+        return report
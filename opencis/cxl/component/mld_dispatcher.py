@@ -0,0 +1,146 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from asyncio import Queue, Task, create_task, gather
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, cast
+
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.device.config.logical_device import MAX_LD_COUNT
+from opencis.cxl.transport.transaction import BasePacket, CxlIoBasePacket, CxlMemBasePacket
+from opencis.util.component import RunnableComponent
+from opencis.util.logger import logger
+
+PacketHandler = Callable[[BasePacket], Awaitable[None]]
+
+
+@dataclass
+class LdPacketHandlers:
+    cfg_space: PacketHandler
+    mmio: PacketHandler
+    cxl_mem: PacketHandler
+
+
+def get_ld_id(packet: BasePacket) -> Optional[int]:
+    """
+    Returns the LD-ID a CXL.io or CXL.mem packet is addressed to, or None when the
+    packet does not carry one.
+    """
+    if packet.is_cxl_io():
+        return cast(CxlIoBasePacket, packet).tlp_prefix.ld_id
+    if packet.is_cxl_mem():
+        cxl_mem_packet = cast(CxlMemBasePacket, packet)
+        if cxl_mem_packet.is_m2sreq():
+            return cxl_mem_packet.m2sreq_header.ld_id
+        if cxl_mem_packet.is_m2srwd():
+            return cxl_mem_packet.m2srwd_header.ld_id
+        if cxl_mem_packet.is_s2mndr():
+            return cxl_mem_packet.s2mndr_header.ld_id
+        if cxl_mem_packet.is_s2mdrs():
+            return cxl_mem_packet.s2mdrs_header.ld_id
+    return None
+
+
+class MldDispatcher(RunnableComponent):
+    """
+    Serves the logical devices of an MLD from one set of host-to-target FIFOs.
+
+    There is one consumer task per channel (CFG, MMIO and CXL.mem) rather than one
+    per LD per channel. Each channel keeps a route list indexed by LD-ID, so a
+    packet reaches its LD's handler with a single lookup, and adding or removing
+    an LD only replaces its entries. Packets for an LD without handlers, or with an
+    LD-ID out of range, are dropped.
+
+    The consumer queues each packet for its LD. A worker task per LD and channel
+    runs the handler on the queued packets in arrival order, and exits once the
+    queue is empty. A slow access to one LD therefore does not hold up the others,
+    and an idle LD has no task.
+    """
+
+    CHANNELS = ("cfg_space", "mmio", "cxl_mem")
+
+    def __init__(self, upstream_connection: CxlConnection, label: Optional[str] = None):
+        super().__init__(label)
+        self._fifos: Dict[str, Queue] = {
+            "cfg_space": upstream_connection.cfg_fifo.host_to_target,
+            "mmio": upstream_connection.mmio_fifo.host_to_target,
+            "cxl_mem": upstream_connection.cxl_mem_fifo.host_to_target,
+        }
+        self._routes: Dict[str, List[Optional[PacketHandler]]] = {
+            channel: [None] * MAX_LD_COUNT for channel in self.CHANNELS
+        }
+        self._pending: Dict[str, List[Deque[BasePacket]]] = {
+            channel: [deque() for _ in range(MAX_LD_COUNT)] for channel in self.CHANNELS
+        }
+        self._workers: Dict[str, List[Optional[Task]]] = {
+            channel: [None] * MAX_LD_COUNT for channel in self.CHANNELS
+        }
+
+    def set_ld_handlers(self, ld_id: int, handlers: LdPacketHandlers):
+        if not 0 <= ld_id < MAX_LD_COUNT:
+            raise Exception(f"LD-ID {ld_id} is out of range")
+        for channel in self.CHANNELS:
+            self._routes[channel][ld_id] = getattr(handlers, channel)
+
+    def remove_ld(self, ld_id: int):
+        for channel in self.CHANNELS:
+            self._routes[channel][ld_id] = None
+
+    def get_ld_ids(self) -> List[int]:
+        routes = self._routes["cfg_space"]
+        return [ld_id for ld_id in range(MAX_LD_COUNT) if routes[ld_id] is not None]
+
+    async def _process_ld_packets(self, channel: str, ld_id: int):
+        pending = self._pending[channel][ld_id]
+        try:
+            while pending:
+                packet = pending.popleft()
+                # The LD may have been removed while the packet was queued
+                handler = self._routes[channel][ld_id]
+                if handler is None:
+                    logger.warning(
+                        self._create_message(f"Dropped {channel} packet for LD-ID {ld_id}")
+                    )
+                    continue
+                try:
+                    await handler(packet)
+                except Exception as e:
+                    logger.error(
+                        self._create_message(f"{channel} handler of LD-ID {ld_id} failed: {e}")
+                    )
+        finally:
+            self._workers[channel][ld_id] = None
+
+    async def _process_channel(self, channel: str):
+        logger.debug(self._create_message(f"Started dispatching {channel} packets"))
+        fifo = self._fifos[channel]
+        routes = self._routes[channel]
+        pending = self._pending[channel]
+        workers = self._workers[channel]
+        while True:
+            packet = await fifo.get()
+            if packet is None:
+                break
+            ld_id = get_ld_id(packet)
+            if ld_id is None or not 0 <= ld_id < MAX_LD_COUNT or routes[ld_id] is None:
+                logger.warning(self._create_message(f"Dropped {channel} packet for LD-ID {ld_id}"))
+                continue
+            pending[ld_id].append(packet)
+            if workers[ld_id] is None:
+                workers[ld_id] = create_task(self._process_ld_packets(channel, ld_id))
+        await gather(*(worker for worker in workers if worker is not None))
+        logger.debug(self._create_message(f"Stopped dispatching {channel} packets"))
+
+    async def _run(self):
+        tasks = [create_task(self._process_channel(channel)) for channel in self.CHANNELS]
+        await self._change_status_to_running()
+        await gather(*tasks)
+
+    async def _stop(self):
+        for fifo in self._fifos.values():
+            await fifo.put(None)
@@ -0,0 +1,337 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import accumulate
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Set, Tuple, cast
+
+from opencis.cxl.component.packet_reader import PacketReader
+from opencis.cxl.transport.transaction import (
+    BasePacket,
+    BaseSidebandPacket,
+    CciBasePacket,
+    CxlIoBasePacket,
+    CxlIoCfgReqPacket,
+    CxlIoCompletionPacket,
+    CxlIoCompletionWithDataPacket,
+    CxlIoMemRdPacket,
+    CxlIoMemReqPacket,
+    CxlMemM2SReqPacket,
+    CxlMemM2SRwDPacket,
+    CxlMemS2MDRSPacket,
+    CxlMemS2MNDRPacket,
+    CXL_IO_FMT_TYPE,
+    CXL_MEM_M2SREQ_OPCODE,
+    CXL_MEM_M2SRWD_OPCODE,
+    CXL_MEM_S2MDRS_OPCODE,
+    CXL_MEM_S2MNDR_OPCODE,
+    SidebandConnectionRequestPacket,
+)
+from opencis.util.logger import logger
+from opencis.util.pcap import Endpoint, TcpStream, reassemble_tcp_streams
+from opencis.util.workload_report import WorkloadReport
+
+CHANNEL_CXL_IO = "CXL.io"
+CHANNEL_CXL_MEM = "CXL.mem"
+CHANNEL_CXL_CACHE = "CXL.cache"
+CHANNEL_CCI = "CCI"
+CHANNEL_SIDEBAND = "sideband"
+
+
+@dataclass
+class CapturedPacket:
+    # Capture time of the segment that completed the packet
+    timestamp: float
+    packet: BasePacket
+    data: bytes
+
+
+@dataclass
+class DecodedStream:
+    stream: TcpStream
+    packets: List[CapturedPacket] = field(default_factory=list)
+    # Bytes after the last packet that could be decoded
+    undecoded: int = 0
+
+    def get_connection(self) -> Tuple[Endpoint, Endpoint]:
+        return tuple(sorted((self.stream.src, self.stream.dst)))
+
+
+def get_channel(packet: BasePacket) -> str:
+    if packet.is_cxl_io():
+        return CHANNEL_CXL_IO
+    if packet.is_cxl_mem():
+        return CHANNEL_CXL_MEM
+    if packet.is_cxl_cache():
+        return CHANNEL_CXL_CACHE
+    if packet.is_cci():
+        return CHANNEL_CCI
+    return CHANNEL_SIDEBAND
+
+
+def _get_enum_name(enum_class, value: int) -> str:
+    try:
+        return enum_class(value).name
+    except ValueError:
+        return f"0x{value:x}"
+
+
+def get_opcode_name(packet: BasePacket) -> str:
+    if isinstance(packet, CxlIoBasePacket):
+        return _get_enum_name(CXL_IO_FMT_TYPE, packet.cxl_io_header.fmt_type)
+    if isinstance(packet, CxlMemM2SReqPacket):
+        return _get_enum_name(CXL_MEM_M2SREQ_OPCODE, packet.m2sreq_header.mem_opcode)
+    if isinstance(packet, CxlMemM2SRwDPacket):
+        return _get_enum_name(CXL_MEM_M2SRWD_OPCODE, packet.m2srwd_header.mem_opcode)
+    if isinstance(packet, CxlMemS2MNDRPacket):
+        return _get_enum_name(CXL_MEM_S2MNDR_OPCODE, packet.s2mndr_header.opcode)
+    if isinstance(packet, CxlMemS2MDRSPacket):
+        return _get_enum_name(CXL_MEM_S2MDRS_OPCODE, packet.s2mdrs_header.opcode)
+    return packet.__class__.__name__
+
+
+def _get_request_key(packet: BasePacket) -> Optional[Tuple[str, int]]:
+    # Requests a completion answers, keyed by their tag
+    if isinstance(packet, CxlIoCfgReqPacket):
+        return (CHANNEL_CXL_IO, packet.cfg_req_header.tag)
+    if isinstance(packet, CxlIoMemReqPacket) and packet.is_mem_read():
+        return (CHANNEL_CXL_IO, cast(CxlIoMemRdPacket, packet).mreq_header.tag)
+    if isinstance(packet, CxlMemM2SReqPacket) and packet.is_mem_rd():
+        return (CHANNEL_CXL_MEM, packet.m2sreq_header.tag)
+    if isinstance(packet, CxlMemM2SRwDPacket):
+        return (CHANNEL_CXL_MEM, packet.m2srwd_header.tag)
+    if isinstance(packet, CciBasePacket) and packet.is_req() and hasattr(packet, "header_data"):
+        return (CHANNEL_CCI, packet.header_data.message_tag)
+    return None
+
+
+def _get_completion_key(packet: BasePacket) -> Optional[Tuple[str, int]]:
+    if isinstance(packet, (CxlIoCompletionPacket, CxlIoCompletionWithDataPacket)):
+        return (CHANNEL_CXL_IO, packet.cpl_header.tag)
+    if isinstance(packet, CxlMemS2MNDRPacket):
+        return (CHANNEL_CXL_MEM, packet.s2mndr_header.tag)
+    if isinstance(packet, CxlMemS2MDRSPacket):
+        return (CHANNEL_CXL_MEM, packet.s2mdrs_header.tag)
+    if isinstance(packet, CciBasePacket) and packet.is_rsp() and hasattr(packet, "header_data"):
+        return (CHANNEL_CCI, packet.header_data.message_tag)
+    return None
+
+
+def decode_tcp_stream(stream: TcpStream) -> DecodedStream:
+    """
+    Splits a stream into packets by their system headers and decodes each with the
+    PacketReader packet classes, up to the first packet that does not decode.
+    """
+    decoded = DecodedStream(stream)
+    data = stream.get_data()
+    chunk_ends = list(accumulate(len(chunk) for _, chunk in stream.chunks))
+    packet_reader = PacketReader(None, label="PacketCapture")
+    header_size = BasePacket.get_size()
+    offset = 0
+    while offset + header_size <= len(data):
+        base_packet = BasePacket()
+        base_packet.reset(data[offset : offset + header_size])
+        length = base_packet.system_header.payload_length
+        if length < header_size or offset + length > len(data):
+            break
+        payload = data[offset : offset + length]
+        try:
+            packet = packet_reader.decode_packet(payload)
+        except Exception as e:
+            logger.debug(f"[PacketCapture] Stopped decoding {stream.src}->{stream.dst}: {e}")
+            break
+        timestamp = stream.chunks[bisect_right(chunk_ends, offset + length - 1)][0]
+        decoded.packets.append(CapturedPacket(timestamp, packet, payload))
+        offset += length
+    decoded.undecoded = len(data) - offset
+    return decoded
+
+
+def decode_packet_capture(filename: str, ports: Optional[Set[int]] = None) -> List[DecodedStream]:
+    with open(filename, "rb") as file:
+        streams = reassemble_tcp_streams(file, ports)
+    return [decode_tcp_stream(stream) for stream in streams]
+
+
+@dataclass
+class PacketCaptureStats:
+    packets: Dict[str, int] = field(default_factory=dict)
+    bytes_by_opcode: Dict[str, int] = field(default_factory=dict)
+    # Seconds from a request to the completion with its tag, per connection
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    unmatched_requests: int = 0
+    unmatched_completions: int = 0
+
+    def format(self) -> List[str]:
+        lines = []
+        for channel, count in sorted(self.packets.items()):
+            line = f"{channel}: {count} packets"
+            latencies = self.latencies.get(channel)
+            if latencies:
+                report = WorkloadReport(latencies=latencies)
+                line += (
+                    f", {len(latencies)} completions, "
+                    f"latency p50 {report.get_latency_percentile(50) * 1e6:.1f} us, "
+                    f"p99 {report.get_latency_percentile(99) * 1e6:.1f} us, "
+                    f"max {max(latencies) * 1e6:.1f} us"
+                )
+            lines.append(line)
+        for opcode, size in sorted(self.bytes_by_opcode.items(), key=lambda item: -item[1]):
+            lines.append(f"  {opcode}: {size} bytes")
+        lines.append(
+            f"unmatched: {self.unmatched_requests} requests, "
+            f"{self.unmatched_completions} completions"
+        )
+        return lines
+
+
+class PacketCaptureAnalyzer:
+    """
+    Counts packets and bytes, and matches completions to the requests with the same
+    tag on the same connection, oldest first. On a capture of a whole topology, a
+    request and its completion are matched on every hop they take.
+    """
+
+    def __init__(self):
+        self._stats = PacketCaptureStats()
+        self._pending: Dict[Tuple, Deque[float]] = {}
+
+    def add(self, timestamp: float, connection, packet: BasePacket, size: int) -> bool:
+        """
+        Adds one packet and returns whether it is a completion of a pending request.
+        """
+        channel = get_channel(packet)
+        self._stats.packets[channel] = self._stats.packets.get(channel, 0) + 1
+        opcode = f"{channel} {get_opcode_name(packet)}"
+        self._stats.bytes_by_opcode[opcode] = self._stats.bytes_by_opcode.get(opcode, 0) + size
+
+        key = _get_request_key(packet)
+        if key is not None:
+            self._pending.setdefault((connection, key), deque()).append(timestamp)
+            return False
+        key = _get_completion_key(packet)
+        if key is None:
+            return False
+        pending = self._pending.get((connection, key))
+        if not pending:
+            self._stats.unmatched_completions += 1
+            return False
+        self._stats.latencies.setdefault(channel, []).append(timestamp - pending.popleft())
+        return True
+
+    def get_stats(self) -> PacketCaptureStats:
+        self._stats.unmatched_requests = sum(len(pending) for pending in self._pending.values())
+        return self._stats
+
+
+def analyze_packet_capture(streams: List[DecodedStream]) -> PacketCaptureStats:
+    packets = [
+        (captured.timestamp, stream.get_connection(), captured)
+        for stream in streams
+        for captured in stream.packets
+    ]
+    packets.sort(key=lambda item: item[0])
+    analyzer = PacketCaptureAnalyzer()
+    for timestamp, connection, captured in packets:
+        analyzer.add(timestamp, connection, captured.packet, len(captured.data))
+    return analyzer.get_stats()
+
+
+def get_host_streams(streams: List[DecodedStream]) -> List[DecodedStream]:
+    """
+    Returns the streams a host root port sent to a switch: they open with a
+    connection request and carry requests rather than completions.
+    """
+    host_streams = []
+    for stream in streams:
+        if not stream.packets:
+            continue
+        if not isinstance(stream.packets[0].packet, SidebandConnectionRequestPacket):
+            continue
+        requests = sum(_get_request_key(p.packet) is not None for p in stream.packets)
+        completions = sum(_get_completion_key(p.packet) is not None for p in stream.packets)
+        if requests > completions:
+            host_streams.append(stream)
+    return host_streams
+
+
+async def _replay_stream(
+    stream: DecodedStream,
+    host: str,
+    port: int,
+    speed: float,
+    timeout: float,
+    analyzer: PacketCaptureAnalyzer,
+):
+    reader, writer = await asyncio.open_connection(host, port)
+    packet_reader = PacketReader(reader, label="PacketCaptureReplay")
+    try:
+        writer.write(stream.packets[0].data)
+        await writer.drain()
+        response = await packet_reader.get_packet()
+        if (
+            not response.is_sideband()
+            or not cast(BaseSidebandPacket, response).is_connection_accept()
+        ):
+            raise Exception(f"Switch at {host}:{port} did not accept the replayed connection")
+        connection = writer.get_extra_info("sockname")
+
+        packets = stream.packets[1:]
+        expected = sum(_get_request_key(captured.packet) is not None for captured in packets)
+        completed = asyncio.Event()
+
+        async def receive_completions():
+            received = 0
+            while received < expected:
+                packet = await packet_reader.get_packet()
+                if analyzer.add(perf_counter(), connection, packet, len(packet)):
+                    received += 1
+            completed.set()
+
+        receiver = asyncio.create_task(receive_completions())
+        start = perf_counter()
+        first_timestamp = packets[0].timestamp if packets else 0
+        for captured in packets:
+            delay = start + (captured.timestamp - first_timestamp) / speed - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            analyzer.add(perf_counter(), connection, captured.packet, len(captured.data))
+            writer.write(captured.data)
+            await writer.drain()
+        try:
+            await asyncio.wait_for(completed.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[PacketCaptureReplay] Completions still missing after {timeout} s")
+        receiver.cancel()
+        await asyncio.gather(receiver, return_exceptions=True)
+    finally:
+        packet_reader.abort()
+        writer.close()
+
+
+async def replay_packet_capture(
+    streams: List[DecodedStream],
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    speed: float = 1.0,
+    timeout: float = 10.0,
+) -> PacketCaptureStats:
+    """
+    Sends the packets of host-side streams to a live switch port, each stream over
+    its own connection, at the recorded pace divided by `speed`. The stream's
+    recorded connection request claims the same switch port as in the capture, so
+    no other host may be connected to it. Latencies are measured at this end.
+    """
+    analyzer = PacketCaptureAnalyzer()
+    await asyncio.gather(
+        *(_replay_stream(stream, host, port, speed, timeout, analyzer) for stream in streams)
+    )
+    return analyzer.get_stats()
@@ -98,7 +98,15 @@ class PacketReader(LabeledComponent):
             self._task.cancel()
 
     async def _get_packet_in_task(self) -> BasePacket:
-        base_packet, payload = await self._get_payload()
+        _, payload = await self._get_payload()
+        return self.decode_packet(payload)
+
+    def decode_packet(self, payload: bytes) -> BasePacket:
+        """
+        Decodes one whole packet, system header included, into its packet class.
+        """
+        base_packet = BasePacket()
+        base_packet.reset(payload[: BasePacket.get_size()])
         if base_packet.is_cxl_io():
             logger.debug(self._create_message("Received Packet is CXL.io"))
             return self._get_cxl_io_packet(payload)
@@ -17,6 +17,8 @@ from opencis.cxl.device.config.logical_device import (
     LogicalDeviceConfig,
     MultiLogicalDeviceConfig,
     SingleLogicalDeviceConfig,
+    Type1AcceleratorConfig,
+    Type2AcceleratorConfig,
 )
 from opencis.cxl.component.bind_processor import PpbDspBindProcessor
 from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
@@ -125,6 +127,9 @@ class PhysicalPortManager(RunnableComponent):
                     # Use the first serial number for now
                     serial_number = switch_config.serial_numbers[0]
                     total_capacity = sum(switch_config.memory_sizes)
+                elif isinstance(switch_config, (Type1AcceleratorConfig, Type2AcceleratorConfig)):
+                    # Not a memory device
+                    continue
                 else:
                     raise Exception(f"Invalid device config type: {type(switch_config)}")
 
@@ -12,6 +12,7 @@ from typing import cast
 from enum import Enum, auto
 
 from opencis.util.logger import logger
+from opencis.util.number import Payload
 from opencis.util.component import RunnableComponent
 from opencis.pci.component.fifo_pair import FifoPair
 from opencis.cxl.transport.memory_fifo import (
@@ -129,7 +130,7 @@ class CacheCoherencyBridge(RunnableComponent):
         cxl_packet = CxlCacheCacheH2DReqPacket.create(addr, cache_id, opcode)
         await self._downstream_cxl_cache_fifos.host_to_target.put(cxl_packet)
 
-    async def _sync_memory_read(self, addr: int) -> int:
+    async def _sync_memory_read(self, addr: int) -> Payload:
         mem_packet = MemoryRequest(MEMORY_REQUEST_TYPE.READ, addr, 64)
         await self._memory_producer_fifos.request.put(mem_packet)
         packet = await self._memory_producer_fifos.response.get()
@@ -186,7 +187,9 @@ class CacheCoherencyBridge(RunnableComponent):
                     return
                 packet = await self._cxl_channel["d2h_data"].get()
                 addr = self._cur_state.packet.get_address()
-                mem_packet = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 64, packet.data)
+                mem_packet = MemoryRequest(
+                    MEMORY_REQUEST_TYPE.WRITE, addr, 64, packet.get_data_bytes()
+                )
                 await self._memory_producer_fifos.request.put(mem_packet)
                 sf_update_list.append(SF_UPDATE_TYPE.SF_DEVICE_OUT)
                 self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
@@ -211,7 +214,7 @@ class CacheCoherencyBridge(RunnableComponent):
                     if self._cxl_channel["d2h_data"].empty():
                         return
                     packet = await self._cxl_channel["d2h_data"].get()
-                    data = packet.data
+                    data = packet.get_data_bytes()
                 else:
                     cache_packet = CacheRequest(CACHE_REQUEST_TYPE.SNP_DATA, addr)
                     await self._upstream_coh_bridge_to_cache_fifo.request.put(cache_packet)
@@ -274,6 +277,7 @@ class CacheCoherencyBridge(RunnableComponent):
         if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_WAIT:
             return
 
+        tag = cache_packet.tag
         if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
             addr = cache_packet.addr
 
@@ -282,7 +286,7 @@ class CacheCoherencyBridge(RunnableComponent):
                     MEMORY_REQUEST_TYPE.WRITE, addr, cache_packet.size, cache_packet.data
                 )
                 await self._memory_producer_fifos.request.put(mem_packet)
-                cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+                cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, tag=tag)
                 await self._upstream_cache_to_coh_bridge_fifo.response.put(cache_packet)
                 self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             else:
@@ -292,14 +296,14 @@ class CacheCoherencyBridge(RunnableComponent):
                 if not self._cur_state.cache_list:
                     if cache_packet.type == CACHE_REQUEST_TYPE.SNP_INV:
                         status = CACHE_RESPONSE_STATUS.RSP_I
-                        cache_packet = CacheResponse(status)
+                        cache_packet = CacheResponse(status, tag=tag)
                     else:
                         if cache_packet.type == CACHE_REQUEST_TYPE.SNP_DATA:
                             status = CACHE_RESPONSE_STATUS.RSP_S
                         elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_CUR:
                             status = CACHE_RESPONSE_STATUS.RSP_V
                         data = await self._sync_memory_read(addr)
-                        cache_packet = CacheResponse(status, data)
+                        cache_packet = CacheResponse(status, data, tag)
                     await self._upstream_cache_to_coh_bridge_fifo.response.put(cache_packet)
                     self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
                 # device cache snoop filter hit
@@ -315,7 +319,7 @@ class CacheCoherencyBridge(RunnableComponent):
                             status = CACHE_RESPONSE_STATUS.RSP_S
                         elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_CUR:
                             status = CACHE_RESPONSE_STATUS.RSP_V
-                        cache_packet = CacheResponse(status, data)
+                        cache_packet = CacheResponse(status, data, tag)
                         await self._upstream_cache_to_coh_bridge_fifo.response.put(cache_packet)
                         self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
                     # cacheline is in modified or exclusive status
@@ -335,8 +339,8 @@ class CacheCoherencyBridge(RunnableComponent):
                 if self._cxl_channel["d2h_data"].empty():
                     return
                 packet = await self._cxl_channel["d2h_data"].get()
-                data = packet.data
-            cache_packet = CacheResponse(self._cur_state.cache_rsp, data)
+                data = packet.get_data_bytes()
+            cache_packet = CacheResponse(self._cur_state.cache_rsp, data, tag)
             await self._upstream_cache_to_coh_bridge_fifo.response.put(cache_packet)
             self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
 
@@ -11,7 +11,9 @@ import asyncio
 from typing import cast
 
 from opencis.util.logger import logger
+from opencis.util.number import Payload
 from opencis.util.component import RunnableComponent
+from opencis.util.tracing import tracer
 from opencis.pci.component.fifo_pair import FifoPair
 from opencis.cxl.transport.memory_fifo import (
     MemoryFifoPair,
@@ -83,6 +85,8 @@ class HomeAgent(RunnableComponent):
             birsp_sched=False,
         )
 
+        self._trace_label = self.get_message_label()
+
         # emulated .mem s2m channels
         self._cxl_channel = {"s2m_ndr": Queue(), "s2m_drs": Queue(), "s2m_bisnp": Queue()}
 
@@ -103,18 +107,18 @@ class HomeAgent(RunnableComponent):
         meta_value: CXL_MEM_META_VALUE,
         snp_type: CXL_MEM_M2S_SNP_TYPE,
         addr: int,
-        data: int,
+        data: Payload,
     ) -> CxlMemMemWrPacket:
         return CxlMemMemWrPacket.create(addr, data, opcode, meta_field, meta_value, snp_type)
 
-    async def _write_memory(self, addr: int, size: int, value: int):
+    async def _write_memory(self, addr: int, size: int, value: Payload):
         packet = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, size, value)
         await self._memory_producer_fifos.request.put(packet)
         packet = await self._memory_producer_fifos.response.get()
 
         assert packet.status == MEMORY_RESPONSE_STATUS.OK
 
-    async def _read_memory(self, addr: int, size: int) -> int:
+    async def _read_memory(self, addr: int, size: int) -> Payload:
         packet = MemoryRequest(MEMORY_REQUEST_TYPE.READ, addr, size)
         await self._memory_producer_fifos.request.put(packet)
         packet = await self._memory_producer_fifos.response.get()
@@ -219,15 +223,16 @@ class HomeAgent(RunnableComponent):
             self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             return
 
+        tag = self._cur_state.packet.tag
         if s2mndr_packet.s2mndr_header.meta_value == CXL_MEM_META_VALUE.ANY:
             # HDM-DB: DRS immediately following NDR as part of one response
             while self._cxl_channel["s2m_drs"].empty():
                 await asyncio.sleep(0)  # just spin
             cxl_packet = await self._cxl_channel["s2m_drs"].get()
             assert cast(CxlMemBasePacket, cxl_packet).is_s2mdrs()
-            cache_packet = CacheResponse(status, cxl_packet.data)
+            cache_packet = CacheResponse(status, cxl_packet.get_data_bytes(), tag)
         else:
-            cache_packet = CacheResponse(status)
+            cache_packet = CacheResponse(status, tag=tag)
         await self._upstream_cache_to_home_agent_fifos.response.put(cache_packet)
         self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
 
@@ -236,7 +241,9 @@ class HomeAgent(RunnableComponent):
     async def _process_cxl_s2m_drs_packet(self, s2mdrs_packet: CxlMemS2MDRSPacket):
         assert s2mdrs_packet.s2mdrs_header.opcode == CXL_MEM_S2MDRS_OPCODE.MEM_DATA
 
-        cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, s2mdrs_packet.data)
+        cache_packet = CacheResponse(
+            CACHE_RESPONSE_STATUS.OK, s2mdrs_packet.get_data_bytes(), self._cur_state.packet.tag
+        )
         await self._upstream_cache_to_home_agent_fifos.response.put(cache_packet)
         self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
 
@@ -287,69 +294,71 @@ class HomeAgent(RunnableComponent):
             return
 
         if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
-            meta_field = CXL_MEM_META_FIELD.NO_OP
-            meta_value = CXL_MEM_META_VALUE.INVALID
-            snp_type = CXL_MEM_M2S_SNP_TYPE.NO_OP
-            addr = cache_packet.addr
-
-            if cache_packet.type in (
-                CACHE_REQUEST_TYPE.WRITE,
-                CACHE_REQUEST_TYPE.WRITE_BACK,
-                CACHE_REQUEST_TYPE.UNCACHED_WRITE,
-            ):
-                opcode = CXL_MEM_M2SRWD_OPCODE.MEM_WR
-                data = cache_packet.data
-
-                # HDM-H Normal Write
-                if cache_packet.type == CACHE_REQUEST_TYPE.WRITE:
-                    meta_value = CXL_MEM_META_VALUE.ANY
-                # HDM-DB Flush Write (Cmp: I/I)
-                elif cache_packet.type == CACHE_REQUEST_TYPE.WRITE_BACK:
-                    meta_field = CXL_MEM_META_FIELD.META0_STATE
-                    meta_value = CXL_MEM_META_VALUE.INVALID
-                # HDM Uncached Write
-                elif cache_packet.type == CACHE_REQUEST_TYPE.UNCACHED_WRITE:
-                    meta_value = CXL_MEM_META_VALUE.ANY
-
-                cxl_packet = self._create_m2s_rwd_packet(
-                    opcode, meta_field, meta_value, snp_type, addr, data
-                )
-                packet = CacheResponse(CACHE_RESPONSE_STATUS.OK)
-                await self._upstream_cache_to_home_agent_fifos.response.put(packet)
-            else:
-                # HDM-H Normal Read
-                if cache_packet.type == CACHE_REQUEST_TYPE.READ:
-                    opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
-                    meta_value = CXL_MEM_META_VALUE.ANY
-                # HDM-DB Device Shared Read (Cmp-S: S/S, Cmp-E: A/I)
-                elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_DATA:
-                    opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
-                    meta_field = CXL_MEM_META_FIELD.META0_STATE
-                    meta_value = CXL_MEM_META_VALUE.SHARED
-                    snp_type = CXL_MEM_M2S_SNP_TYPE.SNP_DATA
-                # HDM-DB Non-Data, Host Ownership Device Invalidation (Cmp-E: A/I)
-                elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_INV:
-                    opcode = CXL_MEM_M2SREQ_OPCODE.MEM_INV
-                    meta_field = CXL_MEM_META_FIELD.META0_STATE
-                    meta_value = CXL_MEM_META_VALUE.ANY
-                    snp_type = CXL_MEM_M2S_SNP_TYPE.SNP_INV
-                # HDM-DB Non-Cacheable Read, Leaving Device Cache (Cmp: I/A)
-                elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_CUR:
-                    opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
-                    meta_field = CXL_MEM_META_FIELD.META0_STATE
-                    snp_type = CXL_MEM_M2S_SNP_TYPE.SNP_CUR
-                elif cache_packet.type == CACHE_REQUEST_TYPE.UNCACHED_READ:
-                    opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
-                    meta_value = CXL_MEM_META_VALUE.ANY
+            with tracer.span("m2s_request", self._trace_label, cache_packet.trace_id):
+                meta_field = CXL_MEM_META_FIELD.NO_OP
+                meta_value = CXL_MEM_META_VALUE.INVALID
+                snp_type = CXL_MEM_M2S_SNP_TYPE.NO_OP
+                addr = cache_packet.addr
+
+                if cache_packet.type in (
+                    CACHE_REQUEST_TYPE.WRITE,
+                    CACHE_REQUEST_TYPE.WRITE_BACK,
+                    CACHE_REQUEST_TYPE.UNCACHED_WRITE,
+                ):
+                    opcode = CXL_MEM_M2SRWD_OPCODE.MEM_WR
+                    data = cache_packet.data
+
+                    # HDM-H Normal Write
+                    if cache_packet.type == CACHE_REQUEST_TYPE.WRITE:
+                        meta_value = CXL_MEM_META_VALUE.ANY
+                    # HDM-DB Flush Write (Cmp: I/I)
+                    elif cache_packet.type == CACHE_REQUEST_TYPE.WRITE_BACK:
+                        meta_field = CXL_MEM_META_FIELD.META0_STATE
+                        meta_value = CXL_MEM_META_VALUE.INVALID
+                    # HDM Uncached Write
+                    elif cache_packet.type == CACHE_REQUEST_TYPE.UNCACHED_WRITE:
+                        meta_value = CXL_MEM_META_VALUE.ANY
+
+                    cxl_packet = self._create_m2s_rwd_packet(
+                        opcode, meta_field, meta_value, snp_type, addr, data
+                    )
+                    packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, tag=cache_packet.tag)
+                    await self._upstream_cache_to_home_agent_fifos.response.put(packet)
                 else:
-                    raise Exception(f"Invalid M2S Opcode Type: {cache_packet.type}")
+                    # HDM-H Normal Read
+                    if cache_packet.type == CACHE_REQUEST_TYPE.READ:
+                        opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
+                        meta_value = CXL_MEM_META_VALUE.ANY
+                    # HDM-DB Device Shared Read (Cmp-S: S/S, Cmp-E: A/I)
+                    elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_DATA:
+                        opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
+                        meta_field = CXL_MEM_META_FIELD.META0_STATE
+                        meta_value = CXL_MEM_META_VALUE.SHARED
+                        snp_type = CXL_MEM_M2S_SNP_TYPE.SNP_DATA
+                    # HDM-DB Non-Data, Host Ownership Device Invalidation (Cmp-E: A/I)
+                    elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_INV:
+                        opcode = CXL_MEM_M2SREQ_OPCODE.MEM_INV
+                        meta_field = CXL_MEM_META_FIELD.META0_STATE
+                        meta_value = CXL_MEM_META_VALUE.ANY
+                        snp_type = CXL_MEM_M2S_SNP_TYPE.SNP_INV
+                    # HDM-DB Non-Cacheable Read, Leaving Device Cache (Cmp: I/A)
+                    elif cache_packet.type == CACHE_REQUEST_TYPE.SNP_CUR:
+                        opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
+                        meta_field = CXL_MEM_META_FIELD.META0_STATE
+                        snp_type = CXL_MEM_M2S_SNP_TYPE.SNP_CUR
+                    elif cache_packet.type == CACHE_REQUEST_TYPE.UNCACHED_READ:
+                        opcode = CXL_MEM_M2SREQ_OPCODE.MEM_RD
+                        meta_value = CXL_MEM_META_VALUE.ANY
+                    else:
+                        raise Exception(f"Invalid M2S Opcode Type: {cache_packet.type}")
 
-                cxl_packet = self._create_m2s_req_packet(
-                    opcode, meta_field, meta_value, snp_type, addr
-                )
+                    cxl_packet = self._create_m2s_req_packet(
+                        opcode, meta_field, meta_value, snp_type, addr
+                    )
 
-            self._cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
-            await self._downstream_cxl_mem_fifos.host_to_target.put(cxl_packet)
+                cxl_packet.trace_id = cache_packet.trace_id
+                self._cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
+                await self._downstream_cxl_mem_fifos.host_to_target.put(cxl_packet)
 
     # .mem s2m packet process
     async def _process_downstream_target_to_host_packets(self):
@@ -431,11 +440,13 @@ class HomeAgent(RunnableComponent):
 
                 if not self._cxl_channel["s2m_ndr"].empty():
                     packet = await self._cxl_channel["s2m_ndr"].get()
-                    await self._process_cxl_s2m_rsp_packet(packet)
+                    with tracer.span("s2m_ndr", self._trace_label, packet.trace_id):
+                        await self._process_cxl_s2m_rsp_packet(packet)
 
                 if not self._cxl_channel["s2m_drs"].empty():
                     packet = await self._cxl_channel["s2m_drs"].get()
-                    await self._process_cxl_s2m_drs_packet(packet)
+                    with tracer.span("s2m_drs", self._trace_label, packet.trace_id):
+                        await self._process_cxl_s2m_drs_packet(packet)
 
     async def _run(self):
         tasks = [
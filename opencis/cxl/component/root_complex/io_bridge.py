@@ -6,10 +6,27 @@
 """
 
 from dataclasses import dataclass
-from typing import cast
-from asyncio import Queue, create_task, gather, timeout, exceptions
+from typing import Dict, List, Optional, cast
+from asyncio import (
+    Future,
+    Lock,
+    Semaphore,
+    create_task,
+    gather,
+    get_running_loop,
+    timeout,
+    exceptions,
+)
 from opencis.util.component import RunnableComponent
 from opencis.pci.component.fifo_pair import FifoPair
+from opencis.pci.component.config_shadow import ConfigSpaceShadow
+from opencis.pci.component.config_pipeline import (
+    CONFIG_PIPELINE_DEPTH,
+    ConfigAccess,
+    create_config_request,
+    exchange_config_requests,
+    get_config_access_result,
+)
 from opencis.cxl.transport.memory_fifo import MemoryFifoPair
 from opencis.util.logger import logger
 from opencis.util.pci import (
@@ -27,6 +44,8 @@ from opencis.cxl.transport.transaction import (
     is_cxl_io_completion_status_sc,
 )
 
+MMIO_TAG_COUNT = 256
+
 
 @dataclass
 class IoBridgeConfig:
@@ -45,13 +64,26 @@ class IoBridge(RunnableComponent):
         self._cxl_io_mmio_fifos = config.cxl_io_mmio_fifos
         self._memory_producer_fifos = config.memory_producer_fifos
         self._next_tag = 0
+        self._config_shadow = ConfigSpaceShadow()
+        # One user of the config FIFO pair at a time; completions are matched by order
+        self._cfg_lock = Lock()
+
+        # MMIO reads may be outstanding to several devices at once, so completions are
+        # matched to reads by tag rather than by arrival order
+        self._mmio_tags = Semaphore(MMIO_TAG_COUNT)
+        self._next_mmio_tag = 0
+        self._mmio_responses: Dict[int, Future] = {}
+
+    def _allocate_mmio_tag(self) -> int:
+        # The caller holds one of _mmio_tags, so at least one tag is free
+        while self._next_mmio_tag in self._mmio_responses:
+            self._next_mmio_tag = (self._next_mmio_tag + 1) % MMIO_TAG_COUNT
+        tag = self._next_mmio_tag
+        self._next_mmio_tag = (tag + 1) % MMIO_TAG_COUNT
+        return tag
 
-        self._internal_io_fifo = Queue()
-
-    # pylint: disable=unused-argument
     async def _get_mmio_response(self, tag: int):
-        # TODO: get packet based on tag
-        packet = await self._internal_io_fifo.get()
+        packet = await self._mmio_responses[tag]
 
         assert is_cxl_io_completion_status_sc(packet)
         return packet
@@ -61,7 +93,11 @@ class IoBridge(RunnableComponent):
 
     # pylint: disable=duplicate-code
 
+    def get_config_shadow(self) -> ConfigSpaceShadow:
+        return self._config_shadow
+
     async def write_config(self, bdf: int, offset: int, size: int, value: int):
+        self._config_shadow.invalidate_write(bdf, offset)
         # TODO: Move pass-through handling to Root Port Switch
         bus = extract_bus_from_bdf(bdf)
         if self._root_bus == bus:
@@ -81,10 +117,11 @@ class IoBridge(RunnableComponent):
         )
         self._next_tag = (self._next_tag + 1) % 256
 
-        await self._cxl_io_cfg_fifos.host_to_target.put(packet)
+        async with self._cfg_lock:
+            await self._cxl_io_cfg_fifos.host_to_target.put(packet)
 
-        # TODO: Wait for an incoming packet that matchs tag
-        packet = await self._cxl_io_cfg_fifos.target_to_host.get()
+            # TODO: Wait for an incoming packet that matchs tag
+            packet = await self._cxl_io_cfg_fifos.target_to_host.get()
 
         tpl_type_str = "CFG WR0" if is_type0 else "CFG WR1"
 
@@ -104,7 +141,10 @@ class IoBridge(RunnableComponent):
             )
         )
 
-    async def read_config(self, bdf: int, offset: int, size: int) -> int:
+    async def read_config(self, bdf: int, offset: int, size: int, cached: bool = False) -> int:
+        if cached and self._config_shadow.enabled:
+            return await self._config_shadow.read(bdf, offset, size, self._fetch_config_dwords)
+
         logger.debug(self._create_message("Reading config from IO Bridge"))
         if offset + size > ((offset // 4) + 1) * 4:
             raise Exception("offset + size out of DWORD boundary")
@@ -127,11 +167,12 @@ class IoBridge(RunnableComponent):
 
         packet = CxlIoCfgRdPacket.create(bdf, offset, size, is_type0, req_id=0, tag=self._next_tag)
         self._next_tag = (self._next_tag + 1) % 256
-        await self._cxl_io_cfg_fifos.host_to_target.put(packet)
+        async with self._cfg_lock:
+            await self._cxl_io_cfg_fifos.host_to_target.put(packet)
 
-        # TODO: Wait for an incoming packet that matchs tag
-        logger.debug(self._create_message("Putting Read Config packet to FIFO"))
-        packet = await self._cxl_io_cfg_fifos.target_to_host.get()
+            # TODO: Wait for an incoming packet that matchs tag
+            logger.debug(self._create_message("Putting Read Config packet to FIFO"))
+            packet = await self._cxl_io_cfg_fifos.target_to_host.get()
 
         bit_offset = (offset % 4) * 8
 
@@ -157,6 +198,57 @@ class IoBridge(RunnableComponent):
         )
         return data
 
+    async def access_config_pipelined(
+        self,
+        bdf: int,
+        accesses: List[ConfigAccess],
+        depth: int = CONFIG_PIPELINE_DEPTH,
+        cached: bool = False,
+    ) -> List[Optional[int]]:
+        """
+        Issues config reads and writes to one function in order, keeping up to `depth`
+        of them outstanding. Returns the data of each read, None for each write. With
+        `cached`, which only reads may use, the reads are served from the config shadow
+        and whatever it is missing is fetched in one burst.
+        """
+        if cached and self._config_shadow.enabled:
+            if not all(access.is_read() for access in accesses):
+                raise Exception("Only config reads can be served from the config shadow")
+            return await self._config_shadow.read_many(bdf, accesses, self._fetch_config_dwords)
+
+        bus = extract_bus_from_bdf(bdf)
+        if self._root_bus == bus:
+            raise Exception("Accessing Root Port isn't supported under pass-through mode")
+
+        is_type0 = bus == self._get_secondary_bus()
+        if is_type0 and extract_device_from_bdf(bdf) != 0:
+            # NOTE: For non-ARI component, only allow device 0
+            return [get_config_access_result(access, None) for access in accesses]
+
+        packets = []
+        for access in accesses:
+            if not access.is_read():
+                self._config_shadow.invalidate_write(bdf, access.offset)
+            packets.append(create_config_request(bdf, access, is_type0, self._next_tag))
+            self._next_tag = (self._next_tag + 1) % 256
+        async with self._cfg_lock:
+            completions = await exchange_config_requests(self._cxl_io_cfg_fifos, packets, depth)
+
+        logger.debug(
+            self._create_message(
+                f"[{bdf_to_string(bdf)}] {len(accesses)} CFG RD/WR, up to {depth} in flight"
+            )
+        )
+        return [
+            get_config_access_result(access, completion)
+            for access, completion in zip(accesses, completions)
+        ]
+
+    async def _fetch_config_dwords(self, bdf: int, offsets: List[int]) -> List[int]:
+        if len(offsets) == 1:
+            return [await self.read_config(bdf, offsets[0], 4)]
+        return await self.access_config_pipelined(bdf, [ConfigAccess(offset) for offset in offsets])
+
     async def write_mmio(self, address: int, size: int, value: int):
         message = self._create_message(f"MMIO: Writing 0x{value:08x} to 0x{address:08x}")
         logger.debug(message)
@@ -166,16 +258,21 @@ class IoBridge(RunnableComponent):
     async def read_mmio(self, address: int, size: int) -> int:
         message = self._create_message(f"MMIO: Reading data from 0x{address:08x}")
         logger.debug(message)
-        packet = CxlIoMemRdPacket.create(address, size)
-        await self._cxl_io_mmio_fifos.host_to_target.put(packet)
-
-        try:
-            async with timeout(10):
-                packet = await self._get_mmio_response(packet.mreq_header.tag)
-
-        except exceptions.TimeoutError:
-            logger.error(self._create_message("CXL.io mmio RD: Timed-out"))
-            return None
+        async with self._mmio_tags:
+            tag = self._allocate_mmio_tag()
+            self._mmio_responses[tag] = get_running_loop().create_future()
+            packet = CxlIoMemRdPacket.create(address, size, tag=tag)
+            await self._cxl_io_mmio_fifos.host_to_target.put(packet)
+
+            try:
+                async with timeout(10):
+                    packet = await self._get_mmio_response(tag)
+
+            except exceptions.TimeoutError:
+                logger.error(self._create_message("CXL.io mmio RD: Timed-out"))
+                return None
+            finally:
+                del self._mmio_responses[tag]
 
         cpld_packet = cast(CxlIoCompletionWithDataPacket, packet)
         return cpld_packet.data
@@ -188,7 +285,14 @@ class IoBridge(RunnableComponent):
             if packet is None:
                 logger.debug(self._create_message("Stopped processing target to host MMIO packets"))
                 break
-            await self._internal_io_fifo.put(packet)
+            tag = cast(CxlIoCompletionPacket, packet).cpl_header.tag
+            response = self._mmio_responses.get(tag)
+            if response is None or response.done():
+                logger.warning(
+                    self._create_message(f"Dropped MMIO completion with unexpected tag 0x{tag:02x}")
+                )
+                continue
+            response.set_result(packet)
 
     async def _run(self):
         tasks = [create_task(self.process_target_to_host_mmio_packets())]
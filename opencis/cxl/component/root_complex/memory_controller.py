@@ -15,6 +15,7 @@ from opencis.cxl.transport.memory_fifo import (
     MEMORY_RESPONSE_STATUS,
 )
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
 from opencis.util.accessor import FileAccessor
 
 
@@ -33,6 +34,13 @@ class MemoryController(RunnableComponent):
         self._memory_consumer_fifos = config.memory_consumer_fifos
         self._file_accessor = FileAccessor(config.memory_filename, config.memory_size)
 
+        metrics_label = self.get_message_label()
+        self._reads = metrics.counter("memory_reads", metrics_label)
+        self._writes = metrics.counter("memory_writes", metrics_label)
+        metrics.gauge(
+            "memory_queue_depth", metrics_label, self._memory_consumer_fifos.request.qsize
+        )
+
     def get_mem_size(self) -> int:
         return self._memory_size
 
@@ -45,10 +53,12 @@ class MemoryController(RunnableComponent):
 
             addr = packet.addr
             if packet.type == MEMORY_REQUEST_TYPE.WRITE:
+                self._writes.inc()
                 await self._file_accessor.write(addr, packet.data, packet.size)
                 response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
             elif packet.type == MEMORY_REQUEST_TYPE.READ:
-                data = await self._file_accessor.read(addr, packet.size)
+                self._reads.inc()
+                data = await self._file_accessor.read_bytes(addr, packet.size)
                 response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
             await self._memory_consumer_fifos.response.put(response)
 
@@ -10,6 +10,8 @@ from dataclasses import dataclass, field
 import asyncio
 from opencis.util.component import RunnableComponent
 from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.pci.component.config_pipeline import CONFIG_PIPELINE_DEPTH, ConfigAccess
+from opencis.pci.component.config_shadow import ConfigSpaceShadow
 from opencis.cxl.component.root_complex.io_bridge import IoBridge, IoBridgeConfig
 from opencis.cxl.transport.memory_fifo import MemoryFifoPair
 from opencis.cxl.transport.cache_fifo import CacheFifoPair
@@ -140,8 +142,20 @@ class RootComplex(RunnableComponent):
     async def write_config(self, bdf: int, offset: int, size: int, value: int):
         await self._io_bridge.write_config(bdf, offset, size, value)
 
-    async def read_config(self, bdf: int, offset: int, size: int) -> int:
-        return await self._io_bridge.read_config(bdf, offset, size)
+    async def read_config(self, bdf: int, offset: int, size: int, cached: bool = False) -> int:
+        return await self._io_bridge.read_config(bdf, offset, size, cached)
+
+    def get_config_shadow(self) -> ConfigSpaceShadow:
+        return self._io_bridge.get_config_shadow()
+
+    async def access_config_pipelined(
+        self,
+        bdf: int,
+        accesses: List[ConfigAccess],
+        depth: int = CONFIG_PIPELINE_DEPTH,
+        cached: bool = False,
+    ) -> List[Optional[int]]:
+        return await self._io_bridge.access_config_pipelined(bdf, accesses, depth, cached)
 
     async def write_mmio(self, address: int, size: int, value: int):
         await self._io_bridge.write_mmio(address, size, value)
@@ -10,18 +10,21 @@ from asyncio import (
     StreamReader,
     StreamWriter,
     Task,
+    TimerHandle,
     create_task,
     gather,
+    get_running_loop,
     start_server,
     open_connection,
     Lock,
 )
-import asyncio
 from asyncio.exceptions import CancelledError
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Callable
+from typing import Callable, Iterable, Optional
 
 from opencis.util.component import RunnableComponent
+from opencis.util.listener import listener_registry
 from opencis.util.logger import logger
 
 
@@ -31,8 +34,38 @@ class ShortMsgBase(Enum):
         return self.value
 
 
+# Largest chunk read from the socket at once; every complete message in it is dispatched
+READ_CHUNK_SIZE = 4096
+
+
+@dataclass
+class InterruptCoalescing:
+    """
+    When a coalesced vector delivers its pending messages: as soon as max_count
+    are pending, or max_delay seconds after the first one arrived.
+    """
+
+    max_count: int = 1
+    max_delay: float = 0.0
+
+
+@dataclass
+class InterruptVector:
+    """
+    One entry of a remote's vector table, like an MSI-X table entry: the handler,
+    its coalescing settings, a mask bit and the messages pending delivery.
+    """
+
+    handler: Callable
+    coalescing: InterruptCoalescing
+    masked: bool = False
+    pending: list[ShortMsgBase] = field(default_factory=list)
+    timer: Optional[TimerHandle] = None
+
+
 class ShortMsgConn(RunnableComponent):
     _msg_to_interrupt_event: dict[int, dict[ShortMsgBase, Callable]]
+    _vector_tables: dict[int, dict[ShortMsgBase, InterruptVector]]
     _callbacks: list[Callable]
     _server_task: Task
 
@@ -52,6 +85,7 @@ class ShortMsgConn(RunnableComponent):
         self._msg_width = msg_width + 1  # 1 extra byte for sending device ID
         self._callbacks = []
         self._msg_to_interrupt_event = {}
+        self._vector_tables = {}
         self._general_interrupt_event = {}
         self._server = server
         self._connections: dict[int, tuple[StreamReader, StreamWriter]] = {}
@@ -63,7 +97,7 @@ class ShortMsgConn(RunnableComponent):
         self._writer_id = {}
         self._device_id = device_id
         self._run_status = False
-        self._msg_tasks: list[Task] = []
+        self._msg_tasks: set[Task] = set()
         self._msg_type = msg_type
 
     def register_interrupt_handler(
@@ -109,52 +143,128 @@ class ShortMsgConn(RunnableComponent):
         )
         self._general_interrupt_event[short_msg] = (cb_func, persistent)
 
+    def register_vector_handler(
+        self,
+        short_msg: ShortMsgBase,
+        msg_recv_cb: Callable,
+        dev_id: int = 0,
+        coalescing: Optional[InterruptCoalescing] = None,
+    ):
+        """
+        Registers a callback that receives a specific message from a remote in batches,
+        as msg_recv_cb(dev_id, msgs). Takes precedence over register_interrupt_handler()
+        for the same message. dev_id will be locked to 0 for a client.
+        """
+        if not self._server:
+            dev_id = 0
+        if coalescing is None:
+            coalescing = InterruptCoalescing()
+        logger.debug(
+            self._create_message(
+                f"Registering vector for ShortMsg {short_msg.name} for remote {dev_id}: "
+                f"{coalescing}"
+            )
+        )
+        vector_table = self._vector_tables.setdefault(dev_id, {})
+        vector_table[short_msg] = InterruptVector(msg_recv_cb, coalescing)
+
+    def mask_vector(self, short_msg: ShortMsgBase, dev_id: int = 0):
+        """
+        Holds back delivery on a vector; messages keep pending until it is unmasked.
+        """
+        if not self._server:
+            dev_id = 0
+        self._vector_tables[dev_id][short_msg].masked = True
+
+    def unmask_vector(self, short_msg: ShortMsgBase, dev_id: int = 0):
+        if not self._server:
+            dev_id = 0
+        vector = self._vector_tables[dev_id][short_msg]
+        vector.masked = False
+        if vector.pending:
+            self._deliver_vector(dev_id, vector)
+
+    def _queue_vector(self, dev_id: int, vector: InterruptVector, msg: ShortMsgBase):
+        vector.pending.append(msg)
+        if vector.masked:
+            return
+        if len(vector.pending) >= vector.coalescing.max_count:
+            self._deliver_vector(dev_id, vector)
+        elif vector.timer is None:
+            vector.timer = get_running_loop().call_later(
+                vector.coalescing.max_delay, self._deliver_vector, dev_id, vector
+            )
+
+    def _deliver_vector(self, dev_id: int, vector: InterruptVector):
+        if vector.timer is not None:
+            vector.timer.cancel()
+            vector.timer = None
+        if vector.masked or not vector.pending:
+            return
+        msgs = vector.pending
+        vector.pending = []
+        self._track_task(create_task(vector.handler(dev_id, msgs)))
+
+    def _track_task(self, task: Task):
+        self._msg_tasks.add(task)
+        task.add_done_callback(self._msg_tasks.discard)
+
     async def _msg_handler(self, reader: StreamReader, _: StreamWriter):
         this_dev_name = f"Device {self._device_id}"
         if self._server:
             this_dev_name = "Host"
         logger.debug(self._create_message(f"{this_dev_name}: Creating ShortMsg handler"))
+        buffer = b""
         while True:
             if not self._run_status:
                 logger.debug(self._create_message(f"{this_dev_name} _msg_handler exiting"))
                 return
 
-            msg = await reader.readexactly(self._msg_width)
-            if not msg:
+            data = await reader.read(READ_CHUNK_SIZE)
+            if not data:
                 logger.debug(self._create_message(f"{this_dev_name} ShortMsg connection broken"))
                 return
-            msg_int = int.from_bytes(msg)
-            remote_dev_id = msg_int & 0xFF
-            remote_dev_name = f"device: {remote_dev_id}"
-            if not self._server:
-                remote_dev_id = 0
-                remote_dev_name = "host"
-
-            msg_num = msg_int >> 8
-            msg = self._msg_type(msg_num)
-            if remote_dev_id not in self._msg_to_interrupt_event:
-                if msg not in self._general_interrupt_event:
-                    raise RuntimeError(
-                        f"ShortMsg: {msg} is not registered for remote {remote_dev_name}"
-                    )
-                func = self._general_interrupt_event[msg][0]
-                persistent = self._general_interrupt_event[msg][1]
-                if not persistent:
-                    del self._general_interrupt_event[msg]
-                t = create_task(func(remote_dev_id, msg))
-                self._msg_tasks.append(t)
-                continue
-
-            if msg not in self._msg_to_interrupt_event[remote_dev_id]:
-                raise RuntimeError(f"Invalid ShortMsg: {msg} for remote {remote_dev_name}")
-
-            t = create_task(self._msg_to_interrupt_event[remote_dev_id][msg](remote_dev_id))
-            self._msg_tasks.append(t)
-            logger.debug(
-                self._create_message(
-                    f"ShortMsg handled for {msg.name} from remote {remote_dev_name}"
+            buffer += data
+            end = len(buffer) - len(buffer) % self._msg_width
+            for offset in range(0, end, self._msg_width):
+                self._dispatch(int.from_bytes(buffer[offset : offset + self._msg_width]))
+            buffer = buffer[end:]
+
+    def _dispatch(self, msg_int: int):
+        remote_dev_id = msg_int & 0xFF
+        remote_dev_name = f"device: {remote_dev_id}"
+        if not self._server:
+            remote_dev_id = 0
+            remote_dev_name = "host"
+
+        msg_num = msg_int >> 8
+        msg = self._msg_type(msg_num)
+        vector = self._vector_tables.get(remote_dev_id, {}).get(msg)
+        if vector is not None:
+            self._queue_vector(remote_dev_id, vector, msg)
+            return
+
+        if remote_dev_id not in self._msg_to_interrupt_event:
+            if msg not in self._general_interrupt_event:
+                raise RuntimeError(
+                    f"ShortMsg: {msg} is not registered for remote {remote_dev_name}"
                 )
-            )
+            func = self._general_interrupt_event[msg][0]
+            persistent = self._general_interrupt_event[msg][1]
+            if not persistent:
+                del self._general_interrupt_event[msg]
+            self._track_task(create_task(func(remote_dev_id, msg)))
+            return
+
+        if msg not in self._msg_to_interrupt_event[remote_dev_id]:
+            raise RuntimeError(f"Invalid ShortMsg: {msg} for remote {remote_dev_name}")
+
+        self._track_task(
+            create_task(self._msg_to_interrupt_event[remote_dev_id][msg](remote_dev_id))
+        )
+        logger.debug(
+            self._create_message(f"ShortMsg handled for {msg.name} from remote {remote_dev_name}")
+        )
 
     async def _create_server(self):
         self._run_status = True
@@ -177,9 +287,20 @@ class ShortMsgConn(RunnableComponent):
         if not self._server:
             info = f"device {self._device_id} sending to host"
         logger.debug(self._create_message(info))
+        await self.send_irq_requests([request], device)
+
+    async def send_irq_requests(self, requests: Iterable[ShortMsgBase], device: int = 0):
+        """
+        Sends several ShortMsg requests to the same remote, flushing the connection once.
+        Each request is encoded as it is taken from the iterable.
+        """
         _, writer = self._connections[device]
-        val_w_dev_id = request.real_val << 8 | self._device_id
-        writer.write(val_w_dev_id.to_bytes(length=self._msg_width))
+        writer.write(
+            b"".join(
+                (request.real_val << 8 | self._device_id).to_bytes(length=self._msg_width)
+                for request in requests
+            )
+        )
         await writer.drain()
 
     async def start_connection(self):
@@ -202,8 +323,7 @@ class ShortMsgConn(RunnableComponent):
             if self._server:
                 server = await self._create_server()
                 self._server_task = create_task(server.serve_forever())
-                while not server.is_serving():
-                    await asyncio.sleep(0.1)
+                listener_registry.notify_ready(self._port)
                 self._tasks.append(self._server_task)
             else:
                 pass
@@ -213,13 +333,20 @@ class ShortMsgConn(RunnableComponent):
             await gather(*self._tasks)
         except CancelledError:
             logger.info(self._create_message("ShortMsg enable listener stopped"))
-            for task in self._msg_tasks:
+            for task in list(self._msg_tasks):
                 task.cancel()
             logger.info(self._create_message("All ShortMsg tasks cancelled"))
 
     async def _stop(self):
         logger.debug(self._create_message("ShortMsg Manager Stopping"))
-        for task in self._msg_tasks:
+        if self._server:
+            listener_registry.notify_closed(self._port)
+        for vector_table in self._vector_tables.values():
+            for vector in vector_table.values():
+                if vector.timer is not None:
+                    vector.timer.cancel()
+                    vector.timer = None
+        for task in list(self._msg_tasks):
             task.cancel()
         self._end_signal.set()
         for task in self._tasks:
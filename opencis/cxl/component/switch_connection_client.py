@@ -21,6 +21,7 @@ from opencis.cxl.component.packet_reader import PacketReader
 from opencis.cxl.component.cxl_connection import CxlConnection
 from opencis.cxl.component.cxl_packet_processor import CxlPacketProcessor
 from opencis.util.component import RunnableComponent
+from opencis.util.listener import Backoff
 from opencis.util.pci import create_bdf
 
 
@@ -105,6 +106,7 @@ class SwitchConnectionClient(RunnableComponent):
             end_time = loop.time() + time_out
             print_time = loop.time() + 5
             elapsed = 0
+            backoff = Backoff(self._port)
             while True:
                 if self._stop_signal:
                     break
@@ -122,7 +124,7 @@ class SwitchConnectionClient(RunnableComponent):
                             self._create_message(f"Awaiting CXL-Switch Ready... {elapsed}s")
                         )
                         print_time = loop.time() + 5
-                    await asyncio.sleep(1)
+                    await backoff.wait()
         else:
             (reader, writer) = await self._connect()
 
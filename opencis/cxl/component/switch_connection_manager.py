@@ -28,6 +28,7 @@ from opencis.cxl.component.cxl_component import (
 )
 from opencis.cxl.component.common import CXL_COMPONENT_TYPE
 from opencis.util.component import RunnableComponent
+from opencis.util.listener import listener_registry
 from opencis.util.logger import logger
 
 
@@ -77,8 +78,8 @@ class SwitchConnectionManager(RunnableComponent):
             server = await self._create_server()
             self._server_task = asyncio.create_task(server.serve_forever())
             logger.info(self._create_message("Starting TCP server task"))
-            while not server.is_serving():
-                await asyncio.sleep(0.1)
+            # start_server() is already accepting connections when it returns
+            listener_registry.notify_ready(self._port)
             await self._change_status_to_running()
             await self._server_task
         except Exception as e:
@@ -92,6 +93,7 @@ class SwitchConnectionManager(RunnableComponent):
 
     async def _stop(self):
         logger.info(self._create_message("Cancelling TCP server task"))
+        listener_registry.notify_closed(self._port)
         self._server_task.cancel()
         try:
             await self._server_task
@@ -10,6 +10,8 @@ from asyncio import gather, create_task
 from typing import List, Optional, cast
 
 from opencis.util.logger import logger
+from opencis.util.metrics import metrics
+from opencis.util.tracing import tracer
 from opencis.util.component import RunnableComponent
 from opencis.util.pci import bdf_to_string
 from opencis.util.number import tlptoh16
@@ -56,6 +58,16 @@ class CxlRouter(RunnableComponent):
         self._routing_table = routing_table
         self._is_running = False
 
+        metrics_label = f"{self.__class__.__name__}:VCS{vcs_id}"
+        self._trace_label = metrics_label
+        self._host_to_target_packets = metrics.counter(
+            "routed_packets", f"{metrics_label},host_to_target"
+        )
+        self._target_to_host_packets = metrics.counter(
+            "routed_packets", f"{metrics_label},target_to_host"
+        )
+        self._unroutable_packets = metrics.counter("unroutable_packets", metrics_label)
+
     def _create_message(self, message):
         message = f"[{self.__class__.__name__}:VCS{self._vcs_id}] {message}"
         return message
@@ -152,6 +164,7 @@ class MmioRouter(CxlRouter):
             packet = await self._upstream_connection_fifo.host_to_target.get()
             if packet is None:
                 break
+            self._host_to_target_packets.inc()
             packet.mreq_header.req_id = self._vcs_id
             logger.debug(self._create_message("Received an incoming request"))
             base_packet = cast(BasePacket, packet)
@@ -166,6 +179,7 @@ class MmioRouter(CxlRouter):
             tag = mmio_packet.mreq_header.tag
             target_port = self._routing_table.get_mmio_target_port(address)
             if target_port is None:
+                self._unroutable_packets.inc()
                 if mmio_packet.is_mem_read():
                     logger.debug(self._create_message(f"RD: 0x{address:x}[{size}] OOB"))
                     await self._send_completion(req_id, tag, data=0, data_len=size)
@@ -197,6 +211,7 @@ class MmioRouter(CxlRouter):
             packet = await downstream_connection_fifo.target_to_host.get()
             if packet is None:
                 break
+            self._target_to_host_packets.inc()
             packet.cpl_header.req_id = 0
             await self._upstream_connection_fifo.target_to_host.put(packet)
 
@@ -253,6 +268,7 @@ class ConfigSpaceRouter(CxlRouter):
             packet = await self._upstream_connection_fifo.host_to_target.get()
             if packet is None:
                 break
+            self._host_to_target_packets.inc()
             packet.cfg_req_header.req_id = self._vcs_id
             logger.debug(self._create_message("Received an incoming request"))
             base_packet = cast(BasePacket, packet)
@@ -277,10 +293,12 @@ class ConfigSpaceRouter(CxlRouter):
                 logger.debug(
                     self._create_message(f"Request to {bdf_to_string(dest_id)} is not routable")
                 )
+                self._unroutable_packets.inc()
                 await self._send_unsupported_request(req_id, tag)
                 continue
             if target_port >= len(self._downstream_connections):
                 logger.warning(self._create_message("target_port is out of bound"))
+                self._unroutable_packets.inc()
                 await self._send_unsupported_request(req_id, tag)
                 continue
 
@@ -291,6 +309,7 @@ class ConfigSpaceRouter(CxlRouter):
             ].vppb.get_upstream_connection()
             if vppb_upstream_connection is None:
                 logger.debug(self._create_message("vppb_upstream_connection is None"))
+                self._unroutable_packets.inc()
                 await self._send_unsupported_request(req_id, tag)
                 continue
 
@@ -305,6 +324,7 @@ class ConfigSpaceRouter(CxlRouter):
             packet = await downstream_connection_fifo.target_to_host.get()
             if packet is None:
                 break
+            self._target_to_host_packets.inc()
             packet.cpl_header.req_id = 0
             await self._upstream_connection_fifo.target_to_host.put(packet)
 
@@ -364,43 +384,45 @@ class CxlMemRouter(CxlRouter):
             packet = await self._upstream_connection_fifo.host_to_target.get()
             if packet is None:
                 break
-
-            target_port = None
-
-            cxl_mem_base_packet = cast(CxlMemBasePacket, packet)
-            if cxl_mem_base_packet.is_m2sreq():
-                cxl_mem_packet = cast(CxlMemM2SReqPacket, packet)
-                addr = cxl_mem_packet.get_address()
-                target_port = self._routing_table.get_cxl_mem_target_port(addr)
-            elif cxl_mem_base_packet.is_m2srwd():
-                cxl_mem_packet = cast(CxlMemM2SRwDPacket, packet)
-                addr = cxl_mem_packet.get_address()
-                target_port = self._routing_table.get_cxl_mem_target_port(addr)
-            elif cxl_mem_base_packet.is_m2sbirsp():
-                cxl_mem_bi_packet: CxlMemM2SBIRspPacket = cast(
-                    CxlMemM2SBIRspPacket, cxl_mem_base_packet
+            self._host_to_target_packets.inc()
+            with tracer.span("route_m2s", self._trace_label, packet.trace_id):
+                target_port = None
+
+                cxl_mem_base_packet = cast(CxlMemBasePacket, packet)
+                if cxl_mem_base_packet.is_m2sreq():
+                    cxl_mem_packet = cast(CxlMemM2SReqPacket, packet)
+                    addr = cxl_mem_packet.get_address()
+                    target_port = self._routing_table.get_cxl_mem_target_port(addr)
+                elif cxl_mem_base_packet.is_m2srwd():
+                    cxl_mem_packet = cast(CxlMemM2SRwDPacket, packet)
+                    addr = cxl_mem_packet.get_address()
+                    target_port = self._routing_table.get_cxl_mem_target_port(addr)
+                elif cxl_mem_base_packet.is_m2sbirsp():
+                    cxl_mem_bi_packet: CxlMemM2SBIRspPacket = cast(
+                        CxlMemM2SBIRspPacket, cxl_mem_base_packet
+                    )
+                    for i, bind_slot in enumerate(self._downstream_connections):
+                        downstream_vppb = bind_slot.vppb
+                        bus = downstream_vppb.get_secondary_bus_number()
+                        if bus == cxl_mem_bi_packet.m2sbirsp_header.bi_id:
+                            target_port = i
+                            break
+                else:
+                    raise Exception("Received unexpected packet")
+
+                if target_port is None:
+                    self._unroutable_packets.inc()
+                    logger.warning(self._create_message("Received unroutable CXL.mem packet"))
+                    logger.warning(self._create_message(cxl_mem_packet.get_pretty_string()))
+                    continue
+                if target_port >= len(self._downstream_connections):
+                    raise Exception("target_port is out of bound")
+                downstream_connection_fifo = (
+                    self._downstream_connections[target_port]
+                    .vppb.get_upstream_connection()
+                    .cxl_mem_fifo
                 )
-                for i, bind_slot in enumerate(self._downstream_connections):
-                    downstream_vppb = bind_slot.vppb
-                    bus = downstream_vppb.get_secondary_bus_number()
-                    if bus == cxl_mem_bi_packet.m2sbirsp_header.bi_id:
-                        target_port = i
-                        break
-            else:
-                raise Exception("Received unexpected packet")
-
-            if target_port is None:
-                logger.warning(self._create_message("Received unroutable CXL.mem packet"))
-                logger.warning(self._create_message(cxl_mem_packet.get_pretty_string()))
-                continue
-            if target_port >= len(self._downstream_connections):
-                raise Exception("target_port is out of bound")
-            downstream_connection_fifo = (
-                self._downstream_connections[target_port]
-                .vppb.get_upstream_connection()
-                .cxl_mem_fifo
-            )
-            await downstream_connection_fifo.host_to_target.put(packet)
+                await downstream_connection_fifo.host_to_target.put(packet)
 
     async def _process_target_to_host_packets(self, downstream_connection_bind_slot: BindSlot):
         downstream_connection_fifo = (
@@ -417,35 +439,36 @@ class CxlMemRouter(CxlRouter):
             packet = await downstream_connection_fifo.target_to_host.get()
             if packet is None:
                 break
+            self._target_to_host_packets.inc()
+            with tracer.span("route_s2m", self._trace_label, packet.trace_id):
+                cxl_mem_base_packet: CxlMemBasePacket = cast(CxlMemBasePacket, packet)
+                if cxl_mem_base_packet.is_s2mbisnp():
+                    # NOTE: Following vars might be uninitialized before while
+                    bi_id = downstream_vppb.get_secondary_bus_number()
+                    bi_decoder_options = downstream_vppb_component.get_bi_decoder_options()
+
+                    if self._bi_enable_override_for_test is None:
+                        bi_enable = bi_decoder_options["control_options"]["bi_enable"]
+                    if self._bi_forward_override_for_test is None:
+                        bi_forward = bi_decoder_options["control_options"]["bi_forward"]
+
+                    cxl_mem_bi_packet: CxlMemS2MBISnpPacket = cast(
+                        CxlMemS2MBISnpPacket, cxl_mem_base_packet
+                    )
+                    if bi_enable == bi_forward:
+                        continue
 
-            cxl_mem_base_packet: CxlMemBasePacket = cast(CxlMemBasePacket, packet)
-            if cxl_mem_base_packet.is_s2mbisnp():
-                # NOTE: Following vars might be uninitialized before while
-                bi_id = downstream_vppb.get_secondary_bus_number()
-                bi_decoder_options = downstream_vppb_component.get_bi_decoder_options()
-
-                if self._bi_enable_override_for_test is None:
-                    bi_enable = bi_decoder_options["control_options"]["bi_enable"]
-                if self._bi_forward_override_for_test is None:
-                    bi_forward = bi_decoder_options["control_options"]["bi_forward"]
-
-                cxl_mem_bi_packet: CxlMemS2MBISnpPacket = cast(
-                    CxlMemS2MBISnpPacket, cxl_mem_base_packet
-                )
-                if bi_enable == bi_forward:
-                    continue
-
-                if bi_enable == 0 and bi_forward == 1:
-                    await self._upstream_connection_fifo.target_to_host.put(packet)
-                elif bi_enable == 1 and bi_forward == 0:
-                    hdm_decoder_manager = upstream_vppb_component.get_hdm_decoder_manager()
-                    if hdm_decoder_manager.is_bi_capable():
-                        cxl_mem_bi_packet.s2mbisnp_header.bi_id = bi_id
+                    if bi_enable == 0 and bi_forward == 1:
                         await self._upstream_connection_fifo.target_to_host.put(packet)
-                    else:
-                        continue
-            else:
-                await self._upstream_connection_fifo.target_to_host.put(packet)
+                    elif bi_enable == 1 and bi_forward == 0:
+                        hdm_decoder_manager = upstream_vppb_component.get_hdm_decoder_manager()
+                        if hdm_decoder_manager.is_bi_capable():
+                            cxl_mem_bi_packet.s2mbisnp_header.bi_id = bi_id
+                            await self._upstream_connection_fifo.target_to_host.put(packet)
+                        else:
+                            continue
+                else:
+                    await self._upstream_connection_fifo.target_to_host.put(packet)
 
     async def update_router(self, vppb_index: int):
         await self.stop_for_update(vppb_index)
@@ -491,6 +514,7 @@ class CxlCacheRouter(CxlRouter):
             packet = await self._upstream_connection_fifo.host_to_target.get()
             if packet is None:
                 break
+            self._host_to_target_packets.inc()
 
             cxl_cache_base_packet = cast(CxlCacheBasePacket, packet)
             if cxl_cache_base_packet.is_h2dreq():
@@ -515,12 +539,14 @@ class CxlCacheRouter(CxlRouter):
             target_fld_name = f"target{cache_id}_options"
 
             if target_fld_name not in upstream_vppb_component.get_cache_route_table_options():
+                self._unroutable_packets.inc()
                 logger.warning(self._create_message("Received unroutable CXL.cache packet"))
                 continue
             target_port: int = upstream_vppb_component.get_cache_route_table_options()[
                 target_fld_name
             ]["port_number"]
             if target_port is None:
+                self._unroutable_packets.inc()
                 logger.warning(self._create_message("Received unroutable CXL.cache packet"))
                 logger.warning(self._create_message("Packet details: "))
                 logger.warning(self._create_message(cxl_cache_base_packet.get_pretty_string()))
@@ -546,6 +572,7 @@ class CxlCacheRouter(CxlRouter):
             packet = await downstream_connection_fifo.target_to_host.get()
             if packet is None:
                 break
+            self._target_to_host_packets.inc()
             cxl_cache_base_packet = cast(CxlCacheBasePacket, packet)
 
             # See CXL 3.0 specification: Section 9.15.2
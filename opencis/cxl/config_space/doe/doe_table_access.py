@@ -112,7 +112,7 @@ class DoeTableAccessProtocol(DoeMailboxProtocolBase):
             return False
 
         request = DoeTableAccessRequest()
-        request.reset(bytes(mailbox_context.write_mailbox)[0 : len(request)])
+        request.reset(mailbox_context.write_mailbox.read_raw(0, len(request) - 1))
 
         request_code = request.table_access_request_code
         table_type = request.table_type
@@ -148,3 +148,14 @@ class DoeTableAccessProtocol(DoeMailboxProtocolBase):
         logger.debug(f"[DOE] Table Access: Response Length (DWORD) = {response.header.length}")
 
         return True
+
+    def get_static_requests(self, _mailbox_context: DoeMailboxContext) -> List[bytes]:
+        requests = []
+        for entry_handle in range(len(self._entries)):
+            request = DoeTableAccessRequest()
+            request.header.vendor_id = self.vendor_id
+            request.header.data_object_type = self.data_object_type
+            request.header.length = self.req_dwords
+            request.entry_handle = entry_handle
+            requests.append(bytes(request))
+        return requests
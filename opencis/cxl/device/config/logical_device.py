@@ -9,6 +9,9 @@ from dataclasses import dataclass
 from typing import List
 from opencis.pci.component.pci import EEUM_VID, SW_SLD_DID, SW_MLD_DID
 
+# Logical devices an MLD can expose
+MAX_LD_COUNT = 16
+
 
 @dataclass(kw_only=True)
 class LogicalDeviceConfig:
@@ -25,6 +28,7 @@ class SingleLogicalDeviceConfig(LogicalDeviceConfig):
     memory_file: str
     serial_number: str
     device_id: int = SW_SLD_DID
+    io_threads: int = 0  # threads for a character device's blocking I/O, 0 for inline
 
 
 @dataclass(kw_only=True)
@@ -35,3 +39,16 @@ class MultiLogicalDeviceConfig(LogicalDeviceConfig):
     serial_numbers: List[str]
     ld_count: int
     device_id: int = SW_MLD_DID
+    io_threads: int = 0  # threads for a character device's blocking I/O, 0 for inline
+
+
+@dataclass(kw_only=True)
+class Type1AcceleratorConfig(LogicalDeviceConfig):
+    device_id: int = SW_SLD_DID
+
+
+@dataclass(kw_only=True)
+class Type2AcceleratorConfig(LogicalDeviceConfig):
+    memory_size: int  # in bytes
+    memory_file: str
+    device_id: int = SW_SLD_DID
@@ -11,7 +11,7 @@ from asyncio import (
     gather,
 )
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Optional, Union
 
 from opencis.cxl.component.cxl_io_callback_data import CxlIoCallbackData
 from opencis.cxl.config_space.dvsec.cxl_devices import (
@@ -19,6 +19,7 @@ from opencis.cxl.config_space.dvsec.cxl_devices import (
     DvsecCxlCapabilityOptions,
 )
 from opencis.util.logger import logger
+from opencis.util.number import Payload, payload_to_bytes, payload_to_int
 from opencis.util.component import RunnableComponent
 from opencis.cxl.component.cxl_connection import CxlConnection
 from opencis.cxl.component.cxl_io_manager import CxlIoManager
@@ -217,36 +218,46 @@ class CxlType1Device(RunnableComponent):
         return self._cxl_io_manager.get_cfg_reg_vals()
 
     async def cxl_cache_readline(self, addr: int, cqid: Optional[int] = None) -> int:
+        return payload_to_int(await self.cxl_cache_readline_bytes(addr, cqid))
+
+    async def cxl_cache_readline_bytes(self, addr: int, cqid: Optional[int] = None) -> bytes:
         logger.debug(f"Beware: cqid {cqid} is not currently implemented.")
-        return await self._cache_controller.cache_coherent_load(addr, 64)
+        data = await self._cache_controller.cache_coherent_load(addr, 64)
+        return payload_to_bytes(data)
 
-    async def cxl_cache_writeline(self, addr: int, data: int, cqid: Optional[int] = None):
+    async def cxl_cache_writeline(self, addr: int, data: Payload, cqid: Optional[int] = None):
         logger.debug(f"Beware: cqid {cqid} is not currently implemented.")
         await self._cache_controller.cache_coherent_store(addr, 64, data)
 
-    async def cxl_cache_read(self, address, size) -> bytes:
-        end = address + size
-        result = b""
-        for cacheline_offset in range(address, address + size, 64):
-            cacheline = await self.cxl_cache_readline(cacheline_offset)
-            chunk_size = min(64, (end - cacheline_offset))
-            chunk_data = cacheline.to_bytes(64, "little")
-            result += chunk_data[:chunk_size]
-        return result
+    async def cxl_cache_read_into(
+        self,
+        address: int,
+        buffer: Union[bytearray, memoryview],
+        window: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ):
+        await self._cache_controller.cache_coherent_load_into(address, buffer, window, progress)
+
+    async def cxl_cache_read(
+        self, address: int, size: int, progress: Optional[Callable[[int], None]] = None
+    ) -> bytes:
+        buffer = bytearray(size)
+        await self.cxl_cache_read_into(address, buffer, progress=progress)
+        return bytes(buffer)
 
-    async def cxl_cache_write(self, address, size, value):
+    async def cxl_cache_write(
+        self,
+        address: int,
+        size: int,
+        value: Payload,
+        progress: Optional[Callable[[int], None]] = None,
+    ):
         if address % 64 != 0 or size % 64 != 0:
             raise Exception(f"Size {size} and address 0x{address:x} must be aligned to 64!")
 
-        chunk_count = 0
-        while size > 0:
-            message = self._create_message(f"Host Memory: Writing 0x{value:08x} to 0x{address:08x}")
-            logger.debug(message)
-            low_64_byte = value & ((1 << (64 * 8)) - 1)
-            await self.cxl_cache_writeline(address + (chunk_count * 64), low_64_byte)
-            size -= 64
-            chunk_count += 1
-            value >>= 64 * 8
+        logger.debug(self._create_message(f"Host Memory: Writing {size} bytes to 0x{address:08x}"))
+        data = payload_to_bytes(value, size)
+        await self._cache_controller.cache_coherent_store_from(address, data, progress=progress)
 
     async def _run(self):
         # pylint: disable=duplicate-code
@@ -8,7 +8,7 @@
 # pylint: disable=duplicate-code
 from asyncio import create_task, gather
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Optional, Union
 from opencis.cxl.component.cxl_cache_dcoh import CxlCacheDcoh
 
 from opencis.cxl.component.cxl_io_callback_data import CxlIoCallbackData
@@ -17,6 +17,7 @@ from opencis.cxl.config_space.dvsec.cxl_devices import (
     DvsecCxlCapabilityOptions,
 )
 from opencis.util.logger import logger
+from opencis.util.number import Payload, payload_to_bytes, payload_to_int
 from opencis.util.component import RunnableComponent
 from opencis.cxl.component.cxl_connection import CxlConnection
 from opencis.cxl.component.cxl_io_manager import CxlIoManager
@@ -229,13 +230,48 @@ class CxlType2Device(RunnableComponent):
     async def read_mem_dpa(self, dpa: int, size: int = 64) -> int:
         if not self._cxl_memory_device_component:
             raise RuntimeError(self._create_message("Memory device not yet initialized"))
-        return await self._cache_controller.cache_coherent_load(dpa, size)
+        data = await self._cache_controller.cache_coherent_load(dpa, size)
+        return payload_to_int(data)
 
-    async def write_mem_dpa(self, dpa: int, data: int, size: int = 64):
+    async def read_mem_dpa_bytes(self, dpa: int, size: int = 64) -> bytes:
+        if not self._cxl_memory_device_component:
+            raise RuntimeError(self._create_message("Memory device not yet initialized"))
+        data = await self._cache_controller.cache_coherent_load(dpa, size)
+        return payload_to_bytes(data, size)
+
+    async def write_mem_dpa(self, dpa: int, data: Payload, size: int = 64):
         if not self._cxl_memory_device_component:
             raise RuntimeError(self._create_message("Memory device not yet initialized"))
         await self._cache_controller.cache_coherent_store(dpa, size, data)
 
+    async def read_mem_dpa_into(
+        self,
+        dpa: int,
+        buffer: Union[bytearray, memoryview],
+        window: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ):
+        if not self._cxl_memory_device_component:
+            raise RuntimeError(self._create_message("Memory device not yet initialized"))
+        await self._cache_controller.cache_coherent_load_into(dpa, buffer, window, progress)
+
+    async def read_mem_dpa_range(
+        self, dpa: int, size: int, progress: Optional[Callable[[int], None]] = None
+    ) -> bytes:
+        buffer = bytearray(size)
+        await self.read_mem_dpa_into(dpa, buffer, progress=progress)
+        return bytes(buffer)
+
+    async def write_mem_dpa_range(
+        self,
+        dpa: int,
+        data: Union[bytes, bytearray, memoryview],
+        progress: Optional[Callable[[int], None]] = None,
+    ):
+        if not self._cxl_memory_device_component:
+            raise RuntimeError(self._create_message("Memory device not yet initialized"))
+        await self._cache_controller.cache_coherent_store_from(dpa, data, progress=progress)
+
     async def _run(self):
         # pylint: disable=duplicate-code
         run_tasks = [
@@ -260,3 +296,5 @@ class CxlType2Device(RunnableComponent):
             create_task(self._cache_controller.stop()),
         ]
         await gather(*tasks)
+        if self._cxl_memory_device_component:
+            await self._cxl_memory_device_component.close()
@@ -25,6 +25,7 @@ from opencis.util.component import RunnableComponent
 from opencis.cxl.component.cxl_connection import CxlConnection
 from opencis.cxl.component.cxl_mem_manager import CxlMemManager
 from opencis.cxl.component.cxl_io_manager import CxlIoManager
+from opencis.cxl.component.mld_dispatcher import LdPacketHandlers
 from opencis.cxl.mmio import CombinedMmioRegister, CombinedMmioRegiterOptions
 from opencis.cxl.config_space.dvsec import (
     CXL_DEVICE_TYPE,
@@ -69,6 +70,7 @@ class CxlType3Device(RunnableComponent):
         dev_type: CXL_T3_DEV_TYPE,
         decoder_count: HDM_DECODER_COUNT = HDM_DECODER_COUNT.DECODER_4,
         label: Optional[str] = None,
+        io_threads: int = 0,
     ):
         # pylint: disable=unused-argument
         super().__init__(label)
@@ -77,6 +79,7 @@ class CxlType3Device(RunnableComponent):
         self._serial_number = serial_number
         self._dev_type = dev_type
         self._decoder_count = decoder_count
+        self._io_threads = io_threads
         self._cxl_memory_device_component = None
         self._upstream_connection = transport_connection
 
@@ -124,6 +127,7 @@ class CxlType3Device(RunnableComponent):
             decoder_count=self._decoder_count,
             memory_file=self._memory_file,
             label=self._label,
+            io_threads=self._io_threads,
         )
 
         # Create CombinedMmioRegister
@@ -170,6 +174,17 @@ class CxlType3Device(RunnableComponent):
     def get_reg_vals(self):
         return self._cxl_io_manager.get_cfg_reg_vals()
 
+    def get_packet_handlers(self) -> LdPacketHandlers:
+        return LdPacketHandlers(
+            cfg_space=self._cxl_io_manager.get_cfg_packet_handler(),
+            mmio=self._cxl_io_manager.get_mmio_packet_handler(),
+            cxl_mem=self._cxl_mem_manager.process_host_to_target_packet,
+        )
+
+    async def close(self):
+        if self._cxl_memory_device_component is not None:
+            await self._cxl_memory_device_component.close()
+
     async def init_bi_snp(self):
         # TODO: implement real BISnp logic
         # This is only a placeholder for tests
@@ -197,3 +212,4 @@ class CxlType3Device(RunnableComponent):
             create_task(self._cxl_mem_manager.stop()),
         ]
         await gather(*tasks)
+        await self.close()
@@ -14,7 +14,17 @@ from opencis.cxl.mmio.component_register.memcache_register.capability import (
 )
 from opencis.util.logger import logger
 from opencis.util.component import RunnableComponent
+from opencis.util.tracing import tracer
 from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.memory_trace import MEMORY_TRACE_OP, MemoryTraceRecorder
+from opencis.pci.component.config_shadow import ConfigSpaceShadow
+from opencis.pci.component.config_pipeline import (
+    CONFIG_PIPELINE_DEPTH,
+    ConfigAccess,
+    create_config_request,
+    exchange_config_requests,
+    get_config_access_result,
+)
 from opencis.pci.component.pci import (
     PCI_CLASS,
     PCI_BRIDGE_SUBCLASS,
@@ -192,14 +202,19 @@ class CxlRootPortDevice(RunnableComponent):
         secondary_bus: int = 1,
         label: Optional[str] = None,
         test_mode: bool = False,
+        trace_recorder: Optional[MemoryTraceRecorder] = None,
     ):
         super().__init__(label)
         self._downstream_connection = downstream_connection
+        self._trace_recorder = trace_recorder
         self._secondary_bus = secondary_bus
         self._continue = True
         self._test_mode = test_mode
         self._run_fut = None
         self._next_tag = 0
+        self._config_shadow = ConfigSpaceShadow()
+        # One user of the config FIFO pair at a time; completions are matched by order
+        self._cfg_lock = asyncio.Lock()
 
         # set default HPA base address using port index
         self._cxl_hpa_base = 0x100000000000 | (int(label[-1]) << 40)
@@ -209,7 +224,11 @@ class CxlRootPortDevice(RunnableComponent):
     Base functions for CFG read/write and MMIO read/write
     """
 
+    def get_config_shadow(self) -> ConfigSpaceShadow:
+        return self._config_shadow
+
     async def write_config(self, bdf: int, offset: int, size: int, value: int):
+        self._config_shadow.invalidate_write(bdf, offset)
         bus = extract_bus_from_bdf(bdf)
         bdf_string = bdf_to_string(bdf)
         is_type0 = bus == self._secondary_bus
@@ -225,10 +244,11 @@ class CxlRootPortDevice(RunnableComponent):
         self._next_tag = (self._next_tag + 1) % 256
 
         cfg_fifo = self._downstream_connection.cfg_fifo
-        await cfg_fifo.host_to_target.put(packet)
+        async with self._cfg_lock:
+            await cfg_fifo.host_to_target.put(packet)
 
-        # TODO: Wait for an incoming packet that matchs tag
-        packet = await cfg_fifo.target_to_host.get()
+            # TODO: Wait for an incoming packet that matchs tag
+            packet = await cfg_fifo.target_to_host.get()
 
         tpl_type_str = "CFG WR0" if is_type0 else "CFG WR1"
 
@@ -248,7 +268,10 @@ class CxlRootPortDevice(RunnableComponent):
             )
         )
 
-    async def read_config(self, bdf: int, offset: int, size: int) -> int:
+    async def read_config(self, bdf: int, offset: int, size: int, cached: bool = False) -> int:
+        if cached and self._config_shadow.enabled:
+            return await self._config_shadow.read(bdf, offset, size, self._fetch_config_dwords)
+
         if offset + size > ((offset // 4) + 1) * 4:
             raise Exception("offset + size out of DWORD boundary")
 
@@ -266,10 +289,11 @@ class CxlRootPortDevice(RunnableComponent):
         packet = CxlIoCfgRdPacket.create(bdf, offset, size, is_type0, req_id=0, tag=self._next_tag)
         self._next_tag = (self._next_tag + 1) % 256
         cfg_fifo = self._downstream_connection.cfg_fifo
-        await cfg_fifo.host_to_target.put(packet)
+        async with self._cfg_lock:
+            await cfg_fifo.host_to_target.put(packet)
 
-        # TODO: Wait for an incoming packet that matchs tag
-        packet = await cfg_fifo.target_to_host.get()
+            # TODO: Wait for an incoming packet that matchs tag
+            packet = await cfg_fifo.target_to_host.get()
 
         bit_offset = (offset % 4) * 8
 
@@ -295,6 +319,54 @@ class CxlRootPortDevice(RunnableComponent):
         )
         return data
 
+    async def access_config_pipelined(
+        self,
+        bdf: int,
+        accesses: List[ConfigAccess],
+        depth: int = CONFIG_PIPELINE_DEPTH,
+        cached: bool = False,
+    ) -> List[Optional[int]]:
+        """
+        Issues config reads and writes to one function in order, keeping up to `depth`
+        of them outstanding. Returns the data of each read, None for each write. With
+        `cached`, which only reads may use, the reads are served from the config shadow
+        and whatever it is missing is fetched in one burst.
+        """
+        if cached and self._config_shadow.enabled:
+            if not all(access.is_read() for access in accesses):
+                raise Exception("Only config reads can be served from the config shadow")
+            return await self._config_shadow.read_many(bdf, accesses, self._fetch_config_dwords)
+
+        is_type0 = extract_bus_from_bdf(bdf) == self._secondary_bus
+        if is_type0 and extract_device_from_bdf(bdf) != 0:
+            # NOTE: For non-ARI component, only allow device 0
+            return [get_config_access_result(access, None) for access in accesses]
+
+        packets = []
+        for access in accesses:
+            if not access.is_read():
+                self._config_shadow.invalidate_write(bdf, access.offset)
+            packets.append(create_config_request(bdf, access, is_type0, self._next_tag))
+            self._next_tag = (self._next_tag + 1) % 256
+        cfg_fifo = self._downstream_connection.cfg_fifo
+        async with self._cfg_lock:
+            completions = await exchange_config_requests(cfg_fifo, packets, depth)
+
+        logger.debug(
+            self._create_message(
+                f"[{bdf_to_string(bdf)}] {len(accesses)} CFG RD/WR, up to {depth} in flight"
+            )
+        )
+        return [
+            get_config_access_result(access, completion)
+            for access, completion in zip(accesses, completions)
+        ]
+
+    async def _fetch_config_dwords(self, bdf: int, offsets: List[int]) -> List[int]:
+        if len(offsets) == 1:
+            return [await self.read_config(bdf, offsets[0], 4)]
+        return await self.access_config_pipelined(bdf, [ConfigAccess(offset) for offset in offsets])
+
     async def write_mmio(self, address: int, data: int, size: int = 4, verbose: bool = True):
         message = self._create_message(f"MMIO: Writing 0x{data:08x} to 0x{address:08x}")
         if verbose:
@@ -320,8 +392,20 @@ class CxlRootPortDevice(RunnableComponent):
         return cpld_packet.data
 
     async def cxl_mem_read(self, address: int) -> int:
+        with tracer.trace("cxl_mem_read", self.get_message_label()):
+            if self._trace_recorder is None:
+                return await self._cxl_mem_read(address)
+            timestamp = self._trace_recorder.get_timestamp()
+            data = await self._cxl_mem_read(address)
+            self._trace_recorder.record(
+                timestamp, self.get_message_label(), MEMORY_TRACE_OP.LOAD, address, 64, data
+            )
+            return data
+
+    async def _cxl_mem_read(self, address: int) -> int:
         logger.info(self._create_message(f"CXL.mem Read: HPA addr:0x{address:08x}"))
         packet = CxlMemMemRdPacket.create(address)
+        packet.trace_id = tracer.get_trace_id()
         await self._downstream_connection.cxl_mem_fifo.host_to_target.put(packet)
         try:
             async with asyncio.timeout(3):
@@ -334,10 +418,22 @@ class CxlRootPortDevice(RunnableComponent):
             return None
 
     async def cxl_mem_write(self, address: int, data: int) -> int:
+        with tracer.trace("cxl_mem_write", self.get_message_label()):
+            if self._trace_recorder is None:
+                return await self._cxl_mem_write(address, data)
+            timestamp = self._trace_recorder.get_timestamp()
+            result = await self._cxl_mem_write(address, data)
+            self._trace_recorder.record(
+                timestamp, self.get_message_label(), MEMORY_TRACE_OP.STORE, address, 64, data
+            )
+            return result
+
+    async def _cxl_mem_write(self, address: int, data: int) -> int:
         logger.info(
             self._create_message(f"CXL.mem Write: HPA addr:0x{address:08x} data:0x{data:08x}")
         )
         packet = CxlMemMemWrPacket.create(address, data)
+        packet.trace_id = tracer.get_trace_id()
         await self._downstream_connection.cxl_mem_fifo.host_to_target.put(packet)
         try:
             async with asyncio.timeout(3):
@@ -431,8 +527,10 @@ class CxlRootPortDevice(RunnableComponent):
         return 0xFFFFFFFF - data + 1
 
     async def read_vid_did(self, bdf: int) -> Optional[int]:
-        vid = await self.read_config(bdf, REG_ADDR.VENDOR_ID.START, REG_ADDR.VENDOR_ID.LEN)
-        did = await self.read_config(bdf, REG_ADDR.DEVICE_ID.START, REG_ADDR.DEVICE_ID.LEN)
+        # VID and DID share a dword. Presence is checked live, never from the shadow.
+        vid_did = await self.read_config(bdf, REG_ADDR.VENDOR_ID.START, 4)
+        vid = vid_did & 0xFFFF
+        did = vid_did >> 16
         logger.debug(self._create_message(f"VID: 0x{vid:x}"))
         logger.debug(self._create_message(f"DID: 0x{did:x}"))
         if did == 0xFFFF and vid == 0xFFFF:
@@ -441,7 +539,9 @@ class CxlRootPortDevice(RunnableComponent):
         return (did << 16) | vid
 
     async def read_class_code(self, bdf: int) -> int:
-        data = await self.read_config(bdf, REG_ADDR.CLASS_CODE.START, REG_ADDR.CLASS_CODE.LEN)
+        data = await self.read_config(
+            bdf, REG_ADDR.CLASS_CODE.START, REG_ADDR.CLASS_CODE.LEN, cached=True
+        )
         if data == 0xFFFF:
             raise Exception("Failed to read class code")
         return data
@@ -528,12 +628,16 @@ class CxlRootPortDevice(RunnableComponent):
         for block_index in range(blocks):
             block_offset = block_offset_base + block_index * block_size
 
-            register_offset_low = await self.read_config(bdf, cap_offset + block_offset, 4)
+            register_offset_low = await self.read_config(
+                bdf, cap_offset + block_offset, 4, cached=True
+            )
             if register_offset_low is None:
                 raise Exception(
                     f"Failed to read Register Block {block_index + 1} - Register Offset Low"
                 )
-            register_offset_high = await self.read_config(bdf, cap_offset + block_offset + 4, 4)
+            register_offset_high = await self.read_config(
+                bdf, cap_offset + block_offset + 4, 4, cached=True
+            )
             if register_offset_high is None:
                 raise Exception(
                     f"Failed to read Register Block {block_index + 1} - Register Offset High"
@@ -579,10 +683,10 @@ class CxlRootPortDevice(RunnableComponent):
                 )
 
     async def scan_dvsec(self, bdf: int, cap_offset: int, capabilities: PciCapabilities):
-        dvsec_header1 = await self.read_config(bdf, cap_offset + 0x04, 4)
+        dvsec_header1 = await self.read_config(bdf, cap_offset + 0x04, 4, cached=True)
         if dvsec_header1 is None:
             raise Exception("Failed to read DVSEC Header 1")
-        dvsec_header2 = await self.read_config(bdf, cap_offset + 0x08, 2)
+        dvsec_header2 = await self.read_config(bdf, cap_offset + 0x08, 2, cached=True)
         if dvsec_header2 is None:
             raise Exception("Failed to read DVSEC Header 2")
 
@@ -595,15 +699,15 @@ class CxlRootPortDevice(RunnableComponent):
             await self.scan_dvsec_register_locator(bdf, cap_offset, length, capabilities)
 
     async def scan_sn(self, bdf: int, cap_offset: int, capabilities: PciCapabilities):
-        sn_low = await self.read_config(bdf, cap_offset + 0x04, 4)
-        sn_high = await self.read_config(bdf, cap_offset + 0x08, 4)
+        sn_low = await self.read_config(bdf, cap_offset + 0x04, 4, cached=True)
+        sn_high = await self.read_config(bdf, cap_offset + 0x08, 4, cached=True)
         sn_int = (sn_high << 32) | sn_low
         sn_str = f"{sn_int:016x}"
         logger.info(self._create_message(f"Found Device SN - {sn_str}"))
         capabilities.serial_number = sn_str
 
     async def scan_pcie_cap_helper(self, bdf: int, offset: int, capabilities: PciCapabilities):
-        data = await self.read_config(bdf, offset, 4)
+        data = await self.read_config(bdf, offset, 4, cached=True)
         if data is None:
             return
 
@@ -689,7 +793,7 @@ class CxlRootPortDevice(RunnableComponent):
             if vid_did is None:
                 continue
 
-            is_multifunction = (await self.read_config(bdf, 0x0E, 1) & 0x80) >> 7
+            is_multifunction = (await self.read_config(bdf, 0x0E, 1, cached=True) & 0x80) >> 7
             if is_multifunction:
                 multi_function_devices.add(device_number)
 
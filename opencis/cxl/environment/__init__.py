@@ -5,4 +5,10 @@
  See LICENSE for details.
 """
 
-from .environment import parse_cxl_environment, CxlEnvironment
+from .environment import (
+    parse_cxl_environment,
+    create_cxl_environment,
+    validate_cxl_environment,
+    CxlEnvironment,
+)
+from .generator import generate_cxl_environment, save_cxl_environment
@@ -6,7 +6,7 @@
 """
 
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, List, Set, Tuple
 import humanfriendly
 import yaml
 
@@ -17,17 +17,25 @@ from opencis.apps.cxl_switch import (
 )
 from opencis.cxl.component.cxl_component import PORT_TYPE
 from opencis.cxl.device.config.logical_device import (
+    MAX_LD_COUNT,
     LogicalDeviceConfig,
     SingleLogicalDeviceConfig,
     MultiLogicalDeviceConfig,
+    Type1AcceleratorConfig,
+    Type2AcceleratorConfig,
 )
 
+# libyaml's parser, when PyYAML was built with it, loads large environments much faster
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 @dataclass
 class CxlEnvironment:
     switch_config: CxlSwitchConfig
     single_logical_device_configs: List[SingleLogicalDeviceConfig] = field(default_factory=list)
     multi_logical_device_configs: List[MultiLogicalDeviceConfig] = field(default_factory=list)
+    type1_accelerator_configs: List[Type1AcceleratorConfig] = field(default_factory=list)
+    type2_accelerator_configs: List[Type2AcceleratorConfig] = field(default_factory=list)
     logical_device_configs: List[LogicalDeviceConfig] = field(default_factory=list)
 
 
@@ -105,6 +113,7 @@ def parse_single_logical_device_configs(
                 serial_number=serial_number,
                 memory_size=memory_size,
                 memory_file=memory_file,
+                io_threads=device.get("io_threads", 0),
             )
         )
     return single_logical_device_configs
@@ -172,15 +181,135 @@ def parse_multi_logical_device_configs(
                 ld_count=len(memory_sizes),
                 memory_sizes=memory_sizes,
                 memory_files=memory_files,
+                io_threads=device.get("io_threads", 0),
             )
         )
     return multi_logical_device_configs
 
 
-def parse_cxl_environment(yaml_path: str) -> CxlEnvironment:
+def parse_type1_accelerator_configs(devices_data) -> List[Type1AcceleratorConfig]:
+    if not isinstance(devices_data, list):
+        raise ValueError("Invalid 'type1_accelerators' configuration, expected a list.")
+
+    type1_accelerator_configs = []
+    for device in devices_data:
+        try:
+            port_index = device["port_index"]
+        except KeyError as exc:
+            raise ValueError("Missing 'port_index' for 'type1_accelerators' entry.") from exc
+        type1_accelerator_configs.append(Type1AcceleratorConfig(port_index=port_index))
+    return type1_accelerator_configs
+
+
+def parse_type2_accelerator_configs(devices_data) -> List[Type2AcceleratorConfig]:
+    if not isinstance(devices_data, list):
+        raise ValueError("Invalid 'type2_accelerators' configuration, expected a list.")
+
+    type2_accelerator_configs = []
+    for device in devices_data:
+        try:
+            port_index = device["port_index"]
+        except KeyError as exc:
+            raise ValueError("Missing 'port_index' for 'type2_accelerators' entry.") from exc
+
+        memory_file = device.get("memory_file", f"t2_mem{port_index}.bin")
+
+        try:
+            memory_size = humanfriendly.parse_size(device["memory_size"], binary=True)
+        except KeyError as exc:
+            raise ValueError("Missing 'memory_size' for 'type2_accelerators' entry.") from exc
+        except humanfriendly.InvalidSize as exc:
+            raise ValueError(f"Invalid 'memory_size' value: {device['memory_size']}") from exc
+
+        type2_accelerator_configs.append(
+            Type2AcceleratorConfig(
+                port_index=port_index,
+                memory_size=memory_size,
+                memory_file=memory_file,
+            )
+        )
+    return type2_accelerator_configs
+
+
+def _get_bound_port(bound) -> Tuple[int, int]:
+    # Same forms as VirtualSwitch accepts: port, [port] or [port, ld_id]
+    if isinstance(bound, list):
+        if len(bound) not in (1, 2):
+            raise ValueError(f"Invalid 'initial_bounds' entry: {bound}.")
+        return bound[0], bound[1] if len(bound) == 2 else 0
+    return bound, 0
+
+
+def validate_cxl_environment(environment: CxlEnvironment):
+    """
+    Checks that the ports, virtual switches and devices of an environment agree with
+    each other, so that a bad environment fails at load time rather than while the
+    switch binds its vPPBs. Every check is a dict or set lookup, which keeps the
+    pass linear in the number of ports, vPPBs and logical devices.
+    """
+    port_configs = environment.switch_config.port_configs
+    port_count = len(port_configs)
+
+    def check_port(port_index, port_type: PORT_TYPE, owner: str):
+        if not isinstance(port_index, int) or not 0 <= port_index < port_count:
+            raise ValueError(f"{owner}: port {port_index} is out of range (0-{port_count - 1}).")
+        if port_configs[port_index].type != port_type:
+            raise ValueError(f"{owner}: port {port_index} is not a {port_type.name}.")
+
+    device_ld_ids: Dict[int, Set[int]] = {}
+    for device in environment.logical_device_configs:
+        owner = f"{type(device).__name__} on port {device.port_index}"
+        check_port(device.port_index, PORT_TYPE.DSP, owner)
+        if device.port_index in device_ld_ids:
+            raise ValueError(f"{owner}: port {device.port_index} already has a device.")
+        if isinstance(device, MultiLogicalDeviceConfig):
+            ld_ids = set(device.ld_list)
+            if not 0 < len(device.ld_list) <= MAX_LD_COUNT:
+                raise ValueError(f"{owner}: expected 1 to {MAX_LD_COUNT} logical devices.")
+            if len(ld_ids) != len(device.ld_list):
+                raise ValueError(f"{owner}: duplicate 'ld_id' in {device.ld_list}.")
+            memory_sizes = device.memory_sizes
+        else:
+            ld_ids = {0}
+            memory_sizes = [getattr(device, "memory_size", 1)]
+        if any(memory_size <= 0 for memory_size in memory_sizes):
+            raise ValueError(f"{owner}: 'memory_size' must be positive.")
+        if getattr(device, "io_threads", 0) < 0:
+            raise ValueError(f"{owner}: 'io_threads' must not be negative.")
+        device_ld_ids[device.port_index] = ld_ids
+
+    upstream_ports: Set[int] = set()
+    bound_lds: Set[Tuple[int, int]] = set()
+    for vcs_index, vcs in enumerate(environment.switch_config.virtual_switch_configs):
+        owner = f"Virtual switch {vcs_index}"
+        check_port(vcs.upstream_port_index, PORT_TYPE.USP, owner)
+        if vcs.upstream_port_index in upstream_ports:
+            raise ValueError(f"{owner}: USP {vcs.upstream_port_index} is already in use.")
+        upstream_ports.add(vcs.upstream_port_index)
+        if not isinstance(vcs.initial_bounds, list) or len(vcs.initial_bounds) != vcs.vppb_counts:
+            raise ValueError(f"{owner}: 'initial_bounds' must have 'vppb_counts' entries.")
+        for vppb_index, bound in enumerate(vcs.initial_bounds):
+            port_index, ld_id = _get_bound_port(bound)
+            if port_index == -1:
+                continue
+            vppb_owner = f"{owner}, vPPB {vppb_index}"
+            check_port(port_index, PORT_TYPE.DSP, vppb_owner)
+            if port_index not in device_ld_ids:
+                raise ValueError(f"{vppb_owner}: no device on port {port_index}.")
+            if ld_id not in device_ld_ids[port_index]:
+                raise ValueError(f"{vppb_owner}: no LD {ld_id} on port {port_index}.")
+            if (port_index, ld_id) in bound_lds:
+                raise ValueError(f"{vppb_owner}: LD {ld_id} on port {port_index} is already bound.")
+            bound_lds.add((port_index, ld_id))
+
+
+def parse_cxl_environment(yaml_path: str, validate: bool = True) -> CxlEnvironment:
     with open(yaml_path, "r") as file:
-        config_data = yaml.safe_load(file)
+        config_data = yaml.load(file, Loader=_YAML_LOADER)
+    return create_cxl_environment(config_data, validate)
 
+
+def create_cxl_environment(config_data, validate: bool = True) -> CxlEnvironment:
     if not config_data:
         raise ValueError("Configuration file is empty or has invalid content.")
 
@@ -191,10 +320,24 @@ def parse_cxl_environment(yaml_path: str) -> CxlEnvironment:
     multi_logical_device_configs = parse_multi_logical_device_configs(
         config_data.get("devices", {}).get("multi_logical_devices", [])
     )
+    type1_accelerator_configs = parse_type1_accelerator_configs(
+        config_data.get("devices", {}).get("type1_accelerators", [])
+    )
+    type2_accelerator_configs = parse_type2_accelerator_configs(
+        config_data.get("devices", {}).get("type2_accelerators", [])
+    )
 
-    return CxlEnvironment(
+    environment = CxlEnvironment(
         switch_config=switch_config,
         single_logical_device_configs=single_logical_device_configs,
         multi_logical_device_configs=multi_logical_device_configs,
-        logical_device_configs=single_logical_device_configs + multi_logical_device_configs,
+        type1_accelerator_configs=type1_accelerator_configs,
+        type2_accelerator_configs=type2_accelerator_configs,
+        logical_device_configs=single_logical_device_configs
+        + multi_logical_device_configs
+        + type1_accelerator_configs
+        + type2_accelerator_configs,
     )
+    if validate:
+        validate_cxl_environment(environment)
+    return environment
@@ -0,0 +1,136 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import random
+from typing import Dict, List, Sequence
+
+import yaml
+
+from opencis.cxl.device.config.logical_device import MAX_LD_COUNT
+from opencis.util.number_const import GB, MB
+
+DEVICE_TYPES = ("sld", "mld", "t1", "t2")
+
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def format_memory_size(memory_size: int) -> str:
+    for unit, suffix in ((GB, "G"), (MB, "M")):
+        if memory_size % unit == 0:
+            return f"{memory_size // unit}{suffix}"
+    return str(memory_size)
+
+
+def generate_cxl_environment(
+    vcs_count: int = 1,
+    dsp_count: int = 4,
+    device_types: Sequence[str] = ("sld",),
+    memory_size: int = 256 * MB,
+    ld_count: int = 4,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    seed: int = 0,
+) -> Dict:
+    """
+    Returns the contents of an environment file with `vcs_count` virtual switches,
+    each owning a USP followed by `dsp_count` DSPs. Devices are placed on the DSPs
+    in port order, cycling through `device_types`, and every device is bound to a
+    vPPB of the virtual switch that owns its port; an MLD gets one vPPB per logical
+    device. SLDs, Type-2 accelerators and each logical device of an MLD get
+    `memory_size` bytes. Serial numbers are drawn from `seed`, so the same arguments
+    always give the same environment.
+    """
+    if vcs_count < 1 or dsp_count < 1:
+        raise ValueError("Expected at least one virtual switch and one DSP per virtual switch.")
+    if not device_types or any(device_type not in DEVICE_TYPES for device_type in device_types):
+        raise ValueError(f"Invalid device types {list(device_types)}, expected {DEVICE_TYPES}.")
+    if memory_size <= 0 or not 0 < ld_count <= MAX_LD_COUNT:
+        raise ValueError(f"Expected a positive memory size and 1 to {MAX_LD_COUNT} LDs per MLD.")
+
+    rng = random.Random(seed)
+    serial_numbers = set()
+
+    def get_serial_number() -> str:
+        while True:
+            serial_number = f"{rng.getrandbits(64):016X}"
+            if serial_number not in serial_numbers:
+                serial_numbers.add(serial_number)
+                return serial_number
+
+    size = format_memory_size(memory_size)
+    port_configs: List[Dict] = []
+    virtual_switch_configs: List[Dict] = []
+    devices: Dict[str, List[Dict]] = {
+        "single_logical_devices": [],
+        "multi_logical_devices": [],
+        "type1_accelerators": [],
+        "type2_accelerators": [],
+    }
+    device_index = 0
+    for _ in range(vcs_count):
+        upstream_port_index = len(port_configs)
+        port_configs.append({"type": "USP"})
+        initial_bounds = []
+        for _ in range(dsp_count):
+            port_index = len(port_configs)
+            port_configs.append({"type": "DSP"})
+            device_type = device_types[device_index % len(device_types)]
+            device_index += 1
+            if device_type == "sld":
+                devices["single_logical_devices"].append(
+                    {
+                        "port_index": port_index,
+                        "memory_size": size,
+                        "serial_number": get_serial_number(),
+                    }
+                )
+                initial_bounds.append(port_index)
+            elif device_type == "mld":
+                devices["multi_logical_devices"].append(
+                    {
+                        "port_index": port_index,
+                        "serial_number": get_serial_number(),
+                        "logical_devices": [
+                            {"memory_size": size, "ld_id": ld_id} for ld_id in range(ld_count)
+                        ],
+                    }
+                )
+                initial_bounds.extend([port_index, ld_id] for ld_id in range(ld_count))
+            elif device_type == "t1":
+                devices["type1_accelerators"].append({"port_index": port_index})
+                initial_bounds.append(port_index)
+            else:
+                devices["type2_accelerators"].append(
+                    {"port_index": port_index, "memory_size": size}
+                )
+                initial_bounds.append(port_index)
+        virtual_switch_configs.append(
+            {
+                "upstream_port_index": upstream_port_index,
+                "vppb_counts": len(initial_bounds),
+                "initial_bounds": initial_bounds,
+            }
+        )
+
+    return {
+        "host": host,
+        "port": port,
+        "port_configs": port_configs,
+        "virtual_switch_configs": virtual_switch_configs,
+        "devices": {name: configs for name, configs in devices.items() if configs},
+    }
+
+
+def save_cxl_environment(config_data: Dict, yaml_path: str):
+    with open(yaml_path, "w") as file:
+        yaml.dump(
+            config_data,
+            file,
+            Dumper=_YAML_DUMPER,
+            sort_keys=False,
+            default_flow_style=None,
+        )
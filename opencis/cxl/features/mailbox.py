@@ -5,9 +5,10 @@
  See LICENSE for details.
 """
 
+import asyncio
 from enum import IntEnum
 from abc import ABC, abstractmethod
-from typing import Dict, TypedDict, List
+from typing import Callable, Dict, Optional, TypedDict, List
 from dataclasses import dataclass, field
 
 from opencis.util.unaligned_bit_structure import ShareableByteArray
@@ -110,7 +111,25 @@ class CxlMailboxCommandBase(ABC):
         return self._opcode
 
 
+class CxlMailboxBackgroundCommandBase(CxlMailboxCommandBase):
+    """
+    A command that runs after the doorbell write has returned. process() checks the
+    input in the foreground: it returns True when the command already completed,
+    e.g. with INVALID_INPUT, and False to start process_background().
+    """
+
+    def process(self, context: CxlMailboxContext) -> bool:
+        return False
+
+    @abstractmethod
+    async def process_background(
+        self, context: CxlMailboxContext, report_progress: Callable[[int], None]
+    ):
+        """this is an abastrct class"""
+
+
 CxlMailboxCommands = Dict[int, CxlMailboxCommandBase]
+MailboxInterruptHandler = Callable[[int], None]
 
 
 class CxlMailbox:
@@ -143,6 +162,19 @@ class CxlMailbox:
             vendor_specific_extended_status=0,
         )
         self.payloads = ShareableByteArray(self.get_payload_size())
+        self._background_task: Optional[asyncio.Task] = None
+        self._background_work: Optional[asyncio.Task] = None
+        self._interrupt_handler: Optional[MailboxInterruptHandler] = None
+        self.commands[REQUEST_ABORT_BACKGROUND_OPERATION_OPCODE] = RequestAbortBackgroundOperation(
+            self
+        )
+
+    def register_interrupt_handler(self, handler: MailboxInterruptHandler):
+        """
+        Receives the interrupt message number on doorbell and background command
+        completion interrupts that are enabled in the control register.
+        """
+        self._interrupt_handler = handler
 
     def process_command(self):
         command_opcode = self.command["command_opcode"]
@@ -161,13 +193,16 @@ class CxlMailbox:
             self.status["return_code"] = MAILBOX_RETURN_CODE.INVALID_PAYLOAD_LENGTH
             return
 
-        if self.status["background_operation"] == 1:
+        command_processor = self.commands[command_opcode]
+        is_background = isinstance(command_processor, CxlMailboxBackgroundCommandBase)
+        # Foreground commands keep running while a background command is in progress
+        if self.status["background_operation"] == 1 and (
+            is_background or self._background_task is None
+        ):
             logger.info("[CCI] Mailbox Busy")
             self.status["return_code"] = MAILBOX_RETURN_CODE.BUSY
             return
 
-        command_processor = self.commands[command_opcode]
-
         context = CxlMailboxContext(
             command=self.command,
             control=self._control,
@@ -175,37 +210,128 @@ class CxlMailbox:
             payloads=self.payloads,
         )
 
-        # NOTE: background commands are not supported. All commands will block
-        # until completed
         self._control["doorbell"] = 1
         self.status["return_code"] = MAILBOX_RETURN_CODE.SUCCESS
 
         command_name = command_processor.__class__.__name__
         logger.info(f"[CCI] Executing {command_name} command")
         completed = command_processor.process(context)
-        self._control["doorbell"] = 0
         if completed:
+            self._control["doorbell"] = 0
             if self.status["return_code"] == MAILBOX_RETURN_CODE.SUCCESS:
                 logger.info(f"[CCI] Completed {command_name} command successfully")
             else:
                 return_code_str = MAILBOX_RETURN_CODE(self.status["return_code"])
                 logger.info(f"[CCI] Command {command_name} failed. Return Code: {return_code_str}")
             self.generate_doorbell_interrupt()
+        elif is_background:
+            self._start_background_command(command_processor, context)
+            self._control["doorbell"] = 0
+            self.generate_doorbell_interrupt()
         else:
             # NOTE: when not completed, assume the command is running in a
             # separate thread. Use synchronization primitives such as mutex
             # to prevent race conditions
+            self._control["doorbell"] = 0
             self.status["return_code"] = MAILBOX_RETURN_CODE.BACKGROUND_COMMAND_STARTED
             self.status["background_operation"] = 1
 
+    def _start_background_command(
+        self, command_processor: CxlMailboxBackgroundCommandBase, context: CxlMailboxContext
+    ):
+        # The payload registers belong to the next foreground command from here on
+        payloads = ShareableByteArray(self.get_payload_size())
+        payloads.write_raw(0, len(payloads) - 1, self.payloads.read_raw(0, len(payloads) - 1))
+        background_context = CxlMailboxContext(
+            command=MailboxCommand(**context.command),
+            control=self._control,
+            status=MailboxStatus(
+                background_operation=1,
+                return_code=MAILBOX_RETURN_CODE.SUCCESS,
+                vendor_specific_extended_status=0,
+            ),
+            payloads=payloads,
+        )
+        self.status["return_code"] = MAILBOX_RETURN_CODE.BACKGROUND_COMMAND_STARTED
+        self.status["background_operation"] = 1
+        self.background_command_status.update(
+            command_opcode=command_processor.get_opcode(),
+            percentage_complete=0,
+            return_code=MAILBOX_RETURN_CODE.SUCCESS,
+            vendor_specific_extended_status=0,
+        )
+        loop = asyncio.get_running_loop()
+        # Aborts cancel only the command itself, so that its completion is still reported
+        self._background_work = loop.create_task(
+            command_processor.process_background(background_context, self._report_progress)
+        )
+        self._background_task = loop.create_task(
+            self._run_background_command(command_processor, background_context)
+        )
+
+    def _report_progress(self, percentage_complete: int):
+        self.background_command_status["percentage_complete"] = min(max(percentage_complete, 0), 99)
+
+    async def _run_background_command(
+        self, command_processor: CxlMailboxBackgroundCommandBase, context: CxlMailboxContext
+    ):
+        command_name = command_processor.__class__.__name__
+        try:
+            await self._background_work
+            return_code = context.status["return_code"]
+            self.background_command_status["percentage_complete"] = 100
+        except asyncio.CancelledError:
+            if not self._background_work.cancelled():
+                # The mailbox itself is being torn down
+                self._background_work.cancel()
+                raise
+            return_code = MAILBOX_RETURN_CODE.ABORTED
+        except Exception as e:
+            logger.error(f"[CCI] Background command {command_name} raised {e}")
+            return_code = MAILBOX_RETURN_CODE.INTERNAL_ERROR
+        logger.info(
+            f"[CCI] Background command {command_name} finished: "
+            f"{MAILBOX_RETURN_CODE(return_code).name}"
+        )
+        self.background_command_status["return_code"] = return_code
+        self.background_command_status["vendor_specific_extended_status"] = context.status[
+            "vendor_specific_extended_status"
+        ]
+        self.status["background_operation"] = 0
+        self._background_task = None
+        self._background_work = None
+        self.generate_background_command_complete_interrupt()
+
+    def abort_background_command(self) -> bool:
+        """
+        Requests the running background command to stop. Returns False when there is none.
+        """
+        if self._background_work is None:
+            return False
+        self._background_work.cancel()
+        return True
+
+    async def wait_for_background_command(self):
+        if self._background_task is not None:
+            await asyncio.shield(self._background_task)
+
     def get_payload_size(self) -> int:
         return 1 << self.capabilities["payload_size"]
 
     def generate_doorbell_interrupt(self):
-        if self._control["doorbell"] == 0:
+        if self._control["mb_doorbell_interrupt"] == 0:
             return
+        self._generate_interrupt()
 
+    def generate_background_command_complete_interrupt(self):
+        if self._control["background_command_complete_interrupt"] == 0:
+            return
+        self._generate_interrupt()
+
+    def _generate_interrupt(self):
         # TODO: generate MSI or MSIX interrupt
+        if self._interrupt_handler is not None:
+            self._interrupt_handler(self.capabilities["interrupt_message_number"])
 
     def enable_mb_doorbell_interrupt(self):
         if not self.capabilities["mb_doorbell_interrupt_capable"]:
@@ -241,3 +367,24 @@ class CxlMailbox:
     def set_command(self, command: MailboxCommand):
         for key, value in command.items():
             self.command[key] = value
+
+
+#
+#   RequestAbortBackgroundOperation command (Opcode 0005h)
+#
+
+REQUEST_ABORT_BACKGROUND_OPERATION_OPCODE = 0x0005
+
+
+class RequestAbortBackgroundOperation(CxlMailboxCommandBase):
+    def __init__(self, mailbox: CxlMailbox):
+        super().__init__(REQUEST_ABORT_BACKGROUND_OPERATION_OPCODE)
+        self._mailbox = mailbox
+
+    def process(self, context: CxlMailboxContext) -> bool:
+        if context.command["payload_length"] != 0:
+            context.status["return_code"] = MAILBOX_RETURN_CODE.INVALID_INPUT
+            return True
+        # Succeeds with no background command running; the abort completes asynchronously
+        self._mailbox.abort_background_command()
+        return True
@@ -8,6 +8,9 @@
 from asyncio import Queue
 from dataclasses import dataclass, field
 from enum import Enum, auto
+from typing import Optional
+
+from opencis.util.number import Payload
 
 
 class CACHE_REQUEST_TYPE(Enum):
@@ -26,7 +29,10 @@ class CacheRequest:
     type: CACHE_REQUEST_TYPE
     addr: int
     size: int = 0
-    data: int = 0
+    data: Payload = 0
+    # Pairs the response with its request when several requests are outstanding
+    tag: int = 0
+    trace_id: Optional[int] = None
 
     def get_address(self) -> int:
         return self.addr
@@ -44,7 +50,8 @@ class CACHE_RESPONSE_STATUS(Enum):
 @dataclass
 class CacheResponse:
     status: CACHE_RESPONSE_STATUS
-    data: int = 0
+    data: Payload = 0
+    tag: int = 0
 
 
 @dataclass
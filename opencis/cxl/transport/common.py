@@ -6,6 +6,7 @@
 """
 
 from enum import IntEnum
+from typing import Optional
 
 from opencis.util.unaligned_bit_structure import (
     UnalignedBitStructure,
@@ -52,6 +53,8 @@ class BasePacket(UnalignedBitStructure):
             SystemHeaderPacket,
         )
     ]
+    # Set on packets of a traced transaction; not part of the wire format
+    trace_id: Optional[int] = None
 
     def is_cxl_io(self) -> bool:
         return self.system_header.payload_type == PAYLOAD_TYPE.CXL_IO
@@ -8,6 +8,9 @@
 from asyncio import Queue
 from dataclasses import dataclass, field
 from enum import Enum, auto
+from typing import Optional
+
+from opencis.util.number import Payload
 
 
 class MEMORY_REQUEST_TYPE(Enum):
@@ -22,7 +25,10 @@ class MemoryRequest:
     type: MEMORY_REQUEST_TYPE
     addr: int
     size: int
-    data: int = 0
+    data: Payload = 0
+    # Pairs the response with its request when several requests are outstanding
+    tag: int = 0
+    trace_id: Optional[int] = None
 
 
 class MEMORY_RESPONSE_STATUS(Enum):
@@ -33,7 +39,8 @@ class MEMORY_RESPONSE_STATUS(Enum):
 @dataclass
 class MemoryResponse:
     status: MEMORY_RESPONSE_STATUS
-    data: int = 0
+    data: Payload = 0
+    tag: int = 0
 
 
 @dataclass
@@ -22,6 +22,8 @@ from opencis.util.pci import (
     extract_bus_from_bdf,
 )
 from opencis.util.number import (
+    Payload,
+    payload_to_bytes,
     get_randbits,
     htotlp16,
     tlptoh16,
@@ -1062,6 +1064,12 @@ class CxlCacheD2HDataPacket(CxlCacheBasePacket):
         ByteField("data", D2HDATA_FIELD_START, D2HDATA_FIELD_START + 63),
     ]
 
+    def get_data_bytes(self) -> bytes:
+        return self.read_raw(D2HDATA_FIELD_START, D2HDATA_FIELD_START + 63)
+
+    def set_data_bytes(self, data: Payload):
+        self.write_raw(D2HDATA_FIELD_START, D2HDATA_FIELD_START + 63, payload_to_bytes(data))
+
 
 H2DREQ_HEADER_START = CXL_CACHE_HEADER_END + 1
 H2DREQ_HEADER_END = H2DREQ_HEADER_START + CxlCacheH2DReqHeader.get_size() - 1
@@ -1124,6 +1132,12 @@ class CxlCacheH2DDataPacket(CxlCacheBasePacket):
         ByteField("data", H2DDATA_FIELD_START, H2DDATA_FIELD_START + 63),
     ]
 
+    def get_data_bytes(self) -> bytes:
+        return self.read_raw(H2DDATA_FIELD_START, H2DDATA_FIELD_START + 63)
+
+    def set_data_bytes(self, data: Payload):
+        self.write_raw(H2DDATA_FIELD_START, H2DDATA_FIELD_START + 63, payload_to_bytes(data))
+
     def get_cqid(self) -> int:
         return self.h2ddata_header.cqid
 
@@ -1171,7 +1185,7 @@ class CxlCacheCacheD2HRspPacket(CxlCacheD2HRspPacket):
 
 class CxlCacheCacheD2HDataPacket(CxlCacheD2HDataPacket):
     @staticmethod
-    def create(uqid: int, data: int) -> "CxlCacheCacheD2HDataPacket":
+    def create(uqid: int, data: Payload) -> "CxlCacheCacheD2HDataPacket":
         packet = CxlCacheCacheD2HDataPacket()
         packet.system_header.payload_type = PAYLOAD_TYPE.CXL_CACHE
         packet.system_header.payload_length = len(packet)
@@ -1179,7 +1193,7 @@ class CxlCacheCacheD2HDataPacket(CxlCacheD2HDataPacket):
         packet.d2hdata_header.valid = 0b1
         packet.d2hdata_header.uqid = uqid
         packet.d2hdata_header.poison = 0b0
-        packet.data = data
+        packet.set_data_bytes(data)
         return packet
 
 
@@ -1225,7 +1239,7 @@ class CxlCacheCacheH2DRspPacket(CxlCacheH2DRspPacket):
 
 class CxlCacheCacheH2DDataPacket(CxlCacheH2DDataPacket):
     @staticmethod
-    def create(cache_id: int, data: int, cqid: int = 0) -> "CxlCacheCacheH2DDataPacket":
+    def create(cache_id: int, data: Payload, cqid: int = 0) -> "CxlCacheCacheH2DDataPacket":
         packet = CxlCacheCacheH2DDataPacket()
         packet.system_header.payload_type = PAYLOAD_TYPE.CXL_CACHE
         packet.system_header.payload_length = len(packet)
@@ -1233,7 +1247,7 @@ class CxlCacheCacheH2DDataPacket(CxlCacheH2DDataPacket):
         packet.h2ddata_header.valid = 0b1
         packet.h2ddata_header.cache_id = cache_id
         packet.h2ddata_header.cqid = cqid
-        packet.data = data
+        packet.set_data_bytes(data)
         return packet
 
 
@@ -1453,6 +1467,12 @@ class CxlMemM2SRwDPacket(CxlMemBasePacket):
     def get_address(self) -> int:
         return self.m2srwd_header.addr << 6
 
+    def get_data_bytes(self) -> bytes:
+        return self.read_raw(M2SRWD_FIELD_START, M2SRWD_FIELD_START + 63)
+
+    def set_data_bytes(self, data: Payload):
+        self.write_raw(M2SRWD_FIELD_START, M2SRWD_FIELD_START + 63, payload_to_bytes(data))
+
 
 # CXL.mem M2S Back-Invalidate Response (BIRsp)
 class CXL_MEM_M2SBIRSP_OPCODE(IntEnum):
@@ -1647,6 +1667,12 @@ class CxlMemS2MDRSPacket(CxlMemBasePacket):
         ByteField("data", S2MDRS_FIELD_START, S2MDRS_FIELD_START + 63),
     ]
 
+    def get_data_bytes(self) -> bytes:
+        return self.read_raw(S2MDRS_FIELD_START, S2MDRS_FIELD_START + 63)
+
+    def set_data_bytes(self, data: Payload):
+        self.write_raw(S2MDRS_FIELD_START, S2MDRS_FIELD_START + 63, payload_to_bytes(data))
+
 
 # Helper classes
 class CxlMemMemRdPacket(CxlMemM2SReqPacket):
@@ -1680,7 +1706,7 @@ class CxlMemMemWrPacket(CxlMemM2SRwDPacket):
     @staticmethod
     def create(
         addr: int,
-        data: int,
+        data: Payload,
         opcode: Optional[CXL_MEM_M2SRWD_OPCODE] = CXL_MEM_M2SRWD_OPCODE.MEM_WR,
         meta_field: Optional[CXL_MEM_META_FIELD] = CXL_MEM_META_FIELD.NO_OP,
         meta_value: Optional[CXL_MEM_META_VALUE] = CXL_MEM_META_VALUE.ANY,
@@ -1700,7 +1726,7 @@ class CxlMemMemWrPacket(CxlMemM2SRwDPacket):
         if addr % 0x40:
             raise Exception("Address must be a multiple of 0x40")
         packet.m2srwd_header.addr = addr >> 6
-        packet.data = data
+        packet.set_data_bytes(data)
         return packet
 
 
@@ -1753,7 +1779,7 @@ class CxlMemBISnpPacket(CxlMemS2MBISnpPacket):
 class CxlMemMemDataPacket(CxlMemS2MDRSPacket):
     @staticmethod
     def create(
-        data: int,
+        data: Payload,
         drs_opcode: Optional[CXL_MEM_S2MDRS_OPCODE] = CXL_MEM_S2MDRS_OPCODE.MEM_DATA,
         meta_field: Optional[CXL_MEM_META_FIELD] = CXL_MEM_META_FIELD.NO_OP,
         meta_value: Optional[CXL_MEM_META_VALUE] = CXL_MEM_META_VALUE.ANY,
@@ -1767,7 +1793,7 @@ class CxlMemMemDataPacket(CxlMemS2MDRSPacket):
         packet.s2mdrs_header.meta_field = meta_field
         packet.s2mdrs_header.meta_value = meta_value
         packet.s2mdrs_header.ld_id = ld_id
-        packet.data = data
+        packet.set_data_bytes(data)
         return packet
 
 
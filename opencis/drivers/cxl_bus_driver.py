@@ -5,6 +5,7 @@
  See LICENSE for details.
 """
 
+import asyncio
 from typing import Optional, List, Dict
 from dataclasses import dataclass, field
 from enum import IntEnum
@@ -16,6 +17,7 @@ from opencis.util.component import LabeledComponent, Label
 from opencis.cxl.component.root_complex.root_complex import RootComplex
 from opencis.pci.component.pci import PCI_DEVICE_PORT_TYPE
 from opencis.drivers.pci_bus_driver import PciBusDriver, PciDeviceInfo
+from opencis.pci.component.config_pipeline import ConfigAccess
 from opencis.util.logger import logger
 from opencis.util.pci import bdf_to_string
 
@@ -23,6 +25,9 @@ CXL_CACHEMEM_REGISTER_HEADER_SIZE = 4
 CXL_HDM_DECODER_CAPABILITY_REGISTER_SIZE = 4
 CXL_HDM_DECODER_CONTROL_REGISTER_SIZE = 4
 CXL_HDM_DECODER_CONTROL_REGISTER_COMMITTED_MASK = 0x400
+CXL_HDM_DECODER_CONTROL_REGISTER_ERROR_NOT_COMMITTED_MASK = 0x800
+CXL_HDM_DECODER_COMMIT_TIMEOUT = 10
+CXL_HDM_DECODER_COMMIT_MAX_BACKOFF = 0.01
 
 
 class CXL_REGISTER_TYPE(IntEnum):
@@ -177,17 +182,47 @@ class CxlDeviceInfo:
         if decoder_count == 0:
             return None
 
-        next_available_decoder = None
-        for decoder_index in range(decoder_count):
-            register_offset = 0x20 + decoder_index * 0x20 + register_base_address
-            register_value = await self.root_complex.read_mmio(
-                register_offset, CXL_HDM_DECODER_CONTROL_REGISTER_SIZE
+        # The control registers are read at once rather than one round trip each
+        register_values = await asyncio.gather(
+            *(
+                self.root_complex.read_mmio(
+                    0x20 + decoder_index * 0x20 + register_base_address,
+                    CXL_HDM_DECODER_CONTROL_REGISTER_SIZE,
+                )
+                for decoder_index in range(decoder_count)
             )
+        )
+        for decoder_index, register_value in enumerate(register_values):
             is_committed = bool(register_value & CXL_HDM_DECODER_CONTROL_REGISTER_COMMITTED_MASK)
             if not is_committed:
-                next_available_decoder = decoder_index
+                return decoder_index
+        return None
+
+    async def _wait_for_commit(self, decoder_index: int, control_register_offset: int) -> bool:
+        """
+        Waits until the decoder reports Committed or Error Not Committed. MMIO reads do
+        not pass the posted writes before them, so the completion of the first read
+        already reflects the commit; the read is only repeated, with a growing delay,
+        for a component that commits in the background.
+        """
+        delay = 0.0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CXL_HDM_DECODER_COMMIT_TIMEOUT
+        while True:
+            control = await self.root_complex.read_mmio(control_register_offset, 4)
+            if control is None:
                 break
-        return next_available_decoder
+            if control & CXL_HDM_DECODER_CONTROL_REGISTER_COMMITTED_MASK:
+                return True
+            if control & CXL_HDM_DECODER_CONTROL_REGISTER_ERROR_NOT_COMMITTED_MASK:
+                logger.warning(f"{self._get_prefix()}HDM Decoder {decoder_index} failed to commit")
+                return False
+            if loop.time() >= deadline:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2 or 0.0001, CXL_HDM_DECODER_COMMIT_MAX_BACKOFF)
+        logger.warning(f"{self._get_prefix()}HDM Decoder {decoder_index} commit timed out")
+        return False
 
     async def _configure_hdm_decoder_common(
         self,
@@ -197,7 +232,7 @@ class CxlDeviceInfo:
         hpa_size: int,
         interleaving_granularity: int = 0,
         interleaving_way: int = 0,
-    ):
+    ) -> bool:
         decoder_base_low_offset = 0x20 * decoder_index + 0x10 + register_base_address
         decoder_base_high_offset = 0x20 * decoder_index + 0x14 + register_base_address
         decoder_size_low_offset = 0x20 * decoder_index + 0x18 + register_base_address
@@ -225,10 +260,7 @@ class CxlDeviceInfo:
         await self.root_complex.write_mmio(decoder_control_register_offset, 4, decoder_control)
 
         logger.debug(f"{self._get_prefix()}Waiting until the decoder is committed")
-        committed = False
-        while not committed:
-            control = await self.root_complex.read_mmio(decoder_control_register_offset, 4)
-            committed = bool(control & CXL_HDM_DECODER_CONTROL_REGISTER_COMMITTED_MASK)
+        return await self._wait_for_commit(decoder_index, decoder_control_register_offset)
 
     async def configure_hdm_decoder_device(
         self,
@@ -264,14 +296,15 @@ class CxlDeviceInfo:
         await self.root_complex.write_mmio(dpa_skip_low_offset, 4, dpa_skip_low)
         await self.root_complex.write_mmio(dpa_skip_high_offset, 4, dpa_skip_high)
 
-        await self._configure_hdm_decoder_common(
+        if not await self._configure_hdm_decoder_common(
             register_base_address,
             decoder_index,
             hpa_base,
             hpa_size,
             interleaving_granularity,
             interleaving_way,
-        )
+        ):
+            return False
 
         logger.debug(f"{self._get_prefix()}Successfully configured HDM decoder {decoder_index}")
         return True
@@ -320,14 +353,15 @@ class CxlDeviceInfo:
         await self.root_complex.write_mmio(target_list_low_offset, 4, target_list_low)
         await self.root_complex.write_mmio(target_list_high_offset, 4, target_list_high)
 
-        await self._configure_hdm_decoder_common(
+        if not await self._configure_hdm_decoder_common(
             register_base_address,
             decoder_index,
             hpa_base,
             hpa_size,
             interleaving_granularity,
             interleaving_way,
-        )
+        ):
+            return False
 
         logger.debug(
             f"{self._get_prefix()}Successfully configured HDM decoder (switch) {decoder_index}"
@@ -368,12 +402,24 @@ class CxlDeviceInfo:
 
 
 class CxlBusDriver(LabeledComponent):
+    """
+    Finds the CXL devices among the devices PciBusDriver enumerated. By default each
+    device is scanned in turn, one register read at a time. With `concurrent_discovery`
+    every device is discovered at once, and the reads that do not depend on each other
+    are issued together.
+    """
+
     def __init__(
-        self, pci_bus_driver: PciBusDriver, root_complex: RootComplex, label: Label = None
+        self,
+        pci_bus_driver: PciBusDriver,
+        root_complex: RootComplex,
+        label: Label = None,
+        concurrent_discovery: bool = False,
     ):
         super().__init__(label)
         self._root_complex = root_complex
         self._pci_bus_driver = pci_bus_driver
+        self._concurrent_discovery = concurrent_discovery
         self._devices: List[CxlDeviceInfo] = []
 
     async def init(self):
@@ -451,11 +497,43 @@ class CxlBusDriver(LabeledComponent):
 
     # pylint: disable=duplicate-code
 
-    async def _scan_register_locator_dvsec(self, device_info: CxlDeviceInfo):
-        bdf = device_info.pci_device_info.bdf
+    def _create_register_info(
+        self, device_info: CxlDeviceInfo, block_index: int, offset_low: int, offset_high: int
+    ) -> CxlRegisterInfo:
+        register_bir = offset_low & 0x7
+        register_block_identifier = (offset_low >> 8) & 0xFF
+        bar_offset = (offset_low & 0xFFFF0000) | offset_high << 32
+        address = device_info.pci_device_info.bars[register_bir].base_address + bar_offset
+        register_type = CXL_REGISTER_TYPE(register_block_identifier)
+        register_info = CxlRegisterInfo(
+            type=register_type,
+            bar=register_bir,
+            offset=bar_offset,
+            address=address,
+        )
+        logger.debug(
+            self._create_message(
+                f"(Block {block_index + 1}) " f"{register_type.name}, BAR: {register_info.bar}"
+            )
+        )
+        logger.debug(
+            self._create_message(
+                f"(Block {block_index + 1}) "
+                f"{register_type.name}, OFFSET: 0x{register_info.offset:X}"
+            )
+        )
+        logger.debug(
+            self._create_message(
+                f"(Block {block_index + 1}) "
+                f"{register_type.name}, ADDRESS: 0x{register_info.address:X}"
+            )
+        )
+        return register_info
+
+    def _get_register_block_offsets(self, device_info: CxlDeviceInfo) -> List[int]:
         register_locator_dvsec = device_info.get_dvsec_by_id(CXL_DVSEC_ID.REGISTER_LOCATOR_DVSEC)
         if not register_locator_dvsec:
-            raise Exception("Call this method only when the PCIE_DVSEC_FOR_CXL_DEVICES exists")
+            raise Exception("Call this method only when the REGISTER_LOCATOR_DVSEC exists")
 
         cap_offset = register_locator_dvsec.offset
         length = register_locator_dvsec.length
@@ -463,56 +541,71 @@ class CxlBusDriver(LabeledComponent):
         block_offset_base = 0x0C
         blocks = int((length - block_offset_base) / 8)
         block_size = 8
-        for block_index in range(blocks):
-            block_offset = block_offset_base + block_index * block_size
+        return [
+            cap_offset + block_offset_base + block_index * block_size
+            for block_index in range(blocks)
+        ]
 
+    async def _scan_register_locator_dvsec(self, device_info: CxlDeviceInfo):
+        bdf = device_info.pci_device_info.bdf
+        block_offsets = self._get_register_block_offsets(device_info)
+        for block_index, block_offset in enumerate(block_offsets):
             register_offset_low = await self._root_complex.read_config(
-                bdf, cap_offset + block_offset, 4
+                bdf, block_offset, 4, cached=True
             )
             if register_offset_low is None:
                 raise Exception(
                     f"Failed to read Register Block {block_index + 1} - Register Offset Low"
                 )
             register_offset_high = await self._root_complex.read_config(
-                bdf, cap_offset + block_offset + 4, 4
+                bdf, block_offset + 4, 4, cached=True
             )
             if register_offset_high is None:
                 raise Exception(
                     f"Failed to read Register Block {block_index + 1} - Register Offset High"
                 )
 
-            register_bir = register_offset_low & 0x7
-            register_block_identifier = (register_offset_low >> 8) & 0xFF
-            bar_offset = (register_offset_low & 0xFFFF0000) | register_offset_high << 32
-            address = device_info.pci_device_info.bars[register_bir].base_address + bar_offset
-            register_type = CXL_REGISTER_TYPE(register_block_identifier)
-            register_info = CxlRegisterInfo(
-                type=register_type,
-                bar=register_bir,
-                offset=bar_offset,
-                address=address,
-            )
-            logger.debug(
-                self._create_message(
-                    f"(Block {block_index + 1}) " f"{register_type.name}, BAR: {register_info.bar}"
-                )
-            )
-            logger.debug(
-                self._create_message(
-                    f"(Block {block_index + 1}) "
-                    f"{register_type.name}, OFFSET: 0x{register_info.offset:X}"
+            device_info.registers.append(
+                self._create_register_info(
+                    device_info, block_index, register_offset_low, register_offset_high
                 )
             )
-            logger.debug(
-                self._create_message(
-                    f"(Block {block_index + 1}) "
-                    f"{register_type.name}, ADDRESS: 0x{register_info.address:X}"
-                )
-            )
-            device_info.registers.append(register_info)
 
     # pylint: enable=duplicate-code
 
+    def _create_device_dvsec_info(self, capability: int) -> CxlDeviceDvsecInfo:
+        cache_capable = bool(capability & 0x01)
+        io_capable = bool(capability & 0x02)
+        mem_capable = bool(capability & 0x04)
+        return CxlDeviceDvsecInfo(
+            cache_capable=cache_capable, io_capable=io_capable, mem_capable=mem_capable
+        )
+
+    def _create_dvsec_range_info(
+        self, size_high: int, size_low: int, base_high: int, base_low: int
+    ) -> CxlDeviceDvsecRangeInfo:
+        memory_info_valid = bool(size_low & 0b1)
+        memory_active = bool((size_low >> 1) & 0b1)
+        media_type = (size_low >> 2) & 0b111
+        media_class = (size_low >> 5) & 0b111
+        desired_interleave = (size_low >> 8) & 0b11111
+        memory_active_timeout = (size_low >> 13) & 0b111
+        memory_active_degraded = bool((size_low >> 16) & 0b1)
+        memory_size = (size_high << 32) | (size_low & 0xF0000000)
+        memory_base = (base_high << 32) | (base_low & 0xF0000000)
+
+        return CxlDeviceDvsecRangeInfo(
+            memory_info_valid=memory_info_valid,
+            memory_active=memory_active,
+            media_type=media_type,
+            memory_class=media_class,
+            desired_interleve=desired_interleave,
+            memory_active_timeout=memory_active_timeout,
+            memory_active_degraded=memory_active_degraded,
+            memory_size=memory_size,
+            memory_base=memory_base,
+        )
+
     async def _scan_pcie_dvsec_for_cxl_devices(self, device_info: CxlDeviceInfo):
         device_dvsec = device_info.get_dvsec_by_id(CXL_DVSEC_ID.PCIE_DVSEC_FOR_CXL_DEVICES)
         if not device_dvsec:
@@ -521,77 +614,68 @@ class CxlBusDriver(LabeledComponent):
         bdf = device_info.pci_device_info.bdf
         # TODO: Define OFFSETs as IntEnum
         dvsec_cxl_capability_offset = device_dvsec.offset + 0x0A
-        capability = await self._root_complex.read_config(bdf, dvsec_cxl_capability_offset, 2)
-        cache_capable = bool(capability & 0x01)
-        io_capable = bool(capability & 0x02)
-        mem_capable = bool(capability & 0x04)
-        device_info.device_dvsec = CxlDeviceDvsecInfo(
-            cache_capable=cache_capable, io_capable=io_capable, mem_capable=mem_capable
+        capability = await self._root_complex.read_config(
+            bdf, dvsec_cxl_capability_offset, 2, cached=True
         )
+        device_info.device_dvsec = self._create_device_dvsec_info(capability)
 
         for range_index in range(2):
             range_size_high_offset = device_dvsec.offset + 0x18 + range_index * 0x10
-            size_high = await self._root_complex.read_config(bdf, range_size_high_offset, 4)
+            size_high = await self._root_complex.read_config(
+                bdf, range_size_high_offset, 4, cached=True
+            )
             range_size_low_offset = device_dvsec.offset + 0x1C + range_index * 0x10
-            size_low = await self._root_complex.read_config(bdf, range_size_low_offset, 4)
+            size_low = await self._root_complex.read_config(
+                bdf, range_size_low_offset, 4, cached=True
+            )
 
             range_base_high_offset = device_dvsec.offset + 0x20 + range_index * 0x10
             base_high = await self._root_complex.read_config(bdf, range_base_high_offset, 4)
             range_base_low_offset = device_dvsec.offset + 0x24 + range_index * 0x10
             base_low = await self._root_complex.read_config(bdf, range_base_low_offset, 4)
 
-            memory_info_valid = bool(size_low & 0b1)
-            memory_active = bool((size_low >> 1) & 0b1)
-            media_type = (size_low >> 2) & 0b111
-            media_class = (size_low >> 5) & 0b111
-            desired_interleave = (size_low >> 8) & 0b11111
-            memory_active_timeout = (size_low >> 13) & 0b111
-            memory_active_degraded = bool((size_low >> 16) & 0b1)
-            memory_size = (size_high << 32) | (size_low & 0xF0000000)
-            memory_base = (base_high << 32) | (base_low & 0xF0000000)
-
-            range_info = CxlDeviceDvsecRangeInfo(
-                memory_info_valid=memory_info_valid,
-                memory_active=memory_active,
-                media_type=media_type,
-                memory_class=media_class,
-                desired_interleve=desired_interleave,
-                memory_active_timeout=memory_active_timeout,
-                memory_active_degraded=memory_active_degraded,
-                memory_size=memory_size,
-                memory_base=memory_base,
+            device_info.device_dvsec.ranges.append(
+                self._create_dvsec_range_info(size_high, size_low, base_high, base_low)
             )
-            device_info.device_dvsec.ranges.append(range_info)
 
     # pylint: disable=duplicate-code
 
-    async def _scan_dvsec(self, device_info: CxlDeviceInfo):
-        for capability in device_info.pci_device_info.capabilities:
-            is_dvsec = capability.id == 0x0023 and capability.version == 0x1
-            if not is_dvsec:
-                continue
+    def _get_dvsec_offsets(self, device_info: CxlDeviceInfo) -> List[int]:
+        return [
+            capability.offset
+            for capability in device_info.pci_device_info.capabilities
+            if capability.id == 0x0023 and capability.version == 0x1
+        ]
+
+    def _create_dvsec_info(
+        self, offset: int, dvsec_header1: int, dvsec_header2: int
+    ) -> Optional[CxlDvsecInfo]:
+        vendor_id = dvsec_header1 & 0xFFFF
+        revision_id = (dvsec_header1 >> 16) & 0xF
+        length = (dvsec_header1 >> 20) & 0xFFF
+        dvsec_id = dvsec_header2
+
+        is_cxl_dvsec = vendor_id == 0x1E98
+        if not is_cxl_dvsec:
+            return None
 
-            bdf = device_info.pci_device_info.bdf
-            offset = capability.offset
-            dvsec_header1 = await self._root_complex.read_config(bdf, offset + 0x04, 4)
+        if dvsec_id in CXL_DVSEC_ID.__members__.values():
+            logger.debug(self._create_message(f"Found DVSEC - {CXL_DVSEC_ID(dvsec_id).name}"))
+        return CxlDvsecInfo(id=dvsec_id, revision=revision_id, length=length, offset=offset)
+
+    async def _scan_dvsec(self, device_info: CxlDeviceInfo):
+        bdf = device_info.pci_device_info.bdf
+        for offset in self._get_dvsec_offsets(device_info):
+            dvsec_header1 = await self._root_complex.read_config(bdf, offset + 0x04, 4, cached=True)
             if dvsec_header1 is None:
                 raise Exception("Failed to read DVSEC Header 1")
-            dvsec_header2 = await self._root_complex.read_config(bdf, offset + 0x08, 2)
+            dvsec_header2 = await self._root_complex.read_config(bdf, offset + 0x08, 2, cached=True)
             if dvsec_header2 is None:
                 raise Exception("Failed to read DVSEC Header 2")
 
-            vendor_id = dvsec_header1 & 0xFFFF
-            revision_id = (dvsec_header1 >> 16) & 0xF
-            length = (dvsec_header1 >> 20) & 0xFFF
-            dvsec_id = dvsec_header2
-
-            is_cxl_dvsec = vendor_id == 0x1E98
-            if not is_cxl_dvsec:
+            dvsec_info = self._create_dvsec_info(offset, dvsec_header1, dvsec_header2)
+            if not dvsec_info:
                 continue
-
-            dvsec_info = CxlDvsecInfo(
-                id=dvsec_id, revision=revision_id, length=length, offset=offset
-            )
             device_info.dvsecs.append(dvsec_info)
 
             dvsec_function_map = {
@@ -603,11 +687,10 @@ class CxlBusDriver(LabeledComponent):
                 CXL_DVSEC_ID.REGISTER_LOCATOR_DVSEC: self._scan_register_locator_dvsec,
             }
 
-            if dvsec_id not in dvsec_function_map:
+            if dvsec_info.id not in dvsec_function_map:
                 continue
 
-            self._create_message(f"Found DVSEC - {CXL_DVSEC_ID(dvsec_id).name}")
-            dvsec_function = dvsec_function_map[dvsec_id]
+            dvsec_function = dvsec_function_map[dvsec_info.id]
             if not dvsec_function:
                 continue
 
@@ -615,10 +698,10 @@ class CxlBusDriver(LabeledComponent):
 
     # pylint: enable=duplicate-code
 
-    async def _scan_cachemem_registers(self, device_info: CxlDeviceInfo):
+    def _get_cachemem_offset(self, device_info: CxlDeviceInfo) -> Optional[int]:
         component_register_info = device_info.get_register_by_type(CXL_REGISTER_TYPE.COMPONENT)
         if not component_register_info:
-            return
+            return None
 
         cxl_cachemem_offset = component_register_info.address + 0x1000
 
@@ -627,10 +710,9 @@ class CxlBusDriver(LabeledComponent):
                 f"Scanning CXL.cache and CXL.mem Registers at 0x{cxl_cachemem_offset:x}"
             )
         )
+        return cxl_cachemem_offset
 
-        cxl_capability_header = await self._root_complex.read_mmio(
-            cxl_cachemem_offset, CXL_CACHEMEM_REGISTER_HEADER_SIZE
-        )
+    def _get_cachemem_array_size(self, cxl_capability_header: int) -> int:
         # TODO: Define constants for masks
         cxl_capability_id = cxl_capability_header & 0xFFFF
         cxl_capability_version = (cxl_capability_header >> 16) & 0xF
@@ -643,33 +725,126 @@ class CxlBusDriver(LabeledComponent):
         logger.debug(self._create_message(f"array_size: {array_size:x}"))
 
         if cxl_capability_id != CXL_CACHEMEM_REGISTER_CAPABILITY_ID.CXL:
+            return 0
+        return array_size
+
+    def _get_cachemem_header_offsets(self, cxl_cachemem_offset: int, array_size: int) -> List[int]:
+        return [
+            (header_index + 1) * CXL_CACHEMEM_REGISTER_HEADER_SIZE + cxl_cachemem_offset
+            for header_index in range(array_size)
+        ]
+
+    def _add_cachemem_register_info(
+        self, device_info: CxlDeviceInfo, cxl_cachemem_offset: int, header_info: int
+    ):
+        # TODO: Define constants for masks
+        cxl_capability_id = header_info & 0xFFFF
+        cxl_capability_version = (header_info >> 16) & 0xF
+        offset = (header_info >> 20) & 0xFFF
+        cxl_capability_address = cxl_cachemem_offset + offset
+        capability_name = CXL_CACHEMEM_REGISTER_CAPABILITY_ID(cxl_capability_id).name
+        logger.debug(self._create_message(f"Found {capability_name} Capability Header"))
+        device_info.cachemem_registers[cxl_capability_id] = CxlCacheMemRegisterInfo(
+            id=cxl_capability_id,
+            version=cxl_capability_version,
+            offset=offset,
+            address=cxl_capability_address,
+        )
+
+    async def _scan_cachemem_registers(self, device_info: CxlDeviceInfo):
+        cxl_cachemem_offset = self._get_cachemem_offset(device_info)
+        if cxl_cachemem_offset is None:
             return
 
-        for header_index in range(array_size):
-            header_offset = (
-                header_index + 1
-            ) * CXL_CACHEMEM_REGISTER_HEADER_SIZE + cxl_cachemem_offset
+        cxl_capability_header = await self._root_complex.read_mmio(
+            cxl_cachemem_offset, CXL_CACHEMEM_REGISTER_HEADER_SIZE
+        )
+        array_size = self._get_cachemem_array_size(cxl_capability_header)
+        for header_offset in self._get_cachemem_header_offsets(cxl_cachemem_offset, array_size):
             header_info = await self._root_complex.read_mmio(
                 header_offset, CXL_CACHEMEM_REGISTER_HEADER_SIZE
             )
-
-            # TODO: Define constants for masks
-            cxl_capability_id = header_info & 0xFFFF
-            cxl_capability_version = (header_info >> 16) & 0xF
-            offset = (header_info >> 20) & 0xFFF
-            cxl_capability_address = cxl_cachemem_offset + offset
-            capability_name = CXL_CACHEMEM_REGISTER_CAPABILITY_ID(cxl_capability_id).name
-            logger.debug(self._create_message(f"Found {capability_name} Capability Header"))
-            device_info.cachemem_registers[cxl_capability_id] = CxlCacheMemRegisterInfo(
-                id=cxl_capability_id,
-                version=cxl_capability_version,
-                offset=offset,
-                address=cxl_capability_address,
-            )
+            self._add_cachemem_register_info(device_info, cxl_cachemem_offset, header_info)
 
     async def _scan_component_register(self, device_info: CxlDeviceInfo):
         await self._scan_cachemem_registers(device_info)
 
+    async def _discover_cxl_device(self, device_info: CxlDeviceInfo):
+        """
+        Builds the same CxlDeviceInfo as _scan_dvsec and _scan_component_register do,
+        but issues the reads that do not depend on each other together: every DVSEC
+        header in one config burst, then the contents of the DVSECs in another, and the
+        CXL.cache and CXL.mem capability headers as concurrent MMIO reads.
+        """
+        bdf = device_info.pci_device_info.bdf
+        dvsec_offsets = self._get_dvsec_offsets(device_info)
+        accesses = []
+        for offset in dvsec_offsets:
+            accesses += [ConfigAccess(offset + 0x04, 4), ConfigAccess(offset + 0x08, 2)]
+        headers = await self._root_complex.access_config_pipelined(bdf, accesses, cached=True)
+        for index, offset in enumerate(dvsec_offsets):
+            dvsec_info = self._create_dvsec_info(offset, headers[index * 2], headers[index * 2 + 1])
+            if dvsec_info:
+                device_info.dvsecs.append(dvsec_info)
+
+        static_accesses = []
+        live_accesses = []
+        device_dvsec = device_info.get_dvsec_by_id(CXL_DVSEC_ID.PCIE_DVSEC_FOR_CXL_DEVICES)
+        if device_dvsec:
+            static_accesses.append(ConfigAccess(device_dvsec.offset + 0x0A, 2))
+            for range_index in range(2):
+                range_offset = device_dvsec.offset + range_index * 0x10
+                static_accesses += [
+                    ConfigAccess(range_offset + 0x18),
+                    ConfigAccess(range_offset + 0x1C),
+                ]
+                live_accesses += [
+                    ConfigAccess(range_offset + 0x20),
+                    ConfigAccess(range_offset + 0x24),
+                ]
+        block_offsets = []
+        if device_info.get_dvsec_by_id(CXL_DVSEC_ID.REGISTER_LOCATOR_DVSEC):
+            block_offsets = self._get_register_block_offsets(device_info)
+            for block_offset in block_offsets:
+                static_accesses += [ConfigAccess(block_offset), ConfigAccess(block_offset + 4)]
+        static_values = await self._root_complex.access_config_pipelined(
+            bdf, static_accesses, cached=True
+        )
+        live_values = await self._root_complex.access_config_pipelined(bdf, live_accesses)
+
+        if device_dvsec:
+            device_info.device_dvsec = self._create_device_dvsec_info(static_values[0])
+            for range_index in range(2):
+                (size_high, size_low) = static_values[1 + range_index * 2 : 3 + range_index * 2]
+                (base_high, base_low) = live_values[range_index * 2 : range_index * 2 + 2]
+                device_info.device_dvsec.ranges.append(
+                    self._create_dvsec_range_info(size_high, size_low, base_high, base_low)
+                )
+            static_values = static_values[5:]
+        for block_index in range(len(block_offsets)):
+            (offset_low, offset_high) = static_values[block_index * 2 : block_index * 2 + 2]
+            device_info.registers.append(
+                self._create_register_info(device_info, block_index, offset_low, offset_high)
+            )
+
+        cxl_cachemem_offset = self._get_cachemem_offset(device_info)
+        if cxl_cachemem_offset is None:
+            return
+        cxl_capability_header = await self._root_complex.read_mmio(
+            cxl_cachemem_offset, CXL_CACHEMEM_REGISTER_HEADER_SIZE
+        )
+        array_size = self._get_cachemem_array_size(cxl_capability_header)
+        header_infos = await asyncio.gather(
+            *(
+                self._root_complex.read_mmio(header_offset, CXL_CACHEMEM_REGISTER_HEADER_SIZE)
+                for header_offset in self._get_cachemem_header_offsets(
+                    cxl_cachemem_offset, array_size
+                )
+            )
+        )
+        for header_info in header_infos:
+            self._add_cachemem_register_info(device_info, cxl_cachemem_offset, header_info)
+
     async def _scan_cxl_devices(self):
         self._devices = []
         count = 0
@@ -685,5 +860,9 @@ class CxlBusDriver(LabeledComponent):
             logger.debug(self._create_message(f"Found CXL Device at {bdf_to_string(device.bdf)}"))
             device_info = CxlDeviceInfo(root_complex=self._root_complex, pci_device_info=device)
             self._devices.append(device_info)
-            await self._scan_dvsec(device_info)
-            await self._scan_component_register(device_info)
+            if not self._concurrent_discovery:
+                await self._scan_dvsec(device_info)
+                await self._scan_component_register(device_info)
+
+        if self._concurrent_discovery:
+            await asyncio.gather(*(self._discover_cxl_device(device) for device in self._devices))
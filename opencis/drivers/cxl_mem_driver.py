@@ -5,12 +5,35 @@
  See LICENSE for details.
 """
 
+import asyncio
+from dataclasses import dataclass, field
 from typing import List
 from opencis.util.component import LabeledComponent, Label
+from opencis.cxl.component.hdm_decoder import INTERLEAVE_GRANULARITY, INTERLEAVE_WAYS
 from opencis.cxl.component.root_complex.root_complex import RootComplex
 from opencis.drivers.cxl_bus_driver import CxlBusDriver, CxlDeviceInfo
 from opencis.util.logger import logger
 
+# Ways whose target selection is a power-of-two HPA bit field and whose targets fit
+# in the 8-entry target list of a switch decoder
+INTERLEAVE_WAYS_BY_COUNT = {
+    1: INTERLEAVE_WAYS.WAY_1,
+    2: INTERLEAVE_WAYS.WAY_2,
+    4: INTERLEAVE_WAYS.WAY_4,
+    8: INTERLEAVE_WAYS.WAY_8,
+}
+
+
+@dataclass
+class InterleaveSet:
+    hpa_base: int
+    hpa_size: int
+    ig: INTERLEAVE_GRANULARITY
+    iw: INTERLEAVE_WAYS
+    devices: List[CxlDeviceInfo] = field(default_factory=list)
+    upstream_port: CxlDeviceInfo = None
+    target_list: List[int] = field(default_factory=list)
+
 
 class CxlMemDriver(LabeledComponent):
     def __init__(
@@ -41,6 +64,52 @@ class CxlMemDriver(LabeledComponent):
             return -1
         return downstream_port.pci_device_info.get_port_number()
 
+    def create_interleave_set(
+        self,
+        devices: List[CxlDeviceInfo],
+        hpa_base: int,
+        ig: INTERLEAVE_GRANULARITY = INTERLEAVE_GRANULARITY.SIZE_256B,
+    ) -> InterleaveSet:
+        """
+        Lays out one HPA range striped across `devices`, in target list order, below a
+        single upstream port. Every device contributes as much memory as the smallest
+        of them.
+        """
+        if len(devices) not in INTERLEAVE_WAYS_BY_COUNT:
+            raise Exception(f"{len(devices)}-way interleaving is not supported")
+        iw = INTERLEAVE_WAYS_BY_COUNT[len(devices)]
+        if ig not in list(INTERLEAVE_GRANULARITY):
+            raise Exception(f"Interleave granularity {ig} is not supported")
+        if hpa_base % ((1 << (ig + 8)) * len(devices)) != 0:
+            raise Exception(f"HPA base 0x{hpa_base:x} is not aligned to the interleave set")
+
+        upstream_ports = []
+        target_list = []
+        for device in devices:
+            port_number = self.get_port_number(device)
+            if port_number < 0:
+                raise Exception("Interleaved devices must be below downstream ports")
+            target_list.append(port_number)
+            if all(device.parent.parent is not port for port in upstream_ports):
+                upstream_ports.append(device.parent.parent)
+        if len(upstream_ports) != 1:
+            raise Exception("Interleaved devices must share one upstream port")
+        upstream_port = upstream_ports[0]
+        if not upstream_port.is_upstream_port():
+            bdf_str = upstream_port.pci_device_info.get_bdf_string()
+            raise Exception(f"{bdf_str} is not upstream port")
+
+        hpa_size = min(device.get_memory_size() for device in devices) * len(devices)
+        return InterleaveSet(
+            hpa_base=hpa_base,
+            hpa_size=hpa_size,
+            ig=ig,
+            iw=iw,
+            devices=list(devices),
+            upstream_port=upstream_port,
+            target_list=target_list,
+        )
+
     async def attach_single_mem_device(
         self, device: CxlDeviceInfo, hpa_base: int, size: int
     ) -> bool:
@@ -71,3 +140,46 @@ class CxlMemDriver(LabeledComponent):
             logger.warning(self._create_message(f"Failed to configure HDM decoder of {bdf_str}"))
             return False
         return True
+
+    async def attach_interleaved_mem_devices(
+        self,
+        devices: List[CxlDeviceInfo],
+        hpa_base: int,
+        ig: INTERLEAVE_GRANULARITY = INTERLEAVE_GRANULARITY.SIZE_256B,
+    ) -> bool:
+        """
+        Programs the HDM decoders of every device in the interleave set and of their
+        upstream port at the same time, instead of one component after another.
+        """
+        interleave_set = self.create_interleave_set(devices, hpa_base, ig)
+        upstream_port = interleave_set.upstream_port
+        for device in interleave_set.devices + [upstream_port]:
+            device.log_prefix = "CxlMemDriver"
+
+        programming = [
+            device.configure_hdm_decoder_device(
+                hpa_base=interleave_set.hpa_base,
+                hpa_size=interleave_set.hpa_size,
+                interleaving_granularity=interleave_set.ig,
+                interleaving_way=interleave_set.iw,
+            )
+            for device in interleave_set.devices
+        ]
+        programming.append(
+            upstream_port.configure_hdm_decoder_switch(
+                hpa_base=interleave_set.hpa_base,
+                hpa_size=interleave_set.hpa_size,
+                target_list=interleave_set.target_list,
+                interleaving_granularity=interleave_set.ig,
+                interleaving_way=interleave_set.iw,
+            )
+        )
+        results = await asyncio.gather(*programming)
+
+        for device, successful in zip(interleave_set.devices + [upstream_port], results):
+            if not successful:
+                bdf_str = device.pci_device_info.get_bdf_string()
+                logger.warning(
+                    self._create_message(f"Failed to configure HDM decoder of {bdf_str}")
+                )
+        return all(results)
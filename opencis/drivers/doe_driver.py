@@ -0,0 +1,192 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from typing import List, Optional, Tuple, Union
+
+from opencis.util.component import LabeledComponent, Label
+from opencis.util.logger import logger
+from opencis.util.number_const import DWORD_BYTES
+from opencis.util.pci import bdf_to_string
+from opencis.cxl.component.root_complex.root_complex import RootComplex
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.cxl.config_space.doe.doe_table_access import (
+    DOE_CXL_VENDOR_ID,
+    DOE_CXL_OBJECT_TYPE_TABLE_ACCESS,
+    DoeTableAccessRequest,
+    DoeTableAccessResponse,
+    DoeTableAccessResponseOptions,
+)
+from opencis.drivers.pci_bus_driver import (
+    PCI_EXTENDED_CAPABILITY_ID,
+    PCIE_CONFIG_BASE,
+    PCIE_CONFIG_HEADER_ID_MASK,
+    PCIE_NEXT_CAP_OFFSET_MASK,
+    PCIE_NEXT_CAP_OFFSET_START,
+)
+from opencis.pci.component.config_pipeline import CONFIG_PIPELINE_DEPTH, ConfigAccess
+from opencis.pci.component.doe_mailbox import (
+    DoeDiscoveryRequest,
+    DoeDiscoveryResponse,
+    DoeMailboxProtocolDoeDiscovery,
+)
+from opencis.pci.config_space.pcie.doe import DOE_REGISTER_OFFSET
+
+DOE_CONTROL_GO = 1 << 31
+DOE_STATUS_BUSY = 1 << 0
+DOE_STATUS_ERROR = 1 << 2
+DOE_STATUS_DATA_OBJECT_READY = 1 << 31
+DOE_LENGTH_MASK = 0x3FFFF
+DOE_STATUS_POLL_COUNT = 100
+CDAT_LAST_ENTRY_HANDLE = 0xFFFF
+
+
+class DoeDriver(LabeledComponent):
+    """
+    Exchanges data objects with DOE mailboxes over config space, through a root complex
+    or directly through a root port. With a pipeline depth above 1, the config reads
+    and writes that move an object are issued with that many outstanding instead of
+    one round trip each.
+    """
+
+    def __init__(
+        self,
+        root_complex: Union[RootComplex, CxlRootPortDevice],
+        pipeline_depth: int = CONFIG_PIPELINE_DEPTH,
+        label: Label = None,
+    ):
+        super().__init__(label)
+        self._root_complex = root_complex
+        self._pipeline_depth = pipeline_depth
+        self._config_accesses = 0
+
+    def get_config_access_count(self) -> int:
+        return self._config_accesses
+
+    async def _access(self, bdf: int, accesses: List[ConfigAccess]) -> List[Optional[int]]:
+        self._config_accesses += len(accesses)
+        if self._pipeline_depth > 1:
+            return await self._root_complex.access_config_pipelined(
+                bdf, accesses, self._pipeline_depth
+            )
+
+        results = []
+        for access in accesses:
+            if access.is_read():
+                results.append(
+                    await self._root_complex.read_config(bdf, access.offset, access.size)
+                )
+            else:
+                await self._root_complex.write_config(bdf, access.offset, access.size, access.value)
+                results.append(None)
+        return results
+
+    async def find_mailboxes(self, bdf: int) -> List[int]:
+        offsets = []
+        offset = PCIE_CONFIG_BASE
+        while offset != 0:
+            header = (await self._access(bdf, [ConfigAccess(offset)]))[0]
+            if header in (0, 0xFFFFFFFF):
+                break
+            if (
+                header & PCIE_CONFIG_HEADER_ID_MASK
+                == PCI_EXTENDED_CAPABILITY_ID.DATA_OBJECT_EXCHANGE
+            ):
+                offsets.append(offset)
+            offset = (header >> PCIE_NEXT_CAP_OFFSET_START) & PCIE_NEXT_CAP_OFFSET_MASK
+        return offsets
+
+    async def _read_dwords(self, bdf: int, mailbox_offset: int, count: int) -> List[int]:
+        # Each dword is a read of the Read Data Mailbox followed by a write to it, which
+        # tells the mailbox the dword was consumed
+        read_data_mailbox = mailbox_offset + DOE_REGISTER_OFFSET.READ_DATA_MAILBOX
+        accesses = []
+        for _ in range(count):
+            accesses.append(ConfigAccess(read_data_mailbox))
+            accesses.append(ConfigAccess(read_data_mailbox, value=0))
+        return (await self._access(bdf, accesses))[0::2]
+
+    async def exchange(self, bdf: int, mailbox_offset: int, request: bytes) -> bytes:
+        bdf_string = bdf_to_string(bdf)
+        status_offset = mailbox_offset + DOE_REGISTER_OFFSET.STATUS
+        status = (await self._access(bdf, [ConfigAccess(status_offset)]))[0]
+        if status & DOE_STATUS_BUSY:
+            raise Exception(f"[{bdf_string}] DOE mailbox at 0x{mailbox_offset:x} is busy")
+
+        write_data_mailbox = mailbox_offset + DOE_REGISTER_OFFSET.WRITE_DATA_MAILBOX
+        accesses = [
+            ConfigAccess(
+                write_data_mailbox,
+                value=int.from_bytes(request[offset : offset + DWORD_BYTES], "little"),
+            )
+            for offset in range(0, len(request), DWORD_BYTES)
+        ]
+        accesses.append(
+            ConfigAccess(mailbox_offset + DOE_REGISTER_OFFSET.CONTROL, value=DOE_CONTROL_GO)
+        )
+        accesses.append(ConfigAccess(status_offset))
+        status = (await self._access(bdf, accesses))[-1]
+        for _ in range(DOE_STATUS_POLL_COUNT):
+            if status & (DOE_STATUS_ERROR | DOE_STATUS_DATA_OBJECT_READY):
+                break
+            status = (await self._access(bdf, [ConfigAccess(status_offset)]))[0]
+        if not status & DOE_STATUS_DATA_OBJECT_READY or status & DOE_STATUS_ERROR:
+            raise Exception(
+                f"[{bdf_string}] DOE mailbox at 0x{mailbox_offset:x} failed, "
+                f"status: 0x{status:08x}"
+            )
+
+        header = await self._read_dwords(bdf, mailbox_offset, 2)
+        length = (header[1] & DOE_LENGTH_MASK) or (DOE_LENGTH_MASK + 1)
+        dwords = header + await self._read_dwords(bdf, mailbox_offset, length - 2)
+        logger.debug(
+            self._create_message(
+                f"[{bdf_string}] DOE exchange: {len(request) // DWORD_BYTES} DW request, "
+                f"{length} DW response"
+            )
+        )
+        return b"".join(dword.to_bytes(DWORD_BYTES, "little") for dword in dwords)
+
+    async def discover_protocols(self, bdf: int, mailbox_offset: int) -> List[Tuple[int, int]]:
+        """
+        Returns the (Vendor ID, Data Object Type) of every protocol the mailbox supports.
+        """
+        protocols = []
+        index = 0
+        while True:
+            request = DoeDiscoveryRequest()
+            request.header.vendor_id = DoeMailboxProtocolDoeDiscovery.vendor_id
+            request.header.data_object_type = DoeMailboxProtocolDoeDiscovery.data_object_type
+            request.header.length = len(request) // DWORD_BYTES
+            request.index = index
+            response = DoeDiscoveryResponse()
+            response.reset(await self.exchange(bdf, mailbox_offset, bytes(request)))
+            protocols.append((response.vendor_id, response.data_object_type))
+            if response.next_index == 0:
+                return protocols
+            index = response.next_index
+
+    async def read_cdat(self, bdf: int, mailbox_offset: int) -> List[bytes]:
+        """
+        Reads the CDAT through DOE Table Access. Returns the CDAT header followed by
+        each CDAT structure.
+        """
+        entries = []
+        entry_handle = 0
+        while entry_handle != CDAT_LAST_ENTRY_HANDLE:
+            request = DoeTableAccessRequest()
+            request.header.vendor_id = DOE_CXL_VENDOR_ID
+            request.header.data_object_type = DOE_CXL_OBJECT_TYPE_TABLE_ACCESS
+            request.header.length = len(request) // DWORD_BYTES
+            request.entry_handle = entry_handle
+            data = await self.exchange(bdf, mailbox_offset, bytes(request))
+
+            options: DoeTableAccessResponseOptions = {"structure_size": len(data) - 0xC}
+            response = DoeTableAccessResponse(options=options)
+            response.reset(data)
+            entries.append(data[0xC:])
+            entry_handle = response.entry_handle
+        return entries
@@ -198,8 +198,8 @@ class PciBusDriver(LabeledComponent):
 
     # pylint: disable=duplicate-code
 
-    async def read_config(self, bdf: int, offset: int, size: int) -> int:
-        return await self._root_complex.read_config(bdf, offset, size)
+    async def read_config(self, bdf: int, offset: int, size: int, cached: bool = False) -> int:
+        return await self._root_complex.read_config(bdf, offset, size, cached)
 
     async def write_config(self, bdf: int, offset: int, size: int, value: int):
         await self._root_complex.write_config(bdf, offset, size, value)
@@ -330,8 +330,10 @@ class PciBusDriver(LabeledComponent):
 
     async def _read_vid_did(self, bdf: int) -> Optional[int]:
         logger.debug(self._create_message(f"Reading VID/DID from {bdf_to_string(bdf)}"))
-        vid = await self.read_config(bdf, REG_ADDR.VENDOR_ID.START, REG_ADDR.VENDOR_ID.LEN)
-        did = await self.read_config(bdf, REG_ADDR.DEVICE_ID.START, REG_ADDR.DEVICE_ID.LEN)
+        # VID and DID share a dword. Presence is checked live, never from the shadow.
+        vid_did = await self.read_config(bdf, REG_ADDR.VENDOR_ID.START, 4)
+        vid = vid_did & 0xFFFF
+        did = vid_did >> 16
         logger.debug(self._create_message(f"VID: 0x{vid:x}"))
         logger.debug(self._create_message(f"DID: 0x{did:x}"))
         if did == 0xFFFF and vid == 0xFFFF:
@@ -340,7 +342,9 @@ class PciBusDriver(LabeledComponent):
         return (did << 16) | vid
 
     async def _read_class_code(self, bdf: int) -> int:
-        data = await self.read_config(bdf, REG_ADDR.CLASS_CODE.START, REG_ADDR.CLASS_CODE.LEN)
+        data = await self.read_config(
+            bdf, REG_ADDR.CLASS_CODE.START, REG_ADDR.CLASS_CODE.LEN, cached=True
+        )
         if data == 0xFFFF:
             raise Exception("Failed to read class code")
         return data
@@ -408,7 +412,7 @@ class PciBusDriver(LabeledComponent):
         return size
 
     async def scan_pcie_cap_helper(self, bdf: int, offset: int, device_info: PciDeviceInfo):
-        data = await self.read_config(bdf, offset, PCIE_CONFIG_HEADER_SIZE)
+        data = await self.read_config(bdf, offset, PCIE_CONFIG_HEADER_SIZE, cached=True)
         if data is None:
             return
 
@@ -445,14 +449,18 @@ class PciBusDriver(LabeledComponent):
         offset = capability_info.offset
 
         pci_express_register_offset = offset + 0x02
-        pci_express_register = await self.read_config(bdf, pci_express_register_offset, 2)
+        pci_express_register = await self.read_config(
+            bdf, pci_express_register_offset, 2, cached=True
+        )
         capability_info.device_port_type = PCI_DEVICE_PORT_TYPE((pci_express_register >> 4) & 0xF)
         link_capability_register_offset = offset + 0x0C
-        link_capability_register = await self.read_config(bdf, link_capability_register_offset, 4)
+        link_capability_register = await self.read_config(
+            bdf, link_capability_register_offset, 4, cached=True
+        )
         capability_info.port_number = (link_capability_register >> 24) & 0xFF
 
     async def scan_pci_cap_helper(self, bdf: int, offset: int, device_info: PciDeviceInfo):
-        data = await self.read_config(bdf, offset, PCI_CONFIG_HEADER_SIZE)
+        data = await self.read_config(bdf, offset, PCI_CONFIG_HEADER_SIZE, cached=True)
         if data is None:
             return
 
@@ -490,7 +498,7 @@ class PciBusDriver(LabeledComponent):
             await self.scan_pci_cap_helper(bdf, next_cap_offset, device_info)
 
     async def _scan_pci_capabilities(self, bdf: int, device_info: PciDeviceInfo):
-        pci_cap_pointer = await self.read_config(bdf, PCI_CAPABILITY_POINTER, 2)
+        pci_cap_pointer = await self.read_config(bdf, PCI_CAPABILITY_POINTER, 2, cached=True)
         await self.scan_pci_cap_helper(bdf, pci_cap_pointer, device_info)
         await self.scan_pcie_cap_helper(bdf, PCIE_CONFIG_BASE, device_info)
 
@@ -506,8 +514,8 @@ class PciBusDriver(LabeledComponent):
             bdf = pci_device_info.bdf
             offset = capability.offset
 
-            sn_low = await self._root_complex.read_config(bdf, offset + 0x04, 4)
-            sn_high = await self._root_complex.read_config(bdf, offset + 0x08, 4)
+            sn_low = await self._root_complex.read_config(bdf, offset + 0x04, 4, cached=True)
+            sn_high = await self._root_complex.read_config(bdf, offset + 0x08, 4, cached=True)
 
             sn_int = (sn_high << 32) | sn_low
             sn_str = f"{sn_int:016x}"
@@ -520,6 +528,8 @@ class PciBusDriver(LabeledComponent):
             vid_did = await self._read_vid_did(bdf)
             if vid_did is not None:
                 remaining_devices.append(device)
+            else:
+                self._root_complex.get_config_shadow().invalidate(bdf)
 
         self._devices = remaining_devices
 
@@ -545,8 +555,11 @@ class PciBusDriver(LabeledComponent):
             vid_did = await self._read_vid_did(bdf)
             if vid_did is None:
                 continue
+            if bdf not in existing_bdfs:
+                # A function that newly appeared may have replaced one seen before
+                self._root_complex.get_config_shadow().invalidate(bdf)
 
-            is_multifunction = (await self.read_config(bdf, 0x0E, 1) & 0x80) >> 7
+            is_multifunction = (await self.read_config(bdf, 0x0E, 1, cached=True) & 0x80) >> 7
             if is_multifunction:
                 multi_function_devices.add(device_number)
 
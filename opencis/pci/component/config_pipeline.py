@@ -0,0 +1,89 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, cast
+
+from opencis.pci.component.fifo_pair import FifoPair
+from opencis.cxl.transport.transaction import (
+    CxlIoBasePacket,
+    CxlIoCfgRdPacket,
+    CxlIoCfgWrPacket,
+    CxlIoCompletionPacket,
+    CxlIoCompletionWithDataPacket,
+    is_cxl_io_completion_status_sc,
+)
+
+CONFIG_PIPELINE_DEPTH = 8
+
+
+@dataclass
+class ConfigAccess:
+    offset: int
+    size: int = 4
+    # None for a CfgRd, the value to write for a CfgWr
+    value: Optional[int] = None
+
+    def is_read(self) -> bool:
+        return self.value is None
+
+
+def create_config_request(
+    bdf: int, access: ConfigAccess, is_type0: bool, tag: int
+) -> CxlIoBasePacket:
+    if access.offset + access.size > ((access.offset // 4) + 1) * 4:
+        raise Exception("offset + size out of DWORD boundary")
+    if access.is_read():
+        return CxlIoCfgRdPacket.create(bdf, access.offset, access.size, is_type0, req_id=0, tag=tag)
+    return CxlIoCfgWrPacket.create(
+        bdf, access.offset, access.size, access.value, is_type0, req_id=0, tag=tag
+    )
+
+
+async def exchange_config_requests(
+    fifo: FifoPair, packets: List[CxlIoBasePacket], depth: int = CONFIG_PIPELINE_DEPTH
+) -> List[CxlIoBasePacket]:
+    """
+    Sends config requests with up to `depth` of them outstanding and returns their
+    completions in request order. Config requests to a function complete in the order
+    they were issued, which is checked against the tags.
+    """
+    completions = []
+
+    async def receive():
+        completion = cast(CxlIoCompletionPacket, await fifo.target_to_host.get())
+        request = packets[len(completions)]
+        if completion.cpl_header.tag != request.cfg_req_header.tag:
+            raise Exception(
+                f"Config completion tag 0x{completion.cpl_header.tag:02x} does not match "
+                f"request tag 0x{request.cfg_req_header.tag:02x}"
+            )
+        completions.append(completion)
+
+    for index, packet in enumerate(packets):
+        if index >= depth:
+            await receive()
+        await fifo.host_to_target.put(packet)
+    while len(completions) < len(packets):
+        await receive()
+    return completions
+
+
+def get_config_access_result(
+    access: ConfigAccess, completion: Optional[CxlIoBasePacket]
+) -> Optional[int]:
+    """
+    Returns the data of a CfgRd completion, all ones if it was unsuccessful, and None
+    for a CfgWr.
+    """
+    if not access.is_read():
+        return None
+    bit_mask = (1 << access.size * 8) - 1
+    if completion is None or not is_cxl_io_completion_status_sc(completion):
+        return 0xFFFFFFFF & bit_mask
+    cpld_packet = cast(CxlIoCompletionWithDataPacket, completion)
+    return (cpld_packet.data >> ((access.offset % 4) * 8)) & bit_mask
@@ -0,0 +1,119 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from opencis.pci.component.config_pipeline import ConfigAccess
+from opencis.pci.config_space.pci import BAR_OFFSETS, BAR_REGISTER_SIZE, REG_ADDR
+from opencis.util.number_const import DWORD_BYTES
+
+PCI_CONFIG_SPACE_SIZE = 0x100
+PCIE_CONFIG_SPACE_SIZE = 0x1000
+HEADER_TYPE_DWORD_OFFSET = 0x0C
+
+
+class ConfigSpaceShadow:
+    """
+    Host-side copy of config space dwords, per BDF. Only reads that ask for it are
+    served from the shadow, so callers use it for registers that do not change on
+    their own, such as IDs, capability headers and DVSEC contents.
+
+    A write drops the dword it wrote. A write to a BAR drops every BAR of the function,
+    and a write to the bus number registers of a bridge (a type 1 header) drops every
+    function, since the functions below the bridge are renumbered. A function whose
+    header type is not shadowed is treated as a bridge. With `snapshot_size` set to
+    PCI_CONFIG_SPACE_SIZE or PCIE_CONFIG_SPACE_SIZE, the first miss on a function
+    fetches that much of its config space in one pipelined burst.
+    """
+
+    def __init__(self, enabled: bool = True, snapshot_size: int = 0):
+        self.enabled = enabled
+        self.snapshot_size = snapshot_size
+        self.hits = 0
+        self.misses = 0
+        self._dwords: Dict[int, Dict[int, int]] = {}
+        self._snapshots: Set[int] = set()
+
+    async def read(
+        self,
+        bdf: int,
+        offset: int,
+        size: int,
+        fetch_dwords: Callable[[int, List[int]], Awaitable[List[int]]],
+    ) -> int:
+        return (await self.read_many(bdf, [ConfigAccess(offset, size)], fetch_dwords))[0]
+
+    async def read_many(
+        self,
+        bdf: int,
+        accesses: List[ConfigAccess],
+        fetch_dwords: Callable[[int, List[int]], Awaitable[List[int]]],
+    ) -> List[int]:
+        """
+        Serves config reads to one function, fetching every dword missing from the
+        shadow with a single call to `fetch_dwords`.
+        """
+        dwords = self._dwords.setdefault(bdf, {})
+        missing = []
+        for access in accesses:
+            dword_offset = access.offset & ~(DWORD_BYTES - 1)
+            if dword_offset in dwords:
+                self.hits += 1
+                continue
+            self.misses += 1
+            if dword_offset not in missing:
+                missing.append(dword_offset)
+        if missing:
+            if bdf not in self._snapshots and min(missing) < self.snapshot_size:
+                self._snapshots.add(bdf)
+                snapshot = range(0, self.snapshot_size, DWORD_BYTES)
+                missing += [offset for offset in snapshot if offset not in missing]
+            fetched = dict(zip(missing, await fetch_dwords(bdf, missing)))
+            for fetched_offset, value in fetched.items():
+                # All ones is what an unsuccessful read returns; leave it to be read again
+                if value != 0xFFFFFFFF:
+                    dwords[fetched_offset] = value
+        else:
+            fetched = {}
+
+        values = []
+        for access in accesses:
+            dword_offset = access.offset & ~(DWORD_BYTES - 1)
+            value = dwords.get(dword_offset, fetched.get(dword_offset))
+            bit_offset = (access.offset % DWORD_BYTES) * 8
+            values.append((value >> bit_offset) & ((1 << access.size * 8) - 1))
+        return values
+
+    def invalidate(self, bdf: Optional[int] = None):
+        if bdf is None:
+            self._dwords.clear()
+            self._snapshots.clear()
+        else:
+            self._dwords.pop(bdf, None)
+            self._snapshots.discard(bdf)
+
+    def _is_bridge(self, bdf: int) -> bool:
+        header = self._dwords.get(bdf, {}).get(HEADER_TYPE_DWORD_OFFSET)
+        return header is None or (header >> 16) & 0x7F == 0x01
+
+    def invalidate_write(self, bdf: int, offset: int):
+        is_bridge = self._is_bridge(bdf)
+        # A type 1 header has two BARs, followed by the bus number registers
+        bars_end = BAR_OFFSETS.BAR2 if is_bridge else BAR_OFFSETS.BAR5 + BAR_REGISTER_SIZE
+        if (
+            is_bridge
+            and REG_ADDR.PRIMARY_BUS_NUMBER.START <= offset <= REG_ADDR.SUBORDINATE_BUS_NUMBER.END
+        ):
+            self.invalidate()
+        elif bdf not in self._dwords:
+            return
+        elif BAR_OFFSETS.BAR0 <= offset < bars_end:
+            # Sizing one half of a 64-bit BAR changes what the other half reads back
+            for bar_offset in range(BAR_OFFSETS.BAR0, bars_end, 4):
+                self._dwords[bdf].pop(bar_offset, None)
+        else:
+            self._dwords[bdf].pop(offset & ~(DWORD_BYTES - 1), None)
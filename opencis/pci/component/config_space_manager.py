@@ -160,29 +160,32 @@ class ConfigSpaceManager(RunnableComponent):
             if packet is None:
                 logger.debug(self._create_message("Stop processing host to target fifo"))
                 break
-            base_packet = cast(CxlIoBasePacket, packet)
-            self._req_id = base_packet.cfg_req_header.req_id
-            logger.debug(self._create_message("Received host to target packet"))
-            if base_packet.is_cfg_type0():
-                if base_packet.is_cfg_read():
-                    await self._process_cxl_io_cfg_rd(base_packet)
-                elif base_packet.is_cfg_write():
-                    await self._process_cxl_io_cfg_wr(base_packet)
-            elif base_packet.is_cfg_type1():
-                if self._downstream_fifo:
-                    self._convert_request_type_when_needed(base_packet)
-                    await self._forward_request(base_packet)
-                else:
-                    logger.warning(
-                        self._create_message("Endpoint device should not receive a type1 request")
-                    )
-                    cfg_req_packet = cast(CxlIoCfgReqPacket, base_packet)
-                    req_id = tlptoh16(cfg_req_packet.cfg_req_header.req_id)
-                    tag = cfg_req_packet.cfg_req_header.tag
-                    ld_id = cfg_req_packet.tlp_prefix.ld_id
-                    await self._send_unsupported_request(req_id, tag, ld_id=ld_id)
+            await self.process_host_to_target_packet(packet)
+
+    async def process_host_to_target_packet(self, packet: CxlIoBasePacket):
+        base_packet = cast(CxlIoBasePacket, packet)
+        self._req_id = base_packet.cfg_req_header.req_id
+        logger.debug(self._create_message("Received host to target packet"))
+        if base_packet.is_cfg_type0():
+            if base_packet.is_cfg_read():
+                await self._process_cxl_io_cfg_rd(base_packet)
+            elif base_packet.is_cfg_write():
+                await self._process_cxl_io_cfg_wr(base_packet)
+        elif base_packet.is_cfg_type1():
+            if self._downstream_fifo:
+                self._convert_request_type_when_needed(base_packet)
+                await self._forward_request(base_packet)
             else:
-                raise Exception("Unexpected packet received from ConfigSpaceManager")
+                logger.warning(
+                    self._create_message("Endpoint device should not receive a type1 request")
+                )
+                cfg_req_packet = cast(CxlIoCfgReqPacket, base_packet)
+                req_id = tlptoh16(cfg_req_packet.cfg_req_header.req_id)
+                tag = cfg_req_packet.cfg_req_header.tag
+                ld_id = cfg_req_packet.tlp_prefix.ld_id
+                await self._send_unsupported_request(req_id, tag, ld_id=ld_id)
+        else:
+            raise Exception("Unexpected packet received from ConfigSpaceManager")
 
     def _convert_request_type_when_needed(self, packet: CxlIoBasePacket):
         offset = REG_ADDR.SECONDARY_BUS_NUMBER.START
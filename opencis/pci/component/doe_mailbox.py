@@ -6,7 +6,7 @@
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional, TypedDict
+from typing import Dict, List, Optional, TypedDict
 from abc import ABC, abstractmethod
 from opencis.util.number_const import DWORD_BYTES
 from opencis.util.unaligned_bit_structure import (
@@ -50,6 +50,14 @@ class DoeMailboxProtocolBase(ABC):
     def process_request(self, mailbox_context: DoeMailboxContext) -> bool:
         pass
 
+    def get_static_requests(self, _mailbox_context: DoeMailboxContext) -> List[bytes]:
+        """
+        Returns the requests whose responses never change for the life of the mailbox.
+        Their responses are built once, when the mailbox is created, and served from
+        the mailbox's response image instead of calling process_request again.
+        """
+        return []
+
 
 class DoeObjectHeader(UnalignedBitStructure):
     vendor_id: int
@@ -102,7 +110,7 @@ class DoeMailboxProtocolDoeDiscovery(DoeMailboxProtocolBase):
             return False
 
         request = DoeDiscoveryRequest()
-        request.reset(bytes(mailbox_context.write_mailbox)[0 : len(request)])
+        request.reset(mailbox_context.write_mailbox.read_raw(0, len(request) - 1))
 
         response = DoeDiscoveryResponse()
         response.header.vendor_id = self.vendor_id
@@ -132,6 +140,17 @@ class DoeMailboxProtocolDoeDiscovery(DoeMailboxProtocolBase):
 
         return True
 
+    def get_static_requests(self, mailbox_context: DoeMailboxContext) -> List[bytes]:
+        requests = []
+        for index in range(len(mailbox_context.protocols)):
+            request = DoeDiscoveryRequest()
+            request.header.vendor_id = self.vendor_id
+            request.header.data_object_type = self.data_object_type
+            request.header.length = self.req_dwords
+            request.index = index
+            requests.append(bytes(request))
+        return requests
+
 
 DEFAULT_DOE_PROTOCOLS: List[DoeMailboxProtocolBase] = [DoeMailboxProtocolDoeDiscovery()]
 
@@ -153,6 +172,8 @@ class DoeMailboxComponent:
         self._status = DoeStatusContext(
             doe_busy=0, doe_interrupt_status=0, doe_error=0, data_object_ready=0
         )
+        # Request object bytes -> response object bytes of the static protocols
+        self._response_image: Dict[bytes, bytes] = {}
 
         for protocol in self._mailbox_context.protocols:
             logger.debug(
@@ -160,6 +181,22 @@ class DoeMailboxComponent:
                 + f"(Vendor ID = 0x{protocol.vendor_id:04x}, "
                 + f"Data Object Type = 0x{protocol.data_object_type:02x})"
             )
+        self._build_response_image()
+
+    def _build_response_image(self):
+        for protocol in self._mailbox_context.protocols:
+            for request in protocol.get_static_requests(self._mailbox_context):
+                self._mailbox_context.write_mailbox.write_raw(0, len(request) - 1, request)
+                self._mailbox_context.write_mailbox_len = len(request) // DWORD_BYTES
+                if protocol.process_request(self._mailbox_context):
+                    response_size = self._mailbox_context.read_mailbox_len * DWORD_BYTES
+                    response = self._mailbox_context.read_mailbox.read_raw(0, response_size - 1)
+                    self._response_image[request] = response
+                self._reset_mailbox()
+        logger.debug(f"[DOE] Initialize: {len(self._response_image)} responses precomputed")
+
+    def get_protocol(self, protocol_id: int) -> Optional[DoeMailboxProtocolBase]:
+        return self._mailbox_context.get_protocol(protocol_id)
 
     def abort(self):
         logger.debug("[DOE] Abort is requested")
@@ -192,6 +229,16 @@ class DoeMailboxComponent:
             vendor_id,
             data_object_type,
         )
+        request_size = self._mailbox_context.write_mailbox_len * DWORD_BYTES
+        request = self._mailbox_context.write_mailbox.read_raw(0, request_size - 1)
+        response = self._response_image.get(request)
+        if response is not None:
+            self._mailbox_context.read_mailbox.write_raw(0, len(response) - 1, response)
+            self._mailbox_context.read_mailbox_len = len(response) // DWORD_BYTES
+            logger.debug("[DOE] Served request from the response image. Read mailbox is ready")
+            self._set_ready()
+            return
+
         successful = protocol.process_request(self._mailbox_context)
         if not successful:
             logger.debug("[DOE] Failed to process request")
@@ -260,8 +307,12 @@ class DoeMailboxComponent:
         return self._status["doe_error"] == 1
 
     def _reset_mailbox(self):
+        # Only the dwords in use can be non-zero. Zeroing both mailboxes in full
+        # costs 2 MB of writes per data object.
+        write_size = self._mailbox_context.write_mailbox_len * DWORD_BYTES
+        read_size = self._mailbox_context.read_mailbox_len * DWORD_BYTES
+        self._mailbox_context.write_mailbox.write_raw(0, write_size - 1, bytes(write_size))
+        self._mailbox_context.read_mailbox.write_raw(0, read_size - 1, bytes(read_size))
         self._mailbox_context.read_mailbox_index = 0
         self._mailbox_context.read_mailbox_len = 0
         self._mailbox_context.write_mailbox_len = 0
-        self._mailbox_context.write_mailbox.reset()
-        self._mailbox_context.read_mailbox.reset()
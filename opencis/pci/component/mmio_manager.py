@@ -227,15 +227,18 @@ class MmioManager(PacketProcessor):
                 logger.debug(self._create_message("Stopped processing host to target fifo"))
                 break
 
-            base_packet = cast(BasePacket, packet)
-            cxl_io_packet = cast(CxlIoBasePacket, packet)
-            if not base_packet.is_cxl_io() or not (
-                cxl_io_packet.is_mem_read() or cxl_io_packet.is_mem_write()
-            ):
-                raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
-            self._req_id = packet.mreq_header.req_id
-            logger.debug(self._create_message("Received host to target packet"))
-            await self._process_mmio_packet(cast(CxlIoMemReqPacket, packet))
+            await self.process_host_to_target_packet(packet)
 
             if run_once:
                 break
+
+    async def process_host_to_target_packet(self, packet: CxlIoBasePacket):
+        base_packet = cast(BasePacket, packet)
+        cxl_io_packet = cast(CxlIoBasePacket, packet)
+        if not base_packet.is_cxl_io() or not (
+            cxl_io_packet.is_mem_read() or cxl_io_packet.is_mem_write()
+        ):
+            raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
+        self._req_id = packet.mreq_header.req_id
+        logger.debug(self._create_message("Received host to target packet"))
+        await self._process_mmio_packet(cast(CxlIoMemReqPacket, packet))
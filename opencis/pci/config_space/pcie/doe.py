@@ -170,6 +170,9 @@ class DoeExtendedCapability(BitMaskedBitStructure):
     def get_size(fields: List[DataField] | None = None) -> int:
         return DOE_REGISTER_OFFSET.RESERVED_END + 1
 
+    def get_protocol(self, protocol_id: int) -> Optional[DoeMailboxProtocolBase]:
+        return self._mailbox_component.get_protocol(protocol_id)
+
     def write_bytes(self, start_offset: int, end_offset: int, value: int):
         match start_offset:
             case DOE_REGISTER_OFFSET.CONTROL:
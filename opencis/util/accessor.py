@@ -1,19 +1,183 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import List, Optional, Sequence, Union
+
+from opencis.util.metrics import metrics
+from opencis.util.number import Payload, payload_to_bytes
+from opencis.util.tracing import tracer
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
 class FileAccessor:
     def __init__(self, filename: str, size: int):
         self.filename = filename
+        self._read_latency = metrics.histogram("accessor_read_latency", filename)
+        self._write_latency = metrics.histogram("accessor_write_latency", filename)
+        self._trace_label = f"{self.__class__.__name__}:{filename}"
         with open(filename, "wb") as file:
             file.write(b"\x00" * size)
             file.flush()
 
-    async def write(self, offset: int, data: int, size: int):
+    async def write(self, offset: int, data: Payload, size: int):
         # TODO: Check for OOB and use asyncio
-        with open(self.filename, "r+b") as file:
+        start = perf_counter()
+        with tracer.span("write", self._trace_label), open(self.filename, "r+b") as file:
             file.seek(offset)
-            file.write(data.to_bytes(size, byteorder="little"))
+            file.write(payload_to_bytes(data, size))
+        self._write_latency.observe(perf_counter() - start)
 
-    async def read(self, offset: int, size: int) -> int:
+    async def read_bytes(self, offset: int, size: int) -> bytes:
         # TODO: Check for OOB and use asyncio
-        with open(self.filename, "rb") as file:
+        start = perf_counter()
+        with tracer.span("read", self._trace_label), open(self.filename, "rb") as file:
             file.seek(offset)
             data = file.read(size)
-            return int.from_bytes(data, byteorder="little")
+        self._read_latency.observe(perf_counter() - start)
+        return data
+
+    async def read(self, offset: int, size: int) -> int:
+        data = await self.read_bytes(offset, size)
+        return int.from_bytes(data, byteorder="little")
+
+
+class CharDriverAccessor:
+    """
+    Accessor for memory exposed through a character device (e.g. /dev/dax*).
+
+    The descriptor is opened once and every access is a single pread/pwrite at
+    an explicit offset, so concurrent accesses never share a file position.
+    When `io_threads` is non-zero the blocking calls run on a dedicated thread
+    pool, and at most `max_pending` of them are queued at once, so a slow
+    device applies backpressure instead of stalling the event loop.
+    """
+
+    def __init__(self, filename: str, size: int, io_threads: int = 0, max_pending: int = 64):
+        self.filename = filename
+        self.size = size
+        self._fd = os.open(filename, os.O_RDWR)
+        self._read_latency = metrics.histogram("accessor_read_latency", filename)
+        self._write_latency = metrics.histogram("accessor_write_latency", filename)
+        self._trace_label = f"{self.__class__.__name__}:{filename}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._closed = False
+        if io_threads:
+            self._executor = ThreadPoolExecutor(
+                max_workers=io_threads, thread_name_prefix="CharDriverAccessor"
+            )
+            self._pending = asyncio.Semaphore(max_pending)
+
+    async def close(self):
+        self._closed = True
+        if self._executor:
+            # In-flight accesses finish before the descriptor is closed, but are
+            # waited for on another thread so the event loop keeps running
+            executor = self._executor
+            self._executor = None
+            await asyncio.to_thread(executor.shutdown, wait=True)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _check_range(self, offset: int, size: int):
+        if offset < 0 or offset + size > self.size:
+            raise IndexError(f"Access 0x{offset:x}+0x{size:x} is out of range 0x{self.size:x}")
+
+    async def _submit(self, func, *args):
+        if self._closed:
+            raise Exception(f"{self.filename} is closed")
+        executor = self._executor
+        if executor is None:
+            return func(*args)
+        async with self._pending:
+            if self._closed:
+                raise Exception(f"{self.filename} is closed")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, func, *args)
+
+    def _pread_all(self, size: int, offset: int) -> bytes:
+        data = os.pread(self._fd, size, offset)
+        while len(data) < size:
+            chunk = os.pread(self._fd, size - len(data), offset + len(data))
+            if not chunk:
+                # past the end of the backing store
+                return data + bytes(size - len(data))
+            data += chunk
+        return data
+
+    def _pwrite_all(self, data: Buffer, offset: int):
+        view = memoryview(data).cast("B")
+        while view:
+            written = os.pwrite(self._fd, view, offset)
+            view = view[written:]
+            offset += written
+
+    def _preadv_all(self, buffers: List[memoryview], offset: int):
+        while buffers:
+            read = os.preadv(self._fd, buffers, offset)
+            if read == 0:
+                for buffer in buffers:
+                    buffer[:] = bytes(len(buffer))
+                return
+            offset += read
+            buffers = _advance_buffers(buffers, read)
+
+    def _pwritev_all(self, buffers: List[memoryview], offset: int):
+        while buffers:
+            written = os.pwritev(self._fd, buffers, offset)
+            offset += written
+            buffers = _advance_buffers(buffers, written)
+
+    async def write(self, offset: int, data: Payload, size: int):
+        self._check_range(offset, size)
+        start = perf_counter()
+        with tracer.span("write", self._trace_label):
+            await self._submit(self._pwrite_all, payload_to_bytes(data, size), offset)
+        self._write_latency.observe(perf_counter() - start)
+
+    async def read_bytes(self, offset: int, size: int) -> bytes:
+        self._check_range(offset, size)
+        start = perf_counter()
+        with tracer.span("read", self._trace_label):
+            data = await self._submit(self._pread_all, size, offset)
+        self._read_latency.observe(perf_counter() - start)
+        return data
+
+    async def read(self, offset: int, size: int) -> int:
+        data = await self.read_bytes(offset, size)
+        return int.from_bytes(data, "little")
+
+    async def read_into(self, offset: int, buffers: Sequence[Union[bytearray, memoryview]]):
+        """
+        Fills `buffers` from consecutive device memory starting at `offset`
+        with one preadv call, e.g. one buffer per cacheline.
+        """
+        views = [memoryview(buffer).cast("B") for buffer in buffers]
+        self._check_range(offset, sum(len(view) for view in views))
+        start = perf_counter()
+        await self._submit(self._preadv_all, views, offset)
+        self._read_latency.observe(perf_counter() - start)
+
+    async def write_from(self, offset: int, buffers: Sequence[Buffer]):
+        """
+        Writes `buffers` to consecutive device memory starting at `offset`
+        with one pwritev call.
+        """
+        views = [memoryview(buffer).cast("B") for buffer in buffers]
+        self._check_range(offset, sum(len(view) for view in views))
+        start = perf_counter()
+        await self._submit(self._pwritev_all, views, offset)
+        self._write_latency.observe(perf_counter() - start)
+
+
+def _advance_buffers(buffers: List[memoryview], count: int) -> List[memoryview]:
+    # drops the first `count` bytes after a short vectored transfer
+    while buffers and count >= len(buffers[0]):
+        count -= len(buffers[0])
+        buffers = buffers[1:]
+    if buffers and count:
+        buffers = [buffers[0][count:]] + buffers[1:]
+    return buffers
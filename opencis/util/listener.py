@@ -0,0 +1,100 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+
+class ListenerRegistry:
+    """
+    Process-wide record of which TCP ports have a listening server.
+
+    Servers call notify_ready() once they accept connections; clients that are
+    backing off wait on wait_ready() so they retry as soon as the listener is
+    up instead of sleeping out the full delay. Components started by the CLI
+    run in separate threads with separate event loops, so waiters are woken
+    with call_soon_threadsafe on their own loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready_ports = set()
+        self._waiters: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def notify_ready(self, port: int):
+        with self._lock:
+            self._ready_ports.add(port)
+            waiters = self._waiters.pop(port, [])
+        for loop, event in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+    def notify_closed(self, port: int):
+        with self._lock:
+            self._ready_ports.discard(port)
+
+    def is_ready(self, port: int) -> bool:
+        with self._lock:
+            return port in self._ready_ports
+
+    async def wait_ready(self, port: int, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds for `port` to be announced. Returns True
+        if a listener was announced during the wait.
+        """
+        event = asyncio.Event()
+        entry = (asyncio.get_running_loop(), event)
+        with self._lock:
+            self._waiters.setdefault(port, []).append(entry)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(port, [])
+                if entry in waiters:
+                    waiters.remove(entry)
+
+
+listener_registry = ListenerRegistry()
+
+
+@dataclass
+class Backoff:
+    """
+    Exponential backoff for connection retries. wait() returns early when a
+    listener on `port` is announced through the listener registry.
+    """
+
+    port: int
+    initial_delay: float = 0.01
+    max_delay: float = 1.0
+    factor: float = 2.0
+
+    def __post_init__(self):
+        self._delay = self.initial_delay
+        self._seen_ready = False
+
+    def reset(self):
+        self._delay = self.initial_delay
+
+    async def wait(self):
+        # The listener may have come up between the failed attempt and now
+        if not self._seen_ready and listener_registry.is_ready(self.port):
+            self._seen_ready = True
+            self.reset()
+            return
+        notified = await listener_registry.wait_ready(self.port, self._delay)
+        if notified:
+            self._seen_ready = True
+            self.reset()
+        else:
+            self._delay = min(self._delay * self.factor, self.max_delay)
@@ -0,0 +1,224 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+# Upper bounds in seconds; a last bucket counts everything above them
+LATENCY_BUCKETS = tuple(
+    scale * unit for unit in (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1) for scale in (1, 2, 5)
+) + (1.0,)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class NullMetric:
+    """
+    Stands in for every metric while the registry is disabled, so instrumented code
+    costs one no-op call per update.
+    """
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+
+NULL_METRIC = NullMetric()
+
+Metric = Union[Counter, Gauge, Histogram, NullMetric]
+
+
+def get_metric_key(name: str, label: Optional[str] = None) -> str:
+    return f"{name}{{{label}}}" if label else name
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and fixed-bucket histograms, keyed by name and
+    component label. Components look their metrics up once, when they are created,
+    and get NULL_METRIC while the registry is disabled, so metrics must be enabled
+    before the components they should cover are created. Components started by the
+    CLI run in separate threads; updates are not locked, so a snapshot taken while
+    they run is approximate.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Gauge] = {}
+        self._gauge_getters: Dict[str, Callable[[], float]] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._gauge_getters.clear()
+            self._histograms.clear()
+
+    def counter(self, name: str, label: Optional[str] = None) -> Metric:
+        if not self.enabled:
+            return NULL_METRIC
+        with self._lock:
+            return self._counters.setdefault(get_metric_key(name, label), Counter())
+
+    def gauge(
+        self,
+        name: str,
+        label: Optional[str] = None,
+        getter: Optional[Callable[[], float]] = None,
+    ) -> Metric:
+        """
+        Returns a gauge to set, or registers `getter` to be read at snapshot time,
+        which costs nothing between snapshots.
+        """
+        if not self.enabled:
+            return NULL_METRIC
+        key = get_metric_key(name, label)
+        with self._lock:
+            if getter is not None:
+                self._gauge_getters[key] = getter
+                return NULL_METRIC
+            return self._gauges.setdefault(key, Gauge())
+
+    def histogram(
+        self,
+        name: str,
+        label: Optional[str] = None,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Metric:
+        if not self.enabled:
+            return NULL_METRIC
+        with self._lock:
+            return self._histograms.setdefault(get_metric_key(name, label), Histogram(buckets))
+
+    def get_snapshot(self, prefix: str = "") -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            gauge_getters = dict(self._gauge_getters)
+            histograms = dict(self._histograms)
+
+        snapshot = {"counters": {}, "gauges": {}, "histograms": {}}
+        for key, counter in counters.items():
+            if key.startswith(prefix):
+                snapshot["counters"][key] = counter.value
+        for key, gauge in gauges.items():
+            if key.startswith(prefix):
+                snapshot["gauges"][key] = gauge.value
+        for key, getter in gauge_getters.items():
+            if key.startswith(prefix):
+                try:
+                    snapshot["gauges"][key] = getter()
+                except Exception:
+                    # The component behind the getter is gone or not set up yet
+                    continue
+        for key, histogram in histograms.items():
+            if key.startswith(prefix):
+                snapshot["histograms"][key] = {
+                    "buckets": list(histogram.buckets),
+                    "counts": list(histogram.counts),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                }
+        return snapshot
+
+
+def get_histogram_percentile(histogram: Dict, percentile: float) -> float:
+    """
+    Returns the upper bound of the bucket holding `percentile` of a histogram in a
+    snapshot, or infinity if it is in the overflow bucket.
+    """
+    if not histogram["count"]:
+        return 0
+    rank = histogram["count"] * percentile / 100
+    seen = 0
+    for bucket, count in zip(histogram["buckets"], histogram["counts"]):
+        seen += count
+        if seen >= rank:
+            return bucket
+    return float("inf")
+
+
+def format_metrics_snapshot(snapshot: Dict) -> List[str]:
+    lines = []
+    for key, value in sorted(snapshot["counters"].items()):
+        lines.append(f"{key} = {value}")
+    for key, value in sorted(snapshot["gauges"].items()):
+        lines.append(f"{key} = {value}")
+    for key, histogram in sorted(snapshot["histograms"].items()):
+        if not histogram["count"]:
+            lines.append(f"{key}: no samples")
+            continue
+        lines.append(
+            f"{key}: {histogram['count']} samples, "
+            f"mean {histogram['sum'] / histogram['count'] * 1e6:.1f} us, "
+            f"p50 <= {get_histogram_percentile(histogram, 50) * 1e6:g} us, "
+            f"p99 <= {get_histogram_percentile(histogram, 99) * 1e6:g} us"
+        )
+    return lines
+
+
+metrics = MetricsRegistry(enabled=os.environ.get("OPENCIS_METRICS", "") not in ("", "0"))
@@ -8,7 +8,11 @@
 import sys
 import os
 import random
-from typing import Generator
+from typing import Generator, Union
+
+# A cacheline payload as it travels between components. Buffers are little-endian
+# and are passed through untouched; ints are kept for existing callers.
+Payload = Union[int, bytes, bytearray, memoryview]
 
 
 def round_up_to_power_of_2(number: int) -> int:
@@ -117,6 +121,43 @@ def split_int(cacheline: int, line_length: int = 64, stride: int = 8) -> Generat
         cacheline -= masked
 
 
+def split_bytes(
+    data: Union[bytes, bytearray, memoryview], stride: int = 64
+) -> Generator[memoryview, None, None]:
+    """
+    Splits a buffer into `stride`-byte views in address order.
+    No bytes are copied; the views share memory with `data`.
+    """
+    view = memoryview(data)
+    for offset in range(0, len(view), stride):
+        yield view[offset : offset + stride]
+
+
+def payload_to_bytes(data: Payload, size: int = 64) -> Union[bytes, bytearray, memoryview]:
+    """
+    Returns `data` as a little-endian buffer of exactly `size` bytes.
+    Buffers of the right length are returned as-is, so a payload that is already
+    bytes moves between components without any conversion.
+    """
+    if isinstance(data, int):
+        return data.to_bytes(size, "little")
+    length = len(data)
+    if length == size:
+        return data
+    if length > size:
+        return memoryview(data)[:size]
+    return bytes(data) + bytes(size - length)
+
+
+def payload_to_int(data: Payload) -> int:
+    """
+    Compatibility helper for callers that still expect a cacheline as an int.
+    """
+    if isinstance(data, int):
+        return data
+    return int.from_bytes(data, "little")
+
+
 def extract_upper(from_what: int, how_much: int, how_long: int):
     """
     Extracts and returns the upper `how_much` bits from `from_what`.
@@ -9,3 +9,4 @@ BITS_IN_BYTE = 8
 DWORD_BYTES = 4
 KB = 1024
 MB = 1024 * 1024
+GB = 1024 * MB
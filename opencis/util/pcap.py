@@ -0,0 +1,235 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from dataclasses import dataclass, field
+from ipaddress import ip_address
+from struct import Struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+# Classic libpcap files, as pylibpcap writes them; pcapng is not supported
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+IP_PROTOCOL_TCP = 6
+TCP_FLAG_SYN = 0x02
+
+_GLOBAL_HEADER = Struct("<IHHiIII")
+_RECORD_HEADER = Struct("<IIII")
+_ETHERNET_HEADER = Struct("!6s6sH")
+_IPV4_HEADER = Struct("!BBHHHBBH4s4s")
+_TCP_HEADER = Struct("!HHIIBBHHH")
+
+Endpoint = Tuple[str, int]
+
+
+@dataclass
+class TcpStream:
+    """
+    The payload one side of a TCP connection sent, in sequence order. Every chunk
+    keeps the capture time of the segment that carried it.
+    """
+
+    src: Endpoint
+    dst: Endpoint
+    chunks: List[Tuple[float, bytes]] = field(default_factory=list)
+    # Bytes missing from the capture; the stream ends at the first gap
+    missing: int = 0
+
+    def get_data(self) -> bytes:
+        return b"".join(data for _, data in self.chunks)
+
+
+def read_pcap(file: BinaryIO) -> Iterator[Tuple[float, int, bytes]]:
+    """
+    Yields the timestamp, link type and frame of every record in a pcap file.
+    """
+    header = file.read(_GLOBAL_HEADER.size)
+    if len(header) < _GLOBAL_HEADER.size:
+        raise Exception("Not a pcap file: header is truncated")
+    magic = int.from_bytes(header[:4], "little")
+    byte_order = "<"
+    if magic not in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+        magic = int.from_bytes(header[:4], "big")
+        byte_order = ">"
+        if magic not in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            raise Exception(f"Not a pcap file: magic 0x{header[:4].hex()}")
+    global_header = Struct(byte_order + _GLOBAL_HEADER.format[1:])
+    record_header = Struct(byte_order + _RECORD_HEADER.format[1:])
+    link_type = global_header.unpack(header)[6]
+    fraction = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+
+    while True:
+        fields = file.read(record_header.size)
+        if not fields:
+            return
+        if len(fields) < record_header.size:
+            raise Exception("pcap file ends in the middle of a record header")
+        seconds, fractions, captured_length, _ = record_header.unpack(fields)
+        frame = file.read(captured_length)
+        if len(frame) < captured_length:
+            raise Exception("pcap file ends in the middle of a record")
+        yield seconds + fractions * fraction, link_type, frame
+
+
+def _get_ip_packet(link_type: int, frame: bytes) -> Optional[bytes]:
+    if link_type == LINKTYPE_ETHERNET:
+        ethertype = _ETHERNET_HEADER.unpack_from(frame)[2]
+        payload = frame[_ETHERNET_HEADER.size :]
+    elif link_type == LINKTYPE_LINUX_SLL:
+        ethertype = int.from_bytes(frame[14:16], "big")
+        payload = frame[16:]
+    elif link_type == LINKTYPE_LINUX_SLL2:
+        ethertype = int.from_bytes(frame[0:2], "big")
+        payload = frame[20:]
+    elif link_type in (LINKTYPE_NULL, LINKTYPE_RAW):
+        payload = frame[4:] if link_type == LINKTYPE_NULL else frame
+        if not payload:
+            return None
+        ethertype = ETHERTYPE_IPV6 if payload[0] >> 4 == 6 else ETHERTYPE_IPV4
+    else:
+        raise Exception(f"Unsupported pcap link type {link_type}")
+    if ethertype not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+        return None
+    return payload
+
+
+def _get_tcp_segment(ip_packet: bytes) -> Optional[Tuple[Endpoint, Endpoint, int, int, bytes]]:
+    version = ip_packet[0] >> 4
+    if version == 4:
+        header_length = (ip_packet[0] & 0xF) * 4
+        total_length, protocol = _IPV4_HEADER.unpack_from(ip_packet)[2], ip_packet[9]
+        src, dst = ip_packet[12:16], ip_packet[16:20]
+        ip_payload = ip_packet[header_length:total_length]
+    elif version == 6:
+        # Extension headers are not followed
+        protocol = ip_packet[6]
+        src, dst = ip_packet[8:24], ip_packet[24:40]
+        ip_payload = ip_packet[40 : 40 + int.from_bytes(ip_packet[4:6], "big")]
+    else:
+        return None
+    if protocol != IP_PROTOCOL_TCP:
+        return None
+    src_port, dst_port, seq, _, offset, flags, _, _, _ = _TCP_HEADER.unpack_from(ip_payload)
+    payload = ip_payload[(offset >> 4) * 4 :]
+    return (
+        (str(ip_address(src)), src_port),
+        (str(ip_address(dst)), dst_port),
+        seq,
+        flags,
+        payload,
+    )
+
+
+def reassemble_tcp_streams(file: BinaryIO, ports: Optional[Set[int]] = None) -> List[TcpStream]:
+    """
+    Reassembles the TCP payload of a pcap file into one stream per connection and
+    direction, limited to connections with an endpoint on one of `ports`.
+    Retransmitted and overlapping bytes are dropped, and reordered segments are put
+    back in order.
+    """
+    # Without SYNs in the capture, sequence numbers count from the first segment seen
+    initial_seqs: Dict[Tuple[Endpoint, Endpoint], int] = {}
+    segments: Dict[Tuple[Endpoint, Endpoint], Dict[int, Tuple[float, bytes]]] = {}
+    for timestamp, link_type, frame in read_pcap(file):
+        ip_packet = _get_ip_packet(link_type, frame)
+        if not ip_packet:
+            continue
+        segment = _get_tcp_segment(ip_packet)
+        if segment is None:
+            continue
+        src, dst, seq, flags, payload = segment
+        if ports is not None and src[1] not in ports and dst[1] not in ports:
+            continue
+        key = (src, dst)
+        if flags & TCP_FLAG_SYN:
+            initial_seqs[key] = (seq + 1) & 0xFFFFFFFF
+            continue
+        if not payload:
+            continue
+        initial_seq = initial_seqs.setdefault(key, seq)
+        offset = (seq - initial_seq) & 0xFFFFFFFF
+        if offset >= 0x80000000:
+            # Retransmission of bytes sent before the capture started
+            continue
+        flow = segments.setdefault(key, {})
+        if offset not in flow or len(flow[offset][1]) < len(payload):
+            flow[offset] = (timestamp, payload)
+
+    streams = []
+    for (src, dst), flow in segments.items():
+        stream = TcpStream(src, dst)
+        next_offset = 0
+        for offset in sorted(flow):
+            timestamp, payload = flow[offset]
+            if offset > next_offset:
+                stream.missing = offset - next_offset
+                break
+            if offset + len(payload) <= next_offset:
+                continue
+            stream.chunks.append((timestamp, payload[next_offset - offset :]))
+            next_offset = offset + len(payload)
+        streams.append(stream)
+    return streams
+
+
+class PcapWriter:
+    """
+    Writes TCP segments as Ethernet/IPv4 frames, the way a capture on the loopback
+    interface stores them.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._seqs: Dict[Tuple[Endpoint, Endpoint], int] = {}
+        file.write(_GLOBAL_HEADER.pack(PCAP_MAGIC_US, 2, 4, 0, 0, 0xFFFF, LINKTYPE_ETHERNET))
+
+    def write_segment(
+        self, timestamp: float, src: Endpoint, dst: Endpoint, payload: bytes, seq: int = None
+    ):
+        """
+        Writes `payload` as the next segment from `src` to `dst`, or at sequence
+        number `seq` to write retransmissions or reordered segments.
+        """
+        next_seq = self._seqs.get((src, dst), 1000)
+        if seq is None:
+            seq = next_seq
+        self._seqs[(src, dst)] = max(next_seq, seq + len(payload))
+        tcp_header = _TCP_HEADER.pack(src[1], dst[1], seq & 0xFFFFFFFF, 0, 5 << 4, 0x18, 0, 0, 0)
+        total_length = _IPV4_HEADER.size + len(tcp_header) + len(payload)
+        ip_header = _IPV4_HEADER.pack(
+            0x45,
+            0,
+            total_length,
+            0,
+            0,
+            64,
+            IP_PROTOCOL_TCP,
+            0,
+            ip_address(src[0]).packed,
+            ip_address(dst[0]).packed,
+        )
+        frame = (
+            _ETHERNET_HEADER.pack(bytes(6), bytes(6), ETHERTYPE_IPV4)
+            + ip_header
+            + tcp_header
+            + payload
+        )
+        seconds = int(timestamp)
+        self._file.write(
+            _RECORD_HEADER.pack(
+                seconds, int(round((timestamp - seconds) * 1e6)), len(frame), len(frame)
+            )
+        )
+        self._file.write(frame)
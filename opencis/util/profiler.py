@@ -0,0 +1,301 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import atexit
+import json
+import os
+import sys
+import sysconfig
+import threading
+from time import perf_counter
+from types import CodeType
+from typing import Dict, List, Optional, Tuple, Union
+
+# Innermost frames of a thread that is blocked waiting for work
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("threading.py", "_shutdown"),
+    ("queue.py", "get"),
+}
+
+# Frames from these directories are shown relative to them
+_SOURCE_ROOTS = (
+    (os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ""),
+    (sysconfig.get_paths()["stdlib"], "<stdlib>/"),
+)
+
+
+def _get_filename(code: CodeType) -> str:
+    filename = code.co_filename
+    for root, prefix in _SOURCE_ROOTS:
+        if filename.startswith(root + os.sep):
+            return prefix + filename[len(root) + 1 :]
+    return filename
+
+
+def _is_idle(code: CodeType) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of every thread in the process. A daemon thread wakes up
+    every `interval` seconds, walks the Python stack of each other thread and counts
+    the stack under the thread's name; `opencis start` names its threads after the
+    components they run, so samples are attributed per component.
+
+    Stacks are counted as they are taken, so memory grows with the number of
+    distinct stacks rather than with the duration. Samples of threads waiting in the
+    event loop's selector or on a lock are counted as idle and left out of the
+    stacks unless `include_idle` is set.
+    """
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self._lock = threading.Lock()
+        # Serializes start() and stop(), which may be called from different threads
+        self._control_lock = threading.Lock()
+        self._stacks: Dict[Tuple[str, Tuple[CodeType, ...]], int] = {}
+        self._idle_samples: Dict[str, int] = {}
+        self._frame_names: Dict[CodeType, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._duration = 0.0
+        self._start_time = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: Optional[float] = None):
+        with self._control_lock:
+            if self.running:
+                raise Exception("Profiler is already running")
+            if interval is not None:
+                self.interval = interval
+            if self.interval <= 0:
+                raise Exception(f"Sampling interval must be positive, got {self.interval}")
+            self._stop_event.clear()
+            self._start_time = perf_counter()
+            self._thread = threading.Thread(target=self._run, name="opencis-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Waits for the sampling thread to exit, which may take up to one interval, so
+        an event loop should call it through asyncio.to_thread().
+        """
+        with self._control_lock:
+            if not self.running:
+                return
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self._duration += perf_counter() - self._start_time
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._idle_samples.clear()
+            self._duration = 0.0
+            if self.running:
+                self._start_time = perf_counter()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """
+        Takes one sample of every thread but the calling one.
+        """
+        own_ident = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            name = names.get(ident, f"thread-{ident}")
+            if not self.include_idle and _is_idle(frame.f_code):
+                with self._lock:
+                    self._idle_samples[name] = self._idle_samples.get(name, 0) + 1
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            key = (name, tuple(codes))
+            with self._lock:
+                self._stacks[key] = self._stacks.get(key, 0) + 1
+
+    def _get_frame_name(self, code: CodeType) -> str:
+        frame_name = self._frame_names.get(code)
+        if frame_name is None:
+            frame_name = f"{code.co_qualname} ({_get_filename(code)}:{code.co_firstlineno})"
+            self._frame_names[code] = frame_name
+        return frame_name
+
+    def _get_stacks(self) -> List[Tuple[str, Tuple[CodeType, ...], int]]:
+        with self._lock:
+            return sorted(
+                ((thread, codes, count) for (thread, codes), count in self._stacks.items()),
+                key=lambda stack: stack[0],
+            )
+
+    def get_duration(self) -> float:
+        if self.running:
+            return self._duration + perf_counter() - self._start_time
+        return self._duration
+
+    def get_thread_samples(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Returns the busy and idle sample counts of each thread.
+        """
+        samples: Dict[str, List[int]] = {}
+        for thread, _, count in self._get_stacks():
+            samples.setdefault(thread, [0, 0])[0] += count
+        with self._lock:
+            for thread, count in self._idle_samples.items():
+                samples.setdefault(thread, [0, 0])[1] += count
+        return {thread: tuple(counts) for thread, counts in sorted(samples.items())}
+
+    def get_top_functions(
+        self, count: int = 10, thread: Optional[str] = None
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Returns the functions seen in most samples of all threads or of `thread`,
+        as (function, self samples, total samples), ordered by self samples.
+        """
+        self_samples: Dict[CodeType, int] = {}
+        total_samples: Dict[CodeType, int] = {}
+        for stack_thread, codes, samples in self._get_stacks():
+            if thread is not None and stack_thread != thread:
+                continue
+            self_samples[codes[-1]] = self_samples.get(codes[-1], 0) + samples
+            for code in set(codes):
+                total_samples[code] = total_samples.get(code, 0) + samples
+        top = sorted(
+            total_samples, key=lambda code: (self_samples.get(code, 0), total_samples[code])
+        )
+        return [
+            (self._get_frame_name(code), self_samples.get(code, 0), total_samples[code])
+            for code in reversed(top[-count:])
+        ]
+
+    def get_summary(self, count: int = 10) -> List[str]:
+        lines = [f"{self.get_duration():.1f} s sampled every {self.interval * 1000:g} ms"]
+        for thread, (busy, idle) in self.get_thread_samples().items():
+            lines.append(f"  {thread}: {busy} busy, {idle} idle samples")
+        lines.append(f"  {'self':>6} {'total':>6}  function")
+        for frame_name, self_samples, total_samples in self.get_top_functions(count):
+            lines.append(f"  {self_samples:6d} {total_samples:6d}  {frame_name}")
+        return lines
+
+    def get_collapsed(self) -> str:
+        """
+        Returns the profile as collapsed stacks, one "thread;outer;...;inner count"
+        line per stack, which flamegraph.pl, inferno and speedscope read.
+        """
+        lines = []
+        for thread, codes, count in self._get_stacks():
+            frames = ";".join(self._get_frame_name(code) for code in codes)
+            lines.append(f"{thread.replace(';', ':')};{frames} {count}")
+        return "\n".join(sorted(lines)) + "\n" if lines else ""
+
+    def get_speedscope(self) -> Dict:
+        """
+        Returns the profile in speedscope's file format, with one sampled profile
+        per thread weighted in seconds.
+        """
+        frames = []
+        frame_indices: Dict[CodeType, int] = {}
+        profiles: Dict[str, Dict] = {}
+        for thread, codes, count in self._get_stacks():
+            stack = []
+            for code in codes:
+                index = frame_indices.get(code)
+                if index is None:
+                    index = frame_indices[code] = len(frames)
+                    frames.append(
+                        {
+                            "name": code.co_qualname,
+                            "file": _get_filename(code),
+                            "line": code.co_firstlineno,
+                        }
+                    )
+                stack.append(index)
+            profile = profiles.setdefault(thread, {"samples": [], "weights": []})
+            profile["samples"].append(stack)
+            profile["weights"].append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(profile["weights"]),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for thread, profile in profiles.items()
+            ],
+            "name": "opencis",
+            "activeProfileIndex": 0,
+            "exporter": "opencis",
+        }
+
+    def get_profile(self, profile_format: str = "collapsed") -> Union[str, Dict]:
+        if profile_format == "collapsed":
+            return self.get_collapsed()
+        if profile_format == "speedscope":
+            return self.get_speedscope()
+        raise Exception(f"Unknown profile format: {profile_format}")
+
+    def save(self, filename: str, profile_format: Optional[str] = None):
+        """
+        Writes the profile to `filename`, as speedscope JSON if the name ends with
+        .json and as collapsed stacks otherwise, unless `profile_format` is given.
+        """
+        if profile_format is None:
+            profile_format = get_profile_format(filename)
+        write_profile(filename, self.get_profile(profile_format))
+
+
+def get_profile_format(filename: str) -> str:
+    return "speedscope" if filename.endswith(".json") else "collapsed"
+
+
+def write_profile(filename: str, profile: Union[str, Dict]):
+    with open(filename, "w", encoding="utf-8") as file:
+        if isinstance(profile, str):
+            file.write(profile)
+        else:
+            json.dump(profile, file)
+
+
+def profile_from_environment():
+    """
+    Starts the process-wide profiler if OPENCIS_PROFILE names an output file and
+    writes the profile there when the process exits.
+    """
+    filename = os.environ.get("OPENCIS_PROFILE")
+    if not filename or profiler.running:
+        return
+    interval = float(os.environ.get("OPENCIS_PROFILE_INTERVAL", "0") or 0)
+    profiler.start(interval or None)
+    # atexit runs its functions last in, first out: stop sampling, then save
+    atexit.register(profiler.save, filename)
+    atexit.register(profiler.stop)
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,227 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import count
+import json
+import os
+import random
+import threading
+from time import perf_counter_ns
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+# The trace of the transaction the running task works on. Tasks created while a
+# span is open inherit it; across FIFOs it rides on the request or packet instead.
+_current_trace_id: ContextVar[Optional[int]] = ContextVar("opencis_trace_id", default=None)
+
+_NULL_SPAN = nullcontext()
+
+
+@dataclass
+class Span:
+    trace_id: int
+    name: str
+    component: str
+    # perf_counter_ns() readings
+    start: int
+    end: int
+
+
+class _SpanContext:
+    __slots__ = ("_tracer", "_trace_id", "_name", "_component", "_start", "_token")
+
+    def __init__(self, tracer: "Tracer", trace_id: int, name: str, component: str):
+        self._tracer = tracer
+        self._trace_id = trace_id
+        self._name = name
+        self._component = component
+
+    def __enter__(self) -> int:
+        self._token = _current_trace_id.set(self._trace_id)
+        self._start = perf_counter_ns()
+        return self._trace_id
+
+    def __exit__(self, *_):
+        self._tracer.record(self._trace_id, self._name, self._component, self._start)
+        _current_trace_id.reset(self._token)
+
+
+class Tracer:
+    """
+    Records timed spans of sampled CXL transactions as they cross components.
+
+    A transaction starts a trace with trace(); every component it reaches opens a
+    span() for the trace id it was handed. In-process the id travels as the
+    `trace_id` attribute of packets and FIFO requests. CxlPacketProcessor carries it
+    over a TCP link by binding it to the link and the packet's position in the
+    stream, and the processor reading that packet on the other end claims it back;
+    both ends of a link have to run in this process for that.
+
+    Untraced transactions cost a None check per span, and nothing is stored for
+    them. Spans beyond `max_spans` push out the oldest ones, so tracing can stay on
+    at a low sample rate.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_spans: int = 100000):
+        self.sample_rate = sample_rate
+        self._random = random.Random()
+        self._trace_ids = count(1)
+        # Span fields as tuples, which are cheaper to create on the hot path
+        self._spans: Deque[Tuple[int, str, str, int, int]] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._bindings: Dict[Hashable, Tuple[int, int]] = {}
+        self._max_bindings = 4096
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def enable(self, sample_rate: float = 1.0):
+        if not 0 < sample_rate <= 1:
+            raise Exception(f"Sample rate must be in (0, 1], got {sample_rate}")
+        self.sample_rate = sample_rate
+
+    def disable(self):
+        self.sample_rate = 0.0
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._bindings.clear()
+
+    def start_trace(self) -> Optional[int]:
+        """
+        Returns the id of a new trace if the transaction is sampled, else None.
+        """
+        if self.sample_rate <= 0:
+            return None
+        if self.sample_rate < 1 and self._random.random() >= self.sample_rate:
+            return None
+        return next(self._trace_ids)
+
+    def get_trace_id(self) -> Optional[int]:
+        return _current_trace_id.get()
+
+    def trace(self, name: str, component: str):
+        """
+        Opens the root span of a transaction, or a child span if the running task
+        already works on a trace.
+        """
+        trace_id = _current_trace_id.get()
+        if trace_id is None:
+            trace_id = self.start_trace()
+            if trace_id is None:
+                return _NULL_SPAN
+        return _SpanContext(self, trace_id, name, component)
+
+    def span(self, name: str, component: str, trace_id: Optional[int] = None):
+        """
+        Opens a span of `trace_id`, or of the trace the running task works on, and
+        makes it the running task's trace until the span closes.
+        """
+        if trace_id is None:
+            trace_id = _current_trace_id.get()
+            if trace_id is None:
+                return _NULL_SPAN
+        return _SpanContext(self, trace_id, name, component)
+
+    def record(
+        self, trace_id: int, name: str, component: str, start: int, end: Optional[int] = None
+    ):
+        if end is None:
+            end = perf_counter_ns()
+        self._spans.append((trace_id, name, component, start, end))
+
+    def has_bindings(self) -> bool:
+        return bool(self._bindings)
+
+    def bind(self, key: Hashable, trace_id: int):
+        """
+        Hands `trace_id` to whoever claims `key` next.
+        """
+        with self._lock:
+            if len(self._bindings) >= self._max_bindings:
+                # The other end is not in this process, or never read the packet
+                del self._bindings[next(iter(self._bindings))]
+            self._bindings[key] = (trace_id, perf_counter_ns())
+
+    def claim(self, key: Hashable, component: str) -> Optional[int]:
+        """
+        Returns the trace id bound to `key`, if any, and records the time from
+        bind to claim as a span of `component`.
+        """
+        with self._lock:
+            binding = self._bindings.pop(key, None)
+        if binding is None:
+            return None
+        trace_id, start = binding
+        self.record(trace_id, "link", component, start)
+        return trace_id
+
+    def get_spans(self, trace_id: Optional[int] = None) -> List[Span]:
+        return [Span(*fields) for fields in list(self._spans) if trace_id in (None, fields[0])]
+
+    def get_chrome_trace(self) -> Dict:
+        """
+        Returns the spans in Chrome trace-event JSON, which chrome://tracing and
+        ui.perfetto.dev open. Every trace shows as a process with one thread per
+        component, so concurrent transactions do not overlap on one track.
+        """
+        spans = sorted(self.get_spans(), key=lambda span: span.start)
+        if not spans:
+            return {"traceEvents": [], "displayTimeUnit": "ns"}
+        origin = spans[0].start
+        component_ids: Dict[str, int] = {}
+        root_names: Dict[int, str] = {}
+        named_threads = set()
+        events = []
+        for span in spans:
+            root_names.setdefault(span.trace_id, span.name)
+            tid = component_ids.setdefault(span.component, len(component_ids) + 1)
+            if (span.trace_id, tid) not in named_threads:
+                named_threads.add((span.trace_id, tid))
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": span.trace_id,
+                        "tid": tid,
+                        "args": {"name": span.component},
+                    }
+                )
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.component,
+                    "ph": "X",
+                    "ts": (span.start - origin) / 1000,
+                    "dur": (span.end - span.start) / 1000,
+                    "pid": span.trace_id,
+                    "tid": tid,
+                    "args": {"trace_id": span.trace_id},
+                }
+            )
+        for trace_id, name in root_names.items():
+            events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": trace_id,
+                    "args": {"name": f"trace {trace_id}: {name}"},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ns"}
+
+    def save(self, filename: str):
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(self.get_chrome_trace(), file)
+
+
+tracer = Tracer(sample_rate=float(os.environ.get("OPENCIS_TRACE_SAMPLE_RATE", "0") or 0))
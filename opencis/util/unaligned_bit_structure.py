@@ -228,6 +228,19 @@ class ShareableByteArray:
         end = end_offset + self.offset
         return int.from_bytes(self._data[start : end + 1], "little")
 
+    def write_raw(self, start_offset: int, end_offset: int, value: bytes):
+        # NOTE: Copies the buffer as-is, without an int round trip
+        length = end_offset - start_offset + 1
+        if len(value) != length:
+            raise Exception(f"Expected {length} bytes, but got {len(value)} bytes")
+        start = start_offset + self.offset
+        self._data[start : start + length] = value
+
+    def read_raw(self, start_offset: int, end_offset: int) -> bytes:
+        start = start_offset + self.offset
+        end = end_offset + self.offset
+        return bytes(self._data[start : end + 1])
+
     def write_bits(self, offset, width, value):
         """
         Writes the given value to the byte array starting at the specified bit offset
@@ -589,6 +602,12 @@ class UnalignedBitStructure:
     def read_bytes(self, start_offset: int, end_offset: int) -> int:
         return self._data.read_bytes(start_offset, end_offset)
 
+    def write_raw(self, start_offset: int, end_offset: int, value: bytes):
+        self._data.write_raw(start_offset, end_offset, value)
+
+    def read_raw(self, start_offset: int, end_offset: int) -> bytes:
+        return self._data.read_raw(start_offset, end_offset)
+
     def _write_bits(self, offset: int, width: int, value: int):
         self._data.write_bits(offset, width, value)
 
@@ -0,0 +1,58 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class WorkloadReport:
+    """
+    Outcome of a load/store workload. Mismatches count the loads that returned other
+    data than the workload expected.
+    """
+
+    reads: int = 0
+    writes: int = 0
+    failures: int = 0
+    mismatches: int = 0
+    elapsed: float = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def get_ops_per_sec(self) -> float:
+        return (self.reads + self.writes) / self.elapsed if self.elapsed else 0
+
+    def get_latency_percentile(self, percentile: float) -> float:
+        if not self.latencies:
+            return 0
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+    def get_latency_histogram(self) -> Dict[int, int]:
+        """
+        Counts latencies per power-of-two bucket of microseconds: bucket N holds
+        latencies from 2^N us up to 2^(N+1) us, and bucket 0 everything below 2 us.
+        """
+        histogram: Dict[int, int] = {}
+        for latency in self.latencies:
+            bucket = max(int(latency * 1e6), 1).bit_length() - 1
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        return dict(sorted(histogram.items()))
+
+    def format(self) -> List[str]:
+        lines = [
+            f"{self.reads + self.writes} ops ({self.reads} loads, {self.writes} stores) "
+            f"in {self.elapsed:.3f} s, {self.get_ops_per_sec():.1f} ops/s, "
+            f"{self.failures} failed, {self.mismatches} mismatched",
+            f"latency p50 {self.get_latency_percentile(50) * 1e6:.1f} us, "
+            f"p99 {self.get_latency_percentile(99) * 1e6:.1f} us, "
+            f"max {max(self.latencies, default=0) * 1e6:.1f} us",
+        ]
+        for bucket, count in self.get_latency_histogram().items():
+            low = 0 if bucket == 0 else 1 << bucket
+            lines.append(f"  {low:>8d} - {1 << (bucket + 1):>8d} us: {count}")
+        return lines
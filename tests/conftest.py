@@ -8,6 +8,17 @@
 from enum import IntEnum, auto
 import pytest
 
+from opencis.cxl.transport.cache_fifo import (
+    CacheFifoPair,
+    CacheResponse,
+    CACHE_REQUEST_TYPE,
+    CACHE_RESPONSE_STATUS,
+)
+from opencis.pci.config_space.pcie.doe import DoeExtendedCapability, DOE_REGISTER_OFFSET
+from opencis.util.number import payload_to_bytes
+from opencis.util.number_const import DWORD_BYTES
+from opencis.util.unaligned_bit_structure import UnalignedBitStructure
+
 
 @pytest.fixture
 def get_gold_std_reg_vals():
@@ -22,6 +33,51 @@ def get_gold_std_reg_vals():
     return _get_gold_std_reg_vals
 
 
+@pytest.fixture
+def run_backing_memory():
+    async def _run_backing_memory(fifo: CacheFifoPair, memory: bytearray):
+        # Minimal coherency agent: serves snoops from a flat buffer, in order
+        while True:
+            packet = await fifo.request.get()
+            if packet is None:
+                break
+            match packet.type:
+                case CACHE_REQUEST_TYPE.SNP_DATA:
+                    data = bytes(memory[packet.addr : packet.addr + 64])
+                    response = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data)
+                case CACHE_REQUEST_TYPE.SNP_INV:
+                    response = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I)
+                case CACHE_REQUEST_TYPE.WRITE_BACK:
+                    memory[packet.addr : packet.addr + 64] = payload_to_bytes(packet.data)
+                    response = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+                case _:
+                    raise Exception(f"Unexpected cache request type: {packet.type}")
+            response.tag = packet.tag
+            await fifo.response.put(response)
+
+    return _run_backing_memory
+
+
+@pytest.fixture
+def write_doe_request():
+    def _write_doe_request(doe: DoeExtendedCapability, request: UnalignedBitStructure):
+        # Writes every dword of `request` to the mailbox, then sets Go
+        # pylint: disable=duplicate-code
+        for dword_index in range(len(request) // DWORD_BYTES):
+            doe.write_bytes(
+                DOE_REGISTER_OFFSET.WRITE_DATA_MAILBOX,
+                DOE_REGISTER_OFFSET.WRITE_DATA_MAILBOX + DWORD_BYTES - 1,
+                request.read_bytes(dword_index * DWORD_BYTES, (dword_index + 1) * DWORD_BYTES - 1),
+            )
+        doe.write_bytes(
+            DOE_REGISTER_OFFSET.CONTROL,
+            DOE_REGISTER_OFFSET.CONTROL + DWORD_BYTES - 1,
+            0x80000000,
+        )
+
+    return _write_doe_request
+
+
 class TEST_PORT(IntEnum):
     TEST_1 = auto()
     TEST_2 = auto()
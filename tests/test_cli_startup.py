@@ -0,0 +1,67 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from opencis.bin.profile_startup import build_components, measure_readiness, profile_imports
+from opencis.cxl.environment import parse_cxl_environment
+
+BASE_TEST_PORT = 9400
+
+# Generous bounds: these catch an accidental eager import of the component stack
+# (or a reconnect loop stuck in a long backoff), not small regressions. The import
+# bound counts modules rather than time, so a loaded machine does not trip it.
+CLI_IMPORT_MODULE_BUDGET = 200
+READINESS_BUDGET_S = 5.0
+
+
+def test_cli_imports_components_lazily():
+    heavy_modules = [
+        "socketio",
+        "aiohttp",
+        "torch",
+        "opencis.apps.fabric_manager",
+        "opencis.apps.cxl_switch",
+        "opencis.apps.single_logical_device",
+    ]
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, opencis.bin.cli; "
+            f"print(','.join(m for m in {heavy_modules!r} if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.strip() == ""
+
+
+def test_cli_import_module_count():
+    records = profile_imports("opencis.bin.cli")
+    assert any(record.name == "opencis.bin.cli" for record in records)
+    assert len(records) <= CLI_IMPORT_MODULE_BUDGET
+
+
+@pytest.mark.asyncio
+async def test_switch_and_sld_readiness(tmp_path):
+    environment = parse_cxl_environment("configs/1vcs_4sld.yaml")
+    environment.switch_config.port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    for vswitch_config in environment.switch_config.virtual_switch_configs:
+        vswitch_config.irq_port = BASE_TEST_PORT + pytest.PORT.TEST_1 + 50
+    for device_config in environment.single_logical_device_configs:
+        device_config.memory_file = str(tmp_path / f"sld_mem{device_config.port_index}.bin")
+
+    components = build_components(("switch", "sld-group"), environment)
+    readiness = await measure_readiness(components, timeout=READINESS_BUDGET_S)
+    assert set(readiness) == {"switch", "sld[1]", "sld[2]", "sld[3]", "sld[4]"}
+    for name, elapsed in readiness.items():
+        assert elapsed is not None, f"{name} was not ready within {READINESS_BUDGET_S} s"
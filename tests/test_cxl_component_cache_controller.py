@@ -0,0 +1,161 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+
+from opencis.cxl.component.cache_controller import (
+    CacheController,
+    CacheControllerConfig,
+    MEM_ADDR_TYPE,
+    MemoryRange,
+    MemoryRangeMap,
+)
+from opencis.cxl.transport.cache_fifo import (
+    CacheFifoPair,
+    CacheResponse,
+    CACHE_RESPONSE_STATUS,
+)
+
+
+@pytest.mark.asyncio
+async def test_cache_controller_bulk_load_store(run_backing_memory):
+    size = 0x4000
+    memory = bytearray(i & 0xFF for i in range(size))
+    cache_to_coh_agent_fifo = CacheFifoPair()
+    cache_controller = CacheController(
+        CacheControllerConfig(
+            component_name="test",
+            processor_to_cache_fifo=None,
+            cache_to_coh_agent_fifo=cache_to_coh_agent_fifo,
+            coh_agent_to_cache_fifo=CacheFifoPair(),
+        )
+    )
+    agent = asyncio.create_task(run_backing_memory(cache_to_coh_agent_fifo, memory))
+    task = asyncio.create_task(cache_controller.run())
+    await cache_controller.wait_for_ready()
+
+    progress = []
+    buffer = bytearray(size - 10)
+    await cache_controller.cache_coherent_load_into(0, buffer, progress=progress.append)
+    assert buffer == memory[: size - 10]
+    assert sum(progress) == size - 10
+
+    pattern = bytes((i * 7) & 0xFF for i in range(size))
+    for window in (1, 16):
+        await cache_controller.cache_coherent_store_from(0, pattern, window=window)
+        buffer = bytearray(size)
+        await cache_controller.cache_coherent_load_into(0, buffer, window=window)
+        assert buffer == pattern
+
+    with pytest.raises(Exception):
+        await cache_controller.cache_coherent_store_from(0x20, pattern[:64])
+
+    await cache_controller.stop()
+    await task
+    await cache_to_coh_agent_fifo.request.put(None)
+    await agent
+
+
+@pytest.mark.asyncio
+async def test_cache_controller_pipelines_misses():
+    window = 4
+    memory = bytearray(i & 0xFF for i in range(0x1000))
+    cache_to_coh_agent_fifo = CacheFifoPair()
+    cache_controller = CacheController(
+        CacheControllerConfig(
+            component_name="test",
+            processor_to_cache_fifo=None,
+            cache_to_coh_agent_fifo=cache_to_coh_agent_fifo,
+            coh_agent_to_cache_fifo=CacheFifoPair(),
+        )
+    )
+    task = asyncio.create_task(cache_controller.run())
+    await cache_controller.wait_for_ready()
+
+    async def serve_window_in_reverse():
+        # Holds back responses until a full window of misses is outstanding, then
+        # answers them out of order
+        packets = [await cache_to_coh_agent_fifo.request.get() for _ in range(window)]
+        assert len({packet.tag for packet in packets}) == window
+        for packet in reversed(packets):
+            data = bytes(memory[packet.addr : packet.addr + 64])
+            response = CacheResponse(CACHE_RESPONSE_STATUS.RSP_S, data, packet.tag)
+            await cache_to_coh_agent_fifo.response.put(response)
+
+    agent = asyncio.create_task(serve_window_in_reverse())
+    buffer = bytearray(window * 64)
+    await asyncio.wait_for(
+        cache_controller.cache_coherent_load_into(0, buffer, window=window), timeout=5
+    )
+    await agent
+    assert buffer == memory[: window * 64]
+
+    await cache_controller.stop()
+    await task
+
+
+def test_memory_range_map():
+    for last_hit in (False, True):
+        range_map = MemoryRangeMap(last_hit)
+        cfg = MemoryRange(0x1000, 0x1000, MEM_ADDR_TYPE.CFG)
+        mmio = MemoryRange(0x4000, 0x100, MEM_ADDR_TYPE.MMIO)
+        dram = MemoryRange(0x3000, 0x1000, MEM_ADDR_TYPE.DRAM)
+        for mem_range in (cfg, mmio, dram):
+            range_map.add(mem_range)
+        assert list(range_map) == [cfg, dram, mmio]
+
+        assert range_map.find(0x0FFF) is None
+        assert range_map.find(0x1000) is cfg
+        assert range_map.find(0x1FFF) is cfg
+        assert range_map.find(0x2000) is None
+        assert range_map.find(0x3FFF) is dram
+        assert range_map.find(0x4000) is mmio
+        assert range_map.find(0x4100) is None
+
+        for overlapping in (
+            MemoryRange(0x1800, 0x1000, MEM_ADDR_TYPE.MMIO),
+            MemoryRange(0x2000, 0x1001, MEM_ADDR_TYPE.MMIO),
+            MemoryRange(0x0, 0x5000, MEM_ADDR_TYPE.MMIO),
+            MemoryRange(0x4000, 0x10, MEM_ADDR_TYPE.MMIO),
+            MemoryRange(0x2000, 0, MEM_ADDR_TYPE.MMIO),
+        ):
+            with pytest.raises(Exception):
+                range_map.add(overlapping)
+
+        # Hot-remove, including the range found last, and hot-add in the gap
+        assert range_map.find(0x3800) is dram
+        assert range_map.remove(MemoryRange(0x3000, 0x800, MEM_ADDR_TYPE.DRAM)) is False
+        assert range_map.remove(dram) is True
+        assert range_map.remove(dram) is False
+        assert range_map.find(0x3800) is None
+        cxl = MemoryRange(0x2000, 0x2000, MEM_ADDR_TYPE.CXL_UNCACHED)
+        range_map.add(cxl)
+        assert range_map.find(0x3800) is cxl
+        assert range_map.find(0x1800) is cfg
+        assert list(range_map) == [cfg, cxl, mmio]
+
+
+def test_cache_controller_mem_addr_type():
+    cache_controller = CacheController(
+        CacheControllerConfig(
+            component_name="test",
+            processor_to_cache_fifo=None,
+            cache_to_coh_agent_fifo=CacheFifoPair(),
+            coh_agent_to_cache_fifo=CacheFifoPair(),
+        )
+    )
+    cache_controller.add_mem_range(0x10000, 0x1000, MEM_ADDR_TYPE.DRAM)
+    cache_controller.add_mem_range(0x0, 0x1000, MEM_ADDR_TYPE.CFG)
+    assert cache_controller.get_mem_addr_type(0x10800) == MEM_ADDR_TYPE.DRAM
+    assert cache_controller.get_mem_addr_type(0x800) == MEM_ADDR_TYPE.CFG
+    assert cache_controller.get_mem_addr_type(0x1000) == MEM_ADDR_TYPE.OOB
+    assert [r.base_addr for r in cache_controller.get_memory_ranges()] == [0x0, 0x10000]
+
+    cache_controller.remove_mem_range(0x10000, 0x1000, MEM_ADDR_TYPE.DRAM)
+    assert cache_controller.get_mem_addr_type(0x10800) == MEM_ADDR_TYPE.OOB
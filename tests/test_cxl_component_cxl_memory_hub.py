@@ -0,0 +1,92 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+
+from opencis.cxl.component.cache_controller import MEM_ADDR_TYPE
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.cxl_memory_hub import CxlMemoryHub, CxlMemoryHubConfig
+from opencis.cxl.component.memory_trace import MEMORY_TRACE_OP, MemoryTraceRecorder
+from opencis.cxl.component.physical_port_manager import PhysicalPortManager
+from opencis.cxl.component.root_complex.root_complex import SystemMemControllerConfig
+from opencis.cxl.component.root_complex.root_port_client_manager import RootPortClientConfig
+from opencis.cxl.component.root_complex.root_port_switch import ROOT_PORT_SWITCH_TYPE
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.component.virtual_switch_manager import VirtualSwitchConfig, VirtualSwitchManager
+from opencis.util.number_const import MB
+
+# pylint: disable=duplicate-code
+
+BASE_TEST_PORT = 9600
+
+
+@pytest.mark.asyncio
+async def test_cxl_memory_hub_concurrent_requests():
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    recorder = MemoryTraceRecorder()
+    port_configs = [PortConfig(PORT_TYPE.USP), PortConfig(PORT_TYPE.DSP)]
+    switch_connection_manager = SwitchConnectionManager(port_configs, port=port)
+    physical_port_manager = PhysicalPortManager(
+        switch_connection_manager=switch_connection_manager, port_configs=port_configs
+    )
+    virtual_switch_manager = VirtualSwitchManager(
+        switch_configs=[
+            VirtualSwitchConfig(
+                upstream_port_index=0,
+                vppb_counts=1,
+                initial_bounds=[-1],
+                irq_host="127.0.0.1",
+                irq_port=port + 50,
+            )
+        ],
+        physical_port_manager=physical_port_manager,
+        allocated_ld={},
+    )
+    cxl_memory_hub = CxlMemoryHub(
+        CxlMemoryHubConfig(
+            host_name="Host",
+            root_bus=0,
+            root_port_switch_type=ROOT_PORT_SWITCH_TYPE.PASS_THROUGH,
+            root_ports=[RootPortClientConfig(0, "127.0.0.1", port)],
+            sys_mem_controller=SystemMemControllerConfig(
+                memory_size=1 * MB, memory_filename="mem_hub_dram.bin"
+            ),
+            irq_handler=None,
+            max_outstanding_requests=4,
+            trace_recorder=recorder,
+        )
+    )
+    components = [switch_connection_manager, physical_port_manager, virtual_switch_manager]
+    tasks = [asyncio.create_task(component.run()) for component in components]
+    await asyncio.gather(*(component.wait_for_ready() for component in components))
+    tasks.append(asyncio.create_task(cxl_memory_hub.run()))
+    await cxl_memory_hub.wait_for_ready()
+    cxl_memory_hub.add_mem_range(0, 1 * MB, MEM_ADDR_TYPE.DRAM)
+
+    # Every task stores and loads its own cacheline; with more tasks than outstanding
+    # requests, each must still get back its own data
+    async def access_cacheline(index: int):
+        for round_index in range(4):
+            value = (index << 8) | round_index
+            await cxl_memory_hub.store(index * 64, 64, value)
+            assert await cxl_memory_hub.load(index * 64, 64) == value
+
+    await asyncio.gather(*(access_cacheline(index) for index in range(8)))
+    values = await asyncio.gather(*(cxl_memory_hub.load(index * 64, 64) for index in range(8)))
+    assert values == [(index << 8) | 3 for index in range(8)]
+
+    records = recorder.get_records()
+    assert len(records) == 8 * 4 * 2 + 8
+    assert all(record.host == "Host" and record.size == 64 for record in records)
+    loads = [record for record in records if record.op == MEMORY_TRACE_OP.LOAD]
+    assert sorted(int.from_bytes(record.data, "little") for record in loads[-8:]) == values
+
+    await cxl_memory_hub.stop()
+    await asyncio.gather(*(component.stop() for component in components))
+    await asyncio.gather(*tasks)
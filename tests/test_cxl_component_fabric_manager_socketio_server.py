@@ -0,0 +1,200 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+import socketio
+
+from opencis.bin import socketio_client
+from opencis.cxl.cci.common import CCI_RETURN_CODE
+from opencis.cxl.cci.fabric_manager.physical_switch import IdentifySwitchDeviceResponsePayload
+from opencis.cxl.cci.fabric_manager.virtual_switch.get_virtual_cxl_switch_info import (
+    VCS_STATE,
+    GetVirtualCxlSwitchInfoResponsePayload,
+    PpbInfo,
+    VcsInfoBlock,
+)
+from opencis.cxl.cci.vendor_specfic import NotifySwitchUpdateRequestPayload
+from opencis.cxl.component.fabric_manager.socketio_server import (
+    FabricManagerSocketIoServer,
+    HostFMConnManager,
+    InventorySnapshot,
+)
+from opencis.cxl.component.virtual_switch.virtual_switch import PPB_BINDING_STATUS
+from opencis.cxl.transport.transaction import CciMessageHeaderPacket, CciMessagePacket
+
+BASE_TEST_PORT = 9650
+
+
+class FakeSwitchClient:
+    def __init__(self):
+        self.vcs_info_requests = 0
+        self.bound_port_id = 1
+        self.notification_handler = None
+        self.vcs_info_return_code = CCI_RETURN_CODE.SUCCESS
+
+    def register_notification_handler(self, handler):
+        self.notification_handler = handler
+
+    async def identify_switch_device(self):
+        return (CCI_RETURN_CODE.SUCCESS, IdentifySwitchDeviceResponsePayload(num_vcss=1))
+
+    async def get_virtual_cxl_switch_info(self, _):
+        self.vcs_info_requests += 1
+        if self.vcs_info_return_code != CCI_RETURN_CODE.SUCCESS:
+            return (self.vcs_info_return_code, None)
+        ppb_info = PpbInfo(0, PPB_BINDING_STATUS.BOUND_PHYSICAL_PORT, self.bound_port_id)
+        vcs_info = VcsInfoBlock(0, VCS_STATE.ENABLED, 0, 1, [ppb_info])
+        return (CCI_RETURN_CODE.SUCCESS, GetVirtualCxlSwitchInfoResponsePayload(1, [vcs_info]))
+
+    async def notify_switch_update(self):
+        request = NotifySwitchUpdateRequestPayload(
+            0, 0, PPB_BINDING_STATUS.BOUND_PHYSICAL_PORT
+        ).create_request()
+        header = CciMessageHeaderPacket()
+        header.command_opcode = request.opcode
+        header.set_message_payload_length(len(request.payload))
+        await self.notification_handler(CciMessagePacket.create(header, request.payload))
+
+
+def test_inventory_snapshot_reports_changed_entries():
+    snapshot = InventorySnapshot("id")
+    assert snapshot.get() is None
+    snapshot.update([{"id": 0, "state": "a"}, {"id": 1, "state": "a"}])
+    delta = snapshot.update([{"id": 0, "state": "a"}, {"id": 2, "state": "b"}])
+    assert delta == {"updated": [{"id": 2, "state": "b"}], "removed": [1]}
+    assert snapshot.get() == [{"id": 0, "state": "a"}, {"id": 2, "state": "b"}]
+    assert snapshot.update(snapshot.get()) == {"updated": [], "removed": []}
+
+
+@pytest.mark.asyncio
+async def test_socketio_server_coalesces_switch_notifications():
+    client = FakeSwitchClient()
+    port = BASE_TEST_PORT + pytest.PORT.TEST_2
+    server = FabricManagerSocketIoServer(
+        client,
+        HostFMConnManager(client, None),
+        host="127.0.0.1",
+        port=port,
+        notification_debounce=0.05,
+    )
+    server_task = asyncio.create_task(server.run())
+    await server.wait_for_ready()
+
+    emitted = []
+    sio_client = socketio.AsyncClient()
+
+    @sio_client.on("*")
+    async def record_event(event, data):
+        emitted.append((event, data))
+
+    await sio_client.connect(f"http://127.0.0.1:{port}")
+    try:
+        # a notification before any client asked for the inventory costs nothing
+        await client.notify_switch_update()
+        await asyncio.sleep(0.1)
+        assert client.vcs_info_requests == 0 and not emitted
+
+        response = await sio_client.call("vcs:get")
+        assert response["result"][0]["vppbs"][0]["boundPortId"] == 1
+        # answered from the snapshot while no notification arrived
+        await sio_client.call("vcs:get")
+        assert client.vcs_info_requests == 1
+
+        client.bound_port_id = 2
+        for _ in range(10):
+            await client.notify_switch_update()
+        await asyncio.sleep(0.15)
+        assert client.vcs_info_requests == 2
+        assert len(emitted) == 1
+        (event, delta) = emitted[0]
+        assert event == "vcs:updated"
+        assert delta["removed"] == []
+        assert delta["updated"][0]["vppbs"][0]["boundPortId"] == 2
+
+        # nothing changed: the refresh is not forwarded to clients
+        await client.notify_switch_update()
+        await asyncio.sleep(0.15)
+        assert client.vcs_info_requests == 3
+        assert len(emitted) == 1
+    finally:
+        await sio_client.disconnect()
+        await server.stop()
+        await server_task
+
+
+@pytest.mark.asyncio
+async def test_host_fm_conn_manager_caches_usp_and_groups_notifications():
+    client = FakeSwitchClient()
+    sent = []
+
+    class FakeHostConn:
+        async def send_irq_requests(self, requests, device=0):
+            sent.append((device, [request.vppb for request in requests]))
+
+    host_fm_conn_manager = HostFMConnManager(client, FakeHostConn())
+    await host_fm_conn_manager.notify_hosts([(0, 0), (1, 0), (2, 0)], bind=True)
+    await host_fm_conn_manager.notify_host_unbind(1, 0)
+    assert sent == [(0, [0, 1, 2]), (0, [1])]
+    assert client.vcs_info_requests == 1
+
+    host_fm_conn_manager.invalidate_topology()
+    assert await host_fm_conn_manager.get_usp_by_vcs_id(0) == 0
+    assert client.vcs_info_requests == 2
+
+    # A failed refresh leaves the topology unknown and skips the notification
+    client.vcs_info_return_code = CCI_RETURN_CODE.INTERNAL_ERROR
+    host_fm_conn_manager.invalidate_topology()
+    assert await host_fm_conn_manager.get_usp_by_vcs_id(0) is None
+    await host_fm_conn_manager.notify_host_bind(0, 0)
+    assert sent == [(0, [0, 1, 2]), (0, [1])]
+    client.vcs_info_return_code = CCI_RETURN_CODE.SUCCESS
+    await host_fm_conn_manager.notify_host_bind(0, 0)
+    assert sent == [(0, [0, 1, 2]), (0, [1]), (0, [0])]
+
+
+@pytest.mark.asyncio
+async def test_socketio_client_receives_inventory_deltas(capsys, monkeypatch):
+    client = FakeSwitchClient()
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    server = FabricManagerSocketIoServer(
+        client,
+        HostFMConnManager(client, None),
+        host="127.0.0.1",
+        port=port,
+        notification_debounce=0.01,
+    )
+    server_task = asyncio.create_task(server.run())
+    await server.wait_for_ready()
+
+    received = asyncio.Queue()
+    print_result = socketio_client.print_result
+
+    def record_result(data):
+        print_result(data)
+        received.put_nowait(data)
+
+    monkeypatch.setattr(socketio_client, "print_result", record_result)
+    await socketio_client.sio.connect(f"http://127.0.0.1:{port}")
+    try:
+        await socketio_client.send("vcs:get")
+        assert (await received.get())["result"][0]["vppbs"][0]["boundPortId"] == 1
+
+        client.bound_port_id = 2
+        await client.notify_switch_update()
+        delta = await asyncio.wait_for(received.get(), timeout=5)
+    finally:
+        await socketio_client.sio.disconnect()
+        await server.stop()
+        await server_task
+
+    assert delta["removed"] == []
+    assert delta["updated"][0]["vppbs"][0]["boundPortId"] == 2
+    output = capsys.readouterr().out
+    assert "[Notification]\nvcs:updated\n" in output
+    assert "port:updated" not in output
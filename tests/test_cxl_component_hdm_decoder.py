@@ -7,12 +7,31 @@
 
 from opencis.cxl.component.hdm_decoder import (
     DeviceHdmDecoderManager,
+    SwitchHdmDecoderManager,
     HdmDecoderCapabilities,
     CXL_DEVICE_TYPE,
     DecoderInfo,
+    INTERLEAVE_WAYS,
 )
 
 
+def create_capabilities(decoder_count: int) -> HdmDecoderCapabilities:
+    # pylint: disable=duplicate-code
+    return HdmDecoderCapabilities(
+        decoder_count=decoder_count,
+        target_count=8,
+        a11to8_interleave_capable=0,
+        a14to12_interleave_capable=0,
+        poison_on_decoder_error_capability=0,
+        three_six_twelve_way_interleave_capable=0,
+        sixteen_way_interleave_capable=0,
+        uio_capable=0,
+        uio_capable_decoder_count=0,
+        mem_data_nxm_capable=0,
+        bi_capable=True,
+    )
+
+
 def test_device_hdm_decoder_manager():
     # pylint: disable=duplicate-code
     capabilities = HdmDecoderCapabilities(
@@ -62,3 +81,48 @@ def test_device_hdm_decoder_manager():
     assert decoder.commit(decoder_index, decoder_info) is True
     assert decoder.get_dpa(0x2012) == 0x12
     assert decoder.get_dpa(0x2412) == 0x212
+
+
+def test_device_hdm_decoder_manager_multiple_decoders():
+    # 4 decoders
+    decoder = DeviceHdmDecoderManager(create_capabilities(2))
+
+    # Decoders commit in index order
+    assert decoder.commit(1, DecoderInfo(size=0x1000, base=0x10000)) is False
+    assert decoder.commit(0, DecoderInfo(size=0x1000, base=0x10000)) is True
+    # and decode HPAs above the previous decoder
+    assert decoder.commit(1, DecoderInfo(size=0x1000, base=0x10800)) is False
+    assert decoder.commit(4, DecoderInfo(size=0x1000, base=0x20000)) is False
+
+    # The DPA range of decoder 1 follows decoder 0 and the DPA skip
+    assert decoder.commit(1, DecoderInfo(size=0x1000, base=0x20000, dpa_skip=0x400)) is True
+    assert decoder.get_dpa(0x10010) == 0x10
+    assert decoder.get_dpa(0x20010) == 0x1410
+    assert decoder.get_hpa(0x10) == 0x10010
+    assert decoder.get_hpa(0x1410) == 0x20010
+    assert decoder.get_hpa(0x1010) is None
+
+    # A 2-way decoder uses half of its HPA range worth of DPA
+    info = DecoderInfo(size=0x2000, base=0x30000, iw=INTERLEAVE_WAYS.WAY_2)
+    assert decoder.commit(2, info) is True
+    assert decoder.get_dpa(0x30010) == 0x2410
+    assert decoder.get_dpa(0x30210) == 0x2510
+    assert decoder.commit(3, DecoderInfo(size=0x1000, base=0x40000)) is True
+    assert decoder.get_dpa(0x40000) == 0x3400
+
+
+def test_switch_hdm_decoder_manager_multiple_decoders():
+    # 2 decoders
+    decoder = SwitchHdmDecoderManager(create_capabilities(1))
+    assert decoder.get_device_type() == CXL_DEVICE_TYPE.SWITCH
+
+    info = DecoderInfo(size=0x2000, base=0x10000, iw=INTERLEAVE_WAYS.WAY_2, target_ports=[3, 5])
+    assert decoder.commit(1, info) is False
+    assert decoder.commit(0, info) is True
+    assert decoder.commit(1, DecoderInfo(size=0x1000, base=0x20000, target_ports=[7])) is True
+    assert decoder.commit(2, DecoderInfo(size=0x1000, base=0x30000, target_ports=[7])) is False
+
+    assert decoder.get_target(0x10000) == 3
+    assert decoder.get_target(0x10100) == 5
+    assert decoder.get_target(0x20100) == 7
+    assert decoder.get_target(0x30000) is None
@@ -0,0 +1,148 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.root_complex.io_bridge import IoBridge, IoBridgeConfig
+from opencis.cxl.transport.memory_fifo import MemoryFifoPair
+from opencis.cxl.transport.transaction import (
+    CXL_IO_FMT_TYPE,
+    CxlIoCompletionWithDataPacket,
+    CxlIoMemRdPacket,
+)
+from opencis.drivers.cxl_bus_driver import CxlBusDriver
+from opencis.drivers.pci_bus_driver import PciBusDriver
+from opencis.pci.component.fifo_pair import FifoPair
+from opencis.util.number_const import MB
+
+# pylint: disable=duplicate-code
+
+
+def create_io_bridge(cfg_fifo: FifoPair, mmio_fifo: FifoPair) -> IoBridge:
+    return IoBridge(
+        IoBridgeConfig(
+            root_bus=0,
+            cxl_io_cfg_fifos=cfg_fifo,
+            cxl_io_mmio_fifos=mmio_fifo,
+            memory_producer_fifos=MemoryFifoPair(),
+            host_name="Host",
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_io_bridge_matches_mmio_completions_by_tag():
+    mmio_fifo = FifoPair()
+    io_bridge = create_io_bridge(FifoPair(), mmio_fifo)
+    task = asyncio.create_task(io_bridge.run())
+    await io_bridge.wait_for_ready()
+
+    reads = asyncio.gather(io_bridge.read_mmio(0x1000, 4), io_bridge.read_mmio(0x2000, 4))
+    requests: List[CxlIoMemRdPacket] = [
+        await mmio_fifo.host_to_target.get(),
+        await mmio_fifo.host_to_target.get(),
+    ]
+    # Complete the second read first
+    for request in reversed(requests):
+        data = request.get_address() >> 8
+        completion = CxlIoCompletionWithDataPacket.create(0, request.mreq_header.tag, data)
+        await mmio_fifo.target_to_host.put(completion)
+    assert await reads == [0x10, 0x20]
+
+    await io_bridge.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_cxl_bus_driver_concurrent_discovery():
+    cfg_fifo = FifoPair()
+    mmio_fifo = FifoPair()
+    io_bridge = create_io_bridge(cfg_fifo, mmio_fifo)
+    connections = [CxlConnection(), CxlConnection()]
+    devices = [
+        SingleLogicalDevice(
+            memory_size=256 * MB,
+            memory_file=f"mem_discovery{index}.bin",
+            serial_number=f"{index:016X}",
+            test_mode=True,
+            cxl_connection=connection,
+        )
+        for index, connection in enumerate(connections)
+    ]
+    tasks = [asyncio.create_task(device.run()) for device in devices]
+    tasks.append(asyncio.create_task(io_bridge.run()))
+    await asyncio.gather(*(device.wait_for_ready() for device in devices))
+    await io_bridge.wait_for_ready()
+
+    # Device N sits alone on bus N + 2, as below a downstream port
+    mmio_ranges = []
+
+    async def route_cfg():
+        while True:
+            packet = await cfg_fifo.host_to_target.get()
+            if packet.is_cfg_read():
+                packet.cxl_io_header.fmt_type = CXL_IO_FMT_TYPE.CFG_RD0
+            else:
+                packet.cxl_io_header.fmt_type = CXL_IO_FMT_TYPE.CFG_WR0
+            await connections[packet.get_bus() - 2].cfg_fifo.host_to_target.put(packet)
+
+    async def route_mmio():
+        while True:
+            packet = await mmio_fifo.host_to_target.get()
+            for start, end, connection in mmio_ranges:
+                if start <= packet.get_address() < end:
+                    await connection.mmio_fifo.host_to_target.put(packet)
+                    break
+
+    async def forward(source: FifoPair, destination: FifoPair):
+        while True:
+            await destination.target_to_host.put(await source.target_to_host.get())
+
+    fabric_tasks = [asyncio.create_task(route_cfg()), asyncio.create_task(route_mmio())]
+    for connection in connections:
+        fabric_tasks.append(asyncio.create_task(forward(connection.cfg_fifo, cfg_fifo)))
+        fabric_tasks.append(asyncio.create_task(forward(connection.mmio_fifo, mmio_fifo)))
+
+    pci_bus_driver = PciBusDriver(io_bridge)
+    memory_start = 0xA0000000
+    for bus in (2, 3):
+        # pylint: disable=protected-access
+        (_, memory_start) = await pci_bus_driver._scan_bus(bus, memory_start)
+    for device in pci_bus_driver.get_devices():
+        bar = device.bars[0]
+        connection = connections[(device.bdf >> 8) - 2]
+        mmio_ranges.append((bar.base_address, bar.base_address + bar.size, connection))
+
+    results = []
+    for concurrent in (False, True):
+        io_bridge.get_config_shadow().invalidate()
+        cxl_bus_driver = CxlBusDriver(pci_bus_driver, io_bridge, concurrent_discovery=concurrent)
+        await cxl_bus_driver.init()
+        results.append(
+            [
+                (device.dvsecs, device.registers, device.cachemem_registers, device.device_dvsec)
+                for device in cxl_bus_driver.get_devices()
+            ]
+        )
+    assert len(results[0]) == 2
+    assert results[0] == results[1]
+    for _, registers, cachemem_registers, device_dvsec in results[1]:
+        assert len(registers) > 0
+        assert len(cachemem_registers) > 0
+        assert device_dvsec.mem_capable
+        assert device_dvsec.ranges[0].memory_size == 256 * MB
+
+    for task in fabric_tasks:
+        task.cancel()
+    await asyncio.gather(*(device.stop() for device in devices))
+    await io_bridge.stop()
+    await asyncio.gather(*tasks)
@@ -0,0 +1,83 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+
+from opencis.cxl.component.irq_manager import Irq, IrqManager
+from opencis.cxl.component.short_msg_conn import InterruptCoalescing
+
+BASE_TEST_PORT = 9550
+
+
+async def _connect(port: int):
+    host = IrqManager("Host", port=port, server=True)
+    device = IrqManager("Device", port=port, device_id=1)
+    tasks = [asyncio.create_task(host.run()), asyncio.create_task(device.run())]
+    await host.wait_for_ready()
+    await device.wait_for_ready()
+    await device.start_connection()
+    return (host, device, tasks)
+
+
+async def _disconnect(host: IrqManager, device: IrqManager, tasks):
+    await device.shutdown()
+    await device.stop()
+    await host.stop()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_irq_manager_coalesces_by_count_and_timer():
+    (host, device, tasks) = await _connect(BASE_TEST_PORT + pytest.PORT.TEST_1)
+    batches = asyncio.Queue()
+
+    async def on_interrupts(dev_id: int, irqs):
+        await batches.put((dev_id, len(irqs)))
+
+    host.register_vector_handler(
+        Irq.HOST_SENT, on_interrupts, dev_id=1, coalescing=InterruptCoalescing(4, 0.05)
+    )
+    for _ in range(10):
+        await device.send_irq_request(Irq.HOST_SENT)
+    assert await asyncio.wait_for(batches.get(), timeout=5) == (1, 4)
+    assert await asyncio.wait_for(batches.get(), timeout=5) == (1, 4)
+    # the last two are delivered once the timer expires
+    assert await asyncio.wait_for(batches.get(), timeout=5) == (1, 2)
+    assert batches.empty()
+    await _disconnect(host, device, tasks)
+
+
+@pytest.mark.asyncio
+async def test_irq_manager_holds_masked_vector_pending():
+    (host, device, tasks) = await _connect(BASE_TEST_PORT + pytest.PORT.TEST_2)
+    batches = []
+    delivered = asyncio.Event()
+    marker_received = asyncio.Event()
+
+    async def on_interrupts(_: int, irqs):
+        batches.append(irqs)
+        delivered.set()
+
+    async def on_marker(*_):
+        marker_received.set()
+
+    host.register_vector_handler(Irq.DEV_ADDED, on_interrupts, dev_id=1)
+    host.register_vector_handler(Irq.HOST_READY, on_marker, dev_id=1)
+    host.mask_vector(Irq.DEV_ADDED, dev_id=1)
+    await device.send_irq_request(Irq.DEV_ADDED)
+    await device.send_irq_request(Irq.DEV_ADDED)
+    # Messages arrive in order, so both have reached the masked vector by the marker
+    await device.send_irq_request(Irq.HOST_READY)
+    await asyncio.wait_for(marker_received.wait(), timeout=5)
+    assert not batches
+
+    host.unmask_vector(Irq.DEV_ADDED, dev_id=1)
+    await asyncio.wait_for(delivered.wait(), timeout=5)
+    assert batches == [[Irq.DEV_ADDED, Irq.DEV_ADDED]]
+    await _disconnect(host, device, tasks)
@@ -0,0 +1,115 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+
+from opencis.cxl.component.cache_controller import (
+    CacheController,
+    CacheControllerConfig,
+    MEM_ADDR_TYPE,
+)
+from opencis.cxl.component.host_llc_iogen import HostLlcIoGen, HostLlcIoGenConfig
+from opencis.cxl.component.llc_iogen import (
+    IOGEN_ADDRESS_PATTERN,
+    LlcIoGenWorkload,
+)
+from opencis.cxl.transport.cache_fifo import CacheFifoPair
+from opencis.cxl.transport.memory_fifo import MemoryFifoPair
+
+MEMORY_SIZE = 0x4000
+
+
+@pytest.mark.asyncio
+async def test_llc_iogen_workloads(run_backing_memory):
+    processor_to_cache_fifo = MemoryFifoPair()
+    cache_to_coh_bridge_fifo = CacheFifoPair()
+    cache_controller = CacheController(
+        CacheControllerConfig(
+            component_name="Host",
+            processor_to_cache_fifo=processor_to_cache_fifo,
+            cache_to_coh_agent_fifo=CacheFifoPair(),
+            coh_agent_to_cache_fifo=CacheFifoPair(),
+            cache_to_coh_bridge_fifo=cache_to_coh_bridge_fifo,
+            coh_bridge_to_cache_fifo=CacheFifoPair(),
+        )
+    )
+    cache_controller.add_mem_range(0, MEMORY_SIZE, MEM_ADDR_TYPE.DRAM)
+    iogen = HostLlcIoGen(
+        HostLlcIoGenConfig(
+            host_name="Host",
+            processor_to_cache_fifo=processor_to_cache_fifo,
+            memory_size=MEMORY_SIZE,
+        )
+    )
+    agent = asyncio.create_task(
+        run_backing_memory(cache_to_coh_bridge_fifo, bytearray(MEMORY_SIZE))
+    )
+    tasks = [asyncio.create_task(component.run()) for component in (cache_controller, iogen)]
+    await asyncio.gather(cache_controller.wait_for_ready(), iogen.wait_for_ready())
+
+    for pattern in IOGEN_ADDRESS_PATTERN:
+        for queue_depth in (1, 8):
+            report = await iogen.run_workload(
+                LlcIoGenWorkload(
+                    pattern=pattern,
+                    read_ratio=0.5,
+                    queue_depth=queue_depth,
+                    working_set_size=0x1000,
+                    stride=0x100,
+                    op_count=200,
+                    seed=queue_depth,
+                )
+            )
+            assert report.reads + report.writes == 200
+            assert len(report.latencies) == 200
+            assert report.failures == 0
+            assert report.mismatches == 0
+            assert 0 < report.reads < 200
+
+    # Loads outside the DRAM range fail without stopping the workload
+    report = await iogen.run_workload(
+        LlcIoGenWorkload(
+            read_ratio=1.0, base_addr=MEMORY_SIZE * 2, working_set_size=0x400, op_count=10
+        )
+    )
+    assert report.failures == 10
+
+    report = await iogen.run_workload(
+        LlcIoGenWorkload(pattern=IOGEN_ADDRESS_PATTERN.SEQUENTIAL, target_rate=200, duration=0.1)
+    )
+    assert 10 <= report.reads + report.writes <= 21
+
+    with pytest.raises(Exception):
+        await iogen.run_workload(LlcIoGenWorkload())
+
+    await asyncio.gather(iogen.stop(), cache_controller.stop())
+    await asyncio.gather(*tasks)
+    await cache_to_coh_bridge_fifo.request.put(None)
+    await agent
+
+
+@pytest.mark.asyncio
+async def test_llc_iogen_stop_during_workload():
+    # Nothing serves the processor fifo, so the workload waits on its first response
+    processor_to_cache_fifo = MemoryFifoPair()
+    iogen = HostLlcIoGen(
+        HostLlcIoGenConfig(
+            host_name="Host",
+            processor_to_cache_fifo=processor_to_cache_fifo,
+            memory_size=MEMORY_SIZE,
+            workload=LlcIoGenWorkload(duration=60),
+        )
+    )
+    task = asyncio.create_task(iogen.run())
+    await iogen.wait_for_ready()
+    await processor_to_cache_fifo.request.get()
+
+    await asyncio.wait_for(iogen.stop(), timeout=5)
+    await task
+    assert iogen.get_report() is None
@@ -0,0 +1,154 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import time
+from typing import cast
+
+import pytest
+
+from opencis.cxl.cci.common import CCI_FM_API_COMMAND_OPCODE, CCI_RETURN_CODE
+from opencis.cxl.cci.fabric_manager.physical_switch import GetPhysicalPortStateCommand
+from opencis.cxl.cci.fabric_manager.physical_switch.get_physical_port_state import (
+    CURRENT_PORT_CONFIGURATION_STATE,
+)
+from opencis.cxl.cci.fabric_manager.mld_components import GetLdInfoResponsePayload
+from opencis.cxl.cci.fabric_manager.virtual_switch import BindVppbRequestPayload
+from opencis.cxl.component.cci_executor import CciBackgroundCommand, CciRequest, CciResponse
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.mctp.mctp_cci_api_client import MCTP_TAG_COUNT, MctpCciApiClient
+from opencis.cxl.component.mctp.mctp_cci_executor import MctpCciExecutor
+from opencis.cxl.component.mctp.mctp_connection import MctpConnection
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.transport.transaction import (
+    CCI_MCTP_MESSAGE_CATEGORY,
+    CciMessageHeaderPacket,
+    CciMessagePacket,
+    CciPayloadPacket,
+)
+
+
+class SlowBindCommand(CciBackgroundCommand):
+    def __init__(self, delay: float):
+        super().__init__(CCI_FM_API_COMMAND_OPCODE.BIND_VPPB)
+        self._delay = delay
+
+    async def _execute(self, request: CciRequest, callback) -> CciResponse:
+        await asyncio.sleep(self._delay)
+        await callback(100)
+        return CciResponse()
+
+
+async def _start(*components):
+    tasks = [asyncio.create_task(component.run()) for component in components]
+    await asyncio.gather(*(component.wait_for_ready() for component in components))
+    return tasks
+
+
+async def _stop(tasks, *components):
+    for component in components:
+        await component.stop()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_mctp_cci_api_client_bounds_and_wraps_tags():
+    connection = MctpConnection()
+    client = MctpCciApiClient(connection)
+    tasks = await _start(client)
+
+    request_count = 3 * MCTP_TAG_COUNT
+    seen_tags = []
+
+    async def reply_out_of_order():
+        while len(seen_tags) < request_count:
+            # the client never has more than 8 requests outstanding
+            batch = [await connection.controller_to_ep.get()]
+            await asyncio.sleep(0.01)
+            while not connection.controller_to_ep.empty():
+                batch.append(connection.controller_to_ep.get_nowait())
+            packets = [cast(CciPayloadPacket, packet) for packet in batch]
+            tags = [packet.get_packet().header.message_tag for packet in packets]
+            assert len(batch) <= MCTP_TAG_COUNT
+            assert len(set(tags)) == len(tags)
+            seen_tags.extend(tags)
+            for packet, tag in reversed(list(zip(packets, tags))):
+                # echo the port index so that misrouted responses are detected
+                payload = GetLdInfoResponsePayload(ld_count=packet.cci_header.port_index)
+                header = CciMessageHeaderPacket()
+                header.message_category = CCI_MCTP_MESSAGE_CATEGORY.RESPONSE
+                header.message_tag = tag
+                header.return_code = CCI_RETURN_CODE.SUCCESS
+                header.set_message_payload_length(len(payload.dump()))
+                response = CciMessagePacket.create(header, payload.dump())
+                await connection.ep_to_controller.put(
+                    CciPayloadPacket.create(response, response.get_total_size())
+                )
+
+    responder = asyncio.create_task(reply_out_of_order())
+    results = await asyncio.gather(
+        *(client.get_ld_info(port_index) for port_index in range(request_count))
+    )
+    await responder
+    assert all(0 <= tag < MCTP_TAG_COUNT for tag in seen_tags)
+    assert [response.ld_count for _, response in results] == list(range(request_count))
+    await _stop(tasks, client)
+
+    with pytest.raises(ValueError):
+        MctpCciApiClient(connection, max_outstanding=MCTP_TAG_COUNT + 1)
+
+
+@pytest.mark.asyncio
+async def test_mctp_cci_api_client_gathers_64_port_states():
+    port_configs = [PortConfig(PORT_TYPE.USP)] + [PortConfig(PORT_TYPE.DSP)] * 63
+    connection = MctpConnection()
+    executor = MctpCciExecutor(connection, None, [])
+    executor.register_cci_commands(
+        [GetPhysicalPortStateCommand(SwitchConnectionManager(port_configs), [])]
+    )
+    client = MctpCciApiClient(connection)
+    tasks = await _start(executor, client)
+
+    (return_code, response) = await client.gather_port_states(range(64))
+    assert return_code == CCI_RETURN_CODE.SUCCESS
+    assert [port.port_id for port in response.port_info_list] == list(range(64))
+    states = [port.current_port_configuration_state for port in response.port_info_list]
+    assert states[0] == CURRENT_PORT_CONFIGURATION_STATE.USP
+    assert set(states[1:]) == {CURRENT_PORT_CONFIGURATION_STATE.DSP}
+
+    (return_code, response) = await client.gather_port_states([1, 64])
+    assert return_code == CCI_RETURN_CODE.INVALID_INPUT
+    assert response is None
+
+    # a failing chunk between successful ones fails the whole request
+    port_ids = list(range(16)) + [64] + list(range(16, 32))
+    (return_code, response) = await client.gather_port_states(port_ids, chunk_size=8)
+    assert return_code == CCI_RETURN_CODE.INVALID_INPUT
+    assert response is None
+    await _stop(tasks, client, executor)
+
+
+@pytest.mark.asyncio
+async def test_mctp_cci_api_client_waits_for_background_notification():
+    connection = MctpConnection()
+    executor = MctpCciExecutor(connection, None, [])
+    executor.register_cci_commands([SlowBindCommand(delay=0.05)])
+    # a long poll interval: only the completion notification can finish in time
+    client = MctpCciApiClient(connection, background_poll_interval=10)
+    tasks = await _start(executor, client)
+
+    request = BindVppbRequestPayload(vcs_id=0, vppb_id=0, physical_port_id=1)
+    start = time.perf_counter()
+    (return_code, result) = await client.bind_vppb(request)
+    assert time.perf_counter() - start < 1
+    assert return_code == CCI_RETURN_CODE.SUCCESS
+    assert result == CCI_RETURN_CODE.SUCCESS
+
+    (return_code, _) = await client.bind_vppb(request, wait_for_completion=False)
+    assert return_code == CCI_RETURN_CODE.BACKGROUND_COMMAND_STARTED
+    await asyncio.sleep(0.1)
+    await _stop(tasks, client, executor)
@@ -0,0 +1,145 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+
+from opencis.cxl.cci.common import (
+    CCI_FM_API_COMMAND_OPCODE,
+    CCI_GENERIC_COMMAND_OPCODE,
+    CCI_RETURN_CODE,
+)
+from opencis.cxl.component.cci_executor import CciForegroundCommand, CciRequest, CciResponse
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.fmld import FMLD
+from opencis.cxl.component.mctp.mctp_cci_executor import (
+    MAX_OUTSTANDING_LD_REQUESTS,
+    MctpCciExecutor,
+)
+from opencis.cxl.component.mctp.mctp_connection import MctpConnection
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.device.cxl_type3_device import CXL_T3_DEV_TYPE
+from opencis.cxl.transport.transaction import (
+    CCI_MCTP_MESSAGE_CATEGORY,
+    CciMessageHeaderPacket,
+    CciMessagePacket,
+    CciPayloadPacket,
+    GetLdInfoResponsePacket,
+)
+
+PORT_CONFIGS = [PortConfig(PORT_TYPE.USP), PortConfig(PORT_TYPE.DSP), PortConfig(PORT_TYPE.DSP)]
+
+
+class SlowCommand(CciForegroundCommand):
+    def __init__(self, opcode: int, delay: float):
+        super().__init__(opcode)
+        self._delay = delay
+
+    async def _execute(self, request: CciRequest) -> CciResponse:
+        await asyncio.sleep(self._delay)
+        return CciResponse()
+
+
+def _request(opcode: int, message_tag: int, port_index: int = 0) -> CciPayloadPacket:
+    header = CciMessageHeaderPacket()
+    header.message_category = CCI_MCTP_MESSAGE_CATEGORY.REQUEST
+    header.message_tag = message_tag
+    header.command_opcode = opcode
+    packet = CciMessagePacket.create(header, bytes())
+    return CciPayloadPacket.create(packet, packet.get_total_size(), port_index)
+
+
+async def _response(connection: MctpConnection) -> CciMessagePacket:
+    packet = await asyncio.wait_for(connection.ep_to_controller.get(), 5)
+    return packet.get_packet()
+
+
+@pytest.mark.asyncio
+async def test_mctp_cci_executor_runs_targets_concurrently_in_order():
+    switch_connection_manager = SwitchConnectionManager(PORT_CONFIGS)
+    connection = MctpConnection()
+    executor = MctpCciExecutor(connection, switch_connection_manager, PORT_CONFIGS)
+    executor.register_cci_commands(
+        [
+            SlowCommand(CCI_GENERIC_COMMAND_OPCODE.IDENTIFY, delay=0.2),
+            SlowCommand(CCI_GENERIC_COMMAND_OPCODE.GET_TIMESTAMP, delay=0),
+        ]
+    )
+    fmld = FMLD(
+        switch_connection_manager.get_cxl_connection(1).cci_fifo,
+        ld_count=4,
+        dev_type=CXL_T3_DEV_TYPE.MLD,
+    )
+    tasks = [asyncio.create_task(component.run()) for component in (executor, fmld)]
+    await executor.wait_for_ready()
+    await fmld.wait_for_ready()
+
+    requests = [
+        _request(CCI_GENERIC_COMMAND_OPCODE.IDENTIFY, 0),
+        _request(CCI_GENERIC_COMMAND_OPCODE.GET_TIMESTAMP, 1),
+        _request(CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO, 2, port_index=1),
+        _request(CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO, 3, port_index=1),
+        # port 0 is the USP: there is no MLD to pass the request to
+        _request(CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO, 4, port_index=0),
+    ]
+    for request in requests:
+        await connection.controller_to_ep.put(request)
+
+    responses = [await _response(connection) for _ in requests]
+    tags = [response.header.message_tag for response in responses]
+    # LD requests overtake the slow switch command; each target keeps its order
+    assert tags.index(2) < tags.index(0)
+    assert tags.index(2) < tags.index(3)
+    assert tags.index(0) < tags.index(1)
+    return_codes = {
+        response.header.message_tag: response.header.return_code for response in responses
+    }
+    assert return_codes[4] == CCI_RETURN_CODE.INVALID_INPUT
+    assert return_codes[2] == CCI_RETURN_CODE.SUCCESS
+
+    await executor.stop()
+    await fmld.stop()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_mctp_cci_executor_bounds_outstanding_ld_requests():
+    switch_connection_manager = SwitchConnectionManager(PORT_CONFIGS)
+    cci_fifo = switch_connection_manager.get_cxl_connection(2).cci_fifo
+    connection = MctpConnection()
+    executor = MctpCciExecutor(connection, switch_connection_manager, PORT_CONFIGS)
+    task = asyncio.create_task(executor.run())
+    await executor.wait_for_ready()
+
+    for tag in range(MAX_OUTSTANDING_LD_REQUESTS + 1):
+        await connection.controller_to_ep.put(
+            _request(CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO, tag, port_index=2)
+        )
+    await asyncio.sleep(0.05)
+    assert cci_fifo.host_to_target.qsize() == MAX_OUTSTANDING_LD_REQUESTS
+
+    first = await cci_fifo.host_to_target.get()
+    await cci_fifo.target_to_host.put(
+        GetLdInfoResponsePacket.create(0, 1, first.header_data.message_tag)
+    )
+    assert (await _response(connection)).header.message_tag == 0
+    await asyncio.sleep(0.05)
+    assert cci_fifo.host_to_target.qsize() == MAX_OUTSTANDING_LD_REQUESTS
+    last = [await cci_fifo.host_to_target.get() for _ in range(MAX_OUTSTANDING_LD_REQUESTS)][-1]
+    assert last.header_data.message_tag == MAX_OUTSTANDING_LD_REQUESTS
+
+    # a reused tag is rejected instead of overwriting the outstanding entry
+    await connection.controller_to_ep.put(
+        _request(CCI_FM_API_COMMAND_OPCODE.GET_LD_INFO, 1, port_index=2)
+    )
+    response = await _response(connection)
+    assert response.header.message_tag == 1
+    assert response.header.return_code == CCI_RETURN_CODE.BUSY
+
+    await executor.stop()
+    await task
@@ -0,0 +1,110 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from asyncio import create_task
+from io import BytesIO
+
+import pytest
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.memory_trace import (
+    CxlMemTraceTarget,
+    MEMORY_TRACE_OP,
+    MemoryTraceRecord,
+    MemoryTraceRecorder,
+    MemoryTraceReplayer,
+    read_memory_trace,
+    write_memory_trace,
+)
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.util.number_const import MB
+
+# pylint: disable=duplicate-code
+
+
+def test_memory_trace_format():
+    records = [
+        MemoryTraceRecord(0, "Host0", MEMORY_TRACE_OP.STORE, 0x1000, 64, bytes(range(64))),
+        MemoryTraceRecord(1500, "Host1", MEMORY_TRACE_OP.LOAD, 0xFE000000, 4, b"\x01\x02\x03\x04"),
+        MemoryTraceRecord(2**40, "Host0", MEMORY_TRACE_OP.LOAD, 0x100000000000, 64),
+    ]
+    file = BytesIO()
+    write_memory_trace(file, records)
+    file.seek(0)
+    assert list(read_memory_trace(file)) == records
+
+    with pytest.raises(Exception):
+        list(read_memory_trace(BytesIO(file.getvalue()[:-1])))
+    with pytest.raises(Exception):
+        list(read_memory_trace(BytesIO(b"XXXX" + file.getvalue()[4:])))
+
+
+@pytest.mark.asyncio
+async def test_memory_trace_record_and_replay(tmp_path):
+    transport_connection = CxlConnection()
+    recorder = MemoryTraceRecorder()
+    root_port_device = CxlRootPortDevice(
+        downstream_connection=transport_connection, label="Port0", trace_recorder=recorder
+    )
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file="mem_trace.bin",
+        serial_number="FFFFFFFFFFFFFFFF",
+        test_mode=True,
+        cxl_connection=transport_connection,
+    )
+    task = create_task(device.run())
+    await device.wait_for_ready()
+
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    hpa_base = 0x100000000
+    await root_port_device.configure_hdm_decoder_single_device(info, hpa_base)
+
+    for index in range(8):
+        await root_port_device.cxl_mem_write(hpa_base + index * 64, 0xC0DE0000 + index)
+    for index in range(8):
+        assert await root_port_device.cxl_mem_read(hpa_base + index * 64) == 0xC0DE0000 + index
+
+    trace_file = tmp_path / "port0.trace"
+    recorder.save(trace_file)
+    with open(trace_file, "rb") as file:
+        records = list(read_memory_trace(file))
+    assert records == recorder.get_records()
+    assert [record.op for record in records] == [MEMORY_TRACE_OP.STORE] * 8 + [
+        MEMORY_TRACE_OP.LOAD
+    ] * 8
+    assert all(record.host == "CxlRootPortDevice:Port0" for record in records)
+    assert records[8].data == (0xC0DE0000).to_bytes(64, "little")
+
+    replayer = MemoryTraceReplayer({"CxlRootPortDevice:Port0": CxlMemTraceTarget(root_port_device)})
+    for report in (
+        await replayer.replay_open_loop(records, speed=2.0),
+        await replayer.replay_closed_loop(records, queue_depth=1),
+        await replayer.replay_closed_loop(records, queue_depth=4),
+    ):
+        assert (report.reads, report.writes) == (8, 8)
+        assert (report.failures, report.mismatches) == (0, 0)
+        assert len(report.latencies) == 16
+
+    # Responses that differ from the recorded ones are divergences
+    records[8].data = (0xBAD).to_bytes(64, "little")
+    report = await replayer.replay_closed_loop(records)
+    assert (report.failures, report.mismatches) == (0, 1)
+
+    # The root port only moves whole cachelines
+    records[0].size = 32
+    report = await replayer.replay_closed_loop(records[:1])
+    assert report.failures == 1
+
+    with pytest.raises(Exception):
+        await MemoryTraceReplayer({}).replay_closed_loop(records)
+
+    await device.stop()
+    await task
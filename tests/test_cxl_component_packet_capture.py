@@ -0,0 +1,166 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+from io import BytesIO
+
+import pytest
+
+from opencis.cxl.component.packet_capture import (
+    CHANNEL_CXL_IO,
+    CHANNEL_CXL_MEM,
+    CHANNEL_SIDEBAND,
+    analyze_packet_capture,
+    decode_packet_capture,
+    decode_tcp_stream,
+    get_host_streams,
+    replay_packet_capture,
+)
+from opencis.cxl.component.packet_reader import PacketReader
+from opencis.cxl.transport.transaction import (
+    BaseSidebandPacket,
+    CxlIoCfgRdPacket,
+    CxlIoCompletionWithDataPacket,
+    CxlIoMemWrPacket,
+    CxlMemCmpPacket,
+    CxlMemM2SReqPacket,
+    CxlMemM2SRwDPacket,
+    CxlMemMemDataPacket,
+    CxlMemMemRdPacket,
+    CxlMemMemWrPacket,
+    SIDEBAND_TYPES,
+    SidebandConnectionRequestPacket,
+)
+from opencis.util.pcap import PcapWriter, read_pcap, reassemble_tcp_streams
+
+BASE_TEST_PORT = 9700
+
+HOST = ("127.0.0.1", 40000)
+SWITCH = ("127.0.0.1", 8000)
+
+
+def _write_capture(file) -> PcapWriter:
+    writer = PcapWriter(file)
+    request = bytes(SidebandConnectionRequestPacket.create(0))
+    writer.write_segment(1.0, HOST, SWITCH, request)
+    accept = bytes(BaseSidebandPacket.create(SIDEBAND_TYPES.CONNECTION_ACCEPT))
+    writer.write_segment(1.0001, SWITCH, HOST, accept)
+
+    cfg_rd = bytes(CxlIoCfgRdPacket.create(0x100, 0, 4, req_id=0, tag=7))
+    # Split across two segments, with the second one retransmitted
+    writer.write_segment(1.001, HOST, SWITCH, cfg_rd[:10])
+    writer.write_segment(1.002, HOST, SWITCH, cfg_rd[10:])
+    writer.write_segment(1.003, HOST, SWITCH, cfg_rd[10:], seq=1000 + len(request) + 10)
+    cpl = bytes(CxlIoCompletionWithDataPacket.create(0, 7, 0x1234))
+    writer.write_segment(1.004, SWITCH, HOST, cpl)
+
+    # A posted write has no completion
+    mem_wr = bytes(CxlIoMemWrPacket.create(0xFE000000, 4, 0xAB, req_id=0, tag=8))
+    writer.write_segment(1.005, HOST, SWITCH, mem_wr)
+
+    # The read is captured after the write that follows it
+    seq = 1000 + len(request) + len(cfg_rd) + len(mem_wr)
+    m2s_rd = bytes(CxlMemMemRdPacket.create(0x1000))
+    m2s_wr = bytes(CxlMemMemWrPacket.create(0x2000, 0xCD))
+    writer.write_segment(1.007, HOST, SWITCH, m2s_wr, seq=seq + len(m2s_rd))
+    writer.write_segment(1.006, HOST, SWITCH, m2s_rd, seq=seq)
+    writer.write_segment(1.010, SWITCH, HOST, bytes(CxlMemMemDataPacket.create(0xCD)))
+    writer.write_segment(1.011, SWITCH, HOST, bytes(CxlMemCmpPacket.create()))
+    return writer
+
+
+def test_pcap_reassembly():
+    file = BytesIO()
+    _write_capture(file)
+    file.seek(0)
+    assert len(list(read_pcap(file))) == 11
+    file.seek(0)
+    streams = {(stream.src, stream.dst): stream for stream in reassemble_tcp_streams(file)}
+    assert set(streams) == {(HOST, SWITCH), (SWITCH, HOST)}
+    assert streams[(HOST, SWITCH)].missing == 0
+    decoded = decode_tcp_stream(streams[(HOST, SWITCH)])
+    assert decoded.undecoded == 0
+    assert [type(p.packet) for p in decoded.packets] == [
+        SidebandConnectionRequestPacket,
+        CxlIoCfgRdPacket,
+        CxlIoMemWrPacket,
+        CxlMemM2SReqPacket,
+        CxlMemM2SRwDPacket,
+    ]
+    # A packet is captured when its last byte is
+    assert decoded.packets[1].timestamp == pytest.approx(1.002)
+    assert decoded.packets[3].timestamp == pytest.approx(1.006)
+
+    file.seek(0)
+    assert not reassemble_tcp_streams(file, {9999})
+    with pytest.raises(Exception):
+        list(read_pcap(BytesIO(b"\x00" * 24)))
+
+
+def test_pcap_stats(tmp_path):
+    filename = tmp_path / "capture.pcap"
+    with open(filename, "wb") as file:
+        _write_capture(file)
+    streams = decode_packet_capture(filename)
+    stats = analyze_packet_capture(streams)
+    assert stats.packets == {CHANNEL_SIDEBAND: 2, CHANNEL_CXL_IO: 3, CHANNEL_CXL_MEM: 4}
+    assert stats.bytes_by_opcode["CXL.io CFG_RD0"] == len(CxlIoCfgRdPacket.create(0, 0, 4))
+    assert stats.bytes_by_opcode["CXL.mem MEM_RD"] == len(CxlMemMemRdPacket.create(0))
+    assert stats.latencies[CHANNEL_CXL_IO] == [pytest.approx(0.002)]
+    assert sorted(stats.latencies[CHANNEL_CXL_MEM]) == [
+        pytest.approx(0.004),
+        pytest.approx(0.004),
+    ]
+    assert (stats.unmatched_requests, stats.unmatched_completions) == (0, 0)
+    assert stats.format()[-1] == "unmatched: 0 requests, 0 completions"
+
+    host_streams = get_host_streams(streams)
+    assert [stream.stream.src for stream in host_streams] == [HOST]
+
+
+@pytest.mark.asyncio
+async def test_pcap_replay(tmp_path):
+    filename = tmp_path / "capture.pcap"
+    with open(filename, "wb") as file:
+        _write_capture(file)
+    streams = get_host_streams(decode_packet_capture(filename))
+    received = []
+
+    async def handle(reader, writer):
+        packet_reader = PacketReader(reader, label="FakeSwitch")
+        request = await packet_reader.get_packet()
+        received.append(request)
+        writer.write(bytes(BaseSidebandPacket.create(SIDEBAND_TYPES.CONNECTION_ACCEPT)))
+        while len(received) < 5:
+            packet = await packet_reader.get_packet()
+            received.append(packet)
+            if isinstance(packet, CxlIoCfgRdPacket):
+                tag = packet.cfg_req_header.tag
+                writer.write(bytes(CxlIoCompletionWithDataPacket.create(0, tag, 0x1234)))
+            elif isinstance(packet, CxlMemM2SReqPacket):
+                writer.write(bytes(CxlMemMemDataPacket.create(0xCD)))
+            elif isinstance(packet, CxlMemM2SRwDPacket):
+                writer.write(bytes(CxlMemCmpPacket.create()))
+        await writer.drain()
+        packet_reader.abort()
+
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    stats = await replay_packet_capture(streams, "127.0.0.1", port, speed=2.0, timeout=5)
+    server.close()
+    await server.wait_closed()
+
+    assert [type(packet) for packet in received] == [
+        SidebandConnectionRequestPacket,
+        CxlIoCfgRdPacket,
+        CxlIoMemWrPacket,
+        CxlMemM2SReqPacket,
+        CxlMemM2SRwDPacket,
+    ]
+    assert len(stats.latencies[CHANNEL_CXL_IO]) == 1
+    assert len(stats.latencies[CHANNEL_CXL_MEM]) == 2
+    assert (stats.unmatched_requests, stats.unmatched_completions) == (0, 0)
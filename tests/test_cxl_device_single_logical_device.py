@@ -6,12 +6,21 @@
 """
 
 from asyncio import gather, create_task
+import time
 import pytest
 
 from opencis.apps.single_logical_device import SingleLogicalDevice
 from opencis.cxl.device.root_port_device import CxlRootPortDevice
 from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.config_space.doe.cdat import DeviceScopedMemoryAffinity
+from opencis.cxl.config_space.doe.doe_table_access import (
+    DOE_CXL_VENDOR_ID,
+    DOE_CXL_OBJECT_TYPE_TABLE_ACCESS,
+)
+from opencis.cxl.features.mailbox import MAILBOX_RETURN_CODE
+from opencis.drivers.doe_driver import DoeDriver
 from opencis.util.number_const import MB
+from opencis.util.pci import create_bdf
 
 # This test will cause many duplicate code between MH-SLD, disable duplicate-code lint here
 # pylint: disable=duplicate-code
@@ -78,3 +87,174 @@ async def test_single_logical_device_enumeration():
 
     tasks = [create_task(device.run()), create_task(wait_and_stop())]
     await gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_single_logical_device_serves_traffic_during_sanitize():
+    memory_size = 256 * MB
+    transport_connection = CxlConnection()
+    root_port_device = CxlRootPortDevice(downstream_connection=transport_connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=memory_size,
+        memory_file="mem_sanitize.bin",
+        serial_number="CCCCCCCCCCCCCCCC",
+        test_mode=True,
+        cxl_connection=transport_connection,
+    )
+    task = create_task(device.run())
+    await device.wait_for_ready()
+
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    hpa_base = 0x100000000
+    await root_port_device.configure_hdm_decoder_single_device(info, hpa_base)
+
+    # find the primary mailbox in the CXL device capabilities array
+    device_registers = info.capabilities.dvsec.register_locators.cxl_device_registers
+    registers_base = info.bars[device_registers.bar] + device_registers.offset
+    capabilities_count = (await root_port_device.read_mmio(registers_base, 8) >> 32) & 0xFFFF
+    for index in range(capabilities_count):
+        header = await root_port_device.read_mmio(registers_base + 0x10 * (index + 1), 8)
+        if header & 0xFFFF == 0x0002:
+            mailbox_base = registers_base + (header >> 32)
+    status_address = mailbox_base + 0x10
+    background_status_address = mailbox_base + 0x18
+
+    async def traffic_latency() -> float:
+        start = time.perf_counter()
+        await root_port_device.read_mmio(status_address, 8, verbose=False)
+        await root_port_device.cxl_mem_write(hpa_base + 0x1000, 0xDEADBEEF)
+        await root_port_device.cxl_mem_read(hpa_base + 0x1000)
+        return time.perf_counter() - start
+
+    # Sanitize, with the background command complete interrupt enabled
+    await root_port_device.write_mmio(mailbox_base + 0x08, 0x4400, 8)
+    start = time.perf_counter()
+    await root_port_device.write_mmio(mailbox_base + 0x04, 0b101)
+    status = await root_port_device.read_mmio(status_address, 8)
+    assert status & 0x1 == 1
+    assert (status >> 32) & 0xFFFF == MAILBOX_RETURN_CODE.BACKGROUND_COMMAND_STARTED
+
+    latencies = []
+    progress = []
+    while (await root_port_device.read_mmio(status_address, 8, verbose=False)) & 0x1:
+        latencies.append(await traffic_latency())
+        background_status = await root_port_device.read_mmio(background_status_address, 8)
+        progress.append((background_status >> 16) & 0x7F)
+    sanitize_time = time.perf_counter() - start
+
+    background_status = await root_port_device.read_mmio(background_status_address, 8)
+    assert background_status & 0xFFFF == 0x4400
+    assert (background_status >> 16) & 0x7F == 100
+    assert (background_status >> 32) & 0xFFFF == MAILBOX_RETURN_CODE.SUCCESS
+    assert len(latencies) > 10 and progress == sorted(progress)
+    # a blocking Sanitize would stall the request that follows it for the whole run
+    assert max(latencies) < sanitize_time / 4
+
+    await device.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_single_logical_device_doe_cdat():
+    memory_size = 256 * MB
+    transport_connection = CxlConnection()
+    root_port_device = CxlRootPortDevice(downstream_connection=transport_connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=memory_size,
+        memory_file="mem_doe.bin",
+        serial_number="DDDDDDDDDDDDDDDD",
+        test_mode=True,
+        cxl_connection=transport_connection,
+    )
+    task = create_task(device.run())
+    await device.wait_for_ready()
+    await root_port_device.enumerate(0xFE000000)
+    bdf = create_bdf(1, 0, 0)
+
+    results = []
+    for depth in (1, 8):
+        doe_driver = DoeDriver(root_port_device, pipeline_depth=depth)
+        mailbox_offsets = await doe_driver.find_mailboxes(bdf)
+        assert len(mailbox_offsets) == 1
+        protocols = await doe_driver.discover_protocols(bdf, mailbox_offsets[0])
+        assert protocols == [(0x0001, 0x00), (DOE_CXL_VENDOR_ID, DOE_CXL_OBJECT_TYPE_TABLE_ACCESS)]
+        results.append(await doe_driver.read_cdat(bdf, mailbox_offsets[0]))
+
+    assert results[0] == results[1]
+    dsmas = DeviceScopedMemoryAffinity()
+    dsmas.reset(results[0][1])
+    assert dsmas.dpa_length == memory_size
+
+    await device.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_single_logical_device_config_shadow():
+    transport_connection = CxlConnection()
+    root_port_device = CxlRootPortDevice(downstream_connection=transport_connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file="mem_shadow.bin",
+        serial_number="EEEEEEEEEEEEEEEE",
+        test_mode=True,
+        cxl_connection=transport_connection,
+    )
+    task = create_task(device.run())
+    await device.wait_for_ready()
+
+    config_requests = 0
+    host_to_target = transport_connection.cfg_fifo.host_to_target
+    put = host_to_target.put
+
+    async def counting_put(packet):
+        nonlocal config_requests
+        config_requests += 1
+        await put(packet)
+
+    host_to_target.put = counting_put
+
+    async def scan():
+        nonlocal config_requests
+        config_requests = 0
+        await root_port_device.enumerate(0xFE000000)
+        devices = (await root_port_device.scan_devices()).get_all_devices()
+        return (
+            [
+                (d.bdf, d.vid_did, d.class_code, d.capabilities, d.component_registers)
+                for d in devices
+            ],
+            config_requests,
+        )
+
+    shadow = root_port_device.get_config_shadow()
+    shadow.enabled = False
+    (uncached, uncached_requests) = await scan()
+    shadow.enabled = True
+    (cold, cold_requests) = await scan()
+    (warm, warm_requests) = await scan()
+    assert uncached == cold == warm
+    assert shadow.hits > 0
+    assert warm_requests < cold_requests <= uncached_requests
+
+    # A write drops the dword it wrote, and the next cached read goes to the device
+    bdf = create_bdf(1, 0, 0)
+    assert await root_port_device.read_config(bdf, 0x3C, 1, cached=True) == 0
+    await root_port_device.write_config(bdf, 0x3C, 1, 0x0B)
+    misses = shadow.misses
+    assert await root_port_device.read_config(bdf, 0x3C, 1, cached=True) == 0x0B
+    assert shadow.misses == misses + 1
+
+    # Snapshot mode fetches the whole PCI header region on the first miss
+    shadow.invalidate()
+    shadow.snapshot_size = 0x100
+    (snapshot, _) = await scan()
+    assert snapshot == uncached
+    config_requests = 0
+    assert await root_port_device.read_config(bdf, 0x3C, 1, cached=True) == 0x0B
+    assert config_requests == 0
+
+    await device.stop()
+    await task
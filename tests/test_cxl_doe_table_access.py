@@ -17,7 +17,7 @@ from opencis.cxl.config_space.doe.doe_table_access import (
     DOE_CXL_VENDOR_ID,
     DOE_CXL_OBJECT_TYPE_TABLE_ACCESS,
 )
-from opencis.cxl.config_space.doe.cdat import CdatHeader
+from opencis.cxl.config_space.doe.cdat import CdatHeader, DeviceScopedMemoryAffinity
 from opencis.pci.config_space.pcie.doe import (
     DOE_REGISTER_OFFSET,
 )
@@ -72,3 +72,45 @@ def test_doe_table_access():
     assert response.header.data_object_type == DOE_CXL_OBJECT_TYPE_TABLE_ACCESS
     assert response.header.length == len(response) // DWORD_BYTES
     assert response.entry_handle == 0xFFFF
+
+
+def test_doe_table_access_serves_static_responses_from_image(write_doe_request):
+    dsmas = DeviceScopedMemoryAffinity()
+    dsmas.dpa_length = 0x10000000
+    doe = CxlDoeExtendedCapability(options={"next": 0, "cdat_entries": [dsmas]})
+    protocol = doe.get_protocol(DOE_CXL_VENDOR_ID | (DOE_CXL_OBJECT_TYPE_TABLE_ACCESS << 16))
+    # the responses were built when the mailbox was created
+    protocol.process_request = lambda _: False
+
+    entries = []
+    entry_handle = 0
+    while entry_handle != 0xFFFF:
+        request = DoeTableAccessRequest()
+        request.header.vendor_id = DOE_CXL_VENDOR_ID
+        request.header.data_object_type = DOE_CXL_OBJECT_TYPE_TABLE_ACCESS
+        request.header.length = len(request) // DWORD_BYTES
+        request.entry_handle = entry_handle
+        write_doe_request(doe, request)
+        data = b""
+        while read_doe_status(doe).data_object_ready == 1:
+            dword = doe.read_bytes(
+                DOE_REGISTER_OFFSET.READ_DATA_MAILBOX,
+                DOE_REGISTER_OFFSET.READ_DATA_MAILBOX + DWORD_BYTES - 1,
+            )
+            data += dword.to_bytes(DWORD_BYTES, "little")
+            doe.write_bytes(
+                DOE_REGISTER_OFFSET.READ_DATA_MAILBOX,
+                DOE_REGISTER_OFFSET.READ_DATA_MAILBOX + DWORD_BYTES - 1,
+                0,
+            )
+        options: DoeTableAccessResponseOptions = {"structure_size": len(data) - 0xC}
+        response = DoeTableAccessResponse(options=options)
+        response.reset(data)
+        entries.append(data[0xC:])
+        entry_handle = response.entry_handle
+
+    assert len(entries) == 2
+    header = CdatHeader()
+    header.reset(entries[0])
+    assert header.length == len(CdatHeader()) + len(dsmas)
+    assert entries[1] == bytes(dsmas)
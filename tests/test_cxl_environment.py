@@ -0,0 +1,161 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import copy
+import glob
+
+import pytest
+
+from opencis.bin.profile_startup import build_components, measure_readiness
+from opencis.cxl.component.cxl_component import PORT_TYPE
+from opencis.cxl.device.config.logical_device import (
+    MultiLogicalDeviceConfig,
+    Type1AcceleratorConfig,
+    Type2AcceleratorConfig,
+)
+from opencis.cxl.environment import (
+    create_cxl_environment,
+    generate_cxl_environment,
+    parse_cxl_environment,
+    save_cxl_environment,
+)
+from opencis.util.number_const import MB
+
+
+@pytest.mark.parametrize("config_file", sorted(glob.glob("configs/*.yaml")))
+def test_shipped_environments_are_valid(config_file):
+    environment = parse_cxl_environment(config_file)
+    assert environment.logical_device_configs
+
+
+def test_generated_environment(tmp_path):
+    config_data = generate_cxl_environment(
+        vcs_count=4, dsp_count=8, device_types=("sld", "mld", "t1", "t2"), ld_count=4
+    )
+    save_cxl_environment(config_data, str(tmp_path / "env.yaml"))
+    environment = parse_cxl_environment(str(tmp_path / "env.yaml"))
+
+    switch_config = environment.switch_config
+    assert len(switch_config.port_configs) == 4 * 9
+    assert [vcs.upstream_port_index for vcs in switch_config.virtual_switch_configs] == [
+        0,
+        9,
+        18,
+        27,
+    ]
+    assert all(switch_config.port_configs[index].type == PORT_TYPE.USP for index in (0, 9, 18, 27))
+    assert len(environment.single_logical_device_configs) == 8
+    assert len(environment.multi_logical_device_configs) == 8
+    assert len(environment.type1_accelerator_configs) == 8
+    assert len(environment.type2_accelerator_configs) == 8
+    assert len(environment.logical_device_configs) == 32
+    assert isinstance(environment.logical_device_configs[-1], Type2AcceleratorConfig)
+    assert isinstance(environment.type1_accelerator_configs[0], Type1AcceleratorConfig)
+
+    # The first VCS: an SLD, a 4-LD MLD, a Type-1 and a Type-2 device, twice
+    vcs = switch_config.virtual_switch_configs[0]
+    assert vcs.vppb_counts == 14
+    assert vcs.initial_bounds[:7] == [1, [2, 0], [2, 1], [2, 2], [2, 3], 3, 4]
+    mld = environment.multi_logical_device_configs[0]
+    assert isinstance(mld, MultiLogicalDeviceConfig)
+    assert mld.port_index == 2
+    assert mld.memory_sizes == [256 * MB] * 4
+    assert environment.type2_accelerator_configs[0].memory_size == 256 * MB
+    serial_numbers = [device.serial_number for device in environment.single_logical_device_configs]
+    assert len(set(serial_numbers)) == len(serial_numbers)
+
+    assert generate_cxl_environment(vcs_count=4, dsp_count=8) == generate_cxl_environment(
+        vcs_count=4, dsp_count=8
+    )
+    with pytest.raises(ValueError):
+        generate_cxl_environment(device_types=("sld", "cxl4"))
+    with pytest.raises(ValueError):
+        generate_cxl_environment(device_types=("mld",), ld_count=17)
+
+
+def _break_unbound_ld(config_data):
+    config_data["virtual_switch_configs"][0]["initial_bounds"][1] = [2, 7]
+
+
+def _break_double_bind(config_data):
+    config_data["virtual_switch_configs"][1]["initial_bounds"][0] = 1
+
+
+def _break_shared_usp(config_data):
+    config_data["virtual_switch_configs"][1]["upstream_port_index"] = 0
+
+
+def _break_upstream_type(config_data):
+    config_data["virtual_switch_configs"][1]["upstream_port_index"] = 1
+
+
+def _break_vppb_count(config_data):
+    config_data["virtual_switch_configs"][0]["vppb_counts"] += 1
+
+
+def _break_device_port(config_data):
+    config_data["devices"]["single_logical_devices"][0]["port_index"] = 0
+
+
+def _break_shared_device_port(config_data):
+    config_data["devices"]["type1_accelerators"][0]["port_index"] = 1
+
+
+def _break_port_range(config_data):
+    config_data["virtual_switch_configs"][0]["initial_bounds"][0] = 99
+
+
+def _break_duplicate_ld(config_data):
+    config_data["devices"]["multi_logical_devices"][0]["logical_devices"][1]["ld_id"] = 0
+
+
+@pytest.mark.parametrize(
+    "break_config, message",
+    [
+        (_break_unbound_ld, "no LD 7 on port 2"),
+        (_break_double_bind, "LD 0 on port 1 is already bound"),
+        (_break_shared_usp, "USP 0 is already in use"),
+        (_break_upstream_type, "port 1 is not a USP"),
+        (_break_vppb_count, "'initial_bounds' must have 'vppb_counts' entries"),
+        (_break_device_port, "port 0 is not a DSP"),
+        (_break_shared_device_port, "port 1 already has a device"),
+        (_break_port_range, "port 99 is out of range"),
+        (_break_duplicate_ld, "duplicate 'ld_id'"),
+    ],
+)
+def test_environment_validation_errors(break_config, message):
+    config_data = generate_cxl_environment(
+        vcs_count=2, dsp_count=4, device_types=("sld", "mld", "t1", "t2")
+    )
+    create_cxl_environment(copy.deepcopy(config_data))
+    break_config(config_data)
+    with pytest.raises(ValueError, match=message):
+        create_cxl_environment(config_data)
+    create_cxl_environment(config_data, validate=False)
+
+
+@pytest.mark.asyncio
+async def test_generated_environment_readiness(tmp_path):
+    config_data = generate_cxl_environment(
+        vcs_count=2, dsp_count=3, device_types=("sld", "mld"), ld_count=2, port=9760
+    )
+    environment = create_cxl_environment(config_data)
+    for vswitch_config in environment.switch_config.virtual_switch_configs:
+        vswitch_config.irq_port = 9761
+    for device_config in environment.single_logical_device_configs:
+        device_config.memory_file = str(tmp_path / f"sld_mem{device_config.port_index}.bin")
+    for device_config in environment.multi_logical_device_configs:
+        device_config.memory_files = [
+            str(tmp_path / f"mld_mem{device_config.port_index}_{index}.bin")
+            for index in range(device_config.ld_count)
+        ]
+
+    components = build_components(("switch", "sld-group", "mld-group"), environment)
+    readiness = await measure_readiness(components, timeout=10)
+    assert set(readiness) == {"switch", "sld[1]", "sld[3]", "sld[6]", "mld[2]", "mld[5]", "mld[7]"}
+    for name, elapsed in readiness.items():
+        assert elapsed is not None, f"{name} was not ready"
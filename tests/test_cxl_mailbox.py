@@ -5,8 +5,14 @@
  See LICENSE for details.
 """
 
+import asyncio
+
+import pytest
+
 from opencis.cxl.features.mailbox import (
+    REQUEST_ABORT_BACKGROUND_OPERATION_OPCODE,
     CxlMailbox,
+    CxlMailboxBackgroundCommandBase,
     CxlMailboxContext,
     MailboxCapabilities,
     MailboxCommand,
@@ -169,3 +175,87 @@ def test_cxl_mailbox_enable_interrupt():
         MailboxControl(doorbell=0, mb_doorbell_interrupt=0, background_command_complete_interrupt=1)
     )
     assert mailbox.get_control()["background_command_complete_interrupt"] == 0
+
+
+class SlowBackgroundCommand(CxlMailboxBackgroundCommandBase):
+    def __init__(self, steps: int):
+        super().__init__(0x4400)
+        self._steps = steps
+        self.step = asyncio.Event()
+
+    async def process_background(self, context: CxlMailboxContext, report_progress):
+        for step in range(self._steps):
+            await self.step.wait()
+            self.step.clear()
+            report_progress((step + 1) * 100 // self._steps)
+
+
+def _ring(mailbox: CxlMailbox, opcode: int):
+    mailbox.set_command(MailboxCommand(command_opcode=opcode, payload_length=0))
+    control = dict(mailbox.get_control())
+    control["doorbell"] = 1
+    mailbox.set_control(control)
+
+
+@pytest.mark.asyncio
+async def test_cxl_mailbox_runs_background_command_asynchronously():
+    capabilities = MailboxCapabilities(
+        payload_size=8,
+        mb_doorbell_interrupt_capable=0,
+        background_command_complete_interrupt_capable=1,
+        interrupt_message_number=3,
+        mailbox_ready_time=0,
+        type=MAILBOX_TYPE.MEMORY_DEVICE_COMMANDS,
+    )
+    background_command = SlowBackgroundCommand(steps=2)
+    mailbox = CxlMailbox(capabilities, [SampleCommand(True), background_command])
+    interrupts = []
+    mailbox.register_interrupt_handler(interrupts.append)
+    mailbox.set_control(
+        MailboxControl(doorbell=0, mb_doorbell_interrupt=0, background_command_complete_interrupt=1)
+    )
+
+    _ring(mailbox, 0x4400)
+    assert mailbox.get_control()["doorbell"] == 0
+    assert mailbox.status["background_operation"] == 1
+    assert mailbox.status["return_code"] == MAILBOX_RETURN_CODE.BACKGROUND_COMMAND_STARTED
+    assert mailbox.background_command_status["command_opcode"] == 0x4400
+
+    # foreground commands still run; a second background command does not
+    _ring(mailbox, 0x0000)
+    assert mailbox.status["return_code"] == MAILBOX_RETURN_CODE.SUCCESS
+    _ring(mailbox, 0x4400)
+    assert mailbox.status["return_code"] == MAILBOX_RETURN_CODE.BUSY
+
+    background_command.step.set()
+    await asyncio.sleep(0)
+    assert mailbox.background_command_status["percentage_complete"] == 50
+    assert not interrupts
+
+    background_command.step.set()
+    await mailbox.wait_for_background_command()
+    assert mailbox.status["background_operation"] == 0
+    assert mailbox.background_command_status["percentage_complete"] == 100
+    assert mailbox.background_command_status["return_code"] == MAILBOX_RETURN_CODE.SUCCESS
+    assert interrupts == [3]
+
+
+@pytest.mark.asyncio
+async def test_cxl_mailbox_aborts_background_command():
+    capabilities = MailboxCapabilities(
+        payload_size=8,
+        mb_doorbell_interrupt_capable=0,
+        background_command_complete_interrupt_capable=0,
+        interrupt_message_number=0,
+        mailbox_ready_time=0,
+        type=MAILBOX_TYPE.MEMORY_DEVICE_COMMANDS,
+    )
+    mailbox = CxlMailbox(capabilities, [SlowBackgroundCommand(steps=1)])
+    _ring(mailbox, 0x4400)
+    assert mailbox.status["background_operation"] == 1
+
+    _ring(mailbox, REQUEST_ABORT_BACKGROUND_OPERATION_OPCODE)
+    assert mailbox.status["return_code"] == MAILBOX_RETURN_CODE.SUCCESS
+    await mailbox.wait_for_background_command()
+    assert mailbox.status["background_operation"] == 0
+    assert mailbox.background_command_status["return_code"] == MAILBOX_RETURN_CODE.ABORTED
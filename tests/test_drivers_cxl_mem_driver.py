@@ -0,0 +1,149 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.cache_controller import MEM_ADDR_TYPE
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.cxl_memory_hub import CxlMemoryHub, CxlMemoryHubConfig
+from opencis.cxl.component.hdm_decoder import INTERLEAVE_GRANULARITY
+from opencis.cxl.component.irq_manager import IrqManager
+from opencis.cxl.component.physical_port_manager import PhysicalPortManager
+from opencis.cxl.component.root_complex.root_complex import SystemMemControllerConfig
+from opencis.cxl.component.root_complex.root_port_client_manager import RootPortClientConfig
+from opencis.cxl.component.root_complex.root_port_switch import ROOT_PORT_SWITCH_TYPE
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.component.virtual_switch_manager import VirtualSwitchConfig, VirtualSwitchManager
+from opencis.drivers.cxl_bus_driver import CxlBusDriver
+from opencis.drivers.cxl_mem_driver import CxlMemDriver
+from opencis.drivers.pci_bus_driver import PciBusDriver
+from opencis.util.number_const import MB
+
+# pylint: disable=duplicate-code
+
+BASE_TEST_PORT = 9950
+HPA_BASE = 0x100000000000
+CACHELINE_SIZE = 64
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "ways, ig, test_port",
+    [
+        (2, INTERLEAVE_GRANULARITY.SIZE_256B, pytest.PORT.TEST_1),
+        (4, INTERLEAVE_GRANULARITY.SIZE_1KB, pytest.PORT.TEST_2),
+    ],
+)
+async def test_cxl_mem_driver_interleaved_mem_devices(ways, ig, test_port, tmp_path):
+    switch_port = BASE_TEST_PORT + test_port
+    irq_port = BASE_TEST_PORT + test_port + 25
+    port_configs = [PortConfig(PORT_TYPE.USP)] + [PortConfig(PORT_TYPE.DSP)] * ways
+    switch_connection_manager = SwitchConnectionManager(port_configs, port=switch_port)
+    physical_port_manager = PhysicalPortManager(
+        switch_connection_manager=switch_connection_manager, port_configs=port_configs
+    )
+    virtual_switch_manager = VirtualSwitchManager(
+        switch_configs=[
+            VirtualSwitchConfig(
+                upstream_port_index=0,
+                vppb_counts=ways,
+                initial_bounds=list(range(1, ways + 1)),
+                irq_host="127.0.0.1",
+                irq_port=irq_port,
+            )
+        ],
+        physical_port_manager=physical_port_manager,
+        allocated_ld={index: [0] for index in range(1, ways + 1)},
+    )
+    memory_files = {
+        index: os.path.join(tmp_path, f"mem{index}.bin") for index in range(1, ways + 1)
+    }
+    devices = [
+        SingleLogicalDevice(
+            port_index=index,
+            memory_size=256 * MB,
+            memory_file=memory_file,
+            serial_number=f"{index:016X}",
+            port=switch_port,
+        )
+        for index, memory_file in memory_files.items()
+    ]
+    irq_manager = IrqManager(
+        device_name="Host", addr="127.0.0.1", port=irq_port, server=True, device_id=0
+    )
+    cxl_memory_hub = CxlMemoryHub(
+        CxlMemoryHubConfig(
+            host_name="Host",
+            root_bus=0,
+            root_port_switch_type=ROOT_PORT_SWITCH_TYPE.PASS_THROUGH,
+            root_ports=[RootPortClientConfig(0, "127.0.0.1", switch_port)],
+            sys_mem_controller=SystemMemControllerConfig(
+                memory_size=1 * MB, memory_filename=os.path.join(tmp_path, "sys.bin")
+            ),
+            irq_handler=irq_manager,
+        )
+    )
+    components = [
+        switch_connection_manager,
+        physical_port_manager,
+        virtual_switch_manager,
+        *devices,
+        irq_manager,
+    ]
+    tasks = [asyncio.create_task(component.run()) for component in components]
+    await asyncio.gather(*(component.wait_for_ready() for component in components))
+    tasks.append(asyncio.create_task(cxl_memory_hub.run()))
+    await cxl_memory_hub.wait_for_ready()
+
+    root_complex = cxl_memory_hub.get_root_complex()
+    pci_bus_driver = PciBusDriver(root_complex)
+    await pci_bus_driver.init(0xFE000000)
+    cxl_bus_driver = CxlBusDriver(pci_bus_driver, root_complex)
+    await cxl_bus_driver.init()
+    cxl_mem_driver = CxlMemDriver(cxl_bus_driver, root_complex)
+    await cxl_mem_driver.init()
+    mem_devices = cxl_mem_driver.get_devices()
+    assert len(mem_devices) == ways
+
+    # Way counts without a power-of-two target selector, granularities the decoders
+    # cannot encode and bases that do not start a stripe are rejected up front
+    with pytest.raises(Exception):
+        cxl_mem_driver.create_interleave_set((mem_devices * 2)[:3], HPA_BASE)
+    with pytest.raises(Exception):
+        cxl_mem_driver.create_interleave_set(mem_devices, HPA_BASE, ig=7)
+    with pytest.raises(Exception):
+        cxl_mem_driver.create_interleave_set(mem_devices, HPA_BASE + 256, ig)
+
+    interleave_set = cxl_mem_driver.create_interleave_set(mem_devices, HPA_BASE, ig)
+    assert interleave_set.hpa_size == 256 * MB * ways
+    assert sorted(interleave_set.target_list) == list(range(ways))
+    assert await cxl_mem_driver.attach_interleaved_mem_devices(mem_devices, HPA_BASE, ig)
+    cxl_memory_hub.add_mem_range(HPA_BASE, interleave_set.hpa_size, MEM_ADDR_TYPE.CXL_UNCACHED)
+
+    # Stripe N lands on target N % ways, one stripe further into the device for every
+    # pass over the targets. vPPB N is bound to the SLD on physical port N + 1.
+    stripe_size = 256 << ig
+    stripes = 2 * ways
+    for stripe in range(stripes):
+        await cxl_memory_hub.store(
+            HPA_BASE + stripe * stripe_size, CACHELINE_SIZE, 0xC0DE00 + stripe
+        )
+    for stripe in range(stripes):
+        address = HPA_BASE + stripe * stripe_size
+        assert await cxl_memory_hub.load(address, CACHELINE_SIZE) == 0xC0DE00 + stripe
+    for stripe in range(stripes):
+        target = interleave_set.target_list[stripe % ways]
+        with open(memory_files[target + 1], "rb") as file:
+            file.seek((stripe // ways) * stripe_size)
+            assert int.from_bytes(file.read(CACHELINE_SIZE), "little") == 0xC0DE00 + stripe
+
+    await asyncio.gather(*(component.stop() for component in [*components, cxl_memory_hub]))
+    await asyncio.gather(*tasks, return_exceptions=True)
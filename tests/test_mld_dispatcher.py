@@ -0,0 +1,201 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+
+import pytest
+
+from opencis.apps.multi_logical_device import MultiLogicalDevice
+from opencis.cxl.component.common import CXL_COMPONENT_TYPE
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.cxl_packet_processor import CxlPacketProcessor
+from opencis.cxl.component.packet_reader import PacketReader
+from opencis.cxl.component.mld_dispatcher import LdPacketHandlers, MldDispatcher, get_ld_id
+from opencis.cxl.transport.transaction import (
+    CxlIoCfgRdPacket,
+    CxlIoCompletionWithDataPacket,
+    CxlIoMemRdPacket,
+    CxlMemBIRspPacket,
+    CxlMemMemRdPacket,
+    CxlMemMemWrPacket,
+    CXL_MEM_M2SBIRSP_OPCODE,
+)
+from opencis.pci.component.pci import EEUM_VID, SW_MLD_DID
+from opencis.util.number_const import MB
+from opencis.util.pci import create_bdf
+
+BASE_TEST_PORT = 9750
+
+
+def test_get_ld_id():
+    assert get_ld_id(CxlIoCfgRdPacket.create(create_bdf(0, 0, 0), 0, 4, ld_id=3)) == 3
+    assert get_ld_id(CxlIoMemRdPacket.create(0x1000, 4, ld_id=5)) == 5
+    assert get_ld_id(CxlMemMemRdPacket.create(0x40, ld_id=15)) == 15
+    assert get_ld_id(CxlMemMemWrPacket.create(0x40, 0, ld_id=7)) == 7
+    assert get_ld_id(CxlMemBIRspPacket.create(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_I)) is None
+
+
+@pytest.mark.asyncio
+async def test_mld_dispatcher_routes_by_ld_id():
+    connection = CxlConnection()
+    dispatcher = MldDispatcher(connection, label="test")
+    received = asyncio.Queue()
+
+    def make_handlers(ld_id):
+        async def handle(channel, packet):
+            await received.put((ld_id, channel, get_ld_id(packet)))
+
+        return LdPacketHandlers(
+            cfg_space=lambda packet: handle("cfg_space", packet),
+            mmio=lambda packet: handle("mmio", packet),
+            cxl_mem=lambda packet: handle("cxl_mem", packet),
+        )
+
+    async def get_received(count):
+        return sorted([await asyncio.wait_for(received.get(), timeout=5) for _ in range(count)])
+
+    for ld_id in (0, 1, 15):
+        dispatcher.set_ld_handlers(ld_id, make_handlers(ld_id))
+    assert dispatcher.get_ld_ids() == [0, 1, 15]
+    with pytest.raises(Exception):
+        dispatcher.set_ld_handlers(16, make_handlers(16))
+
+    task = asyncio.create_task(dispatcher.run())
+    await dispatcher.wait_for_ready()
+
+    await connection.cfg_fifo.host_to_target.put(
+        CxlIoCfgRdPacket.create(create_bdf(0, 0, 0), 0, 4, ld_id=15)
+    )
+    await connection.mmio_fifo.host_to_target.put(CxlIoMemRdPacket.create(0x1000, 4, ld_id=1))
+    await connection.cxl_mem_fifo.host_to_target.put(CxlMemMemRdPacket.create(0x40, ld_id=0))
+    assert await get_received(3) == [(0, "cxl_mem", 0), (1, "mmio", 1), (15, "cfg_space", 15)]
+
+    # Not routed: an LD without handlers, a packet without an LD-ID, an LD-ID out of
+    # range and a removed LD. A channel reads packets in order and drops these as it
+    # reads them, so once the packet that follows them is handled, they have been dropped.
+    await connection.cxl_mem_fifo.host_to_target.put(CxlMemMemRdPacket.create(0x40, ld_id=2))
+    await connection.cxl_mem_fifo.host_to_target.put(
+        CxlMemBIRspPacket.create(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_I)
+    )
+    await connection.cxl_mem_fifo.host_to_target.put(CxlMemMemRdPacket.create(0x40, ld_id=0))
+    await connection.mmio_fifo.host_to_target.put(CxlIoMemRdPacket.create(0x1000, 4, ld_id=0xFFFF))
+    dispatcher.remove_ld(1)
+    await connection.mmio_fifo.host_to_target.put(CxlIoMemRdPacket.create(0x1000, 4, ld_id=1))
+    await connection.mmio_fifo.host_to_target.put(CxlIoMemRdPacket.create(0x1000, 4, ld_id=15))
+    assert await get_received(2) == [(0, "cxl_mem", 0), (15, "mmio", 15)]
+    assert received.empty()
+    assert dispatcher.get_ld_ids() == [0, 15]
+
+    await dispatcher.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_mld_dispatcher_does_not_serialize_lds():
+    connection = CxlConnection()
+    dispatcher = MldDispatcher(connection, label="test")
+    release_ld0 = asyncio.Event()
+    handled = []
+    ld1_handled = asyncio.Event()
+
+    async def handle_ld0(packet):
+        await release_ld0.wait()
+        handled.append((0, packet.get_address()))
+
+    async def handle_ld1(packet):
+        handled.append((1, packet.get_address()))
+        ld1_handled.set()
+
+    for ld_id, handler in ((0, handle_ld0), (1, handle_ld1)):
+        dispatcher.set_ld_handlers(ld_id, LdPacketHandlers(handler, handler, handler))
+    task = asyncio.create_task(dispatcher.run())
+    await dispatcher.wait_for_ready()
+
+    for address in (0x40, 0x80):
+        await connection.cxl_mem_fifo.host_to_target.put(CxlMemMemRdPacket.create(address, ld_id=0))
+    await connection.cxl_mem_fifo.host_to_target.put(CxlMemMemRdPacket.create(0xC0, ld_id=1))
+
+    # LD 1 is served while LD 0 is still busy with its first packet
+    await asyncio.wait_for(ld1_handled.wait(), timeout=5)
+    assert handled == [(1, 0xC0)]
+
+    # and the packets of LD 0 are handled in arrival order
+    release_ld0.set()
+    await dispatcher.stop()
+    await task
+    assert handled == [(1, 0xC0), (0, 0x40), (0, 0x80)]
+
+
+@pytest.mark.asyncio
+async def test_mld_runs_without_per_ld_tasks(tmp_path):
+    ld_count = 16
+    tasks_before = len(asyncio.all_tasks())
+    mld = MultiLogicalDevice(
+        port_index=1,
+        ld_count=ld_count,
+        memory_sizes=[256 * MB] * ld_count,
+        memory_files=[str(tmp_path / f"mld_mem{index}.bin") for index in range(ld_count)],
+        serial_numbers=[f"{index:016X}" for index in range(ld_count)],
+        test_mode=True,
+        cxl_connections=[CxlConnection() for _ in range(ld_count)],
+    )
+    task = asyncio.create_task(mld.run())
+    await mld.wait_for_ready()
+    # The MLD, the dispatcher and one consumer per channel
+    assert len(asyncio.all_tasks()) - tasks_before <= 5
+    await mld.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_mld_drops_unroutable_packets_without_dropping_the_link(tmp_path):
+    # pylint: disable=duplicate-code
+    ld_count = 2
+    cxl_connections = [CxlConnection() for _ in range(ld_count)]
+    mld = MultiLogicalDevice(
+        port_index=1,
+        ld_count=ld_count,
+        memory_sizes=[256 * MB] * ld_count,
+        memory_files=[str(tmp_path / f"mld_mem{index}.bin") for index in range(ld_count)],
+        serial_numbers=[f"{index:016X}" for index in range(ld_count)],
+        test_mode=True,
+        cxl_connections=cxl_connections,
+    )
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def handle_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    server = await asyncio.start_server(handle_client, "127.0.0.1", port)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    processor = CxlPacketProcessor(
+        reader, writer, cxl_connections, CXL_COMPONENT_TYPE.LD, label="Mld"
+    )
+    (switch_reader, switch_writer) = await accepted
+    switch_packet_reader = PacketReader(switch_reader, label="Switch")
+    tasks = [asyncio.create_task(component.run()) for component in (mld, processor)]
+    await asyncio.gather(mld.wait_for_ready(), processor.wait_for_ready())
+
+    # An LD-ID out of range and an LD the MLD does not have
+    switch_writer.write(
+        bytes(CxlIoCfgRdPacket.create(create_bdf(0, 0, 0), 0, 4, tag=1, ld_id=0xFFFF))
+    )
+    switch_writer.write(bytes(CxlMemMemRdPacket.create(0x40, ld_id=ld_count)))
+    switch_writer.write(bytes(CxlIoCfgRdPacket.create(create_bdf(0, 0, 0), 0, 4, ld_id=1)))
+    await switch_writer.drain()
+
+    packet = await asyncio.wait_for(switch_packet_reader.get_packet(), timeout=5)
+    assert isinstance(packet, CxlIoCompletionWithDataPacket)
+    assert packet.tlp_prefix.ld_id == 1
+    assert packet.data == (EEUM_VID | (SW_MLD_DID << 16))
+
+    await asyncio.gather(mld.stop(), processor.stop())
+    await asyncio.gather(*tasks)
+    switch_writer.close()
+    server.close()
+    await server.wait_closed()
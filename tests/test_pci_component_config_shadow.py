@@ -0,0 +1,54 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import pytest
+
+from opencis.pci.component.config_shadow import ConfigSpaceShadow
+from opencis.util.pci import create_bdf
+
+BRIDGE_BDF = create_bdf(0, 0, 0)
+ENDPOINT_BDF = create_bdf(1, 0, 0)
+# Header type 1 with the multi-function bit set, and header type 0
+HEADER_TYPES = {BRIDGE_BDF: 0x81, ENDPOINT_BDF: 0x00}
+
+
+async def _fetch_dwords(bdf, offsets):
+    return [HEADER_TYPES[bdf] << 16 if offset == 0x0C else offset for offset in offsets]
+
+
+async def _read_all(shadow: ConfigSpaceShadow):
+    for bdf in HEADER_TYPES:
+        for offset in (0x0C, 0x10, 0x18, 0x1C, 0x40):
+            await shadow.read(bdf, offset, 4, _fetch_dwords)
+
+
+@pytest.mark.asyncio
+async def test_config_shadow_bus_number_write_on_bridge_only():
+    shadow = ConfigSpaceShadow()
+    await _read_all(shadow)
+    assert shadow.misses == 10
+
+    # 0x18 is BAR2 of a type 0 header: only the BARs of that function are dropped
+    shadow.invalidate_write(ENDPOINT_BDF, 0x18)
+    await _read_all(shadow)
+    assert shadow.misses == 13
+
+    # A bridge's BARs end at 0x18, so a write to 0x1C only drops that dword
+    shadow.invalidate_write(BRIDGE_BDF, 0x1C)
+    await _read_all(shadow)
+    assert shadow.misses == 14
+
+    # The bus numbers of a bridge renumber every function below it
+    shadow.invalidate_write(BRIDGE_BDF, 0x19)
+    await _read_all(shadow)
+    assert shadow.misses == 24
+
+    # Without a shadowed header type, a function is treated as a bridge
+    shadow.invalidate(ENDPOINT_BDF)
+    shadow.invalidate_write(ENDPOINT_BDF, 0x18)
+    await _read_all(shadow)
+    assert shadow.misses == 34
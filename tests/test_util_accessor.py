@@ -0,0 +1,107 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import os
+import threading
+import uuid
+
+import pytest
+
+from opencis.cxl.component.cxl_memory_device_component import (
+    CxlMemoryDeviceComponent,
+    MemoryDeviceIdentity,
+)
+from opencis.util.accessor import CharDriverAccessor
+from opencis.util.number_const import MB
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("io_threads", [0, 2])
+async def test_char_driver_accessor(tmp_path, io_threads):
+    # a regular file stands in for the character device
+    size = 0x1000
+    device = tmp_path / "dax0.0"
+    device.write_bytes(bytes(size))
+    accessor = CharDriverAccessor(str(device), size, io_threads=io_threads, max_pending=4)
+
+    await accessor.write(0x40, 0x1122, 64)
+    assert await accessor.read(0x40, 64) == 0x1122
+    line = bytes(range(64))
+    await accessor.write(0x80, line, 64)
+    assert await accessor.read_bytes(0x80, 64) == line
+
+    # concurrent accesses must not interfere through a shared file position
+    await asyncio.gather(
+        *(accessor.write(i * 64, bytes([i]) * 64, 64) for i in range(4, 32)),
+    )
+    results = await asyncio.gather(*(accessor.read_bytes(i * 64, 64) for i in range(4, 32)))
+    assert results == [bytes([i]) * 64 for i in range(4, 32)]
+
+    lines = [bytes([0xA0 + i]) * 64 for i in range(8)]
+    await accessor.write_from(0x800, lines)
+    buffers = [bytearray(64) for _ in range(8)]
+    await accessor.read_into(0x800, buffers)
+    assert [bytes(buffer) for buffer in buffers] == lines
+
+    with pytest.raises(IndexError):
+        await accessor.read_bytes(size - 32, 64)
+    with pytest.raises(IndexError):
+        await accessor.write_from(size - 64, lines[:2])
+
+    await accessor.close()
+    assert device.read_bytes()[0x800:0x840] == lines[0]
+    with pytest.raises(Exception):
+        await accessor.read(0x40, 64)
+    with pytest.raises(Exception):
+        await accessor.write_from(0x800, lines)
+
+
+@pytest.mark.asyncio
+async def test_memory_device_component_char_driver_io_threads():
+    # pylint: disable=protected-access
+    # a path under /dev selects the character device accessor
+    size = 256 * MB
+    device = f"/dev/shm/opencis-dax-{uuid.uuid4().hex}"
+    with open(device, "wb") as file:
+        file.truncate(size)
+    try:
+        identity = MemoryDeviceIdentity()
+        identity.set_total_capacity(size)
+        component = CxlMemoryDeviceComponent(identity, memory_file=device, io_threads=2)
+        accessor = component._memory_accessor
+        assert isinstance(accessor, CharDriverAccessor)
+        assert accessor._executor is not None
+
+        await component.write_mem_dpa(0x40, 0x1122)
+        assert await component.read_mem_dpa(0x40) == 0x1122
+
+        await component.close()
+        assert accessor._executor is None and accessor._fd is None
+    finally:
+        os.remove(device)
+
+
+@pytest.mark.asyncio
+async def test_char_driver_accessor_close_does_not_block_event_loop(tmp_path):
+    # pylint: disable=protected-access
+    size = 0x1000
+    device = tmp_path / "dax0.0"
+    device.write_bytes(bytes(size))
+    accessor = CharDriverAccessor(str(device), size, io_threads=1)
+
+    # an access still running on the pool thread when close() is called
+    release = threading.Event()
+    in_flight = asyncio.create_task(accessor._submit(release.wait))
+    await asyncio.sleep(0)
+    close = asyncio.create_task(accessor.close())
+    await asyncio.sleep(0.05)
+    assert not close.done() and accessor._fd is not None
+
+    release.set()
+    await asyncio.wait_for(asyncio.gather(in_flight, close), timeout=5)
+    assert accessor._fd is None
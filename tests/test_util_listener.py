@@ -0,0 +1,78 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from opencis.util.listener import Backoff, ListenerRegistry, listener_registry
+
+BASE_TEST_PORT = 9450
+
+
+@pytest.mark.asyncio
+async def test_listener_registry_wakes_waiter():
+    registry = ListenerRegistry()
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+
+    assert not await registry.wait_ready(port, 0.01)
+    waiter = asyncio.create_task(registry.wait_ready(port, 5))
+    await asyncio.sleep(0)
+    registry.notify_ready(port)
+    assert await waiter
+    assert registry.is_ready(port)
+
+    registry.notify_closed(port)
+    assert not registry.is_ready(port)
+
+
+@pytest.mark.asyncio
+async def test_listener_registry_wakes_waiter_on_other_loop():
+    registry = ListenerRegistry()
+    port = BASE_TEST_PORT + pytest.PORT.TEST_2
+
+    # the CLI runs each component in its own thread and event loop
+    thread = threading.Timer(0.05, registry.notify_ready, args=(port,))
+    start = time.perf_counter()
+    thread.start()
+    assert await registry.wait_ready(port, 5)
+    assert time.perf_counter() - start < 1
+    thread.join()
+
+
+@pytest.mark.asyncio
+async def test_backoff_grows_and_retries_on_notification():
+    port = BASE_TEST_PORT + pytest.PORT.TEST_3
+    backoff = Backoff(port, initial_delay=0.01, max_delay=0.04)
+
+    delays = []
+    for _ in range(4):
+        start = time.perf_counter()
+        await backoff.wait()
+        delays.append(time.perf_counter() - start)
+    assert delays[-1] >= 0.03
+    assert delays[-1] < 1
+
+    async def notify_later():
+        await asyncio.sleep(0.01)
+        listener_registry.notify_ready(port)
+
+    backoff = Backoff(port, initial_delay=10, max_delay=10)
+    task = asyncio.create_task(notify_later())
+    start = time.perf_counter()
+    await backoff.wait()
+    assert time.perf_counter() - start < 1
+    await task
+
+    # already announced before the waiter arrived: retry at once
+    backoff = Backoff(port, initial_delay=10, max_delay=10)
+    start = time.perf_counter()
+    await backoff.wait()
+    assert time.perf_counter() - start < 1
+    listener_registry.notify_closed(port)
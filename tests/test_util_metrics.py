@@ -0,0 +1,281 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from opencis.apps.cxl_simple_host import CxlHostUtilClient
+from opencis.cxl.component.cache_controller import MEM_ADDR_TYPE
+from opencis.cxl.component.common import CXL_COMPONENT_TYPE
+from opencis.cxl.component.cxl_component import PORT_TYPE, PortConfig
+from opencis.cxl.component.cxl_memory_hub import CxlMemoryHub, CxlMemoryHubConfig
+from opencis.cxl.component.irq_manager import IrqManager
+from opencis.cxl.component.physical_port_manager import PhysicalPortManager
+from opencis.cxl.component.root_complex.root_complex import SystemMemControllerConfig
+from opencis.cxl.component.root_complex.root_port_client_manager import RootPortClientConfig
+from opencis.cxl.component.root_complex.root_port_switch import ROOT_PORT_SWITCH_TYPE
+from opencis.cxl.component.switch_connection_client import SwitchConnectionClient
+from opencis.cxl.component.switch_connection_manager import SwitchConnectionManager
+from opencis.cxl.component.virtual_switch_manager import VirtualSwitchConfig, VirtualSwitchManager
+from opencis.cxl.device.cxl_type1_device import CxlType1Device, CxlType1DeviceConfig
+from opencis.cxl.device.cxl_type2_device import CxlType2Device, CxlType2DeviceConfig
+from opencis.drivers.cxl_bus_driver import CxlBusDriver
+from opencis.drivers.cxl_mem_driver import CxlMemDriver
+from opencis.drivers.pci_bus_driver import PciBusDriver
+from opencis.cxl.component.host_manager_conn import UtilConnServer
+from opencis.cxl.component.root_complex.memory_controller import (
+    MemoryController,
+    MemoryControllerConfig,
+)
+from opencis.cxl.transport.memory_fifo import (
+    MEMORY_REQUEST_TYPE,
+    MEMORY_RESPONSE_STATUS,
+    MemoryFifoPair,
+    MemoryRequest,
+)
+from opencis.util.metrics import (
+    NULL_METRIC,
+    MetricsRegistry,
+    format_metrics_snapshot,
+    get_histogram_percentile,
+    metrics,
+)
+from opencis.util.number_const import MB
+
+BASE_TEST_PORT = 9800
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_metrics_registry():
+    registry = MetricsRegistry()
+    assert registry.counter("requests", "Port0") is NULL_METRIC
+    assert registry.histogram("latency") is NULL_METRIC
+    registry.counter("requests").inc()
+    assert registry.get_snapshot() == {"counters": {}, "gauges": {}, "histograms": {}}
+
+    registry.enable()
+    requests = registry.counter("requests", "Port0")
+    assert registry.counter("requests", "Port0") is requests
+    requests.inc()
+    requests.inc(2)
+    registry.counter("requests", "Port1").inc()
+    depth = registry.gauge("depth", "Port0")
+    depth.inc()
+    depth.inc()
+    depth.dec()
+    queue = [1, 2, 3]
+    registry.gauge("queued", "Port0", lambda: len(queue))
+    queue.pop()
+    latency = registry.histogram("latency", "Port0", buckets=(1e-6, 1e-3))
+    for value in (5e-7, 2e-4, 3e-4, 5e-4, 2.0):
+        latency.observe(value)
+
+    snapshot = registry.get_snapshot()
+    assert snapshot["counters"] == {"requests{Port0}": 3, "requests{Port1}": 1}
+    assert snapshot["gauges"] == {"depth{Port0}": 1, "queued{Port0}": 2}
+    histogram = snapshot["histograms"]["latency{Port0}"]
+    assert histogram["counts"] == [1, 3, 1]
+    assert histogram["count"] == 5
+    assert get_histogram_percentile(histogram, 50) == 1e-3
+    assert get_histogram_percentile(histogram, 100) == float("inf")
+    json.dumps(snapshot, allow_nan=False)
+
+    assert list(registry.get_snapshot("requests")["counters"]) == [
+        "requests{Port0}",
+        "requests{Port1}",
+    ]
+    assert not registry.get_snapshot("requests")["gauges"]
+    assert format_metrics_snapshot(registry.get_snapshot("requests")) == [
+        "requests{Port0} = 3",
+        "requests{Port1} = 1",
+    ]
+
+    # A gauge whose component is gone is left out
+    registry.gauge("broken", getter=lambda: 1 / 0)
+    assert "broken" not in registry.get_snapshot()["gauges"]
+
+    registry.reset()
+    assert registry.get_snapshot() == {"counters": {}, "gauges": {}, "histograms": {}}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("enabled_metrics")
+async def test_metrics_memory_controller_and_util_server(tmp_path):
+    fifos = MemoryFifoPair()
+    controller = MemoryController(
+        MemoryControllerConfig(4096, str(tmp_path / "dram.bin"), "Host0", fifos)
+    )
+    task = asyncio.create_task(controller.run())
+    await controller.wait_for_ready()
+    for addr in range(0, 256, 64):
+        await fifos.request.put(MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 64, addr))
+        assert (await fifos.response.get()).status == MEMORY_RESPONSE_STATUS.OK
+    await fifos.request.put(MemoryRequest(MEMORY_REQUEST_TYPE.READ, 64, 64))
+    assert (await fifos.response.get()).data == (64).to_bytes(64, "little")
+
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    util_server = UtilConnServer(host="127.0.0.1", port=port)
+    util_task = asyncio.create_task(util_server.run())
+    await util_server.wait_for_ready()
+    snapshot = await CxlHostUtilClient("127.0.0.1", port).get_metrics("memory_")
+    assert snapshot["counters"] == {
+        "memory_reads{Host0:MemoryController}": 1,
+        "memory_writes{Host0:MemoryController}": 4,
+    }
+    assert snapshot["gauges"] == {"memory_queue_depth{Host0:MemoryController}": 0}
+    snapshot = await CxlHostUtilClient("127.0.0.1", port).get_metrics("accessor_")
+    histograms = snapshot["histograms"]
+    assert histograms[f"accessor_write_latency{{{tmp_path / 'dram.bin'}}}"]["count"] == 4
+    assert histograms[f"accessor_read_latency{{{tmp_path / 'dram.bin'}}}"]["count"] == 1
+
+    await util_server.stop()
+    await util_task
+    await controller.stop()
+    await task
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("enabled_metrics")
+async def test_metrics_cxl_mem_and_cxl_cache_transactions(tmp_path):
+    switch_port = BASE_TEST_PORT + pytest.PORT.TEST_2
+    irq_port = BASE_TEST_PORT + pytest.PORT.TEST_2 + 50
+    port_configs = [PortConfig(PORT_TYPE.USP), PortConfig(PORT_TYPE.DSP), PortConfig(PORT_TYPE.DSP)]
+    switch_connection_manager = SwitchConnectionManager(port_configs, port=switch_port)
+    physical_port_manager = PhysicalPortManager(
+        switch_connection_manager=switch_connection_manager, port_configs=port_configs
+    )
+    virtual_switch_manager = VirtualSwitchManager(
+        switch_configs=[
+            VirtualSwitchConfig(
+                upstream_port_index=0,
+                vppb_counts=2,
+                initial_bounds=[1, 2],
+                irq_host="127.0.0.1",
+                irq_port=irq_port,
+            )
+        ],
+        physical_port_manager=physical_port_manager,
+        allocated_ld={1: [0], 2: [0]},
+    )
+    type2_client = SwitchConnectionClient(
+        1, CXL_COMPONENT_TYPE.T2, host="127.0.0.1", port=switch_port
+    )
+    type2_device = CxlType2Device(
+        CxlType2DeviceConfig(
+            device_name="Type2",
+            transport_connection=type2_client.get_cxl_connection(),
+            memory_size=256 * MB,
+            memory_file=str(tmp_path / "type2.bin"),
+        )
+    )
+    type1_client = SwitchConnectionClient(
+        2, CXL_COMPONENT_TYPE.T1, host="127.0.0.1", port=switch_port
+    )
+    type1_device = CxlType1Device(
+        CxlType1DeviceConfig(
+            device_name="Type1",
+            transport_connection=type1_client.get_cxl_connection(),
+            device_id=1,
+        )
+    )
+    irq_manager = IrqManager(
+        device_name="Host", addr="127.0.0.1", port=irq_port, server=True, device_id=0
+    )
+    cxl_memory_hub = CxlMemoryHub(
+        CxlMemoryHubConfig(
+            host_name="Host",
+            root_bus=0,
+            root_port_switch_type=ROOT_PORT_SWITCH_TYPE.PASS_THROUGH,
+            root_ports=[RootPortClientConfig(0, "127.0.0.1", switch_port)],
+            sys_mem_controller=SystemMemControllerConfig(
+                memory_size=1 * MB, memory_filename=str(tmp_path / "sys.bin")
+            ),
+            irq_handler=irq_manager,
+        )
+    )
+    components = [
+        switch_connection_manager,
+        physical_port_manager,
+        virtual_switch_manager,
+        type2_client,
+        type2_device,
+        type1_client,
+        type1_device,
+        irq_manager,
+    ]
+    tasks = [asyncio.create_task(component.run()) for component in components]
+    await asyncio.gather(*(component.wait_for_ready() for component in components))
+    tasks.append(asyncio.create_task(cxl_memory_hub.run()))
+    await cxl_memory_hub.wait_for_ready()
+
+    root_complex = cxl_memory_hub.get_root_complex()
+    # Cache IDs are vPPB indices, and the Type 1 device below vPPB 1 uses cache ID 1
+    root_complex.set_cache_coh_dev_count(2)
+    pci_bus_driver = PciBusDriver(root_complex)
+    await pci_bus_driver.init(0xFE000000)
+    cxl_bus_driver = CxlBusDriver(pci_bus_driver, root_complex)
+    await cxl_bus_driver.init()
+    cxl_mem_driver = CxlMemDriver(cxl_bus_driver, root_complex)
+    await cxl_mem_driver.init()
+    hpa_base = 0x100000000
+    # The Type 1 device has no memory, so the Type 2 device is the first one found
+    mem_device = cxl_mem_driver.get_devices()[0]
+    assert await cxl_mem_driver.attach_single_mem_device(mem_device, hpa_base, 256 * MB)
+    cxl_memory_hub.add_mem_range(hpa_base, 256 * MB, MEM_ADDR_TYPE.CXL_UNCACHED)
+    cxl_memory_hub.add_mem_range(0, 1 * MB, MEM_ADDR_TYPE.DRAM)
+
+    # One CXL.mem write and read from the host, and one CXL.cache read from the device
+    await cxl_memory_hub.store(hpa_base, 64, 0xC0DE)
+    assert await cxl_memory_hub.load(hpa_base, 64) == 0xC0DE
+    await cxl_memory_hub.store(0x1000, 64, 0xCAFE)
+    assert await type1_device.cxl_cache_readline(0x1000) == 0xCAFE
+
+    counters = metrics.get_snapshot()["counters"]
+    expected = {
+        "cache_store_misses{Host:CacheController}": 1,
+        "cache_snoops_sent{Host:CacheController}": 1,
+        "cache_snoops_received{Host:CacheController}": 1,
+        "cache_load_misses{Type1:CacheController}": 1,
+        "dcoh_m2s_packets{Type2:CxlMemDcoh,m2s_req}": 1,
+        "dcoh_m2s_packets{Type2:CxlMemDcoh,m2s_rwd}": 1,
+        "dcoh_d2h_requests{Type1:CxlCacheDcoh}": 1,
+        "dcoh_h2d_packets{Type1:CxlCacheDcoh,h2d_rsp}": 1,
+        "dcoh_h2d_packets{Type1:CxlCacheDcoh,h2d_data}": 1,
+        "routed_packets{CxlMemRouter:VCS0,host_to_target}": 2,
+        "routed_packets{CxlMemRouter:VCS0,target_to_host}": 2,
+        "routed_packets{CxlCacheRouter:VCS0,host_to_target}": 2,
+        "routed_packets{CxlCacheRouter:VCS0,target_to_host}": 1,
+        # Host root port, switch upstream port and Type 2 device
+        "packets_tx{CxlPacketProcessor:ClientPort0,CXL_MEM}": 2,
+        "packets_rx{CxlPacketProcessor:SwitchPort0,CXL_MEM}": 2,
+        "packets_tx{CxlPacketProcessor:SwitchPort1,CXL_MEM}": 2,
+        "packets_rx{CxlPacketProcessor:ClientPort1,CXL_MEM}": 2,
+        "packets_tx{CxlPacketProcessor:ClientPort1,CXL_MEM}": 2,
+        "packets_rx{CxlPacketProcessor:ClientPort0,CXL_MEM}": 2,
+        # Type 1 device, switch and host root port
+        "packets_tx{CxlPacketProcessor:ClientPort2,CXL_CACHE}": 1,
+        "packets_rx{CxlPacketProcessor:ClientPort0,CXL_CACHE}": 1,
+        "packets_tx{CxlPacketProcessor:ClientPort0,CXL_CACHE}": 2,
+        "packets_rx{CxlPacketProcessor:ClientPort2,CXL_CACHE}": 2,
+    }
+    assert {key: counters.get(key) for key in expected} == expected
+    assert counters["dcoh_m2s_packets{Type2:CxlMemDcoh,m2s_birsp}"] == 0
+    assert counters["unroutable_packets{CxlCacheRouter:VCS0}"] == 0
+    assert counters["unroutable_packets{CxlMemRouter:VCS0}"] == 0
+
+    await asyncio.gather(*(component.stop() for component in [*components, cxl_memory_hub]))
+    await asyncio.gather(*tasks, return_exceptions=True)
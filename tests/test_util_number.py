@@ -5,7 +5,18 @@
  See LICENSE for details.
 """
 
-from opencis.util.number import round_up_to_power_of_2
+from opencis.util.number import (
+    round_up_to_power_of_2,
+    payload_to_bytes,
+    payload_to_int,
+    split_bytes,
+)
+from opencis.cxl.transport.transaction import (
+    CxlMemMemWrPacket,
+    CxlMemMemDataPacket,
+    CxlCacheCacheD2HDataPacket,
+    CxlCacheCacheH2DDataPacket,
+)
 
 
 def test_round_up_to_power_of_2():
@@ -20,3 +31,40 @@ def test_round_up_to_power_of_2():
     assert round_up_to_power_of_2(8000) == 8192
     assert round_up_to_power_of_2(12000) == 16384
     assert round_up_to_power_of_2(20000) == 32768
+
+
+def test_payload_conversion():
+    value = 0x0123456789ABCDEF << 448
+    data = payload_to_bytes(value)
+    assert len(data) == 64
+    assert data == value.to_bytes(64, "little")
+    assert payload_to_bytes(data) is data
+    assert payload_to_int(data) == value
+    assert payload_to_int(value) == value
+    assert payload_to_bytes(b"\x01", 4) == b"\x01\x00\x00\x00"
+    assert bytes(payload_to_bytes(b"\x01\x02\x03", 2)) == b"\x01\x02"
+
+
+def test_split_bytes():
+    data = bytes(range(256))
+    chunks = list(split_bytes(data))
+    assert len(chunks) == 4
+    assert b"".join(chunks) == data
+    assert all(isinstance(chunk, memoryview) for chunk in chunks)
+
+
+def test_data_packet_payload_bytes():
+    data = bytes(range(64))
+    for packet in (
+        CxlMemMemWrPacket.create(0x40, data),
+        CxlMemMemDataPacket.create(data),
+        CxlCacheCacheD2HDataPacket.create(0, data),
+        CxlCacheCacheH2DDataPacket.create(0, data),
+    ):
+        assert packet.get_data_bytes() == data
+        assert packet.data == int.from_bytes(data, "little")
+
+    packet = CxlMemMemWrPacket.create(0x40, 0xDEADBEEF)
+    assert packet.get_data_bytes() == (0xDEADBEEF).to_bytes(64, "little")
+    packet.set_data_bytes(b"\xff" * 64)
+    assert packet.data == (1 << 512) - 1
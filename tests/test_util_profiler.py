@@ -0,0 +1,114 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from opencis.apps.cxl_simple_host import CxlHostUtilClient
+from opencis.cxl.component.host_manager_conn import UtilConnServer
+from opencis.util.profiler import SamplingProfiler, profiler, write_profile
+
+BASE_TEST_PORT = 9900
+
+
+def _spin(spinning: list):
+    # No calls in the loop, so every sample of the thread ends in _spin
+    while spinning[0]:
+        pass
+
+
+def test_sampling_profiler_stacks_and_formats(tmp_path):
+    spinning = [True]
+    stop_event = threading.Event()
+    busy = threading.Thread(target=_spin, args=(spinning,), name="switch")
+    idle = threading.Thread(target=stop_event.wait, name="sld-group")
+    busy.start()
+    idle.start()
+    # Let both threads reach their loop and wait
+    time.sleep(0.05)
+    local_profiler = SamplingProfiler(interval=0.002)
+    try:
+        for _ in range(20):
+            local_profiler.sample()
+    finally:
+        spinning[0] = False
+        stop_event.set()
+        busy.join()
+        idle.join()
+
+    samples = local_profiler.get_thread_samples()
+    assert samples["switch"] == (20, 0)
+    assert samples["sld-group"] == (0, 20)
+    assert "MainThread" not in samples
+    top_function, self_samples, total_samples = local_profiler.get_top_functions(1, "switch")[0]
+    assert top_function.startswith("_spin (tests/test_util_profiler.py:")
+    assert self_samples == total_samples == 20
+
+    collapsed = local_profiler.get_collapsed()
+    (line,) = [line for line in collapsed.splitlines() if line.startswith("switch;")]
+    stack, count = line.rsplit(" ", 1)
+    assert stack.endswith(top_function)
+    assert int(count) == 20
+
+    speedscope = json.loads(json.dumps(local_profiler.get_profile("speedscope")))
+    (profile,) = [profile for profile in speedscope["profiles"] if profile["name"] == "switch"]
+    assert profile["type"] == "sampled"
+    assert profile["endValue"] == pytest.approx(20 * 0.002)
+    frames = speedscope["shared"]["frames"]
+    assert frames[profile["samples"][0][-1]]["name"] == "_spin"
+    with pytest.raises(Exception):
+        local_profiler.get_profile("pstats")
+
+    local_profiler.save(str(tmp_path / "profile.json"))
+    assert json.loads((tmp_path / "profile.json").read_text()) == speedscope
+    local_profiler.save(str(tmp_path / "profile.collapsed"))
+    assert (tmp_path / "profile.collapsed").read_text() == collapsed
+
+    local_profiler.start()
+    assert local_profiler.running
+    with pytest.raises(Exception):
+        local_profiler.start()
+    local_profiler.stop()
+    assert not local_profiler.running
+    local_profiler.reset()
+    assert local_profiler.get_collapsed() == ""
+
+
+@pytest.mark.asyncio
+async def test_profile_toggle_over_util_server(tmp_path):
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    util_server = UtilConnServer(host="127.0.0.1", port=port)
+    util_task = asyncio.create_task(util_server.run())
+    await util_server.wait_for_ready()
+    client = CxlHostUtilClient("127.0.0.1", port)
+
+    spinning = [True]
+    busy = threading.Thread(target=_spin, args=(spinning,), name="host-group")
+    busy.start()
+    try:
+        assert await client.start_profile(0.001) == 0.001
+        with pytest.raises(Exception):
+            await client.start_profile()
+        await asyncio.sleep(0.1)
+        result = await client.stop_profile("collapsed")
+    finally:
+        spinning[0] = False
+        busy.join()
+    assert not profiler.running
+    assert any(line.startswith("host-group;") for line in result["profile"].splitlines())
+    assert any("host-group" in line for line in result["summary"])
+    write_profile(str(tmp_path / "profile.collapsed"), result["profile"])
+    with pytest.raises(Exception):
+        await client.stop_profile()
+
+    await util_server.stop()
+    await util_task
+    profiler.reset()
@@ -0,0 +1,178 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+import asyncio
+from asyncio import create_task
+import json
+
+import pytest
+
+from opencis.apps.single_logical_device import SingleLogicalDevice
+from opencis.cxl.component.common import CXL_COMPONENT_TYPE
+from opencis.cxl.component.cxl_connection import CxlConnection
+from opencis.cxl.component.cxl_packet_processor import CxlPacketProcessor
+from opencis.cxl.device.root_port_device import CxlRootPortDevice
+from opencis.cxl.transport.transaction import CxlMemMemDataPacket, CxlMemMemRdPacket
+from opencis.util.number_const import MB
+from opencis.util.tracing import Tracer, tracer
+
+BASE_TEST_PORT = 9850
+
+
+@pytest.fixture
+def enabled_tracer():
+    tracer.reset()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.reset()
+
+
+def test_tracer_spans_and_chrome_trace():
+    local_tracer = Tracer()
+    with local_tracer.trace("load", "Hub") as trace_id:
+        assert trace_id is None
+    assert not local_tracer.get_spans()
+
+    local_tracer.enable(sample_rate=0.25)
+    sampled = sum(local_tracer.start_trace() is not None for _ in range(4000))
+    assert 800 < sampled < 1200
+    with pytest.raises(Exception):
+        local_tracer.enable(sample_rate=1.5)
+
+    local_tracer.enable()
+    with local_tracer.trace("load", "Hub") as trace_id:
+        assert local_tracer.get_trace_id() == trace_id
+        with local_tracer.trace("read", "CacheController") as child_id:
+            assert child_id == trace_id
+        local_tracer.bind(("link", 1), trace_id)
+    assert local_tracer.get_trace_id() is None
+    with local_tracer.span("m2s_req", "Dcoh", local_tracer.claim(("link", 1), "Device")):
+        with local_tracer.span("read", "Accessor"):
+            pass
+    assert local_tracer.claim(("link", 1), "Device") is None
+    assert not local_tracer.has_bindings()
+    with local_tracer.span("route", "Router"):
+        pass
+
+    spans = local_tracer.get_spans(trace_id)
+    assert [span.name for span in spans] == ["read", "load", "link", "read", "m2s_req"]
+    assert all(span.start <= span.end for span in spans)
+    assert len(local_tracer.get_spans()) == len(spans)
+
+    chrome_trace = json.loads(json.dumps(local_tracer.get_chrome_trace()))
+    events = [event for event in chrome_trace["traceEvents"] if event["ph"] == "X"]
+    assert {event["cat"] for event in events} == {
+        "Hub",
+        "CacheController",
+        "Device",
+        "Dcoh",
+        "Accessor",
+    }
+    assert all(event["pid"] == trace_id for event in events)
+    assert min(event["ts"] for event in events) == 0
+    names = [event for event in chrome_trace["traceEvents"] if event["ph"] == "M"]
+    assert {
+        "name": "process_name",
+        "ph": "M",
+        "pid": trace_id,
+        "args": {"name": f"trace {trace_id}: load"},
+    } in names
+    assert len({event["tid"] for event in events}) == 5
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("enabled_tracer")
+async def test_cxl_mem_trace_across_packet_processors():
+    host_connection = CxlConnection()
+    device_connection = CxlConnection()
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def handle_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    port = BASE_TEST_PORT + pytest.PORT.TEST_1
+    server = await asyncio.start_server(handle_client, "127.0.0.1", port)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    host_processor = CxlPacketProcessor(
+        reader, writer, host_connection, CXL_COMPONENT_TYPE.R, label="Host"
+    )
+    device_processor = CxlPacketProcessor(
+        *(await accepted), device_connection, CXL_COMPONENT_TYPE.D2, label="Device"
+    )
+    tasks = [create_task(host_processor.run()), create_task(device_processor.run())]
+    await host_processor.wait_for_ready()
+    await device_processor.wait_for_ready()
+
+    # Same tag and address, only one of them traced
+    untraced = CxlMemMemRdPacket.create(0x1000)
+    traced = CxlMemMemRdPacket.create(0x1000)
+    traced.trace_id = tracer.start_trace()
+    await host_connection.cxl_mem_fifo.host_to_target.put(untraced)
+    await host_connection.cxl_mem_fifo.host_to_target.put(traced)
+    received = [await device_connection.cxl_mem_fifo.host_to_target.get() for _ in range(2)]
+    assert received[0].trace_id is None
+    assert received[1].trace_id == traced.trace_id
+
+    response = CxlMemMemDataPacket.create(0xC0DE)
+    response.trace_id = received[1].trace_id
+    await device_connection.cxl_mem_fifo.target_to_host.put(response)
+    response = await host_connection.cxl_mem_fifo.target_to_host.get()
+    assert response.trace_id == traced.trace_id
+    links = [span.component for span in tracer.get_spans(traced.trace_id)]
+    assert links == ["CxlPacketProcessor:Device", "CxlPacketProcessor:Host"]
+
+    await host_processor.stop()
+    await device_processor.stop()
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("enabled_tracer")
+async def test_cxl_mem_read_trace_spans():
+    transport_connection = CxlConnection()
+    root_port_device = CxlRootPortDevice(downstream_connection=transport_connection, label="Port0")
+    device = SingleLogicalDevice(
+        memory_size=256 * MB,
+        memory_file="mem_tracing.bin",
+        serial_number="FFFFFFFFFFFFFFFF",
+        test_mode=True,
+        cxl_connection=transport_connection,
+    )
+    task = create_task(device.run())
+    await device.wait_for_ready()
+
+    await root_port_device.enumerate(0xFE000000)
+    info = (await root_port_device.scan_devices()).devices[0]
+    await root_port_device.enable_hdm_decoder(info)
+    hpa_base = 0x100000000
+    await root_port_device.configure_hdm_decoder_single_device(info, hpa_base)
+
+    await root_port_device.cxl_mem_write(hpa_base, 0xC0DE)
+    assert await root_port_device.cxl_mem_read(hpa_base) == 0xC0DE
+
+    spans = tracer.get_spans()
+    traces = {span.trace_id for span in spans}
+    assert len(traces) == 2
+    read_spans = tracer.get_spans(max(traces))
+    assert [(span.name, span.component.split(":")[0]) for span in read_spans] == [
+        ("read", "FileAccessor"),
+        ("mem_rd", "CxlMemManager"),
+        ("cxl_mem_read", "CxlRootPortDevice"),
+    ]
+    root_span = read_spans[-1]
+    assert all(root_span.start <= span.start <= span.end <= root_span.end for span in read_spans)
+
+    tracer.disable()
+    assert await root_port_device.cxl_mem_read(hpa_base) == 0xC0DE
+    assert len(tracer.get_spans()) == len(spans)
+
+    await device.stop()
+    await task
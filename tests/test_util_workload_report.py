@@ -0,0 +1,18 @@
+"""
+ Copyright (c) 2024, Eeum, Inc.
+
+ This software is licensed under the terms of the Revised BSD License.
+ See LICENSE for details.
+"""
+
+from opencis.util.workload_report import WorkloadReport
+
+
+def test_workload_report():
+    report = WorkloadReport(reads=3, writes=1, elapsed=2.0)
+    report.latencies = [0.5e-6, 3e-6, 3.5e-6, 100e-6]
+    assert report.get_ops_per_sec() == 2.0
+    assert report.get_latency_histogram() == {0: 1, 1: 2, 6: 1}
+    assert report.get_latency_percentile(50) == 3.5e-6
+    assert report.get_latency_percentile(100) == 100e-6
+    assert WorkloadReport().get_latency_percentile(99) == 0